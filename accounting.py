@@ -0,0 +1,247 @@
+"""
+Usage Accounting
+
+Attributes token usage, estimated cost, turn counts and wall time to the guru (or the
+Orchestrator) and the tool that caused them. Sub-agent messages are linked to the guru
+through the parent_tool_use_id of the Task call that started them. The result is a
+machine-readable JSON report next to the markdown transcript and a short console table.
+"""
+
+import json
+import os
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from claude_agent_sdk import AssistantMessage, ResultMessage, ToolResultBlock, ToolUseBlock, UserMessage
+
+from discussion import DiscussionConfig, DiscussionObserver, DiscussionResult
+from orchestrator import get_prompt_prefix_fingerprint
+from pricing import estimate_cost
+from task_turns import TaskTurn
+from transcript import tool_result_text
+
+ORCHESTRATOR = "orchestrator"
+
+
+@dataclass
+class UsageStats:
+    """Accumulated usage for one guru, tool or phase"""
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_creation_tokens: int = 0
+    cost_usd: float = 0.0
+    turns: int = 0
+    calls: int = 0
+    wall_seconds: float = 0.0
+    result_chars: int = 0
+
+    def add_usage(self, usage: Optional[Dict[str, Any]], model: Optional[str] = None) -> None:
+        if not usage:
+            return
+        self.input_tokens += usage.get("input_tokens", 0) or 0
+        self.output_tokens += usage.get("output_tokens", 0) or 0
+        self.cache_read_tokens += usage.get("cache_read_input_tokens", 0) or 0
+        self.cache_creation_tokens += usage.get("cache_creation_input_tokens", 0) or 0
+        self.cost_usd += estimate_cost(usage, model)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens + self.cache_read_tokens + self.cache_creation_tokens
+
+    @property
+    def prompt_tokens(self) -> int:
+        return self.input_tokens + self.cache_read_tokens + self.cache_creation_tokens
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Share of prompt tokens served from the prompt cache."""
+        return self.cache_read_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data["cost_usd"] = round(self.cost_usd, 6)
+        data["wall_seconds"] = round(self.wall_seconds, 3)
+        data["total_tokens"] = self.total_tokens
+        data["cache_hit_rate"] = round(self.cache_hit_rate, 4)
+        return data
+
+
+def usage_report_path(transcript_path: str) -> str:
+    """Returns the JSON report path next to a markdown transcript."""
+    return os.path.splitext(transcript_path)[0] + ".usage.json"
+
+
+class UsageAccountant(DiscussionObserver):
+    """Observer that accounts usage per guru, per tool and per phase."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.gurus: Dict[str, UsageStats] = {}
+        self.tools: Dict[str, UsageStats] = {}
+        self.phases: Dict[str, UsageStats] = {}
+        self.reported_cost_usd: Optional[float] = None
+        self.reported_usage: Optional[Dict[str, Any]] = None
+        self.config: Optional[DiscussionConfig] = None
+        self.result: Optional[DiscussionResult] = None
+        self._task_owner: Dict[str, str] = {}
+        self._pending_tools: Dict[str, Tuple[str, float]] = {}
+        self._seen_message_ids: Set[str] = set()
+        self._owners_with_usage: Set[str] = set()
+
+    def _guru(self, name: str) -> UsageStats:
+        return self.gurus.setdefault(name, UsageStats())
+
+    def _tool(self, name: str) -> UsageStats:
+        return self.tools.setdefault(name, UsageStats())
+
+    def _phase(self, name: str) -> UsageStats:
+        return self.phases.setdefault(name, UsageStats())
+
+    def _owner(self, message: Any) -> str:
+        parent = getattr(message, "parent_tool_use_id", None)
+        return self._task_owner.get(parent, ORCHESTRATOR) if parent else ORCHESTRATOR
+
+    def on_start(self, config: DiscussionConfig) -> None:
+        self.config = config
+
+    def on_opening_message(self, guru_name: str, message: Any) -> None:
+        if isinstance(message, AssistantMessage):
+            self._account_assistant(guru_name, message, phase="opening")
+        elif isinstance(message, ResultMessage):
+            stats = self._guru(guru_name)
+            stats.calls += 1
+            stats.wall_seconds += (message.duration_ms or 0) / 1000
+            self._phase("opening").wall_seconds = max(
+                self._phase("opening").wall_seconds, (message.duration_ms or 0) / 1000
+            )
+            if guru_name not in self._owners_with_usage:
+                stats.add_usage(message.usage)
+                self._phase("opening").add_usage(message.usage)
+            if message.total_cost_usd is not None:
+                self.reported_cost_usd = (self.reported_cost_usd or 0.0) + message.total_cost_usd
+
+    def on_task_call(self, turn: TaskTurn) -> None:
+        self._task_owner[turn.tool_use_id] = turn.guru
+        self._guru(turn.guru).calls += 1
+
+    def on_message(self, message: Any) -> None:
+        if isinstance(message, AssistantMessage):
+            owner = self._owner(message)
+            self._account_assistant(owner, message, phase="discussion")
+            for block in message.content:
+                if isinstance(block, ToolUseBlock):
+                    self._tool(block.name).calls += 1
+                    self._pending_tools[block.id] = (block.name, self.clock())
+        elif isinstance(message, UserMessage) and isinstance(message.content, list):
+            for block in message.content:
+                if isinstance(block, ToolResultBlock) and block.tool_use_id in self._pending_tools:
+                    self._complete_tool(block, getattr(message, "tool_use_result", None))
+        elif isinstance(message, ResultMessage):
+            if message.total_cost_usd is not None:
+                self.reported_cost_usd = (self.reported_cost_usd or 0.0) + message.total_cost_usd
+            self.reported_usage = message.usage
+            # Older SDKs do not attach usage to every AssistantMessage; fall back to the session total
+            if ORCHESTRATOR not in self._owners_with_usage and message.usage:
+                self._guru(ORCHESTRATOR).add_usage(message.usage)
+                self._phase("discussion").add_usage(message.usage)
+
+    def _account_assistant(self, owner: str, message: AssistantMessage, phase: str) -> None:
+        stats = self._guru(owner)
+        message_id = getattr(message, "message_id", None)
+        # One API turn can be streamed as several AssistantMessages sharing an id and usage
+        if message_id and message_id in self._seen_message_ids:
+            return
+        if message_id:
+            self._seen_message_ids.add(message_id)
+        stats.turns += 1
+        self._phase(phase).turns += 1
+        usage = getattr(message, "usage", None)
+        if usage:
+            self._owners_with_usage.add(owner)
+            stats.add_usage(usage, message.model)
+            self._phase(phase).add_usage(usage, message.model)
+            parent = getattr(message, "parent_tool_use_id", None)
+            if parent and parent in self._task_owner:
+                self._tool("Task").add_usage(usage, message.model)
+
+    def _complete_tool(self, block: ToolResultBlock, tool_use_result: Any) -> None:
+        name, started = self._pending_tools.pop(block.tool_use_id)
+        elapsed = self.clock() - started
+        tool_stats = self._tool(name)
+        tool_stats.wall_seconds += elapsed
+        tool_stats.result_chars += len(tool_result_text(block.content))
+        if name == "Task":
+            guru = self._task_owner.get(block.tool_use_id, "unknown")
+            guru_stats = self._guru(guru)
+            guru_stats.wall_seconds += elapsed
+            # Without per-message usage, use the totals the Task tool reports for its sub-agent
+            if guru not in self._owners_with_usage and isinstance(tool_use_result, dict):
+                usage = tool_use_result.get("usage")
+                guru_stats.add_usage(usage)
+                tool_stats.add_usage(usage)
+                self._phase("discussion").add_usage(usage)
+
+    def on_finish(self, result: DiscussionResult) -> None:
+        self.result = result
+        self._phase("total").wall_seconds = result.duration_seconds
+
+    def prompt_cache(self) -> UsageStats:
+        """Returns the prompt-token totals over every participant."""
+        totals = UsageStats()
+        for stats in self.gurus.values():
+            totals.input_tokens += stats.input_tokens
+            totals.cache_read_tokens += stats.cache_read_tokens
+            totals.cache_creation_tokens += stats.cache_creation_tokens
+        return totals
+
+    def report(self) -> Dict:
+        """Returns the machine-readable usage report."""
+        estimated = sum(stats.cost_usd for stats in self.gurus.values())
+        cache = self.prompt_cache()
+        return {
+            "topic": self.config.topic if self.config else None,
+            "guru_names": list(self.config.guru_names) if self.config else [],
+            "status": self.result.status if self.result else None,
+            "duration_seconds": self.result.duration_seconds if self.result else None,
+            "estimated_cost_usd": round(estimated, 6),
+            "reported_cost_usd": self.reported_cost_usd,
+            "reported_usage": self.reported_usage,
+            "prompt_cache": {
+                "prefix_fingerprint": get_prompt_prefix_fingerprint(),
+                "hit_rate": round(cache.cache_hit_rate, 4),
+                "cache_read_tokens": cache.cache_read_tokens,
+                "cache_creation_tokens": cache.cache_creation_tokens,
+                "uncached_input_tokens": cache.input_tokens,
+            },
+            "gurus": {name: stats.to_dict() for name, stats in self.gurus.items()},
+            "tools": {name: stats.to_dict() for name, stats in self.tools.items()},
+            "phases": {name: stats.to_dict() for name, stats in self.phases.items()},
+        }
+
+    def write_report(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+
+    def format_table(self) -> str:
+        """Returns the short end-of-run console table."""
+        header = (
+            f"{'participant':<22}{'calls':>6}{'turns':>6}{'in tok':>10}{'out tok':>10}"
+            f"{'cache %':>9}{'cost $':>10}{'wall s':>9}"
+        )
+        lines = [header, "-" * len(header)]
+        for name, stats in sorted(self.gurus.items(), key=lambda item: -item[1].total_tokens):
+            lines.append(
+                f"{name[:21]:<22}{stats.calls:>6}{stats.turns:>6}{stats.input_tokens:>10}"
+                f"{stats.output_tokens:>10}{stats.cache_hit_rate:>9.0%}{stats.cost_usd:>10.4f}{stats.wall_seconds:>9.1f}"
+            )
+        cache = self.prompt_cache()
+        if cache.prompt_tokens:
+            lines.append(
+                f"Prompt cache hit rate: {cache.cache_hit_rate:.1%} "
+                f"({cache.cache_read_tokens} of {cache.prompt_tokens} prompt tokens read from cache)"
+            )
+        if self.reported_cost_usd is not None:
+            lines.append(f"Reported session cost: ${self.reported_cost_usd:.4f}")
+        return "\n".join(lines)
@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+"""
+Discussion Archive
+
+Stores every finished discussion in one SQLite database instead of leaving it only as a
+loose discussion_result_<timestamp>.md file: topic, panel, each turn (opening analyses,
+structured picks, guru answers and the Orchestrator's own text), every tool call and the
+run's metrics. Turns are indexed with FTS5, so "everything Graham said about NVDA" is a
+single indexed query.
+
+A discussion of the same topic with the same panel and the same output-shaping settings
+(hybrid picks, guru tools, budget, convergence and model routing) that finished within a
+freshness window can be offered for reuse instead of being run (and paid for) again.
+
+Usage: uv run archive.py search NVDA --speaker "Benjamin Graham"
+       uv run archive.py list
+       uv run archive.py show <id>
+       uv run archive.py import discussion_result_*.md     # backfill old transcripts
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import time
+import uuid
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from claude_agent_sdk import AssistantMessage, ResultMessage, TextBlock, ToolResultBlock, ToolUseBlock, UserMessage
+
+from discussion import DiscussionConfig, DiscussionObserver, DiscussionResult, parse_guru_names
+from pricing import usage_tokens
+from search_cache import normalize_query
+from task_turns import TaskTurn
+
+DEFAULT_ARCHIVE_PATH = os.path.join(".guru_cache", "archive.sqlite3")
+DEFAULT_REUSE_WINDOW = 24 * 60 * 60
+DEFAULT_SEARCH_LIMIT = 20
+
+ORCHESTRATOR = "orchestrator"
+
+# Turn kinds
+OPENING = "opening"
+PICKS = "picks"
+GURU = "guru"
+MODERATOR = "moderator"
+IMPORTED = "imported"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS discussions (
+    id TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    topic_key TEXT NOT NULL,
+    panel_key TEXT NOT NULL,
+    settings_key TEXT NOT NULL DEFAULT '',
+    guru_names TEXT NOT NULL,
+    status TEXT NOT NULL,
+    output TEXT,
+    started_at TEXT,
+    finished_at REAL NOT NULL,
+    duration_seconds REAL,
+    message_count INTEGER,
+    cost_usd REAL,
+    tokens INTEGER,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS discussions_reuse ON discussions (topic_key, panel_key, finished_at);
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY,
+    discussion_id TEXT NOT NULL REFERENCES discussions (id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    speaker TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    prompt TEXT,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS turns_discussion ON turns (discussion_id, seq);
+CREATE TABLE IF NOT EXISTS tool_calls (
+    id INTEGER PRIMARY KEY,
+    discussion_id TEXT NOT NULL REFERENCES discussions (id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    speaker TEXT NOT NULL,
+    name TEXT NOT NULL,
+    input TEXT,
+    is_error INTEGER
+);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5 (
+    speaker, content, content='turns', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+
+def topic_key(topic: str) -> str:
+    """Topics that differ only in case, punctuation or spacing share a key; word order matters."""
+    return normalize_query(topic)
+
+
+def panel_key(guru_names: Iterable[str]) -> str:
+    return ",".join(sorted(set(guru_names)))
+
+
+def settings_key(config: DiscussionConfig) -> str:
+    """The settings that shape a discussion's answer; a run is only reused under the same ones."""
+    settings = {
+        "hybrid": config.hybrid,
+        "guru_tools": config.guru_tools or config.hybrid,
+        "budget": asdict(config.budget) if config.budget is not None else None,
+        "convergence": asdict(config.convergence) if config.convergence is not None else None,
+        "routing": asdict(config.routing) if config.routing is not None else None,
+    }
+    return json.dumps(settings, sort_keys=True, separators=(",", ":"))
+
+
+def fts_query(text: str) -> str:
+    """Quotes every word so user input (tickers like BRK.B, '-', ':') is never FTS syntax."""
+    words = re.findall(r"[\w.$-]+", text)
+    return " ".join('"' + word.replace('"', '""') + '"' for word in words)
+
+
+@dataclass
+class ArchivedTurn:
+    speaker: str
+    kind: str
+    content: str
+    prompt: str = ""
+
+
+@dataclass
+class ArchivedToolCall:
+    speaker: str
+    name: str
+    input: Dict[str, Any]
+    is_error: bool = False
+
+
+@dataclass
+class ArchivedDiscussion:
+    """One discussion as stored in the archive"""
+    id: str
+    topic: str
+    guru_names: List[str]
+    status: str = "completed"
+    output: str = ""
+    started_at: str = ""
+    finished_at: float = 0.0
+    duration_seconds: float = 0.0
+    message_count: int = 0
+    cost_usd: Optional[float] = None
+    tokens: int = 0
+    result: Optional[Dict] = None
+    # settings_key() of the run; empty for imported transcripts, which are never reused
+    settings: str = ""
+    turns: List[ArchivedTurn] = field(default_factory=list)
+    tool_calls: List[ArchivedToolCall] = field(default_factory=list)
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.finished_at
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+@dataclass
+class SearchHit:
+    """One matching turn"""
+    discussion_id: str
+    topic: str
+    started_at: str
+    speaker: str
+    kind: str
+    snippet: str
+
+
+class DiscussionArchive:
+    """SQLite-backed archive of finished discussions with full-text search over turns."""
+
+    def __init__(self, path: str = DEFAULT_ARCHIVE_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.executescript(SCHEMA)
+        columns = {row["name"] for row in self._db.execute("PRAGMA table_info(discussions)")}
+        if "settings_key" not in columns:
+            # Archives from before settings were recorded; their runs are no longer offered for reuse
+            self._db.execute("ALTER TABLE discussions ADD COLUMN settings_key TEXT NOT NULL DEFAULT ''")
+        try:
+            self._db.executescript(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: search falls back to LIKE
+            self.fts = False
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "DiscussionArchive":
+        return self
+
+    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> bool:
+        self.close()
+        return False
+
+    def store(self, discussion: ArchivedDiscussion) -> None:
+        """Writes a discussion, its turns and tool calls in one transaction (replacing an earlier copy)."""
+        with self._db:
+            self._delete(discussion.id)
+            self._db.execute(
+                "INSERT INTO discussions (id, topic, topic_key, panel_key, settings_key, guru_names, status, output, "
+                "started_at, finished_at, duration_seconds, message_count, cost_usd, tokens, result) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    discussion.id, discussion.topic, topic_key(discussion.topic), panel_key(discussion.guru_names),
+                    discussion.settings, json.dumps(discussion.guru_names), discussion.status, discussion.output, discussion.started_at,
+                    discussion.finished_at or time.time(), discussion.duration_seconds, discussion.message_count,
+                    discussion.cost_usd, discussion.tokens,
+                    json.dumps(discussion.result, ensure_ascii=False) if discussion.result else None,
+                ),
+            )
+            for seq, turn in enumerate(discussion.turns):
+                cursor = self._db.execute(
+                    "INSERT INTO turns (discussion_id, seq, speaker, kind, prompt, content) VALUES (?, ?, ?, ?, ?, ?)",
+                    (discussion.id, seq, turn.speaker, turn.kind, turn.prompt, turn.content),
+                )
+                if self.fts:
+                    self._db.execute(
+                        "INSERT INTO turns_fts (rowid, speaker, content) VALUES (?, ?, ?)",
+                        (cursor.lastrowid, turn.speaker, turn.content),
+                    )
+            self._db.executemany(
+                "INSERT INTO tool_calls (discussion_id, seq, speaker, name, input, is_error) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (discussion.id, seq, call.speaker, call.name, json.dumps(call.input, ensure_ascii=False), call.is_error)
+                    for seq, call in enumerate(discussion.tool_calls)
+                ],
+            )
+
+    def _delete(self, discussion_id: str) -> None:
+        if self.fts:
+            # External-content FTS rows are removed with the special 'delete' command
+            self._db.execute(
+                "INSERT INTO turns_fts (turns_fts, rowid, speaker, content) "
+                "SELECT 'delete', id, speaker, content FROM turns WHERE discussion_id = ?",
+                (discussion_id,),
+            )
+        self._db.execute("DELETE FROM discussions WHERE id = ?", (discussion_id,))
+
+    def delete(self, discussion_id: str) -> None:
+        with self._db:
+            self._delete(discussion_id)
+
+    def _discussion(self, row: sqlite3.Row, full: bool) -> ArchivedDiscussion:
+        discussion = ArchivedDiscussion(
+            id=row["id"], topic=row["topic"], guru_names=json.loads(row["guru_names"]), status=row["status"],
+            output=row["output"] or "", started_at=row["started_at"] or "", finished_at=row["finished_at"],
+            duration_seconds=row["duration_seconds"] or 0.0, message_count=row["message_count"] or 0,
+            cost_usd=row["cost_usd"], tokens=row["tokens"] or 0,
+            result=json.loads(row["result"]) if row["result"] else None, settings=row["settings_key"],
+        )
+        if full:
+            discussion.turns = [
+                ArchivedTurn(turn["speaker"], turn["kind"], turn["content"], turn["prompt"] or "")
+                for turn in self._db.execute(
+                    "SELECT * FROM turns WHERE discussion_id = ? ORDER BY seq", (discussion.id,)
+                )
+            ]
+            discussion.tool_calls = [
+                ArchivedToolCall(call["speaker"], call["name"], json.loads(call["input"] or "{}"), bool(call["is_error"]))
+                for call in self._db.execute(
+                    "SELECT * FROM tool_calls WHERE discussion_id = ? ORDER BY seq", (discussion.id,)
+                )
+            ]
+        return discussion
+
+    def get(self, discussion_id: str) -> ArchivedDiscussion:
+        """Returns a discussion with its turns and tool calls; raises KeyError for unknown ids."""
+        row = self._db.execute("SELECT * FROM discussions WHERE id = ?", (discussion_id,)).fetchone()
+        if row is None:
+            raise KeyError(discussion_id)
+        return self._discussion(row, full=True)
+
+    def recent(self, limit: int = DEFAULT_SEARCH_LIMIT) -> List[ArchivedDiscussion]:
+        """Latest discussions first, without their turns."""
+        rows = self._db.execute("SELECT * FROM discussions ORDER BY finished_at DESC LIMIT ?", (limit,))
+        return [self._discussion(row, full=False) for row in rows]
+
+    def find_reusable(
+        self, config: DiscussionConfig, max_age: float = DEFAULT_REUSE_WINDOW
+    ) -> Optional[ArchivedDiscussion]:
+        """
+        The newest completed discussion of the config's topic and panel, run under the same
+        settings, that finished within max_age seconds.
+        """
+        row = self._db.execute(
+            "SELECT * FROM discussions WHERE topic_key = ? AND panel_key = ? AND settings_key = ? "
+            "AND status = 'completed' AND finished_at >= ? ORDER BY finished_at DESC LIMIT 1",
+            (topic_key(config.topic), panel_key(config.guru_names), settings_key(config), time.time() - max_age),
+        ).fetchone()
+        return self._discussion(row, full=False) if row is not None else None
+
+    def search(
+        self, query: str, speaker: Optional[str] = None, limit: int = DEFAULT_SEARCH_LIMIT
+    ) -> List[SearchHit]:
+        """Turns matching every word of the query, best matches first; optionally only one speaker's."""
+        if self.fts:
+            sql = (
+                "SELECT d.id, d.topic, d.started_at, t.speaker, t.kind, "
+                "snippet(turns_fts, 1, '[', ']', '…', 16) AS snippet "
+                "FROM turns_fts JOIN turns t ON t.id = turns_fts.rowid JOIN discussions d ON d.id = t.discussion_id "
+                "WHERE turns_fts MATCH ?"
+            )
+            params: List[Any] = [fts_query(query)]
+            if not params[0]:
+                return []
+        else:
+            sql = (
+                "SELECT d.id, d.topic, d.started_at, t.speaker, t.kind, substr(t.content, 1, 200) AS snippet "
+                "FROM turns t JOIN discussions d ON d.id = t.discussion_id WHERE 1"
+            )
+            params = []
+            for word in query.split():
+                sql += " AND t.content LIKE ?"
+                params.append(f"%{word}%")
+        if speaker is not None:
+            sql += " AND t.speaker = ?"
+            params.append(speaker)
+        sql += " ORDER BY rank LIMIT ?" if self.fts else " ORDER BY d.finished_at DESC LIMIT ?"
+        params.append(limit)
+        return [SearchHit(*row) for row in self._db.execute(sql, params)]
+
+
+class ArchiveRecorder(DiscussionObserver):
+    """Collects a discussion's turns, tool calls and metrics and archives them when it finishes."""
+
+    def __init__(self, archive: DiscussionArchive, discussion_id: Optional[str] = None):
+        self.archive = archive
+        self.discussion_id = discussion_id
+        self.discussion: Optional[ArchivedDiscussion] = None
+        self._speakers: Dict[str, str] = {}
+        self._calls: Dict[str, ArchivedToolCall] = {}
+        self._notes: List[str] = []
+
+    def on_start(self, config: DiscussionConfig) -> None:
+        self.discussion = ArchivedDiscussion(
+            id=self.discussion_id or f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}",
+            topic=config.topic,
+            guru_names=list(config.guru_names),
+            output=config.output or "",
+            settings=settings_key(config),
+        )
+
+    def on_opening(self, analyses: Dict[str, str]) -> None:
+        for guru, analysis in analyses.items():
+            self.discussion.turns.append(ArchivedTurn(guru, OPENING, analysis))
+
+    def on_structured_picks(self, picks: Dict[str, Optional[Dict]]) -> None:
+        for guru, analysis in picks.items():
+            if analysis is not None:
+                self.discussion.turns.append(ArchivedTurn(guru, PICKS, json.dumps(analysis, ensure_ascii=False)))
+
+    def _flush_notes(self) -> None:
+        if self._notes:
+            self.discussion.turns.append(ArchivedTurn(ORCHESTRATOR, MODERATOR, "".join(self._notes)))
+            self._notes.clear()
+
+    def on_task_call(self, turn: TaskTurn) -> None:
+        self._speakers[turn.tool_use_id] = turn.guru
+
+    def on_task_turn(self, turn: TaskTurn) -> None:
+        if not turn.is_error:
+            self.discussion.turns.append(ArchivedTurn(turn.guru, GURU, turn.result, turn.prompt))
+
+    def on_message(self, message: Any) -> None:
+        if isinstance(message, AssistantMessage):
+            speaker = self._speakers.get(message.parent_tool_use_id or "", ORCHESTRATOR)
+            for block in message.content:
+                if isinstance(block, TextBlock) and message.parent_tool_use_id is None:
+                    self._notes.append(block.text)
+                elif isinstance(block, ToolUseBlock):
+                    self._flush_notes()
+                    call = ArchivedToolCall(speaker, block.name, dict(block.input))
+                    self.discussion.tool_calls.append(call)
+                    self._calls[block.id] = call
+        elif isinstance(message, UserMessage) and isinstance(message.content, list):
+            for block in message.content:
+                if not isinstance(block, ToolResultBlock):
+                    continue
+                call = self._calls.pop(block.tool_use_id, None)
+                if call is not None and block.is_error:
+                    call.is_error = True
+        elif isinstance(message, ResultMessage):
+            self.discussion.cost_usd = message.total_cost_usd
+            self.discussion.tokens = usage_tokens(message.usage)
+
+    def on_finish(self, result: DiscussionResult) -> None:
+        if self.discussion is None:
+            return
+        self._flush_notes()
+        self.discussion.status = result.status
+        self.discussion.output = result.output
+        self.discussion.started_at = result.started_at
+        self.discussion.finished_at = time.time()
+        self.discussion.duration_seconds = result.duration_seconds
+        self.discussion.message_count = result.message_count
+        self.discussion.result = result.to_dict()
+        self.archive.store(self.discussion)
+
+
+TRANSCRIPT_TITLE = re.compile(r"^# Investment Guru Discussion: (.+)$", re.MULTILINE)
+TRANSCRIPT_DATE = re.compile(r"^\*\*Date:\*\* (.+)$", re.MULTILINE)
+TRANSCRIPT_PANEL = re.compile(r"^\*\*Participants:\*\* (.+)$", re.MULTILINE)
+TRANSCRIPT_HANDOFF = re.compile(r"^> 🎤 \*\*\[Social\] Passing the microphone to:\*\* `([^`]+)`.*$", re.MULTILINE)
+
+
+def parse_transcript(path: str) -> ArchivedDiscussion:
+    """
+    Reads a markdown transcript into an archive record. The file does not say where a guru's
+    answer ends, so the text after each microphone hand-off is attributed to that guru
+    (kind "imported"); text before the first hand-off is the Orchestrator's.
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    title = TRANSCRIPT_TITLE.search(text)
+    if title is None:
+        raise ValueError(f"{path} is not a discussion transcript")
+    date = TRANSCRIPT_DATE.search(text)
+    panel = TRANSCRIPT_PANEL.search(text)
+    body = text[text.find("---", title.end()) + 3:]
+
+    discussion = ArchivedDiscussion(
+        id=f"import_{os.path.splitext(os.path.basename(path))[0]}",
+        topic=title.group(1).strip(),
+        guru_names=[name.strip() for name in panel.group(1).split(",")] if panel else [],
+        status="interrupted" if "Discussion interrupted" in text[-500:] else "completed",
+        output=path,
+        started_at=date.group(1).strip() if date else "",
+        finished_at=os.path.getmtime(path),
+    )
+    speaker, start = ORCHESTRATOR, 0
+    for handoff in TRANSCRIPT_HANDOFF.finditer(body):
+        content = body[start:handoff.start()].strip()
+        if content:
+            discussion.turns.append(ArchivedTurn(speaker, IMPORTED if speaker != ORCHESTRATOR else MODERATOR, content))
+        discussion.tool_calls.append(ArchivedToolCall(ORCHESTRATOR, "Task", {"subagent_type": handoff.group(1)}))
+        speaker, start = handoff.group(1), handoff.end()
+    content = body[start:].strip()
+    if content:
+        discussion.turns.append(ArchivedTurn(speaker, IMPORTED if speaker != ORCHESTRATOR else MODERATOR, content))
+    return discussion
+
+
+def describe_age(seconds: float) -> str:
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min ago"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f} h ago"
+    return f"{seconds / 86400:.1f} days ago"
+
+
+def main() -> None:
+    """Command line entry point for the discussion archive"""
+    parser = argparse.ArgumentParser(description="Search and manage the discussion archive")
+    parser.add_argument("--archive", default=DEFAULT_ARCHIVE_PATH, help="Archive database path")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    search_parser = subparsers.add_parser("search", help="Full-text search over every archived turn")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--speaker", help="Only this guru's turns (key, name or alias) or 'orchestrator'")
+    search_parser.add_argument("--limit", type=int, default=DEFAULT_SEARCH_LIMIT)
+    list_parser = subparsers.add_parser("list", help="Latest archived discussions")
+    list_parser.add_argument("--limit", type=int, default=DEFAULT_SEARCH_LIMIT)
+    show_parser = subparsers.add_parser("show", help="Print one archived discussion")
+    show_parser.add_argument("id")
+    import_parser = subparsers.add_parser("import", help="Archive existing markdown transcripts")
+    import_parser.add_argument("paths", nargs="+")
+    args = parser.parse_args()
+
+    with DiscussionArchive(args.archive) as archive:
+        if args.command == "search":
+            speaker = None
+            if args.speaker:
+                speaker = args.speaker if args.speaker == ORCHESTRATOR else parse_guru_names(args.speaker)[0]
+            start = time.perf_counter()
+            hits = archive.search(args.query, speaker=speaker, limit=args.limit)
+            for hit in hits:
+                print(f"[{hit.discussion_id}] {hit.topic}\n  {hit.speaker} ({hit.kind}): {hit.snippet}")
+            print(f"\n🔎 {len(hits)} matches in {(time.perf_counter() - start) * 1000:.1f} ms")
+        elif args.command == "list":
+            for discussion in archive.recent(args.limit):
+                cost = f"${discussion.cost_usd:.2f}" if discussion.cost_usd is not None else "-"
+                print(f"{discussion.id:<32}{discussion.status:<12}{cost:>8}  {describe_age(discussion.age_seconds):<14}"
+                      f"{discussion.topic} ({', '.join(discussion.guru_names)})")
+        elif args.command == "show":
+            try:
+                discussion = archive.get(args.id)
+            except KeyError:
+                print(f"❌ No archived discussion '{args.id}'")
+                raise SystemExit(1)
+            print(f"# {discussion.topic}\n{', '.join(discussion.guru_names)} · {discussion.status} · {discussion.output}\n")
+            for turn in discussion.turns:
+                print(f"## {turn.speaker} ({turn.kind})\n\n{turn.content}\n")
+        elif args.command == "import":
+            imported = 0
+            for path in args.paths:
+                try:
+                    archive.store(parse_transcript(path))
+                    imported += 1
+                except (OSError, ValueError) as e:
+                    print(f"⚠️  Skipped {path}: {e}")
+            print(f"📚 Imported {imported} of {len(args.paths)} transcripts into {args.archive}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Batch Discussion Runner
+
+Runs many discussions in one process from a JSONL topic queue, through a bounded
+asyncio worker pool with per-worker rate limiting. Each topic gets its own markdown
+transcript, and a manifest.json summarizes the whole batch.
+
+Each line of the queue is a JSON object:
+    {"id": "ai-infra", "topic": "AI 인프라 투자", "gurus": "warren_buffett,cathie_wood"}
+Only "topic" is required ("title" is accepted as a fallback, "request_id" as the id);
+"gurus" may be a comma-separated string or a list and defaults to the standard panel.
+An optional "budget" object ({"max_tokens": ..., "max_cost_usd": ..., "max_seconds": ...})
+limits that discussion, "convergence" (true or {"threshold": ..., "min_rounds": ...})
+ends its cross-examination once the panel agrees, and "routing" (true or
+{"phases": ..., "gurus": ..., "tools": ..., "tiers": ...}) routes its sessions to model tiers,
+and "resilience" (true or {"turn_timeout": ..., "retries": ...}) keeps failing gurus from
+failing the discussion.
+
+Usage: uv run batch_runner.py topics.jsonl --output-dir batch_results --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from claude_agent_sdk import ClaudeSDKClient
+
+from accounting import UsageAccountant, usage_report_path
+from budget import DiscussionBudget
+from client_pool import ClientPool
+from convergence import ConvergencePolicy
+from discussion import (
+    DEFAULT_GURUS, DiscussionConfig, DiscussionResult, create_discussion_options, parse_guru_names, run_discussion
+)
+from investment_gurus import is_predefined_guru
+from orchestrator import ClientFactory
+from persona_cache import DEFAULT_PERSONA_CACHE_DIR, PersonaCache, warmup
+from resilience import ResiliencePolicy
+from routing import RoutingPolicy
+
+DEFAULT_WORKERS = 4
+DEFAULT_OUTPUT_DIR = "batch_results"
+MANIFEST_FILENAME = "manifest.json"
+
+
+@dataclass
+class BatchItem:
+    """One queued discussion"""
+    id: str
+    topic: str
+    guru_names: List[str] = field(default_factory=lambda: list(DEFAULT_GURUS))
+    parallel_opening: bool = False
+    hybrid: bool = False
+    budget: Optional[DiscussionBudget] = None
+    convergence: Optional[ConvergencePolicy] = None
+    routing: Optional[RoutingPolicy] = None
+    resilience: Optional[ResiliencePolicy] = None
+
+
+def _safe_id(value: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", value).strip("_") or "topic"
+
+
+def parse_batch_line(line: str, line_number: int) -> BatchItem:
+    """Parses one JSONL queue entry."""
+    try:
+        entry = json.loads(line)
+    except ValueError as e:
+        raise ValueError(f"line {line_number}: invalid JSON ({e})") from e
+    if not isinstance(entry, dict):
+        raise ValueError(f"line {line_number}: expected a JSON object")
+
+    topic = entry.get("topic") or entry.get("title")
+    if not topic:
+        raise ValueError(f"line {line_number}: missing 'topic'")
+
+    item_id = entry.get("id") or entry.get("request_id") or f"topic-{line_number:04d}"
+    gurus = entry.get("gurus")
+    try:
+        budget = DiscussionBudget(**entry["budget"]) if entry.get("budget") else None
+    except TypeError as e:
+        raise ValueError(f"line {line_number}: invalid 'budget' ({e})") from e
+    convergence = entry.get("convergence")
+    try:
+        convergence = ConvergencePolicy(**(convergence if isinstance(convergence, dict) else {})) if convergence else None
+    except TypeError as e:
+        raise ValueError(f"line {line_number}: invalid 'convergence' ({e})") from e
+    routing = entry.get("routing")
+    try:
+        routing = RoutingPolicy.from_dict(routing if isinstance(routing, dict) else {}) if routing else None
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"line {line_number}: invalid 'routing' ({e})") from e
+    resilience = entry.get("resilience")
+    try:
+        resilience = ResiliencePolicy(**(resilience if isinstance(resilience, dict) else {})) if resilience else None
+    except TypeError as e:
+        raise ValueError(f"line {line_number}: invalid 'resilience' ({e})") from e
+    return BatchItem(
+        id=_safe_id(str(item_id)),
+        topic=topic,
+        guru_names=parse_guru_names(gurus) if gurus else list(DEFAULT_GURUS),
+        parallel_opening=bool(entry.get("parallel_opening", False)),
+        hybrid=bool(entry.get("hybrid", False)),
+        budget=budget,
+        convergence=convergence,
+        routing=routing,
+        resilience=resilience,
+    )
+
+
+def load_batch(path: str) -> List[BatchItem]:
+    """Loads the topic queue, skipping blank lines; duplicate ids get a numeric suffix."""
+    items: List[BatchItem] = []
+    seen: Dict[str, int] = {}
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            item = parse_batch_line(line, line_number)
+            if item.id in seen:
+                seen[item.id] += 1
+                item.id = f"{item.id}-{seen[item.id]}"
+            else:
+                seen[item.id] = 1
+            items.append(item)
+    return items
+
+
+def item_config(item: BatchItem, output_dir: str) -> DiscussionConfig:
+    """Returns the discussion config of one queued topic."""
+    return DiscussionConfig(
+        topic=item.topic,
+        guru_names=item.guru_names,
+        output=os.path.join(output_dir, f"{item.id}.md"),
+        parallel_opening=item.parallel_opening,
+        hybrid=item.hybrid,
+        budget=item.budget,
+        convergence=item.convergence,
+        routing=item.routing,
+        resilience=item.resilience,
+    )
+
+
+class RateLimiter:
+    """Enforces a minimum interval between successive starts (one limiter per worker)."""
+
+    def __init__(self, min_interval: float, clock: Callable[[], float] = time.monotonic):
+        self.min_interval = min_interval
+        self.clock = clock
+        self._last_start: Optional[float] = None
+
+    async def wait(self) -> None:
+        if self._last_start is not None and self.min_interval > 0:
+            delay = self._last_start + self.min_interval - self.clock()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        self._last_start = self.clock()
+
+
+async def run_batch(
+    items: List[BatchItem],
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    workers: int = DEFAULT_WORKERS,
+    min_interval: float = 0.0,
+    client_factory: ClientFactory = ClaudeSDKClient,
+    persona_cache: Optional[PersonaCache] = None,
+    warm_pool: bool = False,
+) -> Dict:
+    """
+    Runs every queued discussion through a pool of `workers` concurrent workers.
+    A failed topic is recorded in the manifest and does not stop the batch.
+    With warm_pool, Orchestrator clients are started ahead of time for every distinct
+    configuration in the queue and replaced as they are used (see client_pool.py).
+    Returns the manifest, which is also written to <output_dir>/manifest.json.
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    os.makedirs(output_dir, exist_ok=True)
+
+    pool = None
+    if warm_pool:
+        pool = ClientPool(client_factory, spares=min(workers, len(items)))
+        for item in items:
+            pool.warm(create_discussion_options(item_config(item, output_dir), persona_cache)[0])
+        client_factory = pool
+
+    queue: "asyncio.Queue[BatchItem]" = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+    results: Dict[str, Dict] = {}
+    started = time.monotonic()
+
+    async def worker(worker_id: int) -> None:
+        limiter = RateLimiter(min_interval)
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await limiter.wait()
+            config = item_config(item, output_dir)
+            accountant = UsageAccountant()
+            try:
+                result = await run_discussion(
+                    config, observers=[accountant], client_factory=client_factory, persona_cache=persona_cache
+                )
+            except Exception as e:
+                result = accountant.result or DiscussionResult(
+                    topic=item.topic, guru_names=item.guru_names, output=config.output,
+                    status="failed", error=str(e),
+                )
+            report_path = usage_report_path(config.output)
+            accountant.write_report(report_path)
+            results[item.id] = {
+                "id": item.id, "worker": worker_id, **result.to_dict(),
+                "usage_report": report_path,
+                "estimated_cost_usd": accountant.report()["estimated_cost_usd"],
+                "prompt_cache_hit_rate": round(accountant.prompt_cache().cache_hit_rate, 4),
+            }
+
+    try:
+        await asyncio.gather(*(worker(i) for i in range(min(workers, len(items)))))
+    finally:
+        if pool is not None:
+            await pool.close()
+
+    entries = [results[item.id] for item in items]
+    manifest = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "workers": workers,
+        "min_interval": min_interval,
+        "total": len(entries),
+        "completed": sum(1 for entry in entries if entry["status"] == "completed"),
+        "failed": sum(1 for entry in entries if entry["status"] != "completed"),
+        "duration_seconds": round(time.monotonic() - started, 3),
+        "results": entries,
+    }
+    if pool is not None:
+        manifest["client_pool"] = pool.stats.to_dict()
+    with open(os.path.join(output_dir, MANIFEST_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+async def main() -> None:
+    """Command line entry point for batch runs"""
+    parser = argparse.ArgumentParser(description="Run a batch of Investment Guru Discussions")
+    parser.add_argument("queue", help="JSONL file with one topic per line")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help="Directory for transcripts and manifest")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Number of concurrent discussions")
+    parser.add_argument(
+        "--min-interval", type=float, default=0.0,
+        help="Minimum seconds between discussion starts on the same worker"
+    )
+    parser.add_argument("--persona-cache-dir", default=DEFAULT_PERSONA_CACHE_DIR)
+    parser.add_argument(
+        "--warm-pool", action="store_true",
+        help="Start Orchestrator sessions ahead of time so each topic skips session startup"
+    )
+    args = parser.parse_args()
+
+    items = load_batch(args.queue)
+    print(f"📋 Loaded {len(items)} topics from {args.queue}")
+
+    # Research every dynamic guru in the queue once, up front
+    persona_cache = PersonaCache(args.persona_cache_dir)
+    dynamic_gurus = sorted({name for item in items for name in item.guru_names if not is_predefined_guru(name)})
+    if dynamic_gurus:
+        await warmup(dynamic_gurus, persona_cache)
+
+    manifest = await run_batch(
+        items, args.output_dir, workers=args.workers, min_interval=args.min_interval, persona_cache=persona_cache,
+        warm_pool=args.warm_pool,
+    )
+    print(f"✅ {manifest['completed']} completed, ❌ {manifest['failed']} failed "
+          f"in {manifest['duration_seconds']:.1f}s")
+    if "client_pool" in manifest:
+        stats = manifest["client_pool"]
+        print(f"🔥 Warm client pool: {stats['hits']} warm starts / {stats['misses']} cold starts")
+    print(f"💾 Manifest saved to: {os.path.join(args.output_dir, MANIFEST_FILENAME)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Offline Orchestration Benchmark
+
+Measures the overhead of our own discussion pipeline (options building, message
+rendering, transcript streaming, accounting and checkpointing) without live
+credentials, by swapping in the scripted FakeClaudeSDKClient.
+
+For every combination of panel size and transcript length it records throughput,
+time to first output, per-message processing cost and peak memory. Results are
+stored as JSON so runs can be compared against a baseline.
+
+With --startup it also times CLI startup (`run.py --help` and `import run` in a fresh
+interpreter) and fails when the median exceeds --max-startup-ms, or when a dry run loads a
+module that only a running discussion needs.
+
+Usage: uv run benchmark.py --panel-sizes 1,5,20 --rounds 1,5,20 --compare benchmark_results/baseline.json
+       uv run benchmark.py --startup --max-startup-ms 400
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from accounting import UsageAccountant
+from checkpoint import CheckpointStore, Checkpointer
+from client_pool import ClientPool
+from discussion import ConsoleRenderer, DiscussionConfig, DiscussionObserver, run_discussion
+from fake_client import FakeClaudeSDKClient, scripted_discussion
+from investment_gurus import AVAILABLE_GURUS
+from orchestrator import ClientFactory, create_agent_options
+
+DEFAULT_PANEL_SIZES = [1, 5, 20]
+DEFAULT_ROUNDS = [1, 5, 20]
+DEFAULT_TEXT_CHARS = 400
+DEFAULT_REPEAT = 3
+DEFAULT_RESULTS_DIR = "benchmark_results"
+DEFAULT_REGRESSION_THRESHOLD = 0.25
+
+DEFAULT_MAX_STARTUP_MS = 500.0
+
+# Metrics where a higher value is a regression
+REGRESSION_METRICS = ["per_message_us", "time_to_first_output_ms", "peak_memory_kb", "options_build_us"]
+
+# Fresh-interpreter commands whose wall time is the CLI startup cost
+STARTUP_COMMANDS = {
+    "run_help_ms": ["run.py", "--help"],
+    "import_run_ms": ["-c", "import run"],
+}
+
+# Modules only a running discussion needs; `run.py --dry-run` must not load them
+RUN_ONLY_MODULES = ["accounting", "recording", "tracing"]
+DRY_RUN_PROBE = (
+    "import asyncio, contextlib, io, json, sys\n"
+    "import run\n"
+    "sys.argv = ['run.py', '--dry-run', '--no-persona-cache']\n"
+    "with contextlib.redirect_stdout(io.StringIO()):\n"
+    "    asyncio.run(run.main())\n"
+    "print(json.dumps(sorted(sys.modules)))\n"
+)
+
+
+def benchmark_panel(size: int) -> List[str]:
+    """Returns a panel of the given size: the predefined gurus first, then synthetic ones."""
+    return [AVAILABLE_GURUS[i] if i < len(AVAILABLE_GURUS) else f"guru_{i}" for i in range(size)]
+
+
+@dataclass
+class BenchmarkCase:
+    """One benchmark configuration"""
+    panel_size: int
+    rounds: int
+    text_chars: int = DEFAULT_TEXT_CHARS
+    latency: float = 0.0
+    connect_latency: float = 0.0
+    hybrid: bool = False
+    # Back-to-back discussions drawing their clients from a warm ClientPool
+    pooled: bool = False
+
+    @property
+    def key(self) -> str:
+        key = f"panel={self.panel_size},rounds={self.rounds},chars={self.text_chars}"
+        if self.hybrid:
+            key += ",hybrid"
+        return key + ",pooled" if self.pooled else key
+
+
+@dataclass
+class BenchmarkResult:
+    """Median measurements for one case"""
+    key: str
+    panel_size: int
+    rounds: int
+    text_chars: int
+    messages: int
+    wall_seconds: float
+    throughput_msgs_per_s: float
+    time_to_first_output_ms: float
+    per_message_us: float
+    peak_memory_kb: float
+    options_build_us: float
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class FirstOutputProbe(DiscussionObserver):
+    """Records when the first substantive output (a message or structured picks) reaches the observers."""
+
+    def __init__(self) -> None:
+        self.first_output_at: Optional[float] = None
+
+    def on_structured_picks(self, picks: Dict[str, Optional[Dict]]) -> None:
+        self.on_message(picks)
+
+    def on_message(self, message: Any) -> None:
+        if self.first_output_at is None:
+            self.first_output_at = time.perf_counter()
+
+
+def measure_options_build(guru_names: List[str], iterations: int = 50) -> float:
+    """Returns the mean microseconds to build the Orchestrator options for a panel."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        create_agent_options(guru_names)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def _client_factory(case: BenchmarkCase, messages: List[Any]) -> ClientFactory:
+    return lambda options: FakeClaudeSDKClient(
+        options, responder=lambda options, prompt: messages,
+        latency=case.latency, connect_latency=case.connect_latency,
+    )
+
+
+async def _run_pipeline(
+    case: BenchmarkCase, messages: List[Any], workdir: str, probe: FirstOutputProbe, client_factory: ClientFactory
+) -> float:
+    guru_names = benchmark_panel(case.panel_size)
+    config = DiscussionConfig(
+        topic="Benchmark topic", guru_names=guru_names,
+        output=os.path.join(workdir, f"{case.key.replace(',', '_').replace('=', '')}.md"),
+        hybrid=case.hybrid,
+    )
+    observers = [ConsoleRenderer(), UsageAccountant(), Checkpointer(CheckpointStore(workdir)), probe]
+    start = time.perf_counter()
+    # The console renderer is part of the measured pipeline, but its output is discarded
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        await run_discussion(config, observers=observers, client_factory=client_factory)
+    return start
+
+
+async def run_case(case: BenchmarkCase, repeat: int = DEFAULT_REPEAT) -> BenchmarkResult:
+    """Runs one case `repeat` times (plus one traced pass for memory) and returns the medians."""
+    guru_names = benchmark_panel(case.panel_size)
+    messages = scripted_discussion(guru_names, rounds=case.rounds, text_chars=case.text_chars)
+    walls, first_outputs, per_message = [], [], []
+
+    client_factory = _client_factory(case, messages)
+    pool = ClientPool(client_factory) if case.pooled else None
+    with tempfile.TemporaryDirectory() as workdir:
+        if pool is not None:
+            # The first discussion of a configuration starts cold and leaves a warm spare behind
+            await _run_pipeline(case, messages, workdir, FirstOutputProbe(), pool)
+            client_factory = pool
+        for _ in range(repeat):
+            if pool is not None:
+                # Back to back: the spare started by the previous lease is ready
+                await asyncio.sleep(case.connect_latency)
+            probe = FirstOutputProbe()
+            start = await _run_pipeline(case, messages, workdir, probe, client_factory)
+            wall = time.perf_counter() - start
+            walls.append(wall)
+            first_outputs.append(((probe.first_output_at or start) - start) * 1000)
+            simulated = case.latency * len(messages) + (0.0 if pool is not None else case.connect_latency)
+            per_message.append(max(0.0, wall - simulated) / len(messages) * 1e6)
+
+        # Memory is measured in a separate pass because tracing slows everything down
+        tracemalloc.start()
+        try:
+            await _run_pipeline(case, messages, workdir, FirstOutputProbe(), client_factory)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        if pool is not None:
+            await pool.close()
+
+    wall = statistics.median(walls)
+    return BenchmarkResult(
+        key=case.key,
+        panel_size=case.panel_size,
+        rounds=case.rounds,
+        text_chars=case.text_chars,
+        messages=len(messages),
+        wall_seconds=round(wall, 6),
+        throughput_msgs_per_s=round(len(messages) / wall, 1) if wall else 0.0,
+        time_to_first_output_ms=round(statistics.median(first_outputs), 3),
+        per_message_us=round(statistics.median(per_message), 2),
+        peak_memory_kb=round(peak / 1024, 1),
+        options_build_us=round(measure_options_build(guru_names), 2),
+    )
+
+
+def measure_startup(repeat: int = DEFAULT_REPEAT) -> Dict[str, float]:
+    """Returns the median milliseconds of every startup command, each run in a fresh interpreter."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    for name, arguments in STARTUP_COMMANDS.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, *arguments], cwd=here, check=True, capture_output=True)
+            timings.append((time.perf_counter() - start) * 1000)
+        results[name] = round(statistics.median(timings), 1)
+    return results
+
+
+def check_startup(startup: Dict[str, float], max_ms: float = DEFAULT_MAX_STARTUP_MS) -> List[str]:
+    """Returns a description of every startup command slower than max_ms."""
+    return [f"{name}: {value} ms > {max_ms} ms" for name, value in startup.items() if value > max_ms]
+
+
+def dry_run_modules() -> List[str]:
+    """Returns the modules loaded by a dry run in a fresh interpreter."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    completed = subprocess.run([sys.executable, "-c", DRY_RUN_PROBE], cwd=here, check=True, capture_output=True, text=True)
+    return json.loads(completed.stdout.splitlines()[-1])
+
+
+def check_dry_run(modules: List[str]) -> List[str]:
+    """Returns a description of every run-only module a dry run loaded."""
+    return [f"dry run imported {name}" for name in RUN_ONLY_MODULES if name in modules]
+
+
+async def run_benchmarks(cases: List[BenchmarkCase], repeat: int = DEFAULT_REPEAT) -> Dict:
+    """Runs every case and returns the results document."""
+    results = [await run_case(case, repeat) for case in cases]
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": [result.to_dict() for result in results],
+    }
+
+
+def compare_results(baseline: Dict, current: Dict, threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> List[str]:
+    """Returns a description of every metric that regressed by more than `threshold`."""
+    baseline_by_key = {result["key"]: result for result in baseline.get("results", [])}
+    regressions = []
+    for name, after in current.get("startup", {}).items():
+        before = baseline.get("startup", {}).get(name)
+        if before and after > before * (1 + threshold):
+            regressions.append(f"startup: {name} {before} -> {after} (+{(after / before - 1):.0%})")
+    for result in current.get("results", []):
+        previous = baseline_by_key.get(result["key"])
+        if previous is None:
+            continue
+        for metric in REGRESSION_METRICS:
+            before, after = previous.get(metric), result.get(metric)
+            if before and after is not None and after > before * (1 + threshold):
+                regressions.append(
+                    f"{result['key']}: {metric} {before} -> {after} (+{(after / before - 1):.0%})"
+                )
+    return regressions
+
+
+def format_results(document: Dict) -> str:
+    """Renders the results as a console table."""
+    header = f"{'case':<49}{'msgs':>7}{'msg/s':>11}{'TTFO ms':>10}{'us/msg':>9}{'peak KB':>10}{'opts us':>9}"
+    lines = [header, "-" * len(header)]
+    for result in document["results"]:
+        lines.append(
+            f"{result['key']:<49}{result['messages']:>7}{result['throughput_msgs_per_s']:>11.0f}"
+            f"{result['time_to_first_output_ms']:>10.2f}{result['per_message_us']:>9.1f}"
+            f"{result['peak_memory_kb']:>10.0f}{result['options_build_us']:>9.0f}"
+        )
+    return "\n".join(lines)
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+async def main() -> None:
+    """Command line entry point for the benchmark suite"""
+    parser = argparse.ArgumentParser(description="Offline benchmark of the discussion pipeline")
+    parser.add_argument("--panel-sizes", type=_int_list, default=DEFAULT_PANEL_SIZES)
+    parser.add_argument("--rounds", type=_int_list, default=DEFAULT_ROUNDS, help="Transcript lengths (rounds)")
+    parser.add_argument("--text-chars", type=int, default=DEFAULT_TEXT_CHARS, help="Characters per text block")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per streamed message")
+    parser.add_argument("--connect-latency", type=float, default=0.0, help="Simulated session startup seconds")
+    parser.add_argument("--hybrid", action="store_true", help="Also run every case in hybrid mode")
+    parser.add_argument("--pooled", action="store_true", help="Also run every case with a warm client pool")
+    parser.add_argument("--startup", action="store_true", help="Also time CLI startup in fresh interpreters")
+    parser.add_argument("--max-startup-ms", type=float, default=DEFAULT_MAX_STARTUP_MS,
+                        help="Fail when a startup command is slower than this (with --startup)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--output-dir", default=DEFAULT_RESULTS_DIR)
+    parser.add_argument("--compare", default=None, help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    cases = [
+        BenchmarkCase(panel_size, rounds, args.text_chars, args.latency, args.connect_latency, hybrid, pooled)
+        for panel_size in args.panel_sizes
+        for rounds in args.rounds
+        for hybrid in ([False, True] if args.hybrid else [False])
+        for pooled in ([False, True] if args.pooled else [False])
+    ]
+    document = await run_benchmarks(cases, repeat=args.repeat)
+    print(format_results(document))
+    startup_failures = []
+    if args.startup:
+        document["startup"] = measure_startup(args.repeat)
+        print("\nStartup: " + ", ".join(f"{name} {value:.0f}" for name, value in document["startup"].items()))
+        startup_failures = check_startup(document["startup"], args.max_startup_ms) + check_dry_run(dry_run_modules())
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    path = os.path.join(args.output_dir, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+    print(f"\n💾 Results saved to: {path}")
+
+    if startup_failures:
+        print(f"\n❌ Startup regressed (limit {args.max_startup_ms:.0f} ms):")
+        for failure in startup_failures:
+            print(f"   - {failure}")
+        sys.exit(1)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare_results(json.load(f), document, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) against {args.compare}:")
+            for regression in regressions:
+                print(f"   - {regression}")
+            sys.exit(1)
+        print(f"\n✅ No regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,285 @@
+"""
+Discussion Budget
+
+Keeps one discussion inside a token, cost and wall-time budget. The scheduler tracks
+spend live from the message stream (the usage on every AssistantMessage, priced like the
+usage accountant) and adapts the plan as the budget runs down:
+
+- normal: the Orchestrator gets the limits and a number of cross-examination rounds
+  that fits them;
+- tight (from `tight_at` of the budget): every guru call is asked for a short answer,
+  and Gurus who have already spoken more often than the rest of the panel are skipped;
+- wrap-up (once only the reserve is left): further guru calls and web searches are
+  denied and the Orchestrator is told to write its conclusion now.
+
+The reserve is kept back for that closing synthesis, so a discussion ends with a
+conclusion before the budget is exhausted.
+"""
+
+import dataclasses
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from claude_agent_sdk import AssistantMessage, ClaudeAgentOptions, HookMatcher, ResultMessage
+
+from guru_tools import GURU_TOOL_NAMES
+from pricing import estimate_cost, usage_tokens
+from search_cache import SEARCH_TOOL_NAME
+from task_turns import TaskTurn, TurnObserver
+
+NORMAL = "normal"
+TIGHT = "tight"
+WRAP_UP = "wrap_up"
+PHASES = [NORMAL, TIGHT, WRAP_UP]
+ORCHESTRATOR_SESSION = "orchestrator"
+# Tools the scheduler gates: guru calls and web searches, including their cached and in-process forms
+BUDGETED_TOOLS = ["Task", "WebSearch", SEARCH_TOOL_NAME, *GURU_TOOL_NAMES]
+
+DEFAULT_RESERVE = 0.15
+DEFAULT_TIGHT_AT = 0.5
+MAX_PLANNED_ROUNDS = 5
+BRIEF_ANSWER_WORDS = 150
+
+# Rough size of one guru turn, used to plan rounds before any spend is known
+ESTIMATED_TURN_USAGE = {"input_tokens": 6000, "output_tokens": 800}
+ESTIMATED_SECONDS_PER_TURN = 30.0
+
+BUDGET_RULES = """
+
+# Budget
+This discussion has a budget of {limits}. It is tracked live.
+- Plan for the opening round plus at most {rounds} cross-examination round(s).
+- When you are told the budget is tight, keep every call short and skip Gurus who have already had their say.
+- When you are told to wrap up, stop calling Gurus and write the final synthesized conclusion immediately.
+"""
+
+# Console status when the scheduler changes phase
+PHASE_STATUS = {
+    TIGHT: "keeping guru calls short and skipping repeat speakers",
+    WRAP_UP: "no more guru calls, wrapping up with the conclusion",
+}
+
+TIGHT_NOTE = (
+    "Budget {status}: it is running low. Ask this Guru for at most "
+    f"{BRIEF_ANSWER_WORDS} words and plan to conclude soon."
+)
+SKIP_REASON = (
+    "Budget {status}: {guru} has already spoken more often than the rest of the panel. "
+    "Give the floor to another Guru or move on to the conclusion."
+)
+WRAP_UP_REASON = (
+    "Budget {status}: only the reserve for the conclusion is left. "
+    "Do not call any more tools; write the final synthesized conclusion now."
+)
+
+
+@dataclass
+class DiscussionBudget:
+    """Limits for one discussion; None means unlimited"""
+    max_tokens: Optional[int] = None
+    max_cost_usd: Optional[float] = None
+    max_seconds: Optional[float] = None
+    # Share of the budget kept back for the closing synthesis
+    reserve: float = DEFAULT_RESERVE
+    # Share of the budget from which guru calls are kept short
+    tight_at: float = DEFAULT_TIGHT_AT
+
+    @property
+    def limited(self) -> bool:
+        return any(limit is not None for limit in (self.max_tokens, self.max_cost_usd, self.max_seconds))
+
+    def describe(self) -> str:
+        limits = []
+        if self.max_tokens is not None:
+            limits.append(f"{self.max_tokens:,} tokens")
+        if self.max_cost_usd is not None:
+            limits.append(f"${self.max_cost_usd:.2f}")
+        if self.max_seconds is not None:
+            limits.append(f"{self.max_seconds:.0f} seconds")
+        return ", ".join(limits) or "no limit"
+
+    def planned_rounds(self, panel_size: int) -> Optional[int]:
+        """Cross-examination rounds that fit after the opening round; None when unlimited."""
+        usable = 1.0 - self.reserve
+        turns = []
+        if self.max_tokens is not None:
+            turns.append(self.max_tokens * usable / usage_tokens(ESTIMATED_TURN_USAGE))
+        if self.max_cost_usd is not None:
+            turns.append(self.max_cost_usd * usable / estimate_cost(ESTIMATED_TURN_USAGE, None))
+        if self.max_seconds is not None:
+            turns.append(self.max_seconds * usable / ESTIMATED_SECONDS_PER_TURN)
+        if not turns:
+            return None
+        rounds = int(min(turns) // max(panel_size, 1)) - 1
+        return max(0, min(rounds, MAX_PLANNED_ROUNDS))
+
+
+def _deny(reason: str) -> Dict[str, Any]:
+    return {"hookSpecificOutput": {
+        "hookEventName": "PreToolUse",
+        "permissionDecision": "deny",
+        "permissionDecisionReason": reason,
+    }}
+
+
+class BudgetScheduler(TurnObserver):
+    """
+    Tracks spend against a DiscussionBudget and steers the Orchestrator through hooks.
+    on_phase, if given to start(), is called with every phase the scheduler moves into.
+    """
+
+    def __init__(self, budget: DiscussionBudget, clock: Callable[[], float] = time.monotonic):
+        self.budget = budget
+        self.clock = clock
+        self.tokens = 0
+        self.cost_usd = 0.0
+        self.guru_names: List[str] = []
+        self.calls: Dict[str, int] = {}
+        self.skipped: List[str] = []
+        self.phase = NORMAL
+        self._started: Optional[float] = None
+        self.on_phase: Optional[Callable[[str], None]] = None
+        self._seen_message_ids: Set[str] = set()
+        self._sessions_with_usage: Set[str] = set()
+
+    def start(self, guru_names: List[str], on_phase: Optional[Callable[[str], None]] = None) -> None:
+        self.guru_names = list(guru_names)
+        self.on_phase = on_phase
+        self._started = self.clock()
+
+    @property
+    def elapsed(self) -> float:
+        return self.clock() - self._started if self._started is not None else 0.0
+
+    def used(self) -> float:
+        """Share of the budget spent: the highest of the token, cost and time shares."""
+        shares = [0.0]
+        if self.budget.max_tokens:
+            shares.append(self.tokens / self.budget.max_tokens)
+        if self.budget.max_cost_usd:
+            shares.append(self.cost_usd / self.budget.max_cost_usd)
+        if self.budget.max_seconds:
+            shares.append(self.elapsed / self.budget.max_seconds)
+        return max(shares)
+
+    def advance(self) -> Optional[str]:
+        """Moves to the phase the current spend calls for; returns it when it changed."""
+        used = self.used()
+        if used >= 1.0 - self.budget.reserve:
+            phase = WRAP_UP
+        elif used >= self.budget.tight_at:
+            phase = TIGHT
+        else:
+            phase = NORMAL
+        # Phases only move forward, even if a later limit change would allow more
+        if PHASES.index(phase) <= PHASES.index(self.phase):
+            return None
+        self.phase = phase
+        if self.on_phase is not None:
+            self.on_phase(phase)
+        return phase
+
+    def status(self) -> str:
+        return (
+            f"{self.used():.0%} used ({self.tokens:,} tokens, ${self.cost_usd:.4f}, {self.elapsed:.0f}s "
+            f"of {self.budget.describe()})"
+        )
+
+    def _account(self, session: str, message: AssistantMessage) -> None:
+        message_id = getattr(message, "message_id", None)
+        # One API turn can be streamed as several AssistantMessages sharing an id and usage
+        if message_id and message_id in self._seen_message_ids:
+            return
+        if message_id:
+            self._seen_message_ids.add(message_id)
+        usage = getattr(message, "usage", None)
+        if usage:
+            self._sessions_with_usage.add(session)
+            self.tokens += usage_tokens(usage)
+            self.cost_usd += estimate_cost(usage, message.model)
+
+    def _account_result(self, session: str, message: ResultMessage) -> None:
+        # Older SDKs only report usage once per session
+        if session not in self._sessions_with_usage and message.usage:
+            self.tokens += usage_tokens(message.usage)
+            self.cost_usd += estimate_cost(message.usage, None)
+
+    def on_session_message(self, session: str, message: Any) -> None:
+        """Accounts a message of a session outside the Orchestrator (e.g. a speculative draft)."""
+        if isinstance(message, AssistantMessage):
+            self._account(session, message)
+        elif isinstance(message, ResultMessage):
+            self._account_result(session, message)
+
+    def on_opening_message(self, guru_name: str, message: Any) -> None:
+        self.on_session_message(guru_name, message)
+        if isinstance(message, ResultMessage):
+            self.calls[guru_name] = self.calls.get(guru_name, 0) + 1
+
+    def on_message(self, message: Any) -> None:
+        if isinstance(message, AssistantMessage):
+            self._account(ORCHESTRATOR_SESSION, message)
+        elif isinstance(message, ResultMessage):
+            self._account_result(ORCHESTRATOR_SESSION, message)
+        self.advance()
+
+    def on_task_turn(self, turn: TaskTurn) -> None:
+        if not turn.is_error:
+            self.calls[turn.guru] = self.calls.get(turn.guru, 0) + 1
+
+    def is_low_value(self, guru: str) -> bool:
+        """A Guru is low value once they have spoken more often than the least heard panelist."""
+        heard = [self.calls.get(name, 0) for name in self.guru_names] or [0]
+        return self.calls.get(guru, 0) > min(heard)
+
+    async def pre_tool_hook(self, hook_input: Dict[str, Any], tool_use_id: Optional[str], context: Any) -> Dict[str, Any]:
+        """PreToolUse hook for guru calls and searches (BUDGETED_TOOLS): denies or shortens them as the budget runs down."""
+        self.advance()
+        if self.phase == WRAP_UP:
+            return _deny(WRAP_UP_REASON.format(status=self.status()))
+        if self.phase != TIGHT or hook_input.get("tool_name") != "Task":
+            return {}
+        guru = (hook_input.get("tool_input") or {}).get("subagent_type", "")
+        if self.is_low_value(guru):
+            self.skipped.append(guru)
+            return _deny(SKIP_REASON.format(status=self.status(), guru=guru))
+        return {"hookSpecificOutput": {
+            "hookEventName": "PreToolUse",
+            "additionalContext": TIGHT_NOTE.format(status=self.status()),
+        }}
+
+    async def post_task_hook(self, hook_input: Dict[str, Any], tool_use_id: Optional[str], context: Any) -> Dict[str, Any]:
+        """PostToolUse hook for Task: tells the Orchestrator where the budget stands once it is tight."""
+        self.advance()
+        if self.phase == NORMAL:
+            return {}
+        note = WRAP_UP_REASON if self.phase == WRAP_UP else TIGHT_NOTE
+        return {"hookSpecificOutput": {
+            "hookEventName": "PostToolUse",
+            "additionalContext": note.format(status=self.status()),
+        }}
+
+    def report(self) -> Dict:
+        return {
+            "limits": asdict(self.budget),
+            "tokens": self.tokens,
+            "cost_usd": round(self.cost_usd, 6),
+            "elapsed_seconds": round(self.elapsed, 3),
+            "used": round(self.used(), 4),
+            "phase": self.phase,
+            "planned_rounds": self.budget.planned_rounds(len(self.guru_names)),
+            "skipped": list(self.skipped),
+        }
+
+
+def enable_budget(options: ClaudeAgentOptions, scheduler: BudgetScheduler) -> ClaudeAgentOptions:
+    """Returns Orchestrator options that carry the budget rules and the scheduler's hooks."""
+    rounds = scheduler.budget.planned_rounds(len(options.agents or {}))
+    rules = BUDGET_RULES.format(limits=scheduler.budget.describe(), rounds=MAX_PLANNED_ROUNDS if rounds is None else rounds)
+    hooks = dict(options.hooks or {})
+    hooks["PreToolUse"] = [
+        *hooks.get("PreToolUse", []), HookMatcher(matcher="|".join(BUDGETED_TOOLS), hooks=[scheduler.pre_tool_hook])
+    ]
+    hooks["PostToolUse"] = [*hooks.get("PostToolUse", []), HookMatcher(matcher="Task", hooks=[scheduler.post_task_hook])]
+    return dataclasses.replace(options, system_prompt=(options.system_prompt or "") + rules, hooks=hooks)
@@ -0,0 +1,209 @@
+"""
+Discussion Checkpoints
+
+Saves a checkpoint after every completed guru turn (each Task sub-agent call whose
+result has come back, plus the parallel opening round) so an interrupted discussion
+can be resumed instead of paying for every completed turn again.
+
+A resumed discussion starts a fresh Orchestrator session whose first message carries
+the completed guru outputs and the Orchestrator's notes so far, and continues into
+the same transcript file.
+"""
+
+import json
+import os
+import uuid
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from claude_agent_sdk import AssistantMessage, ResultMessage, SystemMessage, TextBlock
+
+from discussion import DiscussionConfig, DiscussionObserver, DiscussionResult
+from task_turns import TaskTurn
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(".guru_cache", "checkpoints")
+
+# Only the tail of the Orchestrator's own text is kept, so checkpoints stay bounded
+MAX_ORCHESTRATOR_NOTES_CHARS = 8000
+
+
+def new_checkpoint_id() -> str:
+    """Returns a sortable, unique checkpoint id."""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+@dataclass
+class GuruTurn:
+    """One completed sub-agent turn"""
+    guru: str
+    prompt: str
+    output: str
+    tool_use_id: str = ""
+
+
+@dataclass
+class Checkpoint:
+    """Everything needed to resume a discussion"""
+    id: str
+    topic: str
+    guru_names: List[str]
+    output: str = ""
+    parallel_opening: bool = False
+    status: str = "running"
+    created_at: str = ""
+    updated_at: str = ""
+    session_id: Optional[str] = None
+    opening_analyses: Dict[str, str] = field(default_factory=dict)
+    turns: List[GuruTurn] = field(default_factory=list)
+    orchestrator_notes: str = ""
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Checkpoint":
+        data = dict(data)
+        data["turns"] = [GuruTurn(**turn) for turn in data.get("turns", [])]
+        return cls(**data)
+
+    @property
+    def resumable(self) -> bool:
+        return self.status != "completed"
+
+
+class CheckpointStore:
+    """Stores checkpoints as one JSON file per discussion."""
+
+    def __init__(self, directory: str = DEFAULT_CHECKPOINT_DIR):
+        self.directory = Path(directory)
+
+    def _path(self, checkpoint_id: str) -> Path:
+        return self.directory / f"{checkpoint_id}.json"
+
+    def save(self, checkpoint: Checkpoint) -> None:
+        """Writes the checkpoint atomically, so a crash mid-save keeps the previous one."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        checkpoint.updated_at = datetime.now().isoformat(timespec="seconds")
+        path = self._path(checkpoint.id)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint.to_dict(), f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def load(self, checkpoint_id: str) -> Checkpoint:
+        """Loads a checkpoint; raises FileNotFoundError for unknown ids."""
+        path = self._path(checkpoint_id)
+        if not path.exists():
+            raise FileNotFoundError(f"No checkpoint named '{checkpoint_id}' in {self.directory}")
+        with open(path, encoding="utf-8") as f:
+            return Checkpoint.from_dict(json.load(f))
+
+    def ids(self) -> List[str]:
+        """Returns the stored checkpoint ids, oldest first."""
+        if not self.directory.exists():
+            return []
+        return sorted(path.stem for path in self.directory.glob("*.json"))
+
+
+class Checkpointer(DiscussionObserver):
+    """Observer that saves a checkpoint after each completed guru turn."""
+
+    def __init__(self, store: CheckpointStore, checkpoint: Optional[Checkpoint] = None):
+        self.store = store
+        self.checkpoint = checkpoint
+
+    @property
+    def id(self) -> Optional[str]:
+        return self.checkpoint.id if self.checkpoint else None
+
+    def on_start(self, config: DiscussionConfig) -> None:
+        if self.checkpoint is None:
+            self.checkpoint = Checkpoint(
+                id=new_checkpoint_id(),
+                topic=config.topic,
+                guru_names=list(config.guru_names),
+                output=config.output or "",
+                parallel_opening=config.parallel_opening,
+                created_at=datetime.now().isoformat(timespec="seconds"),
+            )
+        self.checkpoint.status = "running"
+        self.store.save(self.checkpoint)
+
+    def on_opening(self, analyses: Dict[str, str]) -> None:
+        self.checkpoint.opening_analyses = dict(analyses)
+        self.store.save(self.checkpoint)
+
+    def on_message(self, message: Any) -> None:
+        if isinstance(message, AssistantMessage):
+            for block in message.content:
+                if isinstance(block, TextBlock) and getattr(message, "parent_tool_use_id", None) is None:
+                    notes = self.checkpoint.orchestrator_notes + block.text
+                    self.checkpoint.orchestrator_notes = notes[-MAX_ORCHESTRATOR_NOTES_CHARS:]
+        elif isinstance(message, SystemMessage) and message.subtype == "init":
+            self.checkpoint.session_id = message.data.get("session_id")
+        elif isinstance(message, ResultMessage):
+            self.checkpoint.session_id = message.session_id
+
+    def on_task_turn(self, turn: TaskTurn) -> None:
+        if turn.is_error:
+            return
+        self.checkpoint.turns.append(GuruTurn(
+            guru=turn.guru, prompt=turn.prompt, output=turn.result, tool_use_id=turn.tool_use_id,
+        ))
+        self.store.save(self.checkpoint)
+
+    def on_finish(self, result: DiscussionResult) -> None:
+        if self.checkpoint is None:
+            return
+        self.checkpoint.status = result.status
+        self.store.save(self.checkpoint)
+
+
+def get_resume_prompt(checkpoint: Checkpoint) -> str:
+    """Builds the first Orchestrator message that continues an interrupted discussion."""
+    sections = [
+        checkpoint.topic,
+        "# Resumed Discussion\n\n"
+        "This discussion was interrupted and is now being resumed. The Guru turns below are "
+        "already complete; do NOT call these Gurus again with the same question. "
+        "Continue from where the discussion stopped and drive it to a conclusion.",
+    ]
+    if checkpoint.opening_analyses:
+        sections.append("# Opening Analyses\n\n" + "\n\n".join(
+            f"### {name}\n\n{text}" for name, text in checkpoint.opening_analyses.items()
+        ))
+    if checkpoint.turns:
+        sections.append("# Completed Guru Turns\n\n" + "\n\n".join(
+            f"### {i}. {turn.guru}\n\n**Asked:** {turn.prompt}\n\n**Answer:**\n{turn.output}"
+            for i, turn in enumerate(checkpoint.turns, start=1)
+        ))
+    if checkpoint.orchestrator_notes:
+        sections.append("# Your Moderator Notes So Far\n\n" + checkpoint.orchestrator_notes)
+    return "\n\n".join(sections)
+
+
+def get_resume_config(checkpoint: Checkpoint, base: Optional[DiscussionConfig] = None) -> DiscussionConfig:
+    """Returns the config for resuming: topic, panel and transcript come from the checkpoint."""
+    base = base or DiscussionConfig()
+    return DiscussionConfig(
+        topic=checkpoint.topic,
+        guru_names=list(checkpoint.guru_names),
+        output=checkpoint.output or base.output,
+        # The resume prompt already carries the opening analyses when they were collected
+        parallel_opening=bool(checkpoint.opening_analyses),
+        opening_concurrency=base.opening_concurrency,
+        flush_interval=base.flush_interval,
+        fsync_interval=base.fsync_interval,
+        guru_tools=base.guru_tools,
+        hybrid=base.hybrid,
+        turn_digests=base.turn_digests,
+        budget=base.budget,
+        convergence=base.convergence,
+        speculation=base.speculation,
+        routing=base.routing,
+        resilience=base.resilience,
+    )
@@ -0,0 +1,282 @@
+"""
+Warm Client Pool
+
+Keeps pre-started Claude sessions ready so a discussion does not pay subprocess and
+session startup before its first token. Clients are grouped by the configuration of
+their options (system prompt, panel, tools, model, hook layout; the topic is not part of
+it), so consecutive topics, and different panels with matching configuration, draw from
+the same warm clients.
+
+A session keeps its conversation, so every client serves exactly one discussion: when
+one is leased the pool immediately starts warming its replacement, and the used client
+is disconnected in the background. Idle clients are health-checked before they are
+handed out and evicted once they have been idle for `idle_timeout` seconds.
+
+Hooks are per discussion (turn digests, budget), but a warm client registered its hook
+callbacks when it connected. Each warm client is therefore started with relay callbacks
+that are pointed at the leasing discussion's hooks when it is handed out. In-process MCP
+servers are the ones the client was started with; they are stateless or shared
+(search cache) in this code base.
+
+Usage: pass the pool as client_factory, e.g. run_discussion(config, client_factory=pool)
+"""
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from claude_agent_sdk import ClaudeAgentOptions, ClaudeSDKClient
+
+from orchestrator import ClientFactory
+
+DEFAULT_SPARES = 1
+DEFAULT_IDLE_TIMEOUT = 300.0
+DEFAULT_HEALTH_TIMEOUT = 5.0
+
+
+def options_key(options: ClaudeAgentOptions) -> str:
+    """Fingerprint of the configuration a client is started with; hook callbacks only count by layout."""
+    fields = {}
+    for option in dataclasses.fields(options):
+        value = getattr(options, option.name)
+        if option.name == "hooks" and value:
+            value = {event: [(matcher.matcher, len(matcher.hooks)) for matcher in matchers] for event, matchers in value.items()}
+        elif option.name == "mcp_servers" and isinstance(value, dict):
+            value = {name: config.get("type") if isinstance(config, dict) and config.get("type") == "sdk" else config
+                     for name, config in value.items()}
+        elif callable(value):
+            value = "callable"
+        fields[option.name] = repr(value)
+    return hashlib.sha1(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class HookRelay:
+    """Hook callback that forwards to whichever discussion currently leases the client."""
+
+    def __init__(self, target: Callable[..., Any]):
+        self.target = target
+
+    async def __call__(self, hook_input: Dict[str, Any], tool_use_id: Optional[str], context: Any) -> Dict[str, Any]:
+        return await self.target(hook_input, tool_use_id, context)
+
+
+def _hook_callbacks(options: ClaudeAgentOptions) -> List[Callable[..., Any]]:
+    return [hook for matchers in (options.hooks or {}).values() for matcher in matchers for hook in matcher.hooks]
+
+
+def relay_hooks(options: ClaudeAgentOptions) -> Tuple[ClaudeAgentOptions, List[HookRelay]]:
+    """Returns options whose hook callbacks are relays, and the relays in callback order."""
+    relays: List[HookRelay] = []
+    if not options.hooks:
+        return options, relays
+    hooks = {}
+    for event, matchers in options.hooks.items():
+        hooks[event] = []
+        for matcher in matchers:
+            matcher_relays = [HookRelay(hook) for hook in matcher.hooks]
+            relays.extend(matcher_relays)
+            hooks[event].append(dataclasses.replace(matcher, hooks=matcher_relays))
+    return dataclasses.replace(options, hooks=hooks), relays
+
+
+@dataclass
+class PoolStats:
+    """Counters of the pool's activity"""
+    hits: int = 0
+    misses: int = 0
+    warmed: int = 0
+    warm_failures: int = 0
+    evicted_idle: int = 0
+    evicted_unhealthy: int = 0
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+@dataclass
+class _WarmClient:
+    client: Any
+    relays: List[HookRelay]
+    idle_since: float
+
+
+class _Lease:
+    """Async context manager returned by ClientPool(options)"""
+
+    def __init__(self, pool: "ClientPool", options: ClaudeAgentOptions):
+        self.pool = pool
+        self.options = options
+        self.client: Any = None
+
+    async def __aenter__(self) -> Any:
+        self.client = await self.pool.acquire(self.options)
+        return self.client
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> bool:
+        self.pool.release(self.client)
+        return False
+
+
+class ClientPool:
+    """
+    Pool of pre-started clients keyed by options configuration.
+    Callable like a ClientFactory; `spares` warm clients are kept per configuration in use.
+    """
+
+    def __init__(
+        self,
+        client_factory: ClientFactory = ClaudeSDKClient,
+        spares: int = DEFAULT_SPARES,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        health_timeout: float = DEFAULT_HEALTH_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if spares < 0:
+            raise ValueError("spares must not be negative")
+        self.client_factory = client_factory
+        self.spares = spares
+        self.idle_timeout = idle_timeout
+        self.health_timeout = health_timeout
+        self.clock = clock
+        self.stats = PoolStats()
+        self._templates: Dict[str, ClaudeAgentOptions] = {}
+        self._idle: Dict[str, List[_WarmClient]] = {}
+        self._warming: Dict[str, Set["asyncio.Task[None]"]] = {}
+        self._background: Set["asyncio.Task[None]"] = set()
+        self._closed = False
+
+    def __call__(self, options: ClaudeAgentOptions) -> _Lease:
+        return _Lease(self, options)
+
+    def idle_count(self, options: Optional[ClaudeAgentOptions] = None) -> int:
+        if options is None:
+            return sum(len(clients) for clients in self._idle.values())
+        return len(self._idle.get(options_key(options), []))
+
+    async def _connect(self, key: str) -> _WarmClient:
+        options, relays = relay_hooks(self._templates[key])
+        client = self.client_factory(options)
+        await client.connect()
+        return _WarmClient(client, relays, self.clock())
+
+    async def _warm_one(self, key: str) -> None:
+        try:
+            warm = await self._connect(key)
+        except Exception:
+            self.stats.warm_failures += 1
+            return
+        self.stats.warmed += 1
+        if self._closed:
+            self._discard(warm.client)
+            return
+        self._idle.setdefault(key, []).append(warm)
+
+    def warm(self, options: ClaudeAgentOptions, count: Optional[int] = None) -> None:
+        """Starts warming clients for this configuration in the background (needs a running loop)."""
+        key = options_key(options)
+        self._templates.setdefault(key, options)
+        self._replenish(key, self.spares if count is None else count)
+
+    def _replenish(self, key: str, target: int) -> None:
+        if self._closed:
+            return
+        warming = self._warming.setdefault(key, set())
+        for _ in range(target - len(self._idle.get(key, [])) - len(self._pending(key))):
+            task = asyncio.ensure_future(self._warm_one(key))
+            warming.add(task)
+            task.add_done_callback(warming.discard)
+
+    def _pending(self, key: str) -> Set["asyncio.Task[None]"]:
+        return {task for task in self._warming.get(key, ()) if not task.done()}
+
+    async def _healthy(self, client: Any) -> bool:
+        if getattr(client, "connected", True) is False:
+            return False
+        probe = getattr(client, "get_server_info", None)
+        if probe is None:
+            return True
+        try:
+            return await asyncio.wait_for(probe(), self.health_timeout) is not None
+        except Exception:
+            return False
+
+    def _discard(self, client: Any) -> None:
+        """Disconnects a client in the background, off the discussion's critical path."""
+        async def disconnect() -> None:
+            try:
+                await client.disconnect()
+            except Exception:
+                pass
+        task = asyncio.ensure_future(disconnect())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def evict_idle(self) -> int:
+        """Disconnects the clients idle for longer than idle_timeout; returns how many."""
+        evicted = 0
+        now = self.clock()
+        for key, clients in self._idle.items():
+            fresh = [warm for warm in clients if now - warm.idle_since <= self.idle_timeout]
+            for warm in clients:
+                if warm not in fresh:
+                    self._discard(warm.client)
+                    evicted += 1
+            self._idle[key] = fresh
+        self.stats.evicted_idle += evicted
+        return evicted
+
+    async def acquire(self, options: ClaudeAgentOptions) -> Any:
+        """Returns a connected client for these options: a healthy warm one if possible, else a fresh one."""
+        key = options_key(options)
+        self._templates.setdefault(key, options)
+        self.evict_idle()
+        warm: Optional[_WarmClient] = None
+        while warm is None:
+            idle = self._idle.get(key)
+            if idle:
+                candidate = idle.pop()
+                if await self._healthy(candidate.client):
+                    warm = candidate
+                    self.stats.hits += 1
+                else:
+                    self.stats.evicted_unhealthy += 1
+                    self._discard(candidate.client)
+            elif self._pending(key):
+                # A client for this configuration is already starting; it beats starting another
+                await asyncio.wait(self._pending(key), return_when=asyncio.FIRST_COMPLETED)
+            else:
+                warm = await self._connect(key)
+                self.stats.misses += 1
+
+        for relay, target in zip(warm.relays, _hook_callbacks(options)):
+            relay.target = target
+        self._replenish(key, self.spares)
+        return warm.client
+
+    def release(self, client: Any) -> None:
+        """Ends a lease; the session holds that discussion's conversation, so it is not reused."""
+        self._discard(client)
+
+    async def close(self) -> None:
+        """Stops warming and disconnects every client."""
+        self._closed = True
+        warming = [task for tasks in self._warming.values() for task in tasks]
+        for task in warming:
+            task.cancel()
+        await asyncio.gather(*warming, return_exceptions=True)
+        for clients in self._idle.values():
+            for warm in clients:
+                self._discard(warm.client)
+        self._idle.clear()
+        await asyncio.gather(*list(self._background), return_exceptions=True)
+
+    async def __aenter__(self) -> "ClientPool":
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> bool:
+        await self.close()
+        return False
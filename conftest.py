@@ -0,0 +1,16 @@
+import pytest
+
+
+class FakeClock:
+    """Manually advanced stand-in for the `clock` callables (time.time, time.monotonic) modules accept"""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
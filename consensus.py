@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Consensus Engine
+
+Combines guru picks held in a RecommendationStore without asking the Orchestrator LLM:
+ticker overlap between gurus, weighted conviction scores per ticker, sector exposure per
+guru and a guru-by-guru disagreement matrix. Everything is computed with NumPy on the
+store's columns, so a whole panel, or thousands of archived discussions, takes
+milliseconds.
+
+Requires NumPy: pip install "agent-investment-guru[consensus]"
+
+Usage: uv run consensus.py --gurus "warren_buffett,cathie_wood" --top 5
+       uv run consensus.py --store discussion_result_*.picks.json
+"""
+
+import argparse
+import asyncio
+import json
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from discussion import DEFAULT_GURUS, parse_guru_names
+from investment_guru_agent import collect_panel_recommendations
+from recommendation_store import RecommendationStore
+
+DEFAULT_TOP_PICKS = 10
+
+
+@dataclass
+class TickerConsensus:
+    """Aggregated view of one ticker across the panel"""
+    ticker: str
+    score: float
+    support: int
+    gurus: List[str]
+    sector: str
+    horizon_years: Optional[float]
+
+
+@dataclass
+class ConsensusReport:
+    """Consensus over a panel or a set of discussions"""
+    gurus: List[str]
+    top_picks: List[TickerConsensus] = field(default_factory=list)
+    overlap: List[List[int]] = field(default_factory=list)
+    disagreement: List[List[float]] = field(default_factory=list)
+    sector_exposure: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _column(values, dtype) -> np.ndarray:
+    # Zero-copy view over the store's array.array buffer
+    return np.frombuffer(values, dtype=dtype) if len(values) else np.zeros(0, dtype=dtype)
+
+
+class ConsensusEngine:
+    """
+    Vectorized consensus over a RecommendationStore.
+    discussion_ids restricts the engine to those archived discussions.
+    """
+
+    def __init__(self, store: RecommendationStore, discussion_ids: Optional[Sequence[str]] = None):
+        self.store = store
+        guru = _column(store.guru_codes, np.int64)
+        ticker = _column(store.ticker_codes, np.int64)
+        sector = _column(store.sector_codes, np.int64)
+        discussion = _column(store.discussion_codes, np.int64)
+        conviction = _column(store.convictions, np.float64)
+        horizon = _column(store.horizon_years, np.float64)
+
+        if discussion_ids is not None:
+            wanted = [store.discussions.codes[d] for d in discussion_ids if d in store.discussions.codes]
+            mask = np.isin(discussion, wanted)
+            guru, ticker, sector, conviction, horizon = (
+                guru[mask], ticker[mask], sector[mask], conviction[mask], horizon[mask]
+            )
+
+        self.shape = (len(store.gurus), len(store.tickers))
+        # Guru x ticker conviction; repeated picks (e.g. across discussions) add up
+        self.conviction = np.zeros(self.shape)
+        np.add.at(self.conviction, (guru, ticker), conviction)
+        self.sector_conviction = np.zeros((len(store.gurus), len(store.sectors)))
+        np.add.at(self.sector_conviction, (guru, sector), conviction)
+        self.ticker_sectors = np.zeros((len(store.tickers), len(store.sectors)), dtype=np.int64)
+        np.add.at(self.ticker_sectors, (ticker, sector), 1)
+
+        known = ~np.isnan(horizon)
+        horizon_sum = np.bincount(ticker[known], weights=horizon[known], minlength=len(store.tickers))
+        horizon_count = np.bincount(ticker[known], minlength=len(store.tickers))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.mean_horizon = horizon_sum / horizon_count
+
+        # Only gurus with at least one pick take part
+        self.active_gurus = np.flatnonzero(self.conviction.any(axis=1))
+
+    def guru_weights(self, weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Per-guru weight vector; gurus missing from weights count 1.0."""
+        vector = np.ones(self.shape[0])
+        for name, weight in (weights or {}).items():
+            code = self.store.gurus.codes.get(name)
+            if code is not None:
+                vector[code] = weight
+        return vector
+
+    def ticker_overlap(self) -> np.ndarray:
+        """Active guru x active guru count of shared tickers (the diagonal is each guru's pick count)."""
+        picked = (self.conviction[self.active_gurus] > 0).astype(np.int64)
+        return picked @ picked.T
+
+    def conviction_scores(self, weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Weighted conviction per ticker: the sum over gurus of weight x conviction."""
+        return self.guru_weights(weights) @ self.conviction
+
+    def support(self) -> np.ndarray:
+        """Number of gurus that picked each ticker."""
+        return (self.conviction > 0).sum(axis=0)
+
+    def sector_exposure(self) -> np.ndarray:
+        """Active guru x sector share of each guru's total conviction."""
+        exposure = self.sector_conviction[self.active_gurus]
+        totals = exposure.sum(axis=1, keepdims=True)
+        return np.divide(exposure, totals, out=np.zeros_like(exposure), where=totals > 0)
+
+    def disagreement_matrix(self) -> np.ndarray:
+        """Active guru x active guru cosine distance between conviction vectors (0 = same picks, 1 = disjoint)."""
+        vectors = self.conviction[self.active_gurus]
+        norms = np.linalg.norm(vectors, axis=1)
+        similarity = (vectors @ vectors.T) / np.outer(norms, norms)
+        distance = 1.0 - similarity
+        np.fill_diagonal(distance, 0.0)
+        return np.clip(distance, 0.0, 1.0)
+
+    def top_picks(self, limit: int = DEFAULT_TOP_PICKS, weights: Optional[Dict[str, float]] = None) -> List[TickerConsensus]:
+        """Tickers by descending weighted conviction, ties broken by support."""
+        scores = self.conviction_scores(weights)
+        support = self.support()
+        order = np.lexsort((-support, -scores))
+        picks = []
+        for ticker in order[:limit]:
+            if scores[ticker] <= 0:
+                break
+            gurus = np.flatnonzero(self.conviction[:, ticker] > 0)
+            horizon = self.mean_horizon[ticker]
+            picks.append(TickerConsensus(
+                ticker=self.store.tickers.values[ticker],
+                score=round(float(scores[ticker]), 4),
+                support=int(support[ticker]),
+                gurus=[self.store.gurus.values[g] for g in gurus],
+                sector=self.store.sectors.values[int(self.ticker_sectors[ticker].argmax())],
+                horizon_years=None if np.isnan(horizon) else round(float(horizon), 2),
+            ))
+        return picks
+
+    def report(self, limit: int = DEFAULT_TOP_PICKS, weights: Optional[Dict[str, float]] = None) -> ConsensusReport:
+        gurus = [self.store.gurus.values[g] for g in self.active_gurus]
+        sectors = self.store.sectors.values
+        exposure = self.sector_exposure()
+        return ConsensusReport(
+            gurus=gurus,
+            top_picks=self.top_picks(limit, weights),
+            overlap=self.ticker_overlap().tolist(),
+            disagreement=np.round(self.disagreement_matrix(), 4).tolist(),
+            sector_exposure={
+                guru: {sectors[s]: round(float(share), 4) for s, share in enumerate(row) if share > 0}
+                for guru, row in zip(gurus, exposure)
+            },
+        )
+
+
+def format_report(report: ConsensusReport) -> str:
+    """Renders the consensus as console tables."""
+    lines = [f"{'ticker':<10}{'score':>8}{'support':>9}  {'sector':<24}gurus"]
+    for pick in report.top_picks:
+        lines.append(
+            f"{pick.ticker:<10}{pick.score:>8.2f}{pick.support:>9}  {pick.sector[:23]:<24}{', '.join(pick.gurus)}"
+        )
+    width = max([len(guru) for guru in report.gurus] + [6])
+    lines.append("")
+    lines.append("Disagreement (0 = same picks, 1 = disjoint)")
+    lines.append(" " * (width + 1) + "".join(f"{i:>6}" for i in range(len(report.gurus))))
+    for i, (guru, row) in enumerate(zip(report.gurus, report.disagreement)):
+        lines.append(f"{guru:<{width}} " + "".join(f"{value:>6.2f}" for value in row) + f"  [{i}]")
+    return "\n".join(lines)
+
+
+async def main() -> None:
+    """Command line entry point for the consensus engine"""
+    parser = argparse.ArgumentParser(description="Compute guru consensus over recommendations")
+    parser.add_argument("--gurus", default=",".join(DEFAULT_GURUS), help="Panel whose built-in picks are combined")
+    parser.add_argument("--store", nargs="*", default=None, help="Saved RecommendationStore JSON files to combine")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP_PICKS)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    if args.store:
+        store = RecommendationStore()
+        for path in args.store:
+            store.merge(RecommendationStore.load(path))
+    else:
+        store = await collect_panel_recommendations(parse_guru_names(args.gurus))
+
+    report = ConsensusEngine(store).report(limit=args.top)
+    print(json.dumps(report.to_dict(), ensure_ascii=False, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
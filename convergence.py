@@ -0,0 +1,235 @@
+"""
+Discussion Convergence
+
+Ends the cross-examination early once the panel has converged. The detector watches
+every completed guru turn in the message stream (the opening analyses and each Task
+result) and scores the panel's agreement after each one from three signals:
+
+- stance agreement: share of the panel holding the majority stance (bullish, bearish, neutral);
+- pick overlap: mean pairwise overlap of the tickers the gurus' latest turns name;
+- repetition: how similar each guru's latest turn is to their previous one.
+
+The opening round alone never converges: agreement only counts once repetition can be
+measured (a guru has been heard twice) alongside at least one other signal.
+Task turns are scored in the PostToolUse hook, so the turn that makes the panel converge
+already carries the news: once every guru has been heard for `min_rounds` rounds and the
+agreement reaches the threshold, the Orchestrator is told with that Task result that the
+panel has converged and further guru calls are denied, so it moves straight to the synthesis. The report
+compares the rounds actually run with the rounds the discussion was expected to take.
+"""
+
+import dataclasses
+import re
+from dataclasses import dataclass, asdict
+from itertools import combinations
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from claude_agent_sdk import ClaudeAgentOptions, HookMatcher
+
+from digest import detect_stance, extract_tickers
+from task_turns import TaskTurn, TurnObserver
+from transcript import tool_result_text
+
+DEFAULT_THRESHOLD = 0.75
+DEFAULT_MIN_ROUNDS = 2
+# The opening round plus the cross-examination rounds a discussion usually runs
+DEFAULT_EXPECTED_ROUNDS = 3
+SHINGLE_WORDS = 3
+MAX_TICKERS = 10
+
+# Signal weights; signals that cannot be measured yet are left out and the rest renormalized
+WEIGHTS = {"stance": 0.4, "picks": 0.3, "repetition": 0.3}
+# Agreement on one signal is not convergence, and without repetition nobody has been re-asked yet
+MIN_SIGNALS = 2
+REQUIRED_SIGNAL = "repetition"
+
+CONVERGENCE_RULES = """
+
+# Convergence
+The panel's agreement is measured after every Guru turn. If you are told the panel has converged,
+end the cross-examination: do not call more Gurus and write the final synthesis right away.
+"""
+
+CONVERGED_NOTE = (
+    "The panel has converged (agreement {agreement:.2f}: {signals}) after {rounds} round(s). "
+    "Further cross-examination would repeat what has been said. Skip the remaining rounds "
+    "and write the final synthesis now."
+)
+
+
+@dataclass
+class ConvergencePolicy:
+    """When a discussion counts as converged"""
+    threshold: float = DEFAULT_THRESHOLD
+    min_rounds: int = DEFAULT_MIN_ROUNDS
+    expected_rounds: int = DEFAULT_EXPECTED_ROUNDS
+
+
+@dataclass
+class GuruTurnSignals:
+    """What the detector keeps of one turn"""
+    stance: str
+    tickers: Set[str]
+    shingles: Set[str]
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> Set[str]:
+    """Overlapping word n-grams of the case-folded text."""
+    words = re.findall(r"\w+", text.casefold())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def jaccard(first: Set[str], second: Set[str]) -> float:
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+def task_response_text(response: Any) -> str:
+    """Flattens the tool_response of a Task PostToolUse hook (text, content blocks or a dict holding them)."""
+    if isinstance(response, dict):
+        return tool_result_text(response.get("content", response.get("result")))
+    return tool_result_text(response)
+
+
+def turn_signals(text: str) -> GuruTurnSignals:
+    return GuruTurnSignals(detect_stance(text), set(extract_tickers(text, MAX_TICKERS)), shingles(text))
+
+
+class ConvergenceDetector(TurnObserver):
+    """
+    Scores the panel's agreement after each guru turn and steers the Orchestrator to the
+    synthesis once it converges. on_converged, if given to start(), is called when it does.
+    """
+
+    def __init__(self, policy: Optional[ConvergencePolicy] = None):
+        self.policy = policy or ConvergencePolicy()
+        self.guru_names: List[str] = []
+        self.turns: Dict[str, List[GuruTurnSignals]] = {}
+        self.signals: Dict[str, float] = {}
+        self.agreement = 0.0
+        self.history: List[float] = []
+        self.converged_at: Optional[int] = None
+        self.denied_calls = 0
+        self.on_converged: Optional[Callable[[], None]] = None
+        # Task turns already scored by post_task_hook
+        self._scored: Set[str] = set()
+
+    def start(self, guru_names: List[str], on_converged: Optional[Callable[[], None]] = None) -> None:
+        self.guru_names = list(guru_names)
+        self.turns = {name: [] for name in guru_names}
+        self.on_converged = on_converged
+
+    @property
+    def rounds(self) -> int:
+        """Completed rounds: how often the least heard guru has spoken."""
+        return min((len(self.turns.get(name, [])) for name in self.guru_names), default=0)
+
+    @property
+    def converged(self) -> bool:
+        return self.converged_at is not None
+
+    def add_turn(self, guru: str, text: str) -> bool:
+        """Records one guru turn and rescores; returns True when this turn made the panel converge."""
+        self.turns.setdefault(guru, []).append(turn_signals(text))
+        self.signals = self.measure()
+        self.agreement = self.score(self.signals)
+        self.history.append(round(self.agreement, 4))
+        if (
+            not self.converged and self.rounds >= self.policy.min_rounds
+            and REQUIRED_SIGNAL in self.signals and len(self.signals) >= MIN_SIGNALS
+            and self.agreement >= self.policy.threshold
+        ):
+            self.converged_at = self.rounds
+            if self.on_converged is not None:
+                self.on_converged()
+            return True
+        return False
+
+    def measure(self) -> Dict[str, float]:
+        """The signals that can be measured from the turns so far."""
+        latest = [turns[-1] for name, turns in self.turns.items() if turns]
+        signals = {}
+        if len(latest) >= 2:
+            stances = [turn.stance for turn in latest]
+            signals["stance"] = max(stances.count(stance) for stance in set(stances)) / len(stances)
+            named = [turn.tickers for turn in latest if turn.tickers]
+            if len(named) >= 2:
+                pairs = list(combinations(named, 2))
+                signals["picks"] = sum(jaccard(a, b) for a, b in pairs) / len(pairs)
+        repeated = [jaccard(turns[-1].shingles, turns[-2].shingles) for turns in self.turns.values() if len(turns) >= 2]
+        if repeated:
+            signals["repetition"] = sum(repeated) / len(repeated)
+        return signals
+
+    @staticmethod
+    def score(signals: Dict[str, float]) -> float:
+        total = sum(WEIGHTS[name] for name in signals)
+        return sum(WEIGHTS[name] * value for name, value in signals.items()) / total if total else 0.0
+
+    def describe(self) -> str:
+        return ", ".join(f"{name} {value:.2f}" for name, value in self.signals.items())
+
+    def on_opening(self, analyses: Dict[str, str]) -> None:
+        for guru, text in analyses.items():
+            self.add_turn(guru, text)
+
+    def on_task_turn(self, turn: TaskTurn) -> None:
+        # A turn the PostToolUse hook has already scored is not counted twice
+        if turn.tool_use_id in self._scored:
+            self._scored.discard(turn.tool_use_id)
+        elif not turn.is_error:
+            self.add_turn(turn.guru, turn.result)
+
+    def note(self) -> str:
+        return CONVERGED_NOTE.format(agreement=self.agreement, signals=self.describe(), rounds=self.converged_at)
+
+    async def pre_task_hook(self, hook_input: Dict[str, Any], tool_use_id: Optional[str], context: Any) -> Dict[str, Any]:
+        """PreToolUse hook for Task: denies further guru calls once the panel has converged."""
+        if not self.converged:
+            return {}
+        self.denied_calls += 1
+        return {"hookSpecificOutput": {
+            "hookEventName": "PreToolUse",
+            "permissionDecision": "deny",
+            "permissionDecisionReason": self.note(),
+        }}
+
+    async def post_task_hook(self, hook_input: Dict[str, Any], tool_use_id: Optional[str], context: Any) -> Dict[str, Any]:
+        """
+        PostToolUse hook for Task: scores the guru's turn right away and tells the Orchestrator
+        to synthesize once the panel has converged, starting with the turn that converged it.
+        """
+        if tool_use_id is None or tool_use_id not in self._scored:
+            guru = (hook_input.get("tool_input") or {}).get("subagent_type", "unknown")
+            self.add_turn(guru, task_response_text(hook_input.get("tool_response")))
+            if tool_use_id is not None:
+                self._scored.add(tool_use_id)
+        if not self.converged:
+            return {}
+        return {"hookSpecificOutput": {"hookEventName": "PostToolUse", "additionalContext": self.note()}}
+
+    def report(self) -> Dict:
+        run = max((len(turns) for turns in self.turns.values()), default=0)
+        return {
+            "policy": asdict(self.policy),
+            "converged": self.converged,
+            "converged_after_round": self.converged_at,
+            "agreement": round(self.agreement, 4),
+            "signals": {name: round(value, 4) for name, value in self.signals.items()},
+            "rounds_run": run,
+            "expected_rounds": self.policy.expected_rounds,
+            "rounds_saved": max(0, self.policy.expected_rounds - run) if self.converged else 0,
+            "denied_calls": self.denied_calls,
+            "history": list(self.history),
+        }
+
+
+def enable_convergence(options: ClaudeAgentOptions, detector: ConvergenceDetector) -> ClaudeAgentOptions:
+    """Returns Orchestrator options that end the cross-examination once the detector reports convergence."""
+    hooks = dict(options.hooks or {})
+    hooks["PreToolUse"] = [*hooks.get("PreToolUse", []), HookMatcher(matcher="Task", hooks=[detector.pre_task_hook])]
+    hooks["PostToolUse"] = [*hooks.get("PostToolUse", []), HookMatcher(matcher="Task", hooks=[detector.post_task_hook])]
+    return dataclasses.replace(options, system_prompt=(options.system_prompt or "") + CONVERGENCE_RULES, hooks=hooks)
@@ -0,0 +1,210 @@
+"""
+Turn Digests
+
+Turns every completed guru turn into a compact, bounded-size digest: the guru's stance,
+the tickers they pick and a few key claims. Digests replace raw earlier turns wherever a
+guru needs to see what the rest of the panel said:
+
+- a PreToolUse hook attaches the digests of the other gurus' turns to every Task call,
+  so the Orchestrator no longer pastes growing copies of earlier answers into its prompts;
+- respond_to_peer reacts to a digest of the peer's analysis instead of the full dict.
+
+A digest is capped at MAX_CLAIMS claims of MAX_CLAIM_CHARS characters and MAX_PICKS
+tickers, and the attached block keeps only the latest MAX_DIGESTS_PER_CALL turns, so
+the context of a cross-examination call no longer grows with the length of the discussion.
+"""
+
+import dataclasses
+import json
+import re
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional
+
+from claude_agent_sdk import ClaudeAgentOptions, HookMatcher
+
+from task_turns import TaskTurn, TurnObserver
+
+MAX_CLAIMS = 3
+MAX_CLAIM_CHARS = 200
+MAX_PICKS = 5
+MAX_DIGESTS_PER_CALL = 12
+
+BULLISH_WORDS = ["buy", "bullish", "overweight", "undervalued", "opportunity", "accumulate",
+                 "매수", "긍정", "유망", "저평가", "기회"]
+BEARISH_WORDS = ["sell", "bearish", "underweight", "overvalued", "bubble", "avoid", "hype",
+                 "매도", "부정", "거품", "고평가", "회피"]
+CLAIM_MARKERS = ["because", "therefore", "i believe", "i think", "key", "risk", "moat", "valuation",
+                 "때문", "따라서", "핵심", "리스크", "생각", "판단"]
+
+TICKER_PATTERN = re.compile(r"(?:\$|\b)([A-Z]{2,5}(?:\.[A-Z])?)\b")
+# Upper-case words that are not tickers
+TICKER_STOPWORDS = {
+    "AI", "CEO", "CFO", "USA", "US", "GDP", "PER", "PBR", "PEG", "ROE", "ROI", "ETF", "IPO", "TAM",
+    "EPS", "FCF", "CPU", "GPU", "API", "DNA", "EV", "OK", "THE", "AND", "NOT", "BUY", "SELL",
+}
+
+
+def compact_json(value: Any) -> str:
+    """Serializes without indentation or spaces after separators."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1].rstrip() + "…"
+
+
+def _plain(text: str) -> str:
+    return re.sub(r"[#>*`_|]+", " ", text)
+
+
+def detect_stance(text: str) -> str:
+    """Returns "bullish", "bearish" or "neutral" from simple keyword counts."""
+    lowered = text.lower()
+    bullish = sum(lowered.count(word) for word in BULLISH_WORDS)
+    bearish = sum(lowered.count(word) for word in BEARISH_WORDS)
+    if bullish > bearish:
+        return "bullish"
+    if bearish > bullish:
+        return "bearish"
+    return "neutral"
+
+
+def extract_tickers(text: str, limit: int = MAX_PICKS) -> List[str]:
+    """Returns the distinct ticker-like symbols in order of first mention."""
+    tickers = []
+    for match in TICKER_PATTERN.finditer(text):
+        symbol = match.group(1)
+        if symbol not in TICKER_STOPWORDS and symbol not in tickers:
+            tickers.append(symbol)
+            if len(tickers) == limit:
+                break
+    return tickers
+
+
+def extract_claims(text: str, limit: int = MAX_CLAIMS) -> List[str]:
+    """Picks the sentences that carry an argument, falling back to the first sentences."""
+    sentences = [
+        sentence.strip() for sentence in re.split(r"(?<=[.!?。])\s+|\n+", _plain(text))
+        if len(sentence.strip()) > 20
+    ]
+    marked = [sentence for sentence in sentences if any(marker in sentence.lower() for marker in CLAIM_MARKERS)]
+    chosen = (marked + [sentence for sentence in sentences if sentence not in marked])[:limit]
+    return [_clip(sentence, MAX_CLAIM_CHARS) for sentence in chosen]
+
+
+@dataclass
+class TurnDigest:
+    """Bounded summary of one guru turn"""
+    guru: str
+    stance: str = "neutral"
+    picks: List[str] = field(default_factory=list)
+    claims: List[str] = field(default_factory=list)
+    source_chars: int = 0
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        del data["source_chars"]
+        return data
+
+    def to_compact(self) -> str:
+        return compact_json(self.to_dict())
+
+
+def digest_text(guru: str, text: str) -> TurnDigest:
+    """Digests a free-text guru answer."""
+    return TurnDigest(
+        guru=guru,
+        stance=detect_stance(text),
+        picks=extract_tickers(text),
+        claims=extract_claims(text),
+        source_chars=len(text),
+    )
+
+
+def digest_analysis(guru: str, analysis: Dict[str, Any]) -> TurnDigest:
+    """Digests a structured analyze_market result (or any dict with top_picks)."""
+    picks = analysis.get("top_picks") or []
+    claims = [
+        _clip(f"{pick.get('ticker', '')}: {pick.get('investment_thesis', '')}", MAX_CLAIM_CHARS)
+        for pick in picks[:MAX_CLAIMS] if isinstance(pick, dict)
+    ]
+    text = compact_json(analysis)
+    return TurnDigest(
+        guru=guru,
+        stance=detect_stance(text),
+        picks=[pick.get("ticker", "") for pick in picks[:MAX_PICKS] if isinstance(pick, dict)],
+        claims=claims or extract_claims(str(analysis.get("analysis_summary", ""))),
+        source_chars=len(text),
+    )
+
+
+def format_digest_block(digests: List[TurnDigest]) -> str:
+    """Renders digests as the compact block attached to a guru call."""
+    lines = "\n".join(digest.to_compact() for digest in digests[-MAX_DIGESTS_PER_CALL:])
+    return (
+        "# Panel Digest\n"
+        "Compact digests of the panel's earlier turns (stance, picks, key claims), one JSON object per line:\n"
+        + lines
+    )
+
+
+DIGEST_HINT = (
+    "\n\nWhen you call a Guru with the `Task` tool, do NOT paste earlier Gurus' answers into the prompt: "
+    "a compact digest of the panel's earlier turns is attached to every call automatically. "
+    "Just state the question or the point to address.\n"
+)
+
+
+class DigestBook(TurnObserver):
+    """Digests each completed guru turn and serves the digests to later calls."""
+
+    def __init__(self) -> None:
+        self.digests: List[TurnDigest] = []
+
+    def add(self, digest: TurnDigest) -> None:
+        self.digests.append(digest)
+
+    def on_opening(self, analyses: Dict[str, str]) -> None:
+        for guru, text in analyses.items():
+            self.add(digest_text(guru, text))
+
+    def on_structured_picks(self, picks: Dict[str, Optional[Dict]]) -> None:
+        for guru, analysis in picks.items():
+            if analysis is not None:
+                self.add(digest_analysis(guru, analysis))
+
+    def on_task_turn(self, turn: TaskTurn) -> None:
+        if not turn.is_error:
+            self.add(digest_text(turn.guru, turn.result))
+
+    def for_guru(self, guru: str) -> List[TurnDigest]:
+        """The digests a guru needs: every turn except their own."""
+        return [digest for digest in self.digests if digest.guru != guru]
+
+    def attach(self, tool_input: Dict[str, Any]) -> Dict[str, Any]:
+        """Returns the Task input with the relevant digests appended to its prompt."""
+        digests = self.for_guru(tool_input.get("subagent_type", ""))
+        if not digests:
+            return tool_input
+        prompt = tool_input.get("prompt", "")
+        return {**tool_input, "prompt": f"{prompt}\n\n{format_digest_block(digests)}"}
+
+    async def pre_task_hook(self, hook_input: Dict[str, Any], tool_use_id: Optional[str], context: Any) -> Dict[str, Any]:
+        """PreToolUse hook for Task: swaps in the input with digests attached."""
+        tool_input = hook_input.get("tool_input") or {}
+        updated = self.attach(tool_input)
+        if updated is tool_input:
+            return {}
+        return {"hookSpecificOutput": {
+            "hookEventName": "PreToolUse",
+            "permissionDecision": "allow",
+            "updatedInput": updated,
+        }}
+
+
+def enable_turn_digests(options: ClaudeAgentOptions, book: DigestBook) -> ClaudeAgentOptions:
+    """Returns Orchestrator options whose Task calls carry the panel digests."""
+    hooks = dict(options.hooks or {})
+    hooks["PreToolUse"] = [*hooks.get("PreToolUse", []), HookMatcher(matcher="Task", hooks=[book.pre_task_hook])]
+    return dataclasses.replace(options, system_prompt=(options.system_prompt or "") + DIGEST_HINT, hooks=hooks)
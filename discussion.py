@@ -0,0 +1,452 @@
+"""
+Discussion Runner
+
+Runs one complete guru discussion: builds the Orchestrator options, optionally collects
+the opening round in parallel, streams the Orchestrator's response into the transcript
+and fans every message out to the registered observers (console output, etc.).
+Shared by the interactive CLI (run.py) and the batch runner (batch_runner.py).
+"""
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import IO, Any, Dict, List, Optional, Sequence, Tuple
+
+from claude_agent_sdk import ClaudeAgentOptions, ClaudeSDKClient
+
+from budget import PHASE_STATUS, BudgetScheduler, DiscussionBudget, enable_budget
+from convergence import ConvergenceDetector, ConvergencePolicy, enable_convergence
+from digest import DigestBook, enable_turn_digests
+from events import (
+    DEFAULT_CONSOLE_FLUSH_INTERVAL, BufferedStream, DiscussionEvent, FinishEvent, OpeningEvent, StartEvent,
+    StatusEvent, StructuredPicksEvent, TextEvent, ToolUseEvent, format_console, message_events
+)
+from guru_registry import get_registry
+from guru_tools import (
+    collect_structured_picks, enable_guru_tools, format_structured_picks_block, render_structured_picks
+)
+from investment_gurus import AVAILABLE_GURUS, PersonaSource
+from opening_round import DEFAULT_OPENING_CONCURRENCY, format_opening_block, run_opening_round
+from orchestrator import ClientFactory, create_agent_options
+from recommendation_store import RecommendationStore, picks_filename
+from resilience import (
+    ResilienceMonitor, ResiliencePolicy, continuation_prompt, enable_resilience, format_absent_block
+)
+from routing import OPENING, ModelRouter, RoutingPolicy, enable_routing
+from search_cache import SearchCache, enable_search_cache
+from speculation import Prefetcher, SpeculationPolicy, enable_speculation
+from task_turns import TaskTurnTracker, TurnObserver
+from transcript import (
+    DEFAULT_FLUSH_INTERVAL, DEFAULT_FSYNC_INTERVAL, TranscriptWriter, default_transcript_filename
+)
+
+DEFAULT_TOPIC = "AI 에이전트 시대의 picks and shovels 투자 기회에 대해 토론해줘."
+DEFAULT_GURUS = list(AVAILABLE_GURUS)
+
+
+def parse_guru_names(gurus: Any) -> List[str]:
+    """
+    Accepts a comma-separated string or a list of names and returns the cleaned names.
+    Registered gurus given by name or alias (e.g. "워렌 버핏") become their registry key.
+    """
+    names = gurus.split(",") if isinstance(gurus, str) else list(gurus)
+    registry = get_registry()
+    return [registry.resolve(name) or name.strip() for name in names if name.strip()]
+
+
+def unregistered_suggestions(guru_names: List[str]) -> Dict[str, List[str]]:
+    """
+    Returns the registered gurus each unregistered name is close to, for a "did you mean"
+    the user confirms; a misspelled name is never swapped for another persona.
+    """
+    registry = get_registry()
+    suggestions = {}
+    for name in guru_names:
+        if registry.resolve(name) is None:
+            close = registry.suggest(name)
+            if close:
+                suggestions[name] = close
+    return suggestions
+
+
+@dataclass
+class DiscussionConfig:
+    """Everything needed to run one discussion"""
+    topic: str = DEFAULT_TOPIC
+    guru_names: List[str] = field(default_factory=lambda: list(DEFAULT_GURUS))
+    output: Optional[str] = None
+    parallel_opening: bool = False
+    opening_concurrency: int = DEFAULT_OPENING_CONCURRENCY
+    flush_interval: float = DEFAULT_FLUSH_INTERVAL
+    fsync_interval: float = DEFAULT_FSYNC_INTERVAL
+    # Serve analyze_market/respond_to_peer from the in-process MCP server
+    guru_tools: bool = False
+    # Hand every Guru's structured picks to the Orchestrator up front (implies guru_tools)
+    hybrid: bool = False
+    # Attach compact digests of earlier turns to every guru call instead of raw transcripts
+    turn_digests: bool = True
+    # Token, cost and wall-time limits; the Orchestrator is steered to conclude within them
+    budget: Optional[DiscussionBudget] = None
+    # End the cross-examination once the panel's agreement reaches the policy's threshold
+    convergence: Optional[ConvergencePolicy] = None
+    # Draft the predicted next gurus' turns in the background while one guru speaks
+    speculation: Optional[SpeculationPolicy] = None
+    # Run each phase, tool and guru on the model tier the policy assigns (default model when None)
+    routing: Optional[RoutingPolicy] = None
+    # Per-turn deadlines, retries and hedging; failing gurus are marked absent instead of failing the run
+    resilience: Optional[ResiliencePolicy] = None
+
+
+@dataclass
+class DiscussionResult:
+    """Outcome of one discussion run"""
+    topic: str
+    guru_names: List[str]
+    output: str
+    status: str = "completed"
+    error: Optional[str] = None
+    started_at: str = ""
+    duration_seconds: float = 0.0
+    message_count: int = 0
+    budget: Optional[Dict] = None
+    convergence: Optional[Dict] = None
+    speculation: Optional[Dict] = None
+    routing: Optional[Dict] = None
+    resilience: Optional[Dict] = None
+    # RecommendationStore of the structured picks (hybrid mode), for consensus.py --store
+    picks_path: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+@dataclass
+class DiscussionControls:
+    """The per-discussion objects the Orchestrator's hooks are bound to (None when disabled)"""
+    digests: Optional[DigestBook] = None
+    scheduler: Optional[BudgetScheduler] = None
+    convergence: Optional[ConvergenceDetector] = None
+    prefetcher: Optional[Prefetcher] = None
+    router: Optional[ModelRouter] = None
+    monitor: Optional[ResilienceMonitor] = None
+
+    def observers(self) -> List[TurnObserver]:
+        """The enabled controls, fed the discussion's messages ahead of the observers."""
+        controls = [self.digests, self.scheduler, self.convergence, self.prefetcher, self.router, self.monitor]
+        return [control for control in controls if control is not None]
+
+
+class DiscussionObserver(TurnObserver):
+    """
+    Base class for consumers of a running discussion; override the hooks you need.
+    The turn hooks (on_message, on_task_call, on_task_turn, ...) come from TurnObserver.
+    """
+
+    def on_start(self, config: DiscussionConfig) -> None:
+        pass
+
+    def on_status(self, text: str) -> None:
+        pass
+
+    def on_finish(self, result: DiscussionResult) -> None:
+        pass
+
+
+class EventObserver(DiscussionObserver):
+    """Turns the observer hooks into typed events (see events.py) and hands each one to on_event."""
+
+    def on_event(self, event: DiscussionEvent) -> None:
+        pass
+
+    def on_start(self, config: DiscussionConfig) -> None:
+        self.on_event(StartEvent(config.topic, list(config.guru_names)))
+
+    def on_status(self, text: str) -> None:
+        self.on_event(StatusEvent(text))
+
+    def on_opening(self, analyses: Dict[str, str]) -> None:
+        self.on_event(OpeningEvent(analyses))
+
+    def on_structured_picks(self, picks: Dict[str, Optional[Dict]]) -> None:
+        self.on_event(StructuredPicksEvent(picks))
+
+    def on_message(self, message: Any) -> None:
+        for event in message_events(message):
+            self.on_event(event)
+
+    def on_finish(self, result: DiscussionResult) -> None:
+        self.on_event(FinishEvent(result.to_dict()))
+
+
+class ConsoleRenderer(EventObserver):
+    """
+    Prints the discussion to stdout as it streams in.
+    Text is buffered and flushed on a time or size threshold; status lines and tool
+    calls are flushed right away because a (possibly long) wait usually follows them.
+    """
+
+    def __init__(self, stream: Optional[IO[str]] = None, flush_interval: float = DEFAULT_CONSOLE_FLUSH_INTERVAL):
+        self.output = BufferedStream(stream, flush_interval=flush_interval)
+
+    def on_event(self, event: DiscussionEvent) -> None:
+        text = format_console(event)
+        if text:
+            self.output.write(text, flush=not isinstance(event, TextEvent))
+        elif isinstance(event, FinishEvent):
+            self.output.flush()
+
+
+class NdjsonRenderer(EventObserver):
+    """Writes every event as one JSON line, with `t` seconds since the discussion started."""
+
+    def __init__(self, stream: Optional[IO[str]] = None, flush_interval: float = DEFAULT_CONSOLE_FLUSH_INTERVAL):
+        self.output = BufferedStream(stream, flush_interval=flush_interval)
+        self.started = time.monotonic()
+
+    def on_event(self, event: DiscussionEvent) -> None:
+        if isinstance(event, StartEvent):
+            self.started = time.monotonic()
+        line = json.dumps({"t": round(time.monotonic() - self.started, 3), **event.to_dict()}, ensure_ascii=False, default=str)
+        self.output.write(line + "\n", flush=isinstance(event, (ToolUseEvent, FinishEvent)))
+
+
+def create_discussion_options(
+    config: DiscussionConfig,
+    persona_cache: Optional[PersonaSource] = None,
+    search_cache: Optional[SearchCache] = None,
+    router: Optional[ModelRouter] = None,
+) -> Tuple[ClaudeAgentOptions, DiscussionControls]:
+    """
+    Builds the Orchestrator options for a discussion, together with the turn digests,
+    speculative prefetcher, budget scheduler and convergence detector its hooks are bound to.
+    A given model router (e.g. one that already routed the persona research) is reused.
+    """
+    options = create_agent_options(
+        config.guru_names, parallel_opening=config.parallel_opening, persona_cache=persona_cache,
+        structured_picks=config.hybrid,
+    )
+    controls = DiscussionControls()
+    if config.routing is not None or router is not None:
+        controls.router = router or ModelRouter(config.routing)
+        options = enable_routing(options, controls.router)
+    if search_cache is not None:
+        options = enable_search_cache(options, search_cache)
+    if config.guru_tools or config.hybrid:
+        options = enable_guru_tools(options)
+    if config.turn_digests:
+        controls.digests = DigestBook()
+        options = enable_turn_digests(options, controls.digests)
+    if config.resilience is not None:
+        # Before the prefetcher, so no draft is committed for a guru the monitor denies
+        controls.monitor = ResilienceMonitor(config.resilience)
+        options = enable_resilience(options, controls.monitor)
+    if config.budget is not None and config.budget.limited:
+        controls.scheduler = BudgetScheduler(config.budget)
+        options = enable_budget(options, controls.scheduler)
+    if config.convergence is not None:
+        controls.convergence = ConvergenceDetector(config.convergence)
+        options = enable_convergence(options, controls.convergence)
+    if config.speculation is not None:
+        # After every gate, so no draft is committed for a call they deny; its updatedInput
+        # carries the digests too
+        controls.prefetcher = Prefetcher(
+            config.speculation, controls.digests, router=controls.router,
+            scheduler=controls.scheduler, convergence=controls.convergence,
+        )
+        options = enable_speculation(options, controls.prefetcher)
+    return options, controls
+
+
+async def run_discussion(
+    config: DiscussionConfig,
+    observers: Sequence[DiscussionObserver] = (),
+    client_factory: ClientFactory = ClaudeSDKClient,
+    persona_cache: Optional[PersonaSource] = None,
+    search_cache: Optional[SearchCache] = None,
+    prompt: Optional[str] = None,
+    resumed: bool = False,
+    router: Optional[ModelRouter] = None,
+) -> DiscussionResult:
+    """
+    Runs one discussion end to end, streaming it into the transcript file.
+    On error or interruption the transcript is finalized as a partial document
+    and the exception is re-raised after observers have seen the failed result.
+    With a resilience policy, a failed Orchestrator session is first reconnected with
+    the guru turns completed so far, and gurus that keep failing are marked absent.
+
+    A resumed discussion passes the Orchestrator's initial prompt explicitly, skips the
+    opening round and appends to the existing transcript instead of writing a new header.
+    """
+    started = time.monotonic()
+    result = DiscussionResult(
+        topic=config.topic,
+        guru_names=list(config.guru_names),
+        output=config.output or default_transcript_filename(),
+        started_at=datetime.now().isoformat(timespec="seconds"),
+    )
+
+    options, controls = create_discussion_options(config, persona_cache, search_cache, router)
+    scheduler, convergence, router = controls.scheduler, controls.convergence, controls.router
+    if router is not None:
+        router.start(options)
+    monitor = controls.monitor
+    # The controls are fed every turn ahead of the observers, through one Task-turn tracker
+    listeners: List[TurnObserver] = [*controls.observers(), *observers]
+    tracker = TaskTurnTracker()
+
+    def notify(text: str) -> None:
+        for observer in observers:
+            observer.on_status(text)
+
+    if scheduler is not None:
+        scheduler.start(
+            config.guru_names, on_phase=lambda phase: notify(f"💰 Budget {scheduler.status()}: {PHASE_STATUS[phase]}"),
+        )
+    if convergence is not None:
+        convergence.start(config.guru_names, on_converged=lambda: notify(
+            f"🤝 Panel converged after round {convergence.converged_at} "
+            f"(agreement {convergence.agreement:.2f}: {convergence.describe()}), moving to the synthesis"
+        ))
+    prefetcher = controls.prefetcher
+    if prefetcher is not None:
+        prefetcher.start(options, config.topic, client_factory)
+
+    async def run_orchestrator(session_prompt: str) -> None:
+        async with client_factory(options) as client:
+            await client.query(session_prompt)
+            async for message in client.receive_response():
+                result.message_count += 1
+                transcript.write_message(message)
+                tracker.feed(message, listeners)
+
+    def on_absent(guru: str, reason: str) -> None:
+        transcript.write(f"\n\n> 🚑 **{guru} is absent:** {reason}\n\n")
+        if convergence is not None and guru in convergence.guru_names:
+            # Rounds are counted over the gurus still taking part
+            convergence.guru_names.remove(guru)
+        notify(f"🚑 {guru} marked absent: {reason}")
+
+    if monitor is not None:
+        monitor.start(config.guru_names, on_absent)
+
+    for observer in observers:
+        observer.on_start(config)
+
+    # Stream the discussion log to disk as it arrives
+    transcript = TranscriptWriter(
+        result.output, flush_interval=config.flush_interval, fsync_interval=config.fsync_interval,
+        append=resumed,
+    )
+    if resumed:
+        transcript.write(f"\n\n---\n\n> 🔁 **Discussion resumed at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}**\n\n")
+    else:
+        transcript.write_header(config.topic, config.guru_names)
+
+    try:
+        structured_block = None
+        if config.hybrid:
+            # Deterministic picks are ready in milliseconds, long before any LLM output
+            picks = await collect_structured_picks(config.guru_names)
+            structured_block = format_structured_picks_block(picks)
+            for listener in listeners:
+                listener.on_structured_picks(picks)
+            if not resumed:
+                transcript.write(render_structured_picks(picks))
+            transcript.flush()
+            store = RecommendationStore()
+            discussion_id = os.path.splitext(os.path.basename(result.output))[0]
+            for name, analysis in picks.items():
+                if analysis is not None:
+                    store.add_analysis(analysis, guru=name, discussion_id=discussion_id)
+            result.picks_path = picks_filename(result.output)
+            store.save(result.picks_path)
+
+        if prompt is None:
+            prompt = config.topic
+        if config.parallel_opening and not resumed:
+            for observer in observers:
+                observer.on_status(
+                    f"⚡ Collecting opening analyses in parallel (max {config.opening_concurrency} at a time)..."
+                )
+            def on_opening_message(guru_name: str, message: Any) -> None:
+                for listener in listeners:
+                    listener.on_opening_message(guru_name, message)
+
+            opening_models = None
+            if router is not None:
+                opening_models = {
+                    name: router.model_for(OPENING, name, definition.tools or [])
+                    for name, definition in (options.agents or {}).items()
+                }
+
+            analyses = await run_opening_round(
+                options, config.topic, concurrency=config.opening_concurrency,
+                client_factory=client_factory, on_message=on_opening_message, models=opening_models,
+                monitor=monitor,
+            )
+            if monitor is not None and not monitor.present:
+                raise RuntimeError("Every guru failed the opening round")
+            prompt = format_opening_block(config.topic, analyses)
+            for listener in listeners:
+                listener.on_opening(analyses)
+            transcript.write("## Opening Analyses\n\n")
+            for name, analysis in analyses.items():
+                transcript.write(f"### {name}\n\n{analysis}\n\n")
+            transcript.write("---\n\n")
+        if structured_block is not None:
+            prompt = f"{prompt}\n\n{structured_block}"
+        if monitor is not None and monitor.absent:
+            prompt = f"{prompt}\n\n{format_absent_block(monitor.absent)}"
+
+        # Execute the Orchestrator Agent; a failed session is reconnected with the turns completed so far
+        reconnects = 0
+        session_prompt = prompt
+        while True:
+            try:
+                await run_orchestrator(session_prompt)
+                break
+            except Exception as e:
+                if monitor is None or reconnects >= monitor.policy.orchestrator_retries:
+                    raise
+                reconnects += 1
+                monitor.stats.orchestrator_reconnects += 1
+                delay = monitor.backoff(reconnects - 1)
+                transcript.write(f"\n\n> ⚠️ **Connection lost ({e}); reconnecting**\n\n")
+                for observer in observers:
+                    observer.on_status(
+                        f"⚠️ Orchestrator session failed ({e}); reconnecting in {delay:.1f}s "
+                        f"({reconnects}/{monitor.policy.orchestrator_retries})"
+                    )
+                await monitor.sleep(delay)
+                session_prompt = continuation_prompt(prompt, monitor.completed, monitor.absent)
+
+        transcript.close()
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        result.status = "interrupted"
+        transcript.close(interrupted=True, reason="interrupted by user")
+        raise
+    except Exception as e:
+        result.status = "failed"
+        result.error = str(e)
+        transcript.close(interrupted=True, reason=f"error: {e}")
+        raise
+    finally:
+        result.duration_seconds = round(time.monotonic() - started, 3)
+        if scheduler is not None:
+            result.budget = scheduler.report()
+        if convergence is not None:
+            result.convergence = convergence.report()
+        if prefetcher is not None:
+            await prefetcher.close()
+            result.speculation = prefetcher.report()
+        if router is not None:
+            result.routing = router.report()
+        if monitor is not None:
+            result.resilience = monitor.report()
+        for observer in observers:
+            observer.on_finish(result)
+
+    return result
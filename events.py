@@ -0,0 +1,187 @@
+"""
+Discussion Events
+
+Typed events for everything a discussion reports while it runs: status lines, the
+opening round, streamed text, tool calls and their results, and the final outcome.
+SDK messages are converted once (message_events) and every consumer works on the
+events: the console renderer, the NDJSON stream (`run.py --output-format ndjson`) and
+the SSE service.
+
+Console and NDJSON output go through BufferedStream, which batches writes and flushes
+on a time or size threshold instead of issuing a flushed write per text chunk.
+"""
+
+import sys
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, ClassVar, Dict, IO, List, Optional
+
+from claude_agent_sdk import AssistantMessage, ResultMessage, TextBlock, ToolResultBlock, ToolUseBlock, UserMessage
+
+from transcript import describe_tool_use, tool_result_text
+
+DEFAULT_CONSOLE_FLUSH_INTERVAL = 0.1
+DEFAULT_CONSOLE_BUFFER_BYTES = 8 * 1024
+
+
+@dataclass
+class DiscussionEvent:
+    """Base of all events; `type` is the wire name used in NDJSON and SSE"""
+    type: ClassVar[str] = "event"
+
+    def to_dict(self) -> Dict:
+        return {"type": self.type, **asdict(self)}
+
+
+@dataclass
+class StartEvent(DiscussionEvent):
+    type: ClassVar[str] = "start"
+    topic: str
+    guru_names: List[str]
+
+
+@dataclass
+class StatusEvent(DiscussionEvent):
+    type: ClassVar[str] = "status"
+    text: str
+
+
+@dataclass
+class StructuredPicksEvent(DiscussionEvent):
+    type: ClassVar[str] = "structured_picks"
+    picks: Dict[str, Optional[Dict]]
+
+
+@dataclass
+class OpeningEvent(DiscussionEvent):
+    type: ClassVar[str] = "opening"
+    analyses: Dict[str, str]
+
+
+@dataclass
+class TextEvent(DiscussionEvent):
+    type: ClassVar[str] = "text"
+    text: str
+    parent_tool_use_id: Optional[str] = None
+
+
+@dataclass
+class ToolUseEvent(DiscussionEvent):
+    type: ClassVar[str] = "tool_use"
+    id: str
+    name: str
+    input: Dict[str, Any]
+    label: str
+    parent_tool_use_id: Optional[str] = None
+
+
+@dataclass
+class ToolResultEvent(DiscussionEvent):
+    type: ClassVar[str] = "tool_result"
+    tool_use_id: str
+    is_error: bool
+    chars: int
+    parent_tool_use_id: Optional[str] = None
+
+
+@dataclass
+class ResultEvent(DiscussionEvent):
+    type: ClassVar[str] = "result"
+    num_turns: int
+    duration_ms: int
+    total_cost_usd: Optional[float]
+    is_error: bool
+    usage: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class FinishEvent(DiscussionEvent):
+    type: ClassVar[str] = "finish"
+    result: Dict
+
+
+def tool_label(block: ToolUseBlock) -> str:
+    """One plain-text line announcing a tool call, e.g. "🎤 [Social] Passing the microphone to: warren_buffett..."."""
+    icon, caption, subject, suffix = describe_tool_use(block)
+    return f"{icon} {caption} {subject}{suffix}"
+
+
+def message_events(message: Any) -> List[DiscussionEvent]:
+    """Converts one SDK message into events (an empty list for messages nobody displays)."""
+    events: List[DiscussionEvent] = []
+    if isinstance(message, AssistantMessage):
+        for block in message.content:
+            if isinstance(block, TextBlock):
+                events.append(TextEvent(block.text, message.parent_tool_use_id))
+            elif isinstance(block, ToolUseBlock):
+                events.append(ToolUseEvent(
+                    block.id, block.name, block.input, tool_label(block), message.parent_tool_use_id
+                ))
+    elif isinstance(message, UserMessage) and isinstance(message.content, list):
+        for block in message.content:
+            if isinstance(block, ToolResultBlock):
+                events.append(ToolResultEvent(
+                    block.tool_use_id, bool(block.is_error), len(tool_result_text(block.content)),
+                    message.parent_tool_use_id,
+                ))
+    elif isinstance(message, ResultMessage):
+        events.append(ResultEvent(
+            message.num_turns, message.duration_ms, message.total_cost_usd, message.is_error, message.usage
+        ))
+    return events
+
+
+def format_console(event: DiscussionEvent) -> Optional[str]:
+    """Renders an event for a human reader (None for events the console does not show)."""
+    if isinstance(event, StatusEvent):
+        return f"{event.text}\n"
+    if isinstance(event, StructuredPicksEvent):
+        lines = []
+        for name, analysis in event.picks.items():
+            if analysis is not None:
+                tickers = ", ".join(pick.get("ticker", "") for pick in analysis.get("top_picks", []))
+                lines.append(f"📊 {name}: {tickers}\n")
+        return "".join(lines) or None
+    if isinstance(event, TextEvent):
+        return event.text
+    if isinstance(event, ToolUseEvent):
+        return f"{event.label}\n"
+    return None
+
+
+class BufferedStream:
+    """Batches writes to a text stream and flushes on a time or size threshold."""
+
+    def __init__(
+        self,
+        stream: Optional[IO[str]] = None,
+        flush_interval: float = DEFAULT_CONSOLE_FLUSH_INTERVAL,
+        max_buffer_bytes: int = DEFAULT_CONSOLE_BUFFER_BYTES,
+        clock: Any = time.monotonic,
+    ):
+        self.stream = stream
+        self.flush_interval = flush_interval
+        self.max_buffer_bytes = max_buffer_bytes
+        self.clock = clock
+        self.flushes = 0
+        self._buffer: List[str] = []
+        self._buffer_bytes = 0
+        self._last_flush = clock()
+
+    def write(self, text: str, flush: bool = False) -> None:
+        """Buffers text; flush=True forces it out (e.g. before the stream is likely to stall)."""
+        self._buffer.append(text)
+        self._buffer_bytes += len(text)
+        if flush or self._buffer_bytes >= self.max_buffer_bytes or self.clock() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        # Resolved at flush time so redirected or captured stdout is honoured
+        stream = self.stream or sys.stdout
+        if self._buffer:
+            stream.write("".join(self._buffer))
+            self._buffer.clear()
+            self._buffer_bytes = 0
+            stream.flush()
+            self.flushes += 1
+        self._last_flush = self.clock()
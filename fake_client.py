@@ -0,0 +1,222 @@
+"""
+Fake Claude SDK Client
+
+A local, network-free stand-in for claude_agent_sdk.ClaudeSDKClient.
+It replays scripted AssistantMessage streams so the discussion pipeline can be
+exercised in tests without live credentials.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence
+
+from claude_agent_sdk import (
+    AssistantMessage, ClaudeAgentOptions, ResultMessage, TextBlock, ToolResultBlock, ToolUseBlock, UserMessage
+)
+
+# A responder receives the client options and the prompt and returns the messages to emit
+Responder = Callable[[Optional[ClaudeAgentOptions], str], List[Any]]
+
+FAKE_MODEL = "fake-model"
+
+
+def text_message(text: str, parent_tool_use_id: Optional[str] = None) -> AssistantMessage:
+    """Builds an AssistantMessage holding a single TextBlock."""
+    return AssistantMessage(
+        content=[TextBlock(text=text)], model=FAKE_MODEL, parent_tool_use_id=parent_tool_use_id
+    )
+
+
+def result_message(num_turns: int = 1, duration_ms: int = 0, **kwargs: Any) -> ResultMessage:
+    """Builds the ResultMessage that terminates a response stream."""
+    return ResultMessage(
+        subtype="success",
+        duration_ms=duration_ms,
+        duration_api_ms=duration_ms,
+        is_error=False,
+        num_turns=num_turns,
+        session_id="fake-session",
+        **kwargs,
+    )
+
+
+def scripted_discussion(
+    guru_names: Sequence[str],
+    rounds: int = 1,
+    text_chars: int = 200,
+    searches_per_turn: int = 1,
+) -> List[Any]:
+    """
+    Builds a realistic Orchestrator message stream: an introduction, `rounds` rounds in
+    which every guru is called through Task (with WebSearch calls and a streamed answer
+    inside the sub-agent), and a closing synthesis. Text blocks are `text_chars` long.
+    """
+    filler = ("Moats, margins and multiples. " * (text_chars // 30 + 1))[:text_chars]
+    usage = {"input_tokens": text_chars, "output_tokens": text_chars // 4}
+    messages: List[Any] = [text_message(f"Welcome to the panel. {filler}")]
+    call = 0
+    for round_number in range(rounds):
+        for guru in guru_names:
+            call += 1
+            task_id = f"task-{call}"
+            messages.append(AssistantMessage(
+                content=[ToolUseBlock(id=task_id, name="Task", input={
+                    "subagent_type": guru, "prompt": f"Round {round_number + 1}: your view?"
+                })],
+                model=FAKE_MODEL, message_id=f"orch-{call}", usage=usage,
+            ))
+            for search in range(searches_per_turn):
+                search_id = f"{task_id}-search-{search}"
+                messages.append(AssistantMessage(
+                    content=[ToolUseBlock(id=search_id, name="WebSearch", input={"query": f"{guru} outlook"})],
+                    model=FAKE_MODEL, parent_tool_use_id=task_id, message_id=f"{task_id}-s{search}", usage=usage,
+                ))
+                messages.append(UserMessage(
+                    content=[ToolResultBlock(tool_use_id=search_id, content=filler)], parent_tool_use_id=task_id
+                ))
+            messages.append(AssistantMessage(
+                content=[TextBlock(text=f"{guru}: {filler}")],
+                model=FAKE_MODEL, parent_tool_use_id=task_id, message_id=f"{task_id}-answer", usage=usage,
+            ))
+            messages.append(UserMessage(content=[ToolResultBlock(
+                tool_use_id=task_id, content=[{"type": "text", "text": f"{guru}: {filler}"}]
+            )]))
+    messages.append(text_message(f"Conclusion. {filler}"))
+    messages.append(result_message(num_turns=call + 2, total_cost_usd=0.0))
+    return messages
+
+
+def discussion_responder(rounds: int = 1, text_chars: int = 200, searches_per_turn: int = 1) -> Responder:
+    """Responder that plays a scripted_discussion over the panel registered in the options."""
+    def responder(options: Optional[ClaudeAgentOptions], prompt: str) -> List[Any]:
+        guru_names = list(options.agents or {}) if options is not None else []
+        return scripted_discussion(guru_names, rounds, text_chars, searches_per_turn)
+    return responder
+
+
+def echo_responder(options: Optional[ClaudeAgentOptions], prompt: str) -> List[Any]:
+    """Default responder: answers every prompt with a short acknowledgement."""
+    return [text_message(f"[fake] {prompt[:80]}"), result_message()]
+
+
+class FakeClaudeSDKClient:
+    """
+    Drop-in replacement for ClaudeSDKClient driven by a scripted responder.
+    latency is the delay before each streamed message; connect_latency simulates session startup.
+    """
+
+    def __init__(
+        self,
+        options: Optional[ClaudeAgentOptions] = None,
+        responder: Responder = echo_responder,
+        latency: float = 0.0,
+        connect_latency: float = 0.0,
+    ):
+        self.options = options
+        self.responder = responder
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.queries: List[str] = []
+        self.connected = False
+
+    async def connect(self, prompt: Optional[str] = None) -> None:
+        if self.connect_latency:
+            await asyncio.sleep(self.connect_latency)
+        self.connected = True
+        if prompt is not None:
+            await self.query(prompt)
+
+    async def disconnect(self) -> None:
+        self.connected = False
+
+    async def get_server_info(self) -> Optional[Dict[str, Any]]:
+        if not self.connected:
+            raise RuntimeError("Not connected. Call connect() first.")
+        return {"fake": True}
+
+    async def __aenter__(self) -> "FakeClaudeSDKClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> bool:
+        await self.disconnect()
+        return False
+
+    async def query(self, prompt: str, session_id: str = "default") -> None:
+        self.queries.append(prompt)
+
+    async def receive_response(self) -> AsyncIterator[Any]:
+        """Yields the scripted messages for the most recent query."""
+        prompt = self.queries[-1] if self.queries else ""
+        for message in self.responder(self.options, prompt):
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            yield message
+
+
+@dataclass
+class Fault:
+    """What goes wrong in one session: after `after_messages` messages it stalls for `delay` seconds, then raises `error`"""
+    after_messages: int = 0
+    delay: float = 0.0
+    error: Optional[BaseException] = None
+
+
+# A fault plan receives the session's options and its number (1-based) and returns its fault, if any
+FaultPlan = Callable[[Optional[ClaudeAgentOptions], int], Optional[Fault]]
+
+
+class FaultyClient:
+    """Wraps a client and injects one fault into its response stream."""
+
+    def __init__(self, client: Any, fault: Fault):
+        self.client = client
+        self.fault = fault
+
+    async def __aenter__(self) -> "FaultyClient":
+        await self.client.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> bool:
+        return await self.client.__aexit__(exc_type, exc_val, exc_tb)
+
+    async def query(self, prompt: str, session_id: str = "default") -> None:
+        await self.client.query(prompt, session_id)
+
+    async def _fault(self) -> None:
+        if self.fault.delay:
+            await asyncio.sleep(self.fault.delay)
+        if self.fault.error is not None:
+            raise self.fault.error
+
+    async def receive_response(self) -> AsyncIterator[Any]:
+        count = 0
+        async for message in self.client.receive_response():
+            if count == self.fault.after_messages:
+                await self._fault()
+            count += 1
+            yield message
+        if count <= self.fault.after_messages:
+            await self._fault()
+
+
+class FaultInjector:
+    """
+    Client factory that injects faults into the sessions it creates, following a fault plan.
+    Sessions without a fault are the wrapped factory's clients, unchanged.
+    """
+
+    def __init__(self, plan: FaultPlan, client_factory: Callable[[Any], Any] = FakeClaudeSDKClient):
+        self.plan = plan
+        self.client_factory = client_factory
+        self.sessions = 0
+        self.faults = 0
+
+    def __call__(self, options: Optional[ClaudeAgentOptions] = None) -> Any:
+        self.sessions += 1
+        client = self.client_factory(options)
+        fault = self.plan(options, self.sessions)
+        if fault is None:
+            return client
+        self.faults += 1
+        return FaultyClient(client, fault)
@@ -0,0 +1,182 @@
+"""
+Guru Persona Registry
+
+Loads guru personas from data directories instead of code, so the catalog can grow to
+thousands of personas. Each directory holds an optional index and one prompt body per
+persona:
+
+    personas/
+        index.json          {"warren_buffett": {"name": "Warren Buffett", "aliases": ["워렌 버핏", "버핏"]}}
+        warren_buffett.md   the persona prompt body
+
+Persona files without an index entry are registered under their file name. Only the
+index is read up front; a prompt body is read from disk the first time it is needed.
+Names resolve in O(1) through an alias index over the key, the display name, the
+listed aliases (English, Korean, ...) and the surname, all folded so that case, spacing,
+punctuation and accents do not matter. Misspellings never resolve: suggest() only offers
+the closest names for a "did you mean" the user confirms.
+"""
+
+import difflib
+import functools
+import json
+import os
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Set
+
+DEFAULT_PERSONA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "personas")
+# Extra persona directories (os.pathsep-separated), layered over the bundled ones
+PERSONA_PATH_ENV = "GURU_PERSONA_PATH"
+INDEX_FILENAME = "index.json"
+PERSONA_SUFFIX = ".md"
+
+
+def normalize_guru_name(guru_name: str) -> str:
+    """Normalizes a guru name into the snake_case key used for lookups."""
+    name = unicodedata.normalize("NFKC", guru_name)
+    return "_".join(name.strip().lower().replace("-", " ").split())
+
+
+def fold_guru_name(guru_name: str) -> str:
+    """
+    Folds a name for alias matching: lower case, accents removed and every space,
+    underscore and punctuation mark dropped ("Warren E. Buffett" -> "warrenebuffett").
+    """
+    decomposed = unicodedata.normalize("NFKD", guru_name.lower())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return re.sub(r"[\W_]+", "", unicodedata.normalize("NFC", stripped))
+
+
+@dataclass
+class PersonaEntry:
+    """One registered persona; the prompt body stays on disk until requested"""
+    key: str
+    name: str
+    path: Path
+    aliases: List[str] = field(default_factory=list)
+
+
+class GuruRegistry:
+    """
+    Persona catalog backed by one or more data directories.
+    Later directories override personas of the same key in earlier ones.
+    """
+
+    def __init__(self, directories: Sequence[str] = (DEFAULT_PERSONA_DIR,)):
+        self.directories = [Path(directory) for directory in directories]
+        self._entries: Optional[Dict[str, PersonaEntry]] = None
+        self._aliases: Dict[str, str] = {}
+        self._bodies: Dict[str, str] = {}
+        self.ambiguous: Set[str] = set()
+
+    @property
+    def entries(self) -> Dict[str, PersonaEntry]:
+        if self._entries is None:
+            self._load()
+        return self._entries
+
+    def _load(self) -> None:
+        entries: Dict[str, PersonaEntry] = {}
+        for directory in self.directories:
+            if not directory.is_dir():
+                continue
+            index_path = directory / INDEX_FILENAME
+            index = {}
+            if index_path.exists():
+                with open(index_path, encoding="utf-8") as f:
+                    index = json.load(f)
+            for path in sorted(directory.glob(f"*{PERSONA_SUFFIX}")):
+                key = normalize_guru_name(path.stem)
+                meta = index.get(path.stem) or index.get(key) or {}
+                entries[key] = PersonaEntry(
+                    key=key,
+                    name=meta.get("name") or key.replace("_", " ").title(),
+                    path=path,
+                    aliases=list(meta.get("aliases", [])),
+                )
+        self._entries = entries
+        self._build_alias_index()
+
+    def _build_alias_index(self) -> None:
+        # Keys, display names and listed aliases win over surnames; a surname shared by
+        # several personas (or clashing with an explicit alias) is not an alias at all
+        explicit: Dict[str, str] = {}
+        surnames: Dict[str, Set[str]] = {}
+        for entry in self._entries.values():
+            for alias in [entry.key, entry.name, *entry.aliases]:
+                folded = fold_guru_name(alias)
+                if not folded:
+                    continue
+                if explicit.setdefault(folded, entry.key) != entry.key:
+                    self.ambiguous.add(folded)
+            parts = entry.name.split()
+            if len(parts) > 1:
+                surnames.setdefault(fold_guru_name(parts[-1]), set()).add(entry.key)
+
+        # Every persona stays reachable through its own key, even when the key is also
+        # someone else's alias
+        for entry in self._entries.values():
+            folded_key = fold_guru_name(entry.key)
+            explicit[folded_key] = entry.key
+            self.ambiguous.discard(folded_key)
+        for folded in self.ambiguous:
+            explicit.pop(folded, None)
+
+        for folded, keys in surnames.items():
+            if folded in explicit or folded in self.ambiguous:
+                continue
+            if len(keys) == 1:
+                explicit[folded] = next(iter(keys))
+            else:
+                self.ambiguous.add(folded)
+        self._aliases = explicit
+
+    def resolve(self, guru_name: str) -> Optional[str]:
+        """Returns the persona key for a key, name or alias, or None if it is not registered."""
+        entries = self.entries
+        key = normalize_guru_name(guru_name)
+        if key in entries:
+            return key
+        return self._aliases.get(fold_guru_name(guru_name))
+
+    def get(self, guru_name: str) -> Optional[PersonaEntry]:
+        key = self.resolve(guru_name)
+        return self.entries[key] if key is not None else None
+
+    def prompt(self, guru_name: str) -> Optional[str]:
+        """Returns the persona prompt body, reading it from disk on first use."""
+        key = self.resolve(guru_name)
+        if key is None:
+            return None
+        if key not in self._bodies:
+            self._bodies[key] = self.entries[key].path.read_text(encoding="utf-8")
+        return self._bodies[key]
+
+    def suggest(self, guru_name: str, limit: int = 3) -> List[str]:
+        """Returns the keys of the closest registered names, for 'did you mean' messages."""
+        if not self.entries:
+            return []
+        matches = difflib.get_close_matches(fold_guru_name(guru_name), list(self._aliases), n=limit * 2)
+        return list(dict.fromkeys(self._aliases[match] for match in matches))[:limit]
+
+    def keys(self) -> List[str]:
+        return list(self.entries)
+
+    def __contains__(self, guru_name: str) -> bool:
+        return self.resolve(guru_name) is not None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[PersonaEntry]:
+        return iter(self.entries.values())
+
+
+@functools.lru_cache(maxsize=None)
+def get_registry() -> GuruRegistry:
+    """Returns the shared registry over the bundled personas and any GURU_PERSONA_PATH directories."""
+    extra = [path for path in os.environ.get(PERSONA_PATH_ENV, "").split(os.pathsep) if path]
+    return GuruRegistry([DEFAULT_PERSONA_DIR, *extra])
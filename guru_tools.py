@@ -0,0 +1,102 @@
+"""
+In-Process Guru Tools
+
+Serves the structured guru tools of investment_guru_agent.py (analyze_market and
+respond_to_peer) from an in-process SDK MCP server, so the Orchestrator can get a guru's
+deterministic picks without starting an LLM sub-agent.
+
+Hybrid mode goes one step further: the picks of every guru with built-in recommendation
+logic are computed before the Orchestrator even connects, written to the transcript
+right away and handed to the Orchestrator in its first message. LLM sub-agents are then
+only needed for commentary, critique and cross-examination.
+"""
+
+import dataclasses
+from typing import Any, Dict, List, Optional
+
+from claude_agent_sdk import ClaudeAgentOptions, create_sdk_mcp_server
+
+from digest import compact_json
+from investment_guru_agent import InvestmentGuruFactory, analyze_market, respond_to_peer
+
+GURU_TOOLS_SERVER_NAME = "guru_tools"
+ANALYZE_MARKET_TOOL_NAME = f"mcp__{GURU_TOOLS_SERVER_NAME}__analyze_market"
+RESPOND_TO_PEER_TOOL_NAME = f"mcp__{GURU_TOOLS_SERVER_NAME}__respond_to_peer"
+GURU_TOOL_NAMES = [ANALYZE_MARKET_TOOL_NAME, RESPOND_TO_PEER_TOOL_NAME]
+
+GURU_TOOLS_HINT = (
+    f"\n\nFor a Guru's structured stock picks, call `{ANALYZE_MARKET_TOOL_NAME}` with the guru_name; "
+    f"for a structured reaction to another Guru's analysis, call `{RESPOND_TO_PEER_TOOL_NAME}`. "
+    "Both answer instantly without a sub-agent; use the `Task` tool for commentary and debate.\n"
+)
+
+
+def create_guru_tools_server() -> Any:
+    """Creates the SDK MCP server configuration exposing analyze_market and respond_to_peer."""
+    return create_sdk_mcp_server(name=GURU_TOOLS_SERVER_NAME, tools=[analyze_market, respond_to_peer])
+
+
+def enable_guru_tools(options: ClaudeAgentOptions) -> ClaudeAgentOptions:
+    """Returns Orchestrator options with the in-process guru tools registered and allowed."""
+    mcp_servers = dict(options.mcp_servers) if isinstance(options.mcp_servers, dict) else {}
+    mcp_servers[GURU_TOOLS_SERVER_NAME] = create_guru_tools_server()
+    allowed_tools = list(options.allowed_tools or [])
+    allowed_tools += [name for name in GURU_TOOL_NAMES if name not in allowed_tools]
+    return dataclasses.replace(
+        options,
+        system_prompt=(options.system_prompt or "") + GURU_TOOLS_HINT,
+        allowed_tools=allowed_tools,
+        mcp_servers=mcp_servers,
+    )
+
+
+async def collect_structured_picks(guru_names: List[str]) -> Dict[str, Optional[Dict]]:
+    """
+    Runs analyze_market for every guru in process. Gurus without built-in recommendation
+    logic map to None; the Orchestrator has to ask them through a sub-agent.
+    """
+    picks: Dict[str, Optional[Dict]] = {}
+    for name in guru_names:
+        agent = InvestmentGuruFactory.create_guru_agent(name)
+        try:
+            picks[name] = await agent.analyze_ai_picks_shovels()
+        except NotImplementedError:
+            picks[name] = None
+    return picks
+
+
+def format_structured_picks_block(picks: Dict[str, Optional[Dict]]) -> str:
+    """Builds the "Structured Picks" section of the Orchestrator's first message."""
+    sections = []
+    for name, analysis in picks.items():
+        if analysis is None:
+            sections.append(f"### {name}\n\n(no structured picks; ask this Guru through the `Task` tool)")
+        else:
+            sections.append(f"### {name}\n\n```json\n{compact_json(analysis)}\n```")
+    return (
+        "# Structured Picks\n\n"
+        "Each Guru's deterministic picks, computed in process. Treat them as the Gurus' positions; "
+        "do not call the Gurus just to repeat them.\n\n"
+        + "\n\n".join(sections)
+    )
+
+
+def render_structured_picks(picks: Dict[str, Optional[Dict]]) -> str:
+    """Renders the picks as the markdown transcript section."""
+    lines = ["## Structured Picks\n"]
+    for name, analysis in picks.items():
+        lines.append(f"### {name}\n")
+        if analysis is None:
+            lines.append("_No structured picks; this Guru speaks in the discussion below._\n")
+            continue
+        lines.append("| Ticker | Company | Sector | Horizon | Thesis |")
+        lines.append("|---|---|---|---|---|")
+        for pick in analysis.get("top_picks", []):
+            thesis = pick.get("investment_thesis", "").replace("|", "\\|").replace("\n", " ")
+            lines.append(
+                f"| {pick.get('ticker', '')} | {pick.get('company_name', '')} | {pick.get('sector', '')} "
+                f"| {pick.get('time_horizon', '')} | {thesis} |"
+            )
+        lines.append("")
+    return "\n".join(lines) + "\n---\n\n"
+
@@ -11,8 +11,11 @@ from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
 import json
 from claude_agent_sdk import tool
+from digest import compact_json, digest_analysis
+from investment_gurus import resolve_guru_name
+from recommendation_store import RecommendationStore
 
-@dataclass
+@dataclass(slots=True)
 class InvestmentRecommendation:
     """Represents a single investment recommendation"""
     company_name: str
@@ -40,7 +43,7 @@ class BaseInvestmentGuruAgent:
     
     async def analyze_ai_picks_shovels(self) -> Dict:
         """Analyze AI agent era picks and shovels opportunities"""
-        recommendations = await self._generate_recommendations()
+        recommendations = await self.recommend()
         return {
             "guru": self.name,
             "philosophy": self.philosophy,
@@ -48,6 +51,10 @@ class BaseInvestmentGuruAgent:
             "analysis_summary": await self._provide_analysis_summary(recommendations)
         }
     
+    async def recommend(self) -> List[InvestmentRecommendation]:
+        """Returns the guru's ranked picks; raises NotImplementedError for gurus without built-in logic"""
+        return await self._generate_recommendations()
+
     async def _generate_recommendations(self) -> List[InvestmentRecommendation]:
         """Generate investment recommendations based on guru's style"""
         raise NotImplementedError("Each guru must implement their own recommendation logic")
@@ -259,18 +266,19 @@ class BenjaminGrahamAgent(BaseInvestmentGuruAgent):
 class InvestmentGuruFactory:
     """Factory class to create investment guru agents"""
     
+    # Keyed by persona registry key; Korean and English names resolve through the registry aliases
     GURU_MAPPING = {
-        "워렌 버핏": WarrenBuffettAgent,
-        "피터 린치": PeterLynchAgent,
-        "캐시 우드": CathieWoodAgent,
-        "레이 달리오": RayDalioAgent,
-        "벤자민 그레이엄": BenjaminGrahamAgent
+        "warren_buffett": WarrenBuffettAgent,
+        "peter_lynch": PeterLynchAgent,
+        "cathie_wood": CathieWoodAgent,
+        "ray_dalio": RayDalioAgent,
+        "benjamin_graham": BenjaminGrahamAgent
     }
     
     @classmethod
     def create_guru_agent(cls, guru_name: str) -> BaseInvestmentGuruAgent:
-        """Create a guru agent by name"""
-        agent_class = cls.GURU_MAPPING.get(guru_name)
+        """Create a guru agent by name, key or alias (e.g. "워렌 버핏" or "warren_buffett")"""
+        agent_class = cls.GURU_MAPPING.get(resolve_guru_name(guru_name))
         if agent_class:
             return agent_class()
         else:
@@ -285,22 +293,43 @@ class InvestmentGuruFactory:
     
     @classmethod
     def get_available_gurus(cls) -> List[str]:
-        """Get list of available guru names"""
+        """Get list of available guru keys"""
         return list(cls.GURU_MAPPING.keys())
 
+async def collect_panel_recommendations(guru_names: List[str], discussion_id: str = "") -> RecommendationStore:
+    """
+    Collects every guru's picks into one columnar store for the consensus engine (consensus.py).
+    Gurus without built-in recommendation logic are skipped.
+    """
+    store = RecommendationStore()
+    for guru_name in guru_names:
+        agent = InvestmentGuruFactory.create_guru_agent(guru_name)
+        try:
+            recommendations = await agent.recommend()
+        except NotImplementedError:
+            continue
+        store.add_picks(resolve_guru_name(guru_name), recommendations, discussion_id)
+    return store
+
 # --- Claude Agent SDK Tool Logic Extraction for Testing ---
 
 async def _analyze_market_logic(args: Dict[str, Any]) -> Dict[str, Any]:
     """Inner logic for analyze_market tool"""
     guru_name = args["guru_name"]
     agent = InvestmentGuruFactory.create_guru_agent(guru_name)
-    result = await agent.analyze_ai_picks_shovels()
+    try:
+        result = await agent.analyze_ai_picks_shovels()
+    except NotImplementedError:
+        return {
+            "content": [{"type": "text", "text": f"No structured picks for {guru_name}; ask them through the Task tool."}],
+            "is_error": True,
+        }
     
     return {
         "content": [
             {
                 "type": "text",
-                "text": json.dumps(result, ensure_ascii=False, indent=2)
+                "text": compact_json(result)
             }
         ]
     }
@@ -309,16 +338,17 @@ async def _respond_to_peer_logic(args: Dict[str, Any]) -> Dict[str, Any]:
     """Inner logic for respond_to_peer tool"""
     guru_name = args["guru_name"]
     peer_name = args["peer_name"]
-    peer_analysis = args["peer_analysis"]
+    # React to a bounded digest of the peer's analysis, not the full (ever-growing) dict
+    peer_digest = digest_analysis(peer_name, args["peer_analysis"]).to_dict()
     
     agent = InvestmentGuruFactory.create_guru_agent(guru_name)
-    result = await agent.respond_to_peer(peer_name, peer_analysis)
+    result = await agent.respond_to_peer(peer_name, peer_digest)
     
     return {
         "content": [
             {
                 "type": "text",
-                "text": json.dumps(result, ensure_ascii=False, indent=2)
+                "text": compact_json(result)
             }
         ]
     }
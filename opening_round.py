@@ -0,0 +1,90 @@
+"""
+Parallel Opening Round
+
+Collects the opening analyses of every guru on the panel concurrently, instead of
+letting the Orchestrator call them one at a time through the Task tool.
+The combined analyses are handed to the Orchestrator as a single block.
+"""
+
+import asyncio
+import dataclasses
+from typing import Any, Callable, Dict, Optional
+
+from claude_agent_sdk import ClaudeAgentOptions, ClaudeSDKClient
+
+from orchestrator import ClientFactory, collect_response_text, create_guru_options
+from resilience import ResilienceMonitor
+
+DEFAULT_OPENING_CONCURRENCY = 5
+
+
+def get_opening_prompt(topic: str) -> str:
+    """Returns the prompt each guru answers in the opening round."""
+    return (
+        f"The discussion topic is: {topic}\n\n"
+        "Please give your opening analysis of this topic based on your investment philosophy. "
+        "Include your top picks, your reasoning and the main risks you see."
+    )
+
+
+async def run_opening_round(
+    options: ClaudeAgentOptions,
+    topic: str,
+    concurrency: int = DEFAULT_OPENING_CONCURRENCY,
+    client_factory: ClientFactory = ClaudeSDKClient,
+    on_message: Optional[Callable[[str, Any], None]] = None,
+    models: Optional[Dict[str, str]] = None,
+    monitor: Optional[ResilienceMonitor] = None,
+) -> Dict[str, str]:
+    """
+    Runs the opening analysis of every guru registered in options.agents concurrently,
+    with at most `concurrency` sub-agent sessions in flight.
+    on_message, if given, is called with (guru name, message) for every streamed message.
+    models, if given, overrides the model of the listed gurus' opening sessions.
+    monitor, if given, runs every session under its deadline, retries and hedging; a guru
+    whose attempts are exhausted is marked absent and left out of the analyses. Without a
+    monitor, a failed session fails the round and the sessions still running are cancelled.
+    Returns the analyses keyed by guru name, in panel order.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    prompt = get_opening_prompt(topic)
+    agents = options.agents or {}
+
+    async def run_one(name: str) -> Optional[str]:
+        async with semaphore:
+            guru_options = create_guru_options(agents[name], options)
+            if models and models.get(name):
+                guru_options = dataclasses.replace(guru_options, model=models[name])
+            guru_on_message = None
+            if on_message is not None:
+                guru_on_message = lambda message: on_message(name, message)
+            attempt = lambda: collect_response_text(guru_options, prompt, client_factory, on_message=guru_on_message)
+            if monitor is not None:
+                return await monitor.run_turn(name, attempt)
+            return await attempt()
+
+    names = list(agents)
+    tasks = [asyncio.ensure_future(run_one(name)) for name in names]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        # One failed session fails the round; stop the others instead of letting them stream on
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return {name: text for name, text in zip(names, results) if text is not None}
+
+
+def format_opening_block(topic: str, analyses: Dict[str, str]) -> str:
+    """Combines the opening analyses into the single block handed to the Orchestrator."""
+    sections = [f"### {name}\n\n{text}" for name, text in analyses.items()]
+    return (
+        f"{topic}\n\n"
+        "# Opening Analyses\n\n"
+        "The following opening analyses were collected from every Guru in parallel.\n\n"
+        + "\n\n".join(sections)
+    )
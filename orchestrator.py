@@ -6,19 +6,17 @@ It uses the AgentDefinition architecture from claude-agent-sdk.
 """
 
 import asyncio
-from typing import List, Dict
-from claude_agent_sdk import ClaudeAgentOptions, AgentDefinition
+import hashlib
+from typing import Any, Callable, List, Dict, Optional
+from claude_agent_sdk import AgentDefinition, AssistantMessage, ClaudeAgentOptions, ClaudeSDKClient, TextBlock
 import investment_gurus
 
-def get_system_prompt(guru_names: List[str]) -> str:
-    """
-    Returns the Orchestrator's system prompt dynamically based on the participants.
-    """
-    
-    # Create bullet list of gurus for the prompt
-    guru_list_str = "\n".join([f"- `{name}`" for name in guru_names])
-    
-    return f"""
+# Builds a client from options; ClaudeSDKClient itself or a fake for offline runs
+ClientFactory = Callable[[ClaudeAgentOptions], Any]
+
+# Static part of the Orchestrator prompt. The panel-dependent sections are appended after it,
+# so runs with different panels and modes still share this prefix in the prompt cache.
+ORCHESTRATOR_PROMPT_PREFIX = """
 You are the Orchestrator Agent for an Investment Guru Discussion Panel.
 Your goal is to facilitate a deep, insightful discussion on investment topics among legendary investors.
 
@@ -30,30 +28,70 @@ Your goal is to facilitate a deep, insightful discussion on investment topics am
 3. **Synthesize Views**: Summarize the key points of agreement and disagreement.
 4. **Drive to Conclusion**: Formulate a consensus or a diversified portfolio recommendation based on the discussion.
 
-# Your Sub-Agents (The Gurus)
-You have access to the following specialized agents via the `Task` tool:
-{guru_list_str}
-
 # How to Use the Task Tool
 To ask a Guru for their opinion:
 `Task(subagent_type="guru_name", prompt="Please analyze [topic] based on your investment philosophy.")`
+The available `guru_name` values are listed under "Your Sub-Agents" at the end of this prompt.
 
-# Discussion Flow Rules
-- Start by asking relevant Gurus for their initial analysis.
+Always maintain a professional, moderating tone.
+"""
+
+SEQUENTIAL_FLOW_RULES = """- Start by asking relevant Gurus for their initial analysis.
 - Then facilitate a cross-examination phase.
-- Finally, present a summary of the findings.
+- Finally, present a summary of the findings."""
 
-Always maintain a professional, moderating tone.
+PARALLEL_FLOW_RULES = """- The opening analyses of ALL Gurus have already been collected in parallel.
+  They are provided in the first message under "Opening Analyses". Do NOT ask for them again.
+- Start directly with the cross-examination phase, building on those analyses.
+- Finally, present a summary of the findings."""
+
+STRUCTURED_PICKS_RULES = """
+- Every Guru's structured picks are provided in the first message under "Structured Picks".
+  Treat them as the Gurus' positions; use the `Task` tool only for commentary, critique and debate."""
+
+def get_system_prompt(guru_names: List[str], parallel_opening: bool = False, structured_picks: bool = False) -> str:
+    """
+    Returns the Orchestrator's system prompt dynamically based on the participants.
+    When parallel_opening is set, the opening analyses are collected up front
+    and the Orchestrator starts directly with the cross-examination phase.
+    When structured_picks is set, the Gurus' deterministic picks come with the first message.
+    The prompt is ORCHESTRATOR_PROMPT_PREFIX followed by the flow rules and the panel.
+    """
+    
+    # Create bullet list of gurus for the prompt
+    guru_list_str = "\n".join([f"- `{name}`" for name in guru_names])
+    flow_rules = PARALLEL_FLOW_RULES if parallel_opening else SEQUENTIAL_FLOW_RULES
+    if structured_picks:
+        flow_rules += STRUCTURED_PICKS_RULES
+    
+    return f"""{ORCHESTRATOR_PROMPT_PREFIX}
+# Discussion Flow Rules
+{flow_rules}
+
+# Your Sub-Agents (The Gurus)
+You have access to the following specialized agents via the `Task` tool:
+{guru_list_str}
 """
 
+def get_prompt_prefix_fingerprint() -> str:
+    """Returns a short hash of the shared prompt prefixes; a change means a cold prompt cache."""
+    digest = hashlib.sha1((ORCHESTRATOR_PROMPT_PREFIX + investment_gurus.GURU_PROMPT_PREFIX).encode("utf-8"))
+    return digest.hexdigest()[:12]
+
 def get_allowed_tools() -> List[str]:
     """Returns the tools allowed for the Orchestrator."""
     return ["Bash", "Read", "Write", "WebSearch", "Task"]
 
-def create_agent_options(guru_names: List[str]) -> ClaudeAgentOptions:
+def create_agent_options(
+    guru_names: List[str],
+    parallel_opening: bool = False,
+    persona_cache: Optional[investment_gurus.PersonaSource] = None,
+    structured_picks: bool = False,
+) -> ClaudeAgentOptions:
     """
     Creates the ClaudeAgentOptions with the specified gurus registered as sub-agents.
     Accepts ANY guru name and dynamically creates an agent definition for them.
+    Dynamic gurus use their cached persona from persona_cache when one exists.
     """
     
     agents_map: Dict[str, AgentDefinition] = {}
@@ -65,13 +103,50 @@ def create_agent_options(guru_names: List[str]) -> ClaudeAgentOptions:
         # Create definition for EVERY guru provided, whether predefined or dynamic
         agents_map[clean_name] = AgentDefinition(
             description=f"Investment Guru: {clean_name.replace('_', ' ').title()}",
-            prompt=investment_gurus.get_guru_prompt(clean_name),
+            prompt=investment_gurus.get_guru_prompt(clean_name, persona_cache=persona_cache),
             tools=investment_gurus.get_guru_tools(clean_name)
         )
             
     return ClaudeAgentOptions(
-        system_prompt=get_system_prompt(guru_names),
+        system_prompt=get_system_prompt(
+            guru_names, parallel_opening=parallel_opening, structured_picks=structured_picks
+        ),
         allowed_tools=get_allowed_tools(),
         permission_mode='acceptEdits',
         agents=agents_map
     )
+
+def create_guru_options(definition: AgentDefinition, base_options: ClaudeAgentOptions) -> ClaudeAgentOptions:
+    """
+    Creates standalone ClaudeAgentOptions for running a single Guru outside of the
+    Orchestrator's Task tool (e.g. for the parallel opening round).
+    """
+    return ClaudeAgentOptions(
+        system_prompt=definition.prompt,
+        allowed_tools=list(definition.tools or []),
+        permission_mode=base_options.permission_mode,
+        model=definition.model if definition.model not in (None, "inherit") else base_options.model,
+        mcp_servers=base_options.mcp_servers,
+    )
+
+async def collect_response_text(
+    options: ClaudeAgentOptions,
+    prompt: str,
+    client_factory: ClientFactory = ClaudeSDKClient,
+    on_message: Optional[Callable[[Any], None]] = None,
+) -> str:
+    """
+    Runs a single prompt on a fresh client and returns the concatenated text output.
+    on_message, if given, sees every raw message of the response stream.
+    """
+    chunks = []
+    async with client_factory(options) as client:
+        await client.query(prompt)
+        async for message in client.receive_response():
+            if on_message is not None:
+                on_message(message)
+            if isinstance(message, AssistantMessage):
+                for block in message.content:
+                    if isinstance(block, TextBlock):
+                        chunks.append(block.text)
+    return "".join(chunks).strip()
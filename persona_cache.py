@@ -0,0 +1,246 @@
+"""
+Persona Cache
+
+Dynamically generated gurus (anyone not in investment_gurus.AVAILABLE_GURUS) normally
+research their own investment philosophy with WebSearch at the start of every run.
+This module compiles that research once into a concrete persona prompt and stores it
+on disk, keyed by normalized guru name, so later runs can skip the research step.
+
+Usage: uv run persona_cache.py warmup elon_musk adam_smith keynes
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from claude_agent_sdk import ClaudeAgentOptions, ClaudeSDKClient
+
+from investment_gurus import is_predefined_guru, normalize_guru_name
+from orchestrator import ClientFactory, collect_response_text
+from routing import PERSONA, ModelRouter
+
+DEFAULT_PERSONA_CACHE_DIR = os.path.join(".guru_cache", "personas")
+DEFAULT_PERSONA_TTL_SECONDS = 30 * 24 * 60 * 60
+DEFAULT_MAX_PERSONAS = 500
+DEFAULT_WARMUP_CONCURRENCY = 4
+PERSONA_RESEARCH_TOOLS = ["WebSearch"]
+
+PERSONA_RESEARCH_SYSTEM_PROMPT = """
+You are a research assistant that writes system prompts for an investment discussion panel.
+Use the 'WebSearch' tool to research the requested person's investment or business philosophy,
+then write a persona prompt that lets another model play that person convincingly.
+Respond with the persona prompt only, without any preamble.
+"""
+
+
+def get_persona_research_prompt(guru_name: str) -> str:
+    """Returns the prompt that asks the researcher to compile a concrete persona."""
+    display_name = guru_name.replace("_", " ").title()
+    return f"""
+Research "{display_name}" (search for "Investor {display_name}" or "{display_name} investment philosophy")
+and write a second-person persona prompt in exactly this structure:
+
+You are {display_name}, <one line on who they are>.
+Your philosophy is <one line summary>.
+
+# Your Traits
+- **Philosophy**: ...
+- **Focus**: ...
+- **Risk Profile**: ...
+- **Style**: ...
+
+# Your Mission in this Discussion
+Analyze the given topic through your lens.
+Focus on:
+- <3-4 concrete things this person would look for>
+
+<one line on tone and characteristic way of speaking>
+"""
+
+
+class PersonaCache:
+    """
+    On-disk persona prompt cache with TTL expiry and size-bounded LRU eviction.
+    Each persona is one JSON file; the file's mtime records its last access.
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_PERSONA_CACHE_DIR,
+        ttl_seconds: float = DEFAULT_PERSONA_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_PERSONAS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+
+    def _path(self, guru_name: str) -> Path:
+        key = re.sub(r"[^\w]", "_", normalize_guru_name(guru_name))
+        return self.directory / f"{key}.json"
+
+    def _read(self, guru_name: str) -> Tuple[Path, Optional[dict]]:
+        path = self._path(guru_name)
+        try:
+            with open(path, encoding="utf-8") as f:
+                return path, json.load(f)
+        except (OSError, ValueError):
+            return path, None
+
+    def _expired(self, entry: dict) -> bool:
+        return self.clock() - entry.get("created_at", 0) > self.ttl_seconds
+
+    def get(self, guru_name: str) -> Optional[str]:
+        """Returns the cached persona prompt, or None if missing or expired."""
+        path, entry = self._read(guru_name)
+        if entry is None:
+            return None
+
+        if self._expired(entry):
+            path.unlink(missing_ok=True)
+            return None
+
+        # Touch the file so LRU eviction sees it as recently used
+        now = self.clock()
+        os.utime(path, (now, now))
+        return entry.get("prompt")
+
+    def peek(self, guru_name: str) -> Optional[str]:
+        """Like get(), but leaves the cache untouched: no LRU touch, no expiry deletion."""
+        _, entry = self._read(guru_name)
+        if entry is None or self._expired(entry):
+            return None
+        return entry.get("prompt")
+
+    def contains(self, guru_name: str) -> bool:
+        """Returns True if a fresh persona is cached, without touching the cache."""
+        return self.peek(guru_name) is not None
+
+    def put(self, guru_name: str, prompt: str) -> None:
+        """Stores a compiled persona prompt, evicting least recently used entries if needed."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(guru_name)
+        entry = {
+            "name": normalize_guru_name(guru_name),
+            "prompt": prompt,
+            "created_at": self.clock(),
+        }
+        # Write atomically so a crash never leaves a truncated entry behind
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        now = self.clock()
+        os.utime(path, (now, now))
+        self._evict()
+
+    def names(self) -> List[str]:
+        """Returns the cached persona keys."""
+        if not self.directory.exists():
+            return []
+        return sorted(path.stem for path in self.directory.glob("*.json"))
+
+    def _evict(self) -> None:
+        entries = sorted(self.directory.glob("*.json"), key=lambda path: path.stat().st_mtime)
+        for path in entries[: max(0, len(entries) - self.max_entries)]:
+            path.unlink(missing_ok=True)
+
+
+async def build_persona(
+    guru_name: str,
+    client_factory: ClientFactory = ClaudeSDKClient,
+    model: Optional[str] = None,
+    on_message: Optional[Callable[[Any], None]] = None,
+) -> str:
+    """Researches a guru with WebSearch and compiles the result into a persona prompt."""
+    options = ClaudeAgentOptions(
+        system_prompt=PERSONA_RESEARCH_SYSTEM_PROMPT,
+        allowed_tools=list(PERSONA_RESEARCH_TOOLS),
+        permission_mode="acceptEdits",
+        model=model,
+    )
+    prompt = await collect_response_text(
+        options, get_persona_research_prompt(guru_name), client_factory, on_message=on_message
+    )
+    if not prompt:
+        raise ValueError(f"Empty persona generated for {guru_name}")
+    return prompt
+
+
+async def warmup(
+    guru_names: Iterable[str],
+    cache: PersonaCache,
+    concurrency: int = DEFAULT_WARMUP_CONCURRENCY,
+    client_factory: ClientFactory = ClaudeSDKClient,
+    force: bool = False,
+    router: Optional[ModelRouter] = None,
+) -> Dict[str, str]:
+    """
+    Pre-builds personas for every dynamic guru in parallel, on the persona tier if a router is given.
+    Returns a status per guru: "predefined", "cached", "built" or "failed: <reason>".
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    statuses: Dict[str, str] = {}
+
+    async def build_one(name: str) -> None:
+        async with semaphore:
+            try:
+                if router is not None:
+                    persona = await build_persona(
+                        name, client_factory, model=router.model_for(PERSONA, name, PERSONA_RESEARCH_TOOLS),
+                        on_message=router.session(PERSONA, name, PERSONA_RESEARCH_TOOLS),
+                    )
+                else:
+                    persona = await build_persona(name, client_factory)
+                cache.put(name, persona)
+                statuses[name] = "built"
+            except Exception as e:
+                statuses[name] = f"failed: {e}"
+
+    pending = []
+    for name in dict.fromkeys(normalize_guru_name(n) for n in guru_names if n.strip()):
+        if is_predefined_guru(name):
+            statuses[name] = "predefined"
+        elif not force and cache.get(name) is not None:
+            statuses[name] = "cached"
+        else:
+            pending.append(build_one(name))
+
+    await asyncio.gather(*pending)
+    return statuses
+
+
+async def main() -> None:
+    """Command line entry point for managing the persona cache"""
+    parser = argparse.ArgumentParser(description="Manage the persona cache for dynamic gurus")
+    parser.add_argument("--cache-dir", default=DEFAULT_PERSONA_CACHE_DIR, help="Persona cache directory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    warmup_parser = subparsers.add_parser("warmup", help="Pre-build personas in parallel")
+    warmup_parser.add_argument("gurus", nargs="+", help="Guru names (space or comma separated)")
+    warmup_parser.add_argument("--concurrency", type=int, default=DEFAULT_WARMUP_CONCURRENCY)
+    warmup_parser.add_argument("--force", action="store_true", help="Rebuild even if cached")
+
+    subparsers.add_parser("list", help="List cached personas")
+    args = parser.parse_args()
+
+    cache = PersonaCache(args.cache_dir)
+    if args.command == "list":
+        for name in cache.names():
+            print(name)
+        return
+
+    guru_names = [name for arg in args.gurus for name in arg.split(",")]
+    statuses = await warmup(guru_names, cache, concurrency=args.concurrency, force=args.force)
+    for name, status in statuses.items():
+        print(f"{name}: {status}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,154 @@
+"""
+Discussion Planning
+
+Builds the plan of a discussion without starting a client: the resolved panel, the
+AgentDefinition of every guru (description, tools, model, where the persona comes from)
+and the estimated size of every prompt. Used by `run.py --dry-run` to validate a panel
+and to see what a discussion will send before paying for it.
+"""
+
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+
+from discussion import DiscussionConfig, create_discussion_options
+from investment_gurus import PersonaSource, is_predefined_guru
+
+# Rough tokenizer ratios: English prose is ~4 characters per token, Hangul ~1.5
+ASCII_CHARS_PER_TOKEN = 4.0
+OTHER_CHARS_PER_TOKEN = 1.5
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the token count of a prompt without a tokenizer."""
+    ascii_chars = sum(1 for char in text if ord(char) < 128)
+    return round(ascii_chars / ASCII_CHARS_PER_TOKEN + (len(text) - ascii_chars) / OTHER_CHARS_PER_TOKEN)
+
+
+@dataclass
+class AgentPlan:
+    """One guru sub-agent as it will be registered"""
+    name: str
+    description: str
+    persona: str
+    tools: List[str]
+    model: Optional[str]
+    prompt_chars: int
+    prompt_tokens: int
+
+
+@dataclass
+class DiscussionPlan:
+    """Everything a discussion would send, sized"""
+    topic: str
+    guru_names: List[str]
+    modes: List[str]
+    allowed_tools: List[str]
+    mcp_servers: List[str]
+    hooks: List[str]
+    orchestrator_prompt_chars: int
+    orchestrator_prompt_tokens: int
+    orchestrator_model: Optional[str] = None
+    agents: List[AgentPlan] = field(default_factory=list)
+
+    @property
+    def total_prompt_tokens(self) -> int:
+        """System prompts of the Orchestrator and every guru, each sent at least once."""
+        return self.orchestrator_prompt_tokens + sum(agent.prompt_tokens for agent in self.agents)
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data["total_prompt_tokens"] = self.total_prompt_tokens
+        return data
+
+
+class _ReadOnlySource:
+    """Serves a persona cache through peek() so planning never touches LRU order or expiry."""
+
+    def __init__(self, cache: PersonaSource):
+        self.cache = cache
+
+    def get(self, guru_name: str) -> Optional[str]:
+        peek = getattr(self.cache, "peek", None)
+        return peek(guru_name) if peek is not None else self.cache.get(guru_name)
+
+
+def _persona_source(name: str, persona_cache: Optional[PersonaSource]) -> str:
+    if is_predefined_guru(name):
+        return "registry"
+    if persona_cache is not None and persona_cache.get(name) is not None:
+        return "persona cache"
+    return "dynamic (researches itself)"
+
+
+def build_plan(config: DiscussionConfig, persona_cache: Optional[PersonaSource] = None) -> DiscussionPlan:
+    """Builds the Orchestrator options exactly as run_discussion would and describes them."""
+    if persona_cache is not None:
+        persona_cache = _ReadOnlySource(persona_cache)
+    options, _ = create_discussion_options(config, persona_cache)
+    modes = [
+        mode for mode, enabled in [
+            ("parallel opening", config.parallel_opening),
+            ("guru tools", config.guru_tools or config.hybrid),
+            ("hybrid", config.hybrid),
+            ("turn digests", config.turn_digests),
+            (f"budget ({config.budget.describe()})" if config.budget else "budget", bool(config.budget and config.budget.limited)),
+            (f"convergence (at {config.convergence.threshold:.2f})" if config.convergence else "convergence",
+             config.convergence is not None),
+            (f"speculation (depth {config.speculation.depth})" if config.speculation else "speculation",
+             config.speculation is not None),
+            ("model routing", config.routing is not None),
+            (f"resilience ({config.resilience.turn_timeout:g}s deadline, {config.resilience.retries} retries)"
+             if config.resilience else "resilience", config.resilience is not None),
+        ] if enabled
+    ]
+    system_prompt = options.system_prompt if isinstance(options.system_prompt, str) else ""
+    return DiscussionPlan(
+        topic=config.topic,
+        guru_names=list(config.guru_names),
+        modes=modes,
+        allowed_tools=list(options.allowed_tools or []),
+        mcp_servers=list(options.mcp_servers or {}) if isinstance(options.mcp_servers, dict) else [],
+        hooks=[f"{event}:{matcher.matcher}" for event, matchers in (options.hooks or {}).items() for matcher in matchers],
+        orchestrator_prompt_chars=len(system_prompt),
+        orchestrator_prompt_tokens=estimate_tokens(system_prompt),
+        orchestrator_model=options.model,
+        agents=[
+            AgentPlan(
+                name=name,
+                description=definition.description,
+                persona=_persona_source(name, persona_cache),
+                tools=list(definition.tools or []),
+                model=definition.model,
+                prompt_chars=len(definition.prompt),
+                prompt_tokens=estimate_tokens(definition.prompt),
+            )
+            for name, definition in (options.agents or {}).items()
+        ],
+    )
+
+
+def format_plan(plan: DiscussionPlan) -> str:
+    """Renders the plan for the console."""
+    lines = [
+        f"Topic: {plan.topic}",
+        f"Modes: {', '.join(plan.modes) or 'sequential'}",
+        f"Orchestrator: ~{plan.orchestrator_prompt_tokens} tokens system prompt ({plan.orchestrator_prompt_chars} chars)",
+        f"  tools: {', '.join(plan.allowed_tools)}",
+    ]
+    if plan.orchestrator_model:
+        lines.append(f"  model: {plan.orchestrator_model}")
+    if plan.mcp_servers:
+        lines.append(f"  in-process MCP servers: {', '.join(plan.mcp_servers)}")
+    if plan.hooks:
+        lines.append(f"  hooks: {', '.join(plan.hooks)}")
+    lines.append("")
+    lines.append(f"{'guru':<22}{'persona':<28}{'~tokens':>8}{'chars':>8}  tools")
+    for agent in plan.agents:
+        model = f"  (model {agent.model})" if agent.model else ""
+        lines.append(
+            f"{agent.name[:21]:<22}{agent.persona:<28}{agent.prompt_tokens:>8}{agent.prompt_chars:>8}  "
+            f"{', '.join(agent.tools)}{model}"
+        )
+    lines.append("")
+    lines.append(f"Total system prompt size: ~{plan.total_prompt_tokens} tokens")
+    return "\n".join(lines)
@@ -0,0 +1,56 @@
+"""
+Model Pricing
+
+USD list prices per model family and the cost estimate of one usage record. Shared by
+the usage accountant (accounting.py) and the budget scheduler (budget.py), which
+estimates spend live from the message stream.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+# USD per million (input, output) tokens; the first family found in the model name wins
+MODEL_PRICING: Dict[str, Tuple[float, float]] = {
+    "opus": (15.0, 75.0),
+    "sonnet": (3.0, 15.0),
+    "haiku": (1.0, 5.0),
+}
+DEFAULT_PRICING = MODEL_PRICING["sonnet"]
+CACHE_READ_PRICE_FACTOR = 0.1
+CACHE_WRITE_PRICE_FACTOR = 1.25
+
+
+def get_model_family(model: Optional[str]) -> Optional[str]:
+    """Returns the priced model family a model name belongs to, or None for an unknown model."""
+    lowered = (model or "").lower()
+    for family in MODEL_PRICING:
+        if family in lowered:
+            return family
+    return None
+
+
+def get_model_pricing(model: Optional[str]) -> Tuple[float, float]:
+    """Returns the (input, output) USD per million tokens for a model name."""
+    family = get_model_family(model)
+    return MODEL_PRICING[family] if family is not None else DEFAULT_PRICING
+
+
+def estimate_cost(usage: Dict[str, Any], model: Optional[str]) -> float:
+    """Estimates the USD cost of one usage record."""
+    input_price, output_price = get_model_pricing(model)
+    return (
+        # The CLI may report a usage field as null
+        (usage.get("input_tokens") or 0) * input_price
+        + (usage.get("cache_read_input_tokens") or 0) * input_price * CACHE_READ_PRICE_FACTOR
+        + (usage.get("cache_creation_input_tokens") or 0) * input_price * CACHE_WRITE_PRICE_FACTOR
+        + (usage.get("output_tokens") or 0) * output_price
+    ) / 1_000_000
+
+
+def usage_tokens(usage: Optional[Dict[str, Any]]) -> int:
+    """Total tokens of one usage record, cached prompt tokens included."""
+    if not usage:
+        return 0
+    return sum(
+        usage.get(key, 0) or 0
+        for key in ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens")
+    )
@@ -0,0 +1,192 @@
+"""
+Columnar Recommendation Store
+
+Holds guru picks from one panel or from many archived discussions in column form:
+guru, ticker, sector and discussion are interned into integer codes and stored with the
+conviction and horizon in flat typed arrays, so the consensus engine (consensus.py) can
+view them as NumPy arrays without copying. Records are slots-based and are only built
+on demand.
+"""
+
+import json
+import math
+import os
+import re
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Horizon wording that carries no number
+PERMANENT_HORIZON_YEARS = 30.0
+PERMANENT_HORIZON_WORDS = ["영구", "permanent", "forever"]
+PICKS_SUFFIX = ".picks.json"
+
+
+def picks_filename(transcript_path: str) -> str:
+    """Returns where a discussion's picks are stored: next to its transcript, as <name>.picks.json."""
+    return os.path.splitext(transcript_path)[0] + PICKS_SUFFIX
+
+
+def parse_horizon_years(horizon: Optional[str]) -> float:
+    """
+    Converts a horizon such as "3-5년", "10년 이상", "5-10 years" or "영구보유" into years
+    (the midpoint of a range); NaN when it cannot be read.
+    """
+    if not horizon:
+        return math.nan
+    lowered = horizon.lower()
+    if any(word in lowered for word in PERMANENT_HORIZON_WORDS):
+        return PERMANENT_HORIZON_YEARS
+    numbers = [float(value) for value in re.findall(r"\d+(?:\.\d+)?", lowered)]
+    if not numbers:
+        return math.nan
+    years = sum(numbers[:2]) / len(numbers[:2])
+    if "month" in lowered or "개월" in lowered:
+        years /= 12
+    return years
+
+
+def rank_conviction(rank: int) -> float:
+    """Default conviction for the pick at a 0-based rank in a guru's list: 1, 1/2, 1/3, ..."""
+    return 1.0 / (rank + 1)
+
+
+def _pick_field(pick: Any, name: str) -> Any:
+    return pick.get(name) if isinstance(pick, dict) else getattr(pick, name, None)
+
+
+@dataclass(slots=True)
+class RecommendationRecord:
+    """One guru's pick"""
+    guru: str
+    ticker: str
+    sector: str = ""
+    horizon_years: float = math.nan
+    conviction: float = 1.0
+    discussion_id: str = ""
+
+
+class StringColumn:
+    """Interns strings into dense integer codes."""
+
+    __slots__ = ("values", "codes")
+
+    def __init__(self) -> None:
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class RecommendationStore:
+    """Append-only columnar store of recommendations."""
+
+    def __init__(self) -> None:
+        self.gurus = StringColumn()
+        self.tickers = StringColumn()
+        self.sectors = StringColumn()
+        self.discussions = StringColumn()
+        # int64 codes and float64 values, viewable with numpy.frombuffer
+        self.guru_codes = array("q")
+        self.ticker_codes = array("q")
+        self.sector_codes = array("q")
+        self.discussion_codes = array("q")
+        self.horizon_years = array("d")
+        self.convictions = array("d")
+
+    def __len__(self) -> int:
+        return len(self.ticker_codes)
+
+    def add(self, record: RecommendationRecord) -> None:
+        self.guru_codes.append(self.gurus.code(record.guru))
+        self.ticker_codes.append(self.tickers.code(record.ticker.strip().upper()))
+        self.sector_codes.append(self.sectors.code(record.sector.strip()))
+        self.discussion_codes.append(self.discussions.code(record.discussion_id))
+        self.horizon_years.append(record.horizon_years)
+        self.convictions.append(record.conviction)
+
+    def extend(self, records: Iterable[RecommendationRecord]) -> None:
+        for record in records:
+            self.add(record)
+
+    def add_picks(self, guru: str, picks: Iterable[Any], discussion_id: str = "") -> None:
+        """
+        Adds a guru's ranked picks: InvestmentRecommendation objects or their dicts (as in
+        analyze_market output). An explicit "conviction" wins over the rank-based default.
+        """
+        for rank, pick in enumerate(picks):
+            conviction = _pick_field(pick, "conviction")
+            self.add(RecommendationRecord(
+                guru=guru,
+                ticker=_pick_field(pick, "ticker") or "",
+                sector=_pick_field(pick, "sector") or "",
+                horizon_years=parse_horizon_years(_pick_field(pick, "time_horizon")),
+                conviction=rank_conviction(rank) if conviction is None else float(conviction),
+                discussion_id=discussion_id,
+            ))
+
+    def add_analysis(self, analysis: Dict[str, Any], guru: Optional[str] = None, discussion_id: str = "") -> None:
+        """Adds the top_picks of one analyze_market result."""
+        self.add_picks(guru or analysis.get("guru", "unknown"), analysis.get("top_picks", []), discussion_id)
+
+    def record(self, index: int) -> RecommendationRecord:
+        return RecommendationRecord(
+            guru=self.gurus.values[self.guru_codes[index]],
+            ticker=self.tickers.values[self.ticker_codes[index]],
+            sector=self.sectors.values[self.sector_codes[index]],
+            horizon_years=self.horizon_years[index],
+            conviction=self.convictions[index],
+            discussion_id=self.discussions.values[self.discussion_codes[index]],
+        )
+
+    def __iter__(self) -> Iterator[RecommendationRecord]:
+        return (self.record(i) for i in range(len(self)))
+
+    def to_dict(self) -> Dict:
+        """Columnar, JSON-serializable form (NaN horizons become null)."""
+        return {
+            "gurus": self.gurus.values,
+            "tickers": self.tickers.values,
+            "sectors": self.sectors.values,
+            "discussions": self.discussions.values,
+            "guru_codes": self.guru_codes.tolist(),
+            "ticker_codes": self.ticker_codes.tolist(),
+            "sector_codes": self.sector_codes.tolist(),
+            "discussion_codes": self.discussion_codes.tolist(),
+            "horizon_years": [None if math.isnan(value) else value for value in self.horizon_years],
+            "convictions": self.convictions.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "RecommendationStore":
+        store = cls()
+        for name in ["gurus", "tickers", "sectors", "discussions"]:
+            column: StringColumn = getattr(store, name)
+            for value in data.get(name, []):
+                column.code(value)
+        for name in ["guru_codes", "ticker_codes", "sector_codes", "discussion_codes"]:
+            getattr(store, name).extend(data.get(name, []))
+        store.horizon_years.extend(math.nan if value is None else value for value in data.get("horizon_years", []))
+        store.convictions.extend(data.get("convictions", []))
+        return store
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "RecommendationStore":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def merge(self, other: "RecommendationStore") -> None:
+        """Appends every record of another store (e.g. another archived discussion)."""
+        self.extend(other)
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Discussion Stream Recording and Replay
+
+Records the raw message and block stream of a discussion, exactly as
+ClaudeSDKClient.receive_response() produced it, into a compact append-only NDJSON
+file (gzip-compressed when the path ends in .gz). Each line is one message with its
+offset in seconds from the start of the discussion:
+
+    {"format":"guru-recording","version":1,"topic":"...","guru_names":[...]}    <- header
+    {"t":0.512,"s":"warren_buffett","m":{"_":"AssistantMessage",...}}          <- opening round
+    {"t":3.104,"s":"main","m":{"_":"ResultMessage",...}}                       <- Orchestrator
+    {"end":"completed","t":3.2}                                                <- footer
+
+Replay feeds a recording back through run_discussion (same transcript, observers and
+console rendering) at full speed or at the recorded pace, without network access.
+
+Usage: uv run recording.py replay discussion.rec.ndjson --pace recorded
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import gzip
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import IO, Any, AsyncIterator, Callable, Dict, List, Optional
+
+import claude_agent_sdk
+from claude_agent_sdk import ClaudeAgentOptions
+
+from accounting import UsageAccountant
+from discussion import ConsoleRenderer, DiscussionConfig, DiscussionObserver, DiscussionResult, run_discussion
+from tracing import TraceObserver, Tracer, trace_client_factory
+
+RECORDING_FORMAT = "guru-recording"
+RECORDING_VERSION = 1
+MAIN_STREAM = "main"
+DEFAULT_RECORDING_FLUSH_INTERVAL = 1.0
+
+# SDK message and block types a recording may contain
+RECORDABLE_TYPES = {
+    name: getattr(claude_agent_sdk, name)
+    for name in [
+        "AssistantMessage", "UserMessage", "SystemMessage", "ResultMessage", "StreamEvent",
+        "TextBlock", "ThinkingBlock", "ToolUseBlock", "ToolResultBlock",
+    ]
+    if hasattr(claude_agent_sdk, name)
+}
+
+
+def encode_value(value: Any) -> Any:
+    """Encodes SDK dataclasses as compact dicts tagged with their type; None fields are dropped."""
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        encoded = {"_": type(value).__name__}
+        for f in dataclasses.fields(value):
+            item = getattr(value, f.name)
+            if item is not None:
+                encoded[f.name] = encode_value(item)
+        return encoded
+    if isinstance(value, (list, tuple)):
+        return [encode_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: encode_value(item) for key, item in value.items()}
+    return value
+
+
+def decode_value(value: Any) -> Any:
+    """Rebuilds SDK dataclasses from encode_value output, ignoring fields this SDK does not know."""
+    if isinstance(value, list):
+        return [decode_value(item) for item in value]
+    if isinstance(value, dict):
+        type_name = value.get("_")
+        cls = RECORDABLE_TYPES.get(type_name) if isinstance(type_name, str) else None
+        if cls is None:
+            return {key: decode_value(item) for key, item in value.items()}
+        known = {f.name for f in dataclasses.fields(cls)}
+        return cls(**{key: decode_value(item) for key, item in value.items() if key in known})
+    return value
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _dumps(entry: Dict) -> str:
+    return json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+
+
+class StreamRecorder(DiscussionObserver):
+    """Observer that writes every raw message to a recording file as it arrives; an existing file is replaced."""
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = DEFAULT_RECORDING_FLUSH_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self.message_count = 0
+        self._file: Optional[IO[str]] = None
+        self._started = 0.0
+        self._last_flush = 0.0
+
+    def on_start(self, config: DiscussionConfig) -> None:
+        # One recording per file: load_recording reads a single header
+        self._file = _open(self.path, "w")
+        self._started = self._last_flush = self.clock()
+        self._write({
+            "format": RECORDING_FORMAT,
+            "version": RECORDING_VERSION,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "topic": config.topic,
+            "guru_names": list(config.guru_names),
+            "parallel_opening": config.parallel_opening,
+            "hybrid": config.hybrid,
+        })
+
+    def on_opening_message(self, guru_name: str, message: Any) -> None:
+        self._record(guru_name, message)
+
+    def on_message(self, message: Any) -> None:
+        self._record(MAIN_STREAM, message)
+
+    def on_finish(self, result: DiscussionResult) -> None:
+        if self._file is None:
+            return
+        self._write({"end": result.status, "t": round(self.clock() - self._started, 4)})
+        self._file.close()
+        self._file = None
+
+    def _record(self, stream: str, message: Any) -> None:
+        if self._file is None:
+            return
+        self.message_count += 1
+        self._write({"t": round(self.clock() - self._started, 4), "s": stream, "m": encode_value(message)})
+
+    def _write(self, entry: Dict) -> None:
+        self._file.write(_dumps(entry) + "\n")
+        now = self.clock()
+        if now - self._last_flush >= self.flush_interval:
+            self._file.flush()
+            self._last_flush = now
+
+
+@dataclass
+class RecordedMessage:
+    """One recorded message and its offset from the start of the discussion"""
+    t: float
+    stream: str
+    message: Any
+
+
+@dataclass
+class Recording:
+    """A loaded recording"""
+    header: Dict
+    messages: List[RecordedMessage] = field(default_factory=list)
+    status: Optional[str] = None
+
+    @property
+    def topic(self) -> str:
+        return self.header.get("topic", "")
+
+    @property
+    def guru_names(self) -> List[str]:
+        return list(self.header.get("guru_names", []))
+
+    def stream(self, name: str) -> List[RecordedMessage]:
+        return [recorded for recorded in self.messages if recorded.stream == name]
+
+
+def load_recording(path: str) -> Recording:
+    """Loads a recording; a truncated last line (from a crash) is ignored."""
+    with _open(path, "r") as f:
+        lines = f.read().splitlines()
+    if not lines:
+        raise ValueError(f"{path} is empty")
+    header = json.loads(lines[0])
+    if header.get("format") != RECORDING_FORMAT:
+        raise ValueError(f"{path} is not a discussion recording")
+
+    recording = Recording(header=header)
+    for line in lines[1:]:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            break
+        if "end" in entry:
+            recording.status = entry["end"]
+        elif "m" in entry:
+            recording.messages.append(RecordedMessage(entry["t"], entry["s"], decode_value(entry["m"])))
+    return recording
+
+
+class ReplayClient:
+    """ClaudeSDKClient stand-in that replays one recorded stream."""
+
+    def __init__(self, options: Optional[ClaudeAgentOptions], messages: List[RecordedMessage],
+                 speed: Optional[float] = None, start_offset: float = 0.0):
+        self.options = options
+        self.messages = messages
+        self.speed = speed
+        self.start_offset = start_offset
+
+    async def __aenter__(self) -> "ReplayClient":
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> bool:
+        return False
+
+    async def query(self, prompt: str, session_id: str = "default") -> None:
+        pass
+
+    async def receive_response(self) -> AsyncIterator[Any]:
+        previous = self.start_offset
+        for recorded in self.messages:
+            if self.speed:
+                delay = (recorded.t - previous) / self.speed
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                previous = recorded.t
+            yield recorded.message
+
+
+class ReplayClientFactory:
+    """
+    Client factory for run_discussion that serves recorded streams: the Orchestrator session
+    gets the main stream, and each opening-round guru session gets that guru's stream.
+    The opening round opens its sessions in panel order, so the n-th new guru prompt is the
+    n-th recorded guru; a session repeating a prompt (a retry or hedge) gets the same stream.
+    Nothing depends on the prompts themselves, which persona caches, search caches or
+    hybrid mode change between recording and replay.
+    speed=None replays at full speed; 1.0 at the recorded pace; 2.0 twice as fast.
+    """
+
+    def __init__(self, recording: Recording, speed: Optional[float] = None):
+        self.recording = recording
+        self.speed = speed
+        self._guru_by_prompt: Dict[str, str] = {}
+
+    def _guru_for(self, prompt: str) -> str:
+        if prompt not in self._guru_by_prompt:
+            panel = self.recording.guru_names
+            served = len(self._guru_by_prompt)
+            self._guru_by_prompt[prompt] = panel[served] if served < len(panel) else ""
+        return self._guru_by_prompt[prompt]
+
+    def __call__(self, options: ClaudeAgentOptions) -> ReplayClient:
+        if options.agents:
+            messages = self.recording.stream(MAIN_STREAM)
+            opening = [recorded.t for recorded in self.recording.messages if recorded.stream != MAIN_STREAM]
+            start_offset = max(opening) if opening else 0.0
+        else:
+            messages = self.recording.stream(self._guru_for(options.system_prompt or ""))
+            start_offset = 0.0
+        return ReplayClient(options, messages, self.speed, start_offset)
+
+
+def get_replay_config(recording: Recording, output: str) -> DiscussionConfig:
+    """Returns the config that reproduces the recorded discussion."""
+    return DiscussionConfig(
+        topic=recording.topic,
+        guru_names=recording.guru_names,
+        output=output,
+        parallel_opening=bool(recording.header.get("parallel_opening")),
+        hybrid=bool(recording.header.get("hybrid")),
+    )
+
+
+async def main() -> None:
+    """Command line entry point for replaying recordings"""
+    parser = argparse.ArgumentParser(description="Replay a recorded discussion stream")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    replay_parser = subparsers.add_parser("replay", help="Replay a recording through the pipeline")
+    replay_parser.add_argument("recording", help="Recording file (.ndjson or .ndjson.gz)")
+    replay_parser.add_argument(
+        "--pace", default="full",
+        help="'full' for full speed, 'recorded' for the recorded pace, or a speed factor such as 2.0"
+    )
+    replay_parser.add_argument("--output", default="replay_result.md", help="Transcript path for the replay")
+    replay_parser.add_argument("--trace", metavar="PATH", default=None, help="Write the replay's timeline as Chrome trace-event JSON")
+    args = parser.parse_args()
+
+    speed = None if args.pace == "full" else 1.0 if args.pace == "recorded" else float(args.pace)
+    recording = load_recording(args.recording)
+    accountant = UsageAccountant()
+    observers: List[DiscussionObserver] = [ConsoleRenderer(), accountant]
+    client_factory = ReplayClientFactory(recording, speed)
+    tracer = None
+    if args.trace:
+        tracer = Tracer()
+        client_factory = trace_client_factory(client_factory, tracer)
+        observers.append(TraceObserver(tracer))
+    start = time.perf_counter()
+    await run_discussion(
+        get_replay_config(recording, args.output), observers=observers, client_factory=client_factory,
+    )
+    print(f"\n\n⏱️  Replayed {len(recording.messages)} messages in {time.perf_counter() - start:.3f}s")
+    print(accountant.format_table())
+    if tracer is not None:
+        tracer.export(args.trace)
+        print(f"🧵 Trace saved to: {args.trace}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,316 @@
+"""
+Guru Turn Resilience
+
+Keeps one slow or failing guru from taking the whole panel down:
+
+- deadline: every guru turn has `turn_timeout` seconds. The opening round's sessions are
+  cancelled at the deadline. Task sub-agents run inside the CLI and cannot be cancelled,
+  so a Task turn that overruns counts as a failed attempt (its answer is still used);
+- retries: a failed opening session is retried after a jittered exponential backoff. A
+  failed Task call is retried by the Orchestrator: the PostToolUseFailure hook waits out
+  the backoff, then tells it to ask once more;
+- hedging: once enough turns have been timed, an opening session still running past the
+  `hedge_percentile` latency gets a duplicate, and the first to answer wins;
+- absence: a guru whose attempts are exhausted is marked absent. The discussion continues
+  without them: further Task calls to them are denied, and the Orchestrator is told to
+  note the absence in the synthesis.
+
+A failed Orchestrator session (a dropped connection or a broken stream) is reconnected
+up to `orchestrator_retries` times, and the completed guru turns are handed to the new
+session so the panel's work is not lost.
+"""
+
+import asyncio
+import dataclasses
+import math
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from claude_agent_sdk import ClaudeAgentOptions, HookMatcher
+
+from task_turns import TaskTurn, TurnObserver
+
+DEFAULT_TURN_TIMEOUT = 300.0
+DEFAULT_RETRIES = 1
+DEFAULT_BACKOFF_BASE = 2.0
+DEFAULT_BACKOFF_MAX = 30.0
+DEFAULT_HEDGE_MIN_SAMPLES = 3
+DEFAULT_ORCHESTRATOR_RETRIES = 1
+HEDGE_CHECK_INTERVAL = 0.5
+LATENCY_WINDOW = 50
+
+ABSENT_NOTE = (
+    "{guru} is absent from this discussion ({reason}). Do not call {guru} again; continue with "
+    "the other Gurus and mention the absence in the final synthesis."
+)
+RETRY_NOTE = "{guru}'s turn failed ({reason}). You may ask {guru} once more; keep the question short."
+ABSENT_BLOCK = (
+    "# Absent Gurus\n"
+    "These Gurus could not take part and must not be called; mention their absence in the synthesis:\n{gurus}"
+)
+CONTINUATION_BLOCK = (
+    "# Reconnected Discussion\n\n"
+    "The connection to this discussion was lost and has been restored. The Guru turns below "
+    "are already complete; do NOT call these Gurus again with the same question. Continue "
+    "from where the discussion stopped and drive it to a conclusion."
+)
+
+
+@dataclass
+class ResiliencePolicy:
+    """Deadlines, retries and hedging of guru turns"""
+    turn_timeout: float = DEFAULT_TURN_TIMEOUT
+    retries: int = DEFAULT_RETRIES
+    backoff_base: float = DEFAULT_BACKOFF_BASE
+    backoff_max: float = DEFAULT_BACKOFF_MAX
+    # e.g. 0.9: duplicate an opening session still running past the p90 turn latency
+    hedge_percentile: Optional[float] = None
+    hedge_min_samples: int = DEFAULT_HEDGE_MIN_SAMPLES
+    orchestrator_retries: int = DEFAULT_ORCHESTRATOR_RETRIES
+
+
+@dataclass
+class ResilienceStats:
+    attempts: int = 0
+    retries: int = 0
+    timeouts: int = 0
+    errors: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    orchestrator_reconnects: int = 0
+
+
+def backoff_delay(attempt: int, base: float, maximum: float, rand: Callable[[], float] = random.random) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(maximum, base * 2**attempt)]."""
+    return rand() * min(maximum, base * 2 ** attempt)
+
+
+class LatencyTracker:
+    """Sliding window of turn latencies"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Nearest-rank percentile (p in 0-1) of the window; None while it is empty."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(p * len(ordered)) - 1))]
+
+
+def continuation_prompt(prompt: str, turns: List[Tuple[str, str, str]], absent: Dict[str, str]) -> str:
+    """The first message of a reconnected Orchestrator session: the original prompt plus the turns already done."""
+    sections = [prompt, CONTINUATION_BLOCK]
+    if turns:
+        sections.append("# Completed Guru Turns\n\n" + "\n\n".join(
+            f"### {i}. {guru}\n\n**Asked:** {asked}\n\n**Answer:**\n{answer}"
+            for i, (guru, asked, answer) in enumerate(turns, start=1)
+        ))
+    if absent:
+        sections.append(format_absent_block(absent))
+    return "\n\n".join(sections)
+
+
+def format_absent_block(absent: Dict[str, str]) -> str:
+    return ABSENT_BLOCK.format(gurus="\n".join(f"- `{guru}`: {reason}" for guru, reason in absent.items()))
+
+
+class ResilienceMonitor(TurnObserver):
+    """Runs guru turns under the policy and tracks which gurus are absent."""
+
+    def __init__(
+        self,
+        policy: Optional[ResiliencePolicy] = None,
+        clock: Callable[[], float] = time.monotonic,
+        rand: Callable[[], float] = random.random,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ):
+        self.policy = policy or ResiliencePolicy()
+        self.clock = clock
+        self.rand = rand
+        self.sleep = sleep
+        self.stats = ResilienceStats()
+        self.latency = LatencyTracker()
+        self.guru_names: List[str] = []
+        self.absent: Dict[str, str] = {}
+        self.failures: Dict[str, int] = {}
+        self.completed: List[Tuple[str, str, str]] = []
+        self.on_absent: Callable[[str, str], None] = lambda guru, reason: None
+        self._started: Dict[str, Tuple[str, float]] = {}
+
+    def start(self, guru_names: List[str], on_absent: Optional[Callable[[str, str], None]] = None) -> None:
+        self.guru_names = list(guru_names)
+        if on_absent is not None:
+            self.on_absent = on_absent
+
+    @property
+    def present(self) -> List[str]:
+        return [name for name in self.guru_names if name not in self.absent]
+
+    def backoff(self, attempt: int) -> float:
+        return backoff_delay(attempt, self.policy.backoff_base, self.policy.backoff_max, self.rand)
+
+    def mark_absent(self, guru: str, reason: str) -> None:
+        if guru not in self.absent:
+            self.absent[guru] = reason
+            self.on_absent(guru, reason)
+
+    def fail(self, guru: str, reason: str) -> bool:
+        """Counts a failed attempt; returns True when it exhausted the guru's attempts."""
+        self.failures[guru] = self.failures.get(guru, 0) + 1
+        if self.failures[guru] > self.policy.retries:
+            self.mark_absent(guru, reason)
+            return True
+        return False
+
+    # Standalone sessions (the opening round)
+
+    def hedge_after(self) -> Optional[float]:
+        """Seconds after which an attempt is duplicated; None while hedging is off or under-sampled."""
+        if self.policy.hedge_percentile is None or len(self.latency.samples) < self.policy.hedge_min_samples:
+            return None
+        after = self.latency.percentile(self.policy.hedge_percentile)
+        return after if after is not None and after < self.policy.turn_timeout else None
+
+    async def _attempt(self, attempt: Callable[[], Awaitable[str]]) -> str:
+        """One attempt within the deadline, hedged once it runs past the latency percentile."""
+        started = self.clock()
+        deadline = started + self.policy.turn_timeout
+        primary = asyncio.ensure_future(attempt())
+        tasks: Set["asyncio.Future[str]"] = {primary}
+        hedged = self.policy.hedge_percentile is None
+        try:
+            while True:
+                timeout = deadline - self.clock()
+                if timeout <= 0:
+                    raise asyncio.TimeoutError()
+                if not hedged:
+                    hedge_after = self.hedge_after()
+                    if hedge_after is None:
+                        # Concurrent turns may finish meanwhile and provide the samples
+                        timeout = min(timeout, HEDGE_CHECK_INTERVAL)
+                    elif started + hedge_after <= self.clock():
+                        self.stats.hedges += 1
+                        tasks.add(asyncio.ensure_future(attempt()))
+                        hedged = True
+                    else:
+                        timeout = min(timeout, started + hedge_after - self.clock())
+                done, tasks = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.stats.hedge_wins += 1
+                        self.latency.add(self.clock() - started)
+                        return task.result()
+                if done and not tasks:
+                    # Every attempt in flight failed; surface the error
+                    raise next(iter(done)).exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Let cancelled attempts unwind (and close their sessions) before returning
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run_turn(self, guru: str, attempt: Callable[[], Awaitable[str]]) -> Optional[str]:
+        """
+        Runs one guru turn with deadline, retries and hedging; attempt() starts a fresh session.
+        Returns None once the guru's attempts are exhausted and the guru is marked absent.
+        """
+        for number in range(self.policy.retries + 1):
+            self.stats.attempts += 1
+            try:
+                return await self._attempt(attempt)
+            except asyncio.TimeoutError:
+                self.stats.timeouts += 1
+                reason = f"no answer within {self.policy.turn_timeout:g}s"
+            except Exception as e:
+                self.stats.errors += 1
+                reason = f"{type(e).__name__}: {e}"
+            if self.fail(guru, reason):
+                return None
+            self.stats.retries += 1
+            await self.sleep(self.backoff(number))
+        return None
+
+    # Orchestrator stream and Task hooks
+
+    def on_task_turn(self, turn: TaskTurn) -> None:
+        """Records the completed guru turns, for a reconnected Orchestrator session."""
+        if not turn.is_error:
+            self.completed.append((turn.guru, turn.prompt, turn.result))
+
+    async def pre_task_hook(self, hook_input: Dict[str, Any], tool_use_id: Optional[str], context: Any) -> Dict[str, Any]:
+        """PreToolUse hook for Task: denies calls to absent gurus and starts the turn's clock."""
+        guru = (hook_input.get("tool_input") or {}).get("subagent_type", "")
+        if guru in self.absent:
+            return {"hookSpecificOutput": {
+                "hookEventName": "PreToolUse",
+                "permissionDecision": "deny",
+                "permissionDecisionReason": ABSENT_NOTE.format(guru=guru, reason=self.absent[guru]),
+            }}
+        self.stats.attempts += 1
+        self._started[hook_input.get("tool_use_id") or tool_use_id or ""] = (guru, self.clock())
+        return {}
+
+    def _finish(self, hook_input: Dict[str, Any], tool_use_id: Optional[str]) -> Tuple[str, float]:
+        key = hook_input.get("tool_use_id") or tool_use_id or ""
+        guru, started = self._started.pop(key, ((hook_input.get("tool_input") or {}).get("subagent_type", ""), self.clock()))
+        return guru, self.clock() - started
+
+    async def post_task_hook(self, hook_input: Dict[str, Any], tool_use_id: Optional[str], context: Any) -> Dict[str, Any]:
+        """PostToolUse hook for Task: an answer past the deadline counts as a failed attempt."""
+        guru, seconds = self._finish(hook_input, tool_use_id)
+        self.latency.add(seconds)
+        if seconds <= self.policy.turn_timeout:
+            return {}
+        self.stats.timeouts += 1
+        reason = f"answered after {seconds:.0f}s, past the {self.policy.turn_timeout:g}s deadline"
+        if not self.fail(guru, reason):
+            return {}
+        return {"hookSpecificOutput": {
+            "hookEventName": "PostToolUse",
+            "additionalContext": ABSENT_NOTE.format(guru=guru, reason=reason),
+        }}
+
+    async def task_failure_hook(self, hook_input: Dict[str, Any], tool_use_id: Optional[str], context: Any) -> Dict[str, Any]:
+        """PostToolUseFailure hook for Task: backs off before a retry, or marks the guru absent."""
+        guru, _ = self._finish(hook_input, tool_use_id)
+        if hook_input.get("is_interrupt"):
+            return {}
+        self.stats.errors += 1
+        reason = str(hook_input.get("error") or "sub-agent error")
+        if self.fail(guru, reason):
+            note = ABSENT_NOTE.format(guru=guru, reason=reason)
+        else:
+            self.stats.retries += 1
+            await self.sleep(self.backoff(self.failures[guru] - 1))
+            note = RETRY_NOTE.format(guru=guru, reason=reason)
+        return {"hookSpecificOutput": {"hookEventName": "PostToolUseFailure", "additionalContext": note}}
+
+    def report(self) -> Dict:
+        return {
+            "policy": asdict(self.policy),
+            "absent": dict(self.absent),
+            "failures": dict(self.failures),
+            "p50_seconds": round(self.latency.percentile(0.5) or 0.0, 3),
+            "p90_seconds": round(self.latency.percentile(0.9) or 0.0, 3),
+            **asdict(self.stats),
+        }
+
+
+def enable_resilience(options: ClaudeAgentOptions, monitor: ResilienceMonitor) -> ClaudeAgentOptions:
+    """Returns Orchestrator options whose Task calls observe the deadline and skip absent gurus."""
+    hooks = dict(options.hooks or {})
+    hooks["PreToolUse"] = [*hooks.get("PreToolUse", []), HookMatcher(matcher="Task", hooks=[monitor.pre_task_hook])]
+    hooks["PostToolUse"] = [*hooks.get("PostToolUse", []), HookMatcher(matcher="Task", hooks=[monitor.post_task_hook])]
+    hooks["PostToolUseFailure"] = [
+        *hooks.get("PostToolUseFailure", []), HookMatcher(matcher="Task", hooks=[monitor.task_failure_hook])
+    ]
+    return dataclasses.replace(options, hooks=hooks)
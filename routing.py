@@ -0,0 +1,256 @@
+"""
+Tiered Model Routing
+
+Every session of a discussion runs on the default model unless a routing policy sends it
+elsewhere. The policy maps the work to a tier (fast, standard, strong) and each tier to a
+model, so cheap, high-volume work runs on a faster model and the strong model is kept for
+the Orchestrator, which moderates and writes the final synthesis:
+
+- phase: persona research, the parallel opening round, speculative drafts, the gurus'
+  cross-examination turns (Task sub-agents) and the Orchestrator session itself;
+- tool: a guru session allowed to use a listed tool (e.g. WebSearch) runs on that tier,
+  whatever its phase;
+- guru: a listed guru runs on that tier in every phase.
+
+The most specific route wins (guru, then tool, then phase). A route may name a model
+directly instead of a tier. The router also accounts calls, latency, tokens and cost per
+tier from the message streams, to tune the policy against what it saves.
+"""
+
+import dataclasses
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from claude_agent_sdk import AssistantMessage, ClaudeAgentOptions, ResultMessage
+
+from pricing import estimate_cost, get_model_family, usage_tokens
+from task_turns import TaskTurn, TurnObserver
+
+PERSONA = "persona"
+OPENING = "opening"
+SPECULATION = "speculation"
+CROSS_EXAMINATION = "cross_examination"
+ORCHESTRATOR = "orchestrator"
+PHASES = (PERSONA, OPENING, SPECULATION, CROSS_EXAMINATION, ORCHESTRATOR)
+
+DEFAULT_TIERS = {"fast": "haiku", "standard": "sonnet", "strong": "opus"}
+DEFAULT_PHASE_TIERS = {
+    PERSONA: "fast",
+    OPENING: "fast",
+    SPECULATION: "fast",
+    CROSS_EXAMINATION: "standard",
+    ORCHESTRATOR: "strong",
+}
+
+
+@dataclass
+class RoutingPolicy:
+    """Which tier each phase, tool and guru runs on, and which model each tier is"""
+    tiers: Dict[str, str] = field(default_factory=lambda: dict(DEFAULT_TIERS))
+    phases: Dict[str, str] = field(default_factory=lambda: dict(DEFAULT_PHASE_TIERS))
+    tools: Dict[str, str] = field(default_factory=dict)
+    gurus: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RoutingPolicy":
+        """Builds a policy from its JSON form; the given tiers and phases update the defaults."""
+        unknown = set(data) - {"tiers", "phases", "tools", "gurus"}
+        if unknown:
+            raise TypeError(f"unexpected routing keys: {', '.join(sorted(unknown))}")
+        policy = cls()
+        policy.tiers.update(data.get("tiers") or {})
+        for phase, tier in (data.get("phases") or {}).items():
+            policy.set_route(phase, tier)
+        policy.tools.update(data.get("tools") or {})
+        policy.gurus.update(data.get("gurus") or {})
+        return policy
+
+    def set_route(self, key: str, tier: str) -> None:
+        """
+        Sets one route from its command line form: a phase name, "tool:<Tool>",
+        "tier:<tier>" (the tier's model) or a guru name.
+        """
+        if not key or not tier:
+            raise ValueError(f"invalid route '{key}={tier}'")
+        kind, _, name = key.partition(":")
+        if key in PHASES:
+            self.phases[key] = tier
+        elif kind == "tool" and name:
+            self.tools[name] = tier
+        elif kind == "tier" and name:
+            self.tiers[name] = tier
+        elif ":" in key:
+            raise ValueError(f"invalid route '{key}={tier}': expected a phase, tool:<name>, tier:<name> or a guru")
+        else:
+            self.gurus[key] = tier
+
+    def tier_for(self, phase: str, guru: Optional[str] = None, tools: Iterable[str] = ()) -> str:
+        """The tier (or literal model) a session runs on; the Orchestrator is routed by phase only."""
+        if phase not in PHASES:
+            raise ValueError(f"unknown phase '{phase}'")
+        if phase != ORCHESTRATOR:
+            if guru is not None and guru in self.gurus:
+                return self.gurus[guru]
+            for tool in tools:
+                if tool in self.tools:
+                    return self.tools[tool]
+        return self.phases.get(phase, "standard")
+
+    def model_for(self, phase: str, guru: Optional[str] = None, tools: Iterable[str] = ()) -> str:
+        tier = self.tier_for(phase, guru, tools)
+        return self.tiers.get(tier, tier)
+
+
+def parse_routes(specs: Iterable[str], policy: Optional[RoutingPolicy] = None) -> RoutingPolicy:
+    """Applies "key=tier" route specs (see RoutingPolicy.set_route) to a policy."""
+    policy = policy or RoutingPolicy()
+    for spec in specs:
+        key, separator, tier = spec.partition("=")
+        if not separator:
+            raise ValueError(f"invalid route '{spec}': expected key=tier")
+        policy.set_route(key.strip(), tier.strip())
+    return policy
+
+
+@dataclass
+class TierStats:
+    """Accumulated calls, latency and spend of one tier"""
+    model: str = ""
+    calls: int = 0
+    seconds: float = 0.0
+    tokens: int = 0
+    cost_usd: float = 0.0
+    phases: Set[str] = field(default_factory=set)
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data["phases"] = sorted(self.phases)
+        data["seconds"] = round(self.seconds, 3)
+        data["mean_seconds"] = round(self.seconds / self.calls, 3) if self.calls else 0.0
+        data["cost_usd"] = round(self.cost_usd, 6)
+        return data
+
+
+class ModelRouter(TurnObserver):
+    """
+    Applies a routing policy to the sessions of a discussion and accounts their usage per
+    tier. Standalone sessions (persona research, speculative drafts) report through session().
+    """
+
+    def __init__(self, policy: Optional[RoutingPolicy] = None):
+        self.policy = policy or RoutingPolicy()
+        self.tiers: Dict[str, TierStats] = {}
+        self._task_tier: Dict[str, str] = {}
+        self._task_seconds = 0.0
+        self._seen_message_ids: Set[str] = set()
+        self._opening: Dict[str, Callable[[Any], None]] = {}
+        self._guru_tools: Dict[str, List[str]] = {}
+
+    def start(self, options: ClaudeAgentOptions) -> None:
+        self._guru_tools = {name: list(definition.tools or []) for name, definition in (options.agents or {}).items()}
+
+    def tier_for(self, phase: str, guru: Optional[str] = None, tools: Iterable[str] = ()) -> str:
+        return self.policy.tier_for(phase, guru, tools)
+
+    def model_for(self, phase: str, guru: Optional[str] = None, tools: Iterable[str] = ()) -> str:
+        return self.policy.model_for(phase, guru, tools)
+
+    # Accounting
+
+    def _stats(self, tier: str, phase: str) -> TierStats:
+        stats = self.tiers.setdefault(tier, TierStats(model=self.policy.tiers.get(tier, tier)))
+        stats.phases.add(phase)
+        return stats
+
+    def _add_usage(self, tier: str, phase: str, usage: Optional[Dict[str, Any]], model: Optional[str]) -> None:
+        if not usage:
+            return
+        stats = self._stats(tier, phase)
+        stats.tokens += usage_tokens(usage)
+        # Priced as the model that answered when it is known, else as the routed one
+        stats.cost_usd += estimate_cost(usage, model if get_model_family(model) else stats.model)
+
+    def _assistant(self, tier: str, phase: str, message: AssistantMessage) -> bool:
+        """Accounts one assistant message once (streamed messages repeat their id); False for a repeat."""
+        if message.message_id:
+            if message.message_id in self._seen_message_ids:
+                return False
+            self._seen_message_ids.add(message.message_id)
+        self._add_usage(tier, phase, message.usage, message.model)
+        return True
+
+    def session(self, phase: str, guru: Optional[str] = None, tools: Iterable[str] = ()) -> Callable[[Any], None]:
+        """Returns the on_message callback accounting one standalone session to its tier."""
+        tier = self.tier_for(phase, guru, tools)
+        usage_seen = False
+
+        def on_message(message: Any) -> None:
+            nonlocal usage_seen
+            if isinstance(message, AssistantMessage):
+                if self._assistant(tier, phase, message) and message.usage:
+                    usage_seen = True
+            elif isinstance(message, ResultMessage):
+                stats = self._stats(tier, phase)
+                stats.calls += 1
+                stats.seconds += (message.duration_ms or 0) / 1000
+                if not usage_seen:
+                    self._add_usage(tier, phase, message.usage, None)
+
+        return on_message
+
+    def on_opening_message(self, guru: str, message: Any) -> None:
+        if guru not in self._opening:
+            self._opening[guru] = self.session(OPENING, guru, self._guru_tools.get(guru, []))
+        self._opening[guru](message)
+
+    def on_task_call(self, turn: TaskTurn) -> None:
+        self._task_tier[turn.tool_use_id] = self.tier_for(CROSS_EXAMINATION, turn.guru, self._guru_tools.get(turn.guru, []))
+
+    def on_task_turn(self, turn: TaskTurn) -> None:
+        stats = self._stats(self._task_tier[turn.tool_use_id], CROSS_EXAMINATION)
+        stats.calls += 1
+        stats.seconds += turn.seconds
+        self._task_seconds += turn.seconds
+
+    def on_message(self, message: Any) -> None:
+        """Feeds one Orchestrator message; sub-agent messages count to the called guru's tier."""
+        if isinstance(message, AssistantMessage):
+            parent = message.parent_tool_use_id
+            if parent in self._task_tier:
+                self._assistant(self._task_tier[parent], CROSS_EXAMINATION, message)
+            else:
+                self._assistant(self.tier_for(ORCHESTRATOR), ORCHESTRATOR, message)
+        elif isinstance(message, ResultMessage):
+            stats = self._stats(self.tier_for(ORCHESTRATOR), ORCHESTRATOR)
+            stats.calls += 1
+            # The session's wall time includes the Task calls it waited for; those count to the gurus' tiers
+            stats.seconds += max(0.0, (message.duration_ms or 0) / 1000 - self._task_seconds)
+
+    def report(self) -> Dict:
+        return {
+            "policy": asdict(self.policy),
+            "tiers": {tier: stats.to_dict() for tier, stats in self.tiers.items()},
+            "cost_usd": round(sum(stats.cost_usd for stats in self.tiers.values()), 6),
+        }
+
+
+def format_routing_report(report: Dict) -> List[str]:
+    """Renders the per-tier lines of a routing report for the console."""
+    lines = [f"{'tier':<10}{'model':<12}{'calls':>6}{'mean s':>9}{'tokens':>10}{'cost':>10}  phases"]
+    for tier, stats in report["tiers"].items():
+        lines.append(
+            f"{tier[:9]:<10}{stats['model'][:11]:<12}{stats['calls']:>6}{stats['mean_seconds']:>9.2f}"
+            f"{stats['tokens']:>10}{'$' + format(stats['cost_usd'], '.4f'):>10}  {', '.join(stats['phases'])}"
+        )
+    return lines
+
+
+def enable_routing(options: ClaudeAgentOptions, router: ModelRouter) -> ClaudeAgentOptions:
+    """Returns Orchestrator options with the Orchestrator's and every guru sub-agent's model routed."""
+    agents = {
+        name: dataclasses.replace(
+            definition, model=router.model_for(CROSS_EXAMINATION, name, definition.tools or [])
+        )
+        for name, definition in (options.agents or {}).items()
+    }
+    return dataclasses.replace(options, model=router.model_for(ORCHESTRATOR), agents=agents)
@@ -4,89 +4,499 @@ Investment Guru Multi-Agent Discussion System
 
 Main entry point for running the multi-agent investment guru discussion.
 Usage: uv run run.py [topic]
+       uv run run.py --gurus "warren_buffett,cathie_wood" --dry-run
+
+Everything that pulls in the Claude Agent SDK is imported inside main(), once the
+arguments are valid, so --help and argument errors return immediately. Options whose
+defaults live in those modules default to None here and are filled in by apply_defaults().
 """
 
 import sys
+import json
 import asyncio
 import argparse
-from datetime import datetime
-from claude_agent_sdk import ClaudeSDKClient, AssistantMessage, TextBlock, ToolUseBlock
-from orchestrator import create_agent_options
+import functools
 
-async def main():
-    """Main entry point"""
+def print_usage_report(accountant: "UsageAccountant", transcript_path: str, log=print) -> None:
+    """Writes the JSON usage report next to the transcript and prints the summary table"""
+    from accounting import usage_report_path
+    report_path = usage_report_path(transcript_path)
+    accountant.write_report(report_path)
+    log(f"\n📊 Usage by participant (report: {report_path})")
+    log(accountant.format_table())
+
+def build_parser() -> argparse.ArgumentParser:
+    """Returns the command line parser; it imports nothing heavy"""
     parser = argparse.ArgumentParser(description="Run Investment Guru Discussion")
     parser.add_argument(
         "--topic", 
-        default="AI 에이전트 시대의 picks and shovels 투자 기회에 대해 토론해줘.",
+        default=None,
         help="Discussion topic"
     )
     parser.add_argument(
         "--gurus",
-        default="warren_buffett,peter_lynch,cathie_wood,ray_dalio,benjamin_graham",
+        default=None,
         help="Comma-separated list of investment gurus (e.g. 'warren_buffett,elon_musk')"
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--parallel-opening",
+        action="store_true",
+        help="Collect every guru's opening analysis concurrently before the Orchestrator starts"
+    )
+    parser.add_argument(
+        "--guru-tools",
+        action="store_true",
+        help="Serve analyze_market/respond_to_peer from an in-process MCP server the Orchestrator can call"
+    )
+    parser.add_argument(
+        "--hybrid",
+        action="store_true",
+        help="Give the Orchestrator every guru's structured picks up front; sub-agents only add commentary"
+    )
+    parser.add_argument(
+        "--no-turn-digests",
+        action="store_true",
+        help="Let the Orchestrator paste raw earlier answers into guru calls instead of attaching compact digests"
+    )
+    parser.add_argument(
+        "--max-tokens",
+        type=int,
+        default=None,
+        help="Token budget for the whole discussion; the Orchestrator concludes before it runs out"
+    )
+    parser.add_argument(
+        "--max-cost",
+        type=float,
+        default=None,
+        help="Estimated USD cost budget for the whole discussion"
+    )
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=None,
+        help="Wall-time budget in seconds for the whole discussion"
+    )
+    parser.add_argument(
+        "--opening-concurrency",
+        type=int,
+        default=None,
+        help="Maximum number of concurrent guru sessions in the parallel opening round"
+    )
+    parser.add_argument(
+        "--persona-cache-dir",
+        default=None,
+        help="Directory of compiled personas for dynamic gurus"
+    )
+    parser.add_argument(
+        "--no-persona-cache",
+        action="store_true",
+        help="Let dynamic gurus research themselves during the discussion instead of using cached personas"
+    )
+    parser.add_argument(
+        "--search-cache",
+        action="store_true",
+        help="Serve all web searches through a shared result cache (deduped within and across runs)"
+    )
+    parser.add_argument(
+        "--search-cache-dir",
+        default=None,
+        help="Directory of cached search results"
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Markdown transcript path (default: discussion_result_YYYYMMDD_HHMMSS.md)"
+    )
+    parser.add_argument(
+        "--flush-interval",
+        type=float,
+        default=None,
+        help="Seconds between batched transcript writes"
+    )
+    parser.add_argument(
+        "--fsync-interval",
+        type=float,
+        default=None,
+        help="Seconds between forcing the transcript to disk"
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="ID",
+        default=None,
+        help="Resume an interrupted discussion from its last checkpoint"
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        default=None,
+        help="Directory of discussion checkpoints"
+    )
+    parser.add_argument(
+        "--no-checkpoint",
+        action="store_true",
+        help="Do not save checkpoints after each completed guru turn"
+    )
+    parser.add_argument(
+        "--stop-on-convergence",
+        action="store_true",
+        help="Skip the remaining cross-examination once the panel agrees or repeats itself"
+    )
+    parser.add_argument(
+        "--convergence-threshold",
+        type=float,
+        default=None,
+        help="Agreement (0-1) from which the panel counts as converged (implies --stop-on-convergence)"
+    )
+    parser.add_argument(
+        "--speculate",
+        type=int,
+        nargs="?",
+        const=1,
+        default=None,
+        metavar="DEPTH",
+        help="Draft the turns of the DEPTH (default 1) most likely next gurus in the background while one speaks"
+    )
+    parser.add_argument(
+        "--route-models",
+        action="store_true",
+        help="Route each phase to a model tier: fast (haiku) for persona research, openings and drafts, "
+             "standard (sonnet) for guru turns, strong (opus) for the Orchestrator's synthesis"
+    )
+    parser.add_argument(
+        "--route",
+        action="append",
+        default=[],
+        metavar="KEY=TIER",
+        help="Override one route (implies --route-models): a phase (e.g. opening=standard), a guru "
+             "(warren_buffett=strong), a tool (tool:WebSearch=standard) or a tier's model (tier:fast=claude-haiku-4-5)"
+    )
+    parser.add_argument(
+        "--resilient",
+        action="store_true",
+        help="Give every guru turn a deadline and retries; a guru that keeps failing is marked absent "
+             "and the discussion continues without them"
+    )
+    parser.add_argument(
+        "--turn-timeout",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Deadline of one guru turn (implies --resilient)"
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=None,
+        help="Retries of a failed guru turn, with jittered backoff (implies --resilient)"
+    )
+    parser.add_argument(
+        "--hedge-percentile",
+        type=float,
+        default=None,
+        metavar="P",
+        help="Duplicate an opening analysis still running past this latency percentile, e.g. 0.9 (implies --resilient)"
+    )
+    parser.add_argument(
+        "--archive",
+        metavar="PATH",
+        default=None,
+        help="SQLite archive the finished discussion is stored in (searchable with archive.py)"
+    )
+    parser.add_argument(
+        "--no-archive",
+        action="store_true",
+        help="Neither archive this discussion nor look for a reusable one"
+    )
+    parser.add_argument(
+        "--reuse",
+        choices=["ask", "always", "never"],
+        default="ask",
+        help="What to do when the same topic and panel finished recently (ask only on a terminal)"
+    )
+    parser.add_argument(
+        "--reuse-within",
+        type=float,
+        default=24.0,
+        metavar="HOURS",
+        help="How recent an archived discussion must be to be offered for reuse"
+    )
+    parser.add_argument(
+        "--record",
+        metavar="PATH",
+        default=None,
+        help="Record the raw message stream (NDJSON, gzip if PATH ends in .gz) for replay with recording.py"
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="PATH",
+        default=None,
+        help="Write a timeline of the run (client startup, messages, tool calls, guru turns, rendering) "
+             "as Chrome trace-event JSON, for chrome://tracing or ui.perfetto.dev"
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=["text", "ndjson"],
+        default="text",
+        help="ndjson: write one JSON event per line to stdout for machine consumers (messages go to stderr)"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Resolve the panel and print the agent plan with estimated prompt sizes, without starting a client"
+    )
+    return parser
+
+def apply_defaults(args: argparse.Namespace) -> None:
+    """Fills in the defaults owned by the discussion modules"""
+    from archive import DEFAULT_ARCHIVE_PATH
+    from checkpoint import DEFAULT_CHECKPOINT_DIR
+    from discussion import DEFAULT_GURUS, DEFAULT_TOPIC
+    from opening_round import DEFAULT_OPENING_CONCURRENCY
+    from persona_cache import DEFAULT_PERSONA_CACHE_DIR
+    from search_cache import DEFAULT_SEARCH_CACHE_DIR
+    from transcript import DEFAULT_FLUSH_INTERVAL, DEFAULT_FSYNC_INTERVAL
+
+    defaults = {
+        "topic": DEFAULT_TOPIC,
+        "gurus": ",".join(DEFAULT_GURUS),
+        "opening_concurrency": DEFAULT_OPENING_CONCURRENCY,
+        "persona_cache_dir": DEFAULT_PERSONA_CACHE_DIR,
+        "search_cache_dir": DEFAULT_SEARCH_CACHE_DIR,
+        "flush_interval": DEFAULT_FLUSH_INTERVAL,
+        "fsync_interval": DEFAULT_FSYNC_INTERVAL,
+        "checkpoint_dir": DEFAULT_CHECKPOINT_DIR,
+        "archive": DEFAULT_ARCHIVE_PATH,
+    }
+    for name, value in defaults.items():
+        if getattr(args, name) is None:
+            setattr(args, name, value)
+
+async def main():
+    """Main entry point"""
+    args = build_parser().parse_args()
+    apply_defaults(args)
+    ndjson = args.output_format == "ndjson"
+    # In NDJSON mode stdout carries only events; everything for humans goes to stderr
+    log = functools.partial(print, file=sys.stderr) if ndjson else print
+
+    # What a dry run needs; everything that only a running discussion uses is imported below it
+    from budget import DiscussionBudget
+    from checkpoint import CheckpointStore
+    from convergence import ConvergencePolicy
+    from discussion import DiscussionConfig, parse_guru_names, unregistered_suggestions
+    from persona_cache import PersonaCache
+    from resilience import ResiliencePolicy
+    from routing import parse_routes
+    from speculation import SpeculationPolicy
+
+    checkpoint_store = CheckpointStore(args.checkpoint_dir)
+    checkpoint = None
+    if args.resume:
+        try:
+            checkpoint = checkpoint_store.load(args.resume)
+        except FileNotFoundError as e:
+            log(f"❌ {e}")
+            sys.exit(1)
+        if not checkpoint.resumable:
+            log(f"❌ Discussion '{checkpoint.id}' already completed; nothing to resume.")
+            sys.exit(1)
+        args.topic = checkpoint.topic
+        args.gurus = ",".join(checkpoint.guru_names)
     
     # Parse gurus
-    guru_names = [name.strip() for name in args.gurus.split(",")]
-    
-    print(f"🤖 Starting Investment Guru Discussion Panel")
-    print(f"topic: {args.topic}")
-    print(f"Participants: {', '.join(guru_names)}")
-    print("-" * 60)
+    guru_names = parse_guru_names(args.gurus)
+    for name, close in unregistered_suggestions(guru_names).items():
+        log(f"❓ '{name}' is not a registered guru and will research itself; did you mean: {', '.join(close)}?")
+    budget = DiscussionBudget(max_tokens=args.max_tokens, max_cost_usd=args.max_cost, max_seconds=args.max_seconds)
+    convergence = None
+    if args.stop_on_convergence or args.convergence_threshold is not None:
+        convergence = ConvergencePolicy()
+        if args.convergence_threshold is not None:
+            convergence.threshold = args.convergence_threshold
+    speculation = SpeculationPolicy(depth=args.speculate) if args.speculate else None
+    resilience = None
+    if args.resilient or args.turn_timeout is not None or args.retries is not None or args.hedge_percentile is not None:
+        resilience = ResiliencePolicy(hedge_percentile=args.hedge_percentile)
+        if args.turn_timeout is not None:
+            resilience.turn_timeout = args.turn_timeout
+        if args.retries is not None:
+            resilience.retries = args.retries
+    routing = None
+    if args.route_models or args.route:
+        try:
+            routing = parse_routes(args.route)
+        except ValueError as e:
+            log(f"❌ {e}")
+            sys.exit(2)
+
+    if args.dry_run:
+        from planning import build_plan, format_plan
+        config = DiscussionConfig(
+            topic=args.topic, guru_names=guru_names, parallel_opening=args.parallel_opening,
+            guru_tools=args.guru_tools, hybrid=args.hybrid, turn_digests=not args.no_turn_digests, budget=budget,
+            convergence=convergence, speculation=speculation, routing=routing, resilience=resilience,
+        )
+        # Read-only: cached personas are peeked at, missing ones are not researched
+        persona_cache = None if args.no_persona_cache else PersonaCache(args.persona_cache_dir)
+        plan = build_plan(config, persona_cache)
+        if ndjson:
+            print(json.dumps({"type": "plan", **plan.to_dict()}, ensure_ascii=False))
+        else:
+            print("📝 Dry run: nothing is sent")
+            print(format_plan(plan))
+        return
+
+    from claude_agent_sdk import ClaudeSDKClient
+
+    from accounting import UsageAccountant
+    from archive import ArchiveRecorder, DiscussionArchive, describe_age
+    from checkpoint import Checkpointer, get_resume_config, get_resume_prompt
+    from discussion import ConsoleRenderer, NdjsonRenderer, run_discussion
+    from investment_gurus import is_predefined_guru
+    from persona_cache import warmup
+    from recording import StreamRecorder
+    from routing import ModelRouter, format_routing_report
+    from search_cache import ClaudeWebSearchBackend, SearchCache
+    from tracing import NULL_TRACER, TraceObserver, Tracer, trace_client_factory
+    from transcript import default_transcript_filename
+
+    log(f"🤖 Starting Investment Guru Discussion Panel")
+    log(f"topic: {args.topic}")
+    log(f"Participants: {', '.join(guru_names)}")
+    if checkpoint is not None:
+        log(f"Resuming: {checkpoint.id} ({len(checkpoint.turns)} completed guru turns)")
+    log("-" * 60)
+
+    config = DiscussionConfig(
+        topic=args.topic,
+        guru_names=guru_names,
+        output=args.output or default_transcript_filename(),
+        parallel_opening=args.parallel_opening,
+        opening_concurrency=args.opening_concurrency,
+        flush_interval=args.flush_interval,
+        fsync_interval=args.fsync_interval,
+        guru_tools=args.guru_tools,
+        hybrid=args.hybrid,
+        turn_digests=not args.no_turn_digests,
+        budget=budget,
+        convergence=convergence,
+        speculation=speculation,
+        routing=routing,
+        resilience=resilience,
+    )
+
+    archive = None
+    if not args.no_archive:
+        archive = DiscussionArchive(args.archive)
+        previous = None
+        if checkpoint is None and args.reuse != "never":
+            previous = archive.find_reusable(config, args.reuse_within * 3600)
+        if previous is not None:
+            log(f"♻️  The same topic, panel and settings finished {describe_age(previous.age_seconds)}: {previous.output}")
+            reuse = args.reuse == "always"
+            if args.reuse == "ask" and sys.stdin.isatty():
+                reuse = input("   Reuse it instead of running again? [Y/n] ").strip().lower() in ("", "y", "yes")
+            if reuse:
+                if ndjson:
+                    print(json.dumps({"type": "reused", "id": previous.id, "output": previous.output,
+                                      "result": previous.result}, ensure_ascii=False))
+                log(f"💾 Reused archived discussion {previous.id} (uv run archive.py show {previous.id})")
+                archive.close()
+                return
+
+    router = ModelRouter(routing) if routing is not None else None
+    # Untraced runs use the plain client factory, so tracing costs nothing when it is off
+    tracer = Tracer() if args.trace else NULL_TRACER
+    client_factory = trace_client_factory(ClaudeSDKClient, tracer) if args.trace else ClaudeSDKClient
+
+    # Load (or research once and cache) personas for dynamic gurus
+    persona_cache = None
+    if not args.no_persona_cache:
+        persona_cache = PersonaCache(args.persona_cache_dir)
+        dynamic_gurus = [name for name in guru_names if not is_predefined_guru(name)]
+        if dynamic_gurus:
+            log(f"🧠 Preparing personas for: {', '.join(dynamic_gurus)}")
+            with tracer.span("persona warmup"):
+                statuses = await warmup(dynamic_gurus, persona_cache, client_factory=client_factory, router=router)
+            for name, status in statuses.items():
+                log(f"   - {name}: {status}")
+
+    search_cache = None
+    if args.search_cache:
+        search_cache = SearchCache(ClaudeWebSearchBackend(), directory=args.search_cache_dir)
+
+    prompt = None
+    if checkpoint is not None:
+        config = get_resume_config(checkpoint, config)
+        prompt = get_resume_prompt(checkpoint)
+
+    accountant = UsageAccountant()
+    observers = [NdjsonRenderer() if ndjson else ConsoleRenderer(), accountant]
+    if args.record:
+        observers.append(StreamRecorder(args.record))
+    if archive is not None:
+        observers.append(ArchiveRecorder(archive))
+    if args.trace:
+        observers.append(TraceObserver(tracer))
+    checkpointer = None
+    if not args.no_checkpoint:
+        checkpointer = Checkpointer(checkpoint_store, checkpoint)
+        observers.append(checkpointer)
 
-    # Create options with all gurus registered
-    options = create_agent_options(guru_names)
-    
-    # Collect discussion log
-    discussion_log = []
-    discussion_log.append(f"# Investment Guru Discussion: {args.topic}\n")
-    discussion_log.append(f"**Date:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-    discussion_log.append(f"**Participants:** {', '.join(guru_names)}\n\n")
-    discussion_log.append("---\n\n")
-    
     # Execute the Orchestrator Agent
     try:
-        async with ClaudeSDKClient(options=options) as client:
-            # Send the initial prompt to start the discussion
-            await client.query(args.topic)
-            
-            # Stream the response
-            async for message in client.receive_response():
-                if isinstance(message, AssistantMessage):
-                    for block in message.content:
-                        if isinstance(block, TextBlock):
-                            print(block.text, end="", flush=True)
-                            discussion_log.append(block.text)
-                        elif isinstance(block, ToolUseBlock):
-                            # Real-time broadcasting of tool usage (Sub-agent calls)
-                            if block.name == "Task":
-                                subagent = block.input.get("subagent_type", "Unknown Agent")
-                                log_msg = f"\n\n> 🎤 **[Social] Passing the microphone to:** `{subagent}`...\n\n"
-                                print(log_msg.replace(">", "").replace("*", "").replace("`", "").strip())
-                                discussion_log.append(log_msg)
-                            elif block.name == "WebSearch":
-                                query = block.input.get("query", "Unknown Query")
-                                log_msg = f"\n\n> 🔍 **[System] Searching the web for:** `'{query}'`...\n\n"
-                                print(log_msg.replace(">", "").replace("*", "").replace("`", "").strip())
-                                discussion_log.append(log_msg)
-                            else:
-                                log_msg = f"\n\n> 🛠️ **[System] Using tool:** `{block.name}`\n\n"
-                                print(log_msg.replace(">", "").replace("*", "").replace("`", "").strip())
-                                discussion_log.append(log_msg)
-        
-        # Save to MD file
-        filename = f"discussion_result_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md"
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write("".join(discussion_log))
-        
-        print(f"\n\n💾 Discussion saved to: {filename}")
-                            
+        with tracer.span("discussion"):
+            result = await run_discussion(
+                config, observers=observers, client_factory=client_factory, persona_cache=persona_cache,
+                search_cache=search_cache, prompt=prompt, resumed=checkpoint is not None, router=router
+            )
+        log(f"\n\n💾 Discussion saved to: {result.output}")
+        if result.picks_path is not None:
+            log(f"📈 Picks saved to: {result.picks_path} (uv run consensus.py --store {result.picks_path})")
+        print_usage_report(accountant, result.output, log)
+        if result.budget is not None:
+            skipped = f", skipped: {', '.join(result.budget['skipped'])}" if result.budget["skipped"] else ""
+            log(f"💰 Budget: {result.budget['used']:.0%} used, ended in phase '{result.budget['phase']}'{skipped}")
+        if result.convergence is not None and result.convergence["converged"]:
+            report = result.convergence
+            log(f"🤝 Converged after round {report['converged_after_round']} (agreement {report['agreement']:.2f}): "
+                f"{report['rounds_run']} of {report['expected_rounds']} expected rounds run, "
+                f"{report['rounds_saved']} saved")
+        if result.speculation is not None:
+            report = result.speculation
+            log(f"🔮 Speculation: {report['committed']}/{report['started']} drafts used ({report['hit_rate']:.0%} hit rate), "
+                f"{report['head_start_seconds']:.1f}s head start, ${report['wasted_cost_usd']:.4f} wasted")
+        if result.routing is not None:
+            log(f"🧭 Model routing (routed spend ${result.routing['cost_usd']:.4f})")
+            for line in format_routing_report(result.routing):
+                log(f"   {line}")
+        if result.resilience is not None and (result.resilience["absent"] or result.resilience["retries"]):
+            report = result.resilience
+            absent = ", ".join(f"{guru} ({reason})" for guru, reason in report["absent"].items()) or "none"
+            log(f"🚑 Resilience: {report['retries']} retries, {report['timeouts']} timeouts, "
+                f"{report['hedges']} hedges ({report['hedge_wins']} won), absent: {absent}")
+        if search_cache is not None:
+            stats = search_cache.stats
+            log(f"🔍 Search cache: {stats.hits} hits / {stats.misses} misses ({stats.hit_rate:.0%} hit rate)")
+
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        log(f"\n\n💾 Partial discussion saved to: {config.output}")
+        if checkpointer is not None:
+            log(f"🔖 Resume with: uv run run.py --resume {checkpointer.id}")
+        raise
     except Exception as e:
-        print(f"\n\n❌ Error: {str(e)}")
-        print("Ensure you are authenticated with 'anthropic auth login'.")
+        log(f"\n\n💾 Partial discussion saved to: {config.output}")
+        print_usage_report(accountant, config.output, log)
+        if checkpointer is not None:
+            log(f"🔖 Resume with: uv run run.py --resume {checkpointer.id}")
+        log(f"\n\n❌ Error: {str(e)}")
+        log("Ensure you are authenticated with 'anthropic auth login'.")
         sys.exit(1)
+    finally:
+        if archive is not None:
+            archive.close()
+        if args.trace:
+            tracer.export(args.trace)
+            log(f"🧵 Trace saved to: {args.trace} (open in ui.perfetto.dev)")
 
 if __name__ == "__main__":
     try:
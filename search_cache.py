@@ -0,0 +1,267 @@
+"""
+Shared WebSearch Result Cache
+
+Every guru and the Orchestrator can search the web, and on the same topic they often
+issue nearly identical queries. This module serves searches through an in-process
+SDK MCP tool backed by a local result cache that dedupes identical and normalized
+queries within a discussion (including concurrent in-flight ones) and across runs.
+"""
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Protocol, Tuple
+
+from claude_agent_sdk import ClaudeAgentOptions, ClaudeSDKClient, SdkMcpTool, create_sdk_mcp_server, tool
+
+from orchestrator import ClientFactory, collect_response_text
+
+DEFAULT_SEARCH_CACHE_DIR = os.path.join(".guru_cache", "search")
+SEARCH_SERVER_NAME = "search_cache"
+SEARCH_TOOL_NAME = f"mcp__{SEARCH_SERVER_NAME}__web_search"
+
+DEFAULT_FRESHNESS_SECONDS = 7 * 24 * 60 * 60
+
+# (pattern, freshness window) pairs; the first matching pattern wins
+DEFAULT_FRESHNESS_RULES: List[Tuple[str, float]] = [
+    (r"\b(price|quote|today|latest|news|breaking)\b|주가|오늘|실시간|뉴스", 60 * 60),
+    (r"\b(earnings|guidance|quarter|q[1-4])\b|실적|분기", 24 * 60 * 60),
+]
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a search query so trivially different spellings share one cache entry:
+    case-folded, punctuation stripped and whitespace collapsed. Word order is kept, since
+    it carries meaning ("apple vs microsoft" is not "microsoft vs apple").
+    """
+    words = re.sub(r"[^\w\s.]", " ", query.casefold()).split()
+    return " ".join(word.strip(".") for word in words if word.strip("."))
+
+
+class SearchBackend(Protocol):
+    """Performs an actual (uncached) web search."""
+
+    async def search(self, query: str) -> str: ...
+
+
+class ClaudeWebSearchBackend:
+    """Runs the built-in WebSearch tool in a dedicated one-shot session."""
+
+    SYSTEM_PROMPT = (
+        "You are a search service. Use the 'WebSearch' tool for the given query and reply with "
+        "a concise list of the most relevant results (title, source and key facts). No commentary."
+    )
+
+    def __init__(self, client_factory: ClientFactory = ClaudeSDKClient):
+        self.client_factory = client_factory
+
+    async def search(self, query: str) -> str:
+        options = ClaudeAgentOptions(
+            system_prompt=self.SYSTEM_PROMPT,
+            allowed_tools=["WebSearch"],
+            permission_mode="acceptEdits",
+            max_turns=2,
+        )
+        return await collect_response_text(options, query, self.client_factory)
+
+
+class LocalSearchBackend:
+    """Offline stand-in backend returning canned or generated results (for tests)."""
+
+    def __init__(self, results: Optional[Dict[str, str]] = None, latency: float = 0.0):
+        self.results = results or {}
+        self.latency = latency
+        self.queries: List[str] = []
+
+    async def search(self, query: str) -> str:
+        self.queries.append(query)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.results.get(query, f"Local results for: {query}")
+
+
+@dataclass
+class SearchCacheStats:
+    """Hit/miss counters for one SearchCache instance"""
+    memory_hits: int = 0
+    disk_hits: int = 0
+    inflight_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits + self.inflight_hits
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> Dict:
+        return {**asdict(self), "hits": self.hits, "hit_rate": round(self.hit_rate, 4)}
+
+
+class SearchCache:
+    """
+    Two-level search result cache: an in-memory layer shared by everyone in the current
+    process, and an on-disk layer (one JSON file per normalized query) shared across runs.
+    """
+
+    def __init__(
+        self,
+        backend: SearchBackend,
+        directory: Optional[str] = DEFAULT_SEARCH_CACHE_DIR,
+        freshness_rules: Optional[List[Tuple[str, float]]] = None,
+        default_freshness_seconds: float = DEFAULT_FRESHNESS_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.backend = backend
+        self.directory = Path(directory) if directory else None
+        self.freshness_rules = [
+            (re.compile(pattern), seconds)
+            for pattern, seconds in (DEFAULT_FRESHNESS_RULES if freshness_rules is None else freshness_rules)
+        ]
+        self.default_freshness_seconds = default_freshness_seconds
+        self.clock = clock
+        self.stats = SearchCacheStats()
+        self._memory: Dict[str, Tuple[float, str]] = {}
+        self._inflight: Dict[str, "asyncio.Future[str]"] = {}
+
+    def freshness_for(self, query: str) -> float:
+        """Returns how long results for this query stay fresh."""
+        lowered = query.casefold()
+        for pattern, seconds in self.freshness_rules:
+            if pattern.search(lowered):
+                return seconds
+        return self.default_freshness_seconds
+
+    def _path(self, key: str) -> Optional[Path]:
+        if self.directory is None:
+            return None
+        return self.directory / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json"
+
+    def _load(self, key: str) -> Optional[Tuple[float, str]]:
+        path = self._path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry["fetched_at"], entry["result"]
+
+    def _store(self, key: str, query: str, fetched_at: float, result: str) -> None:
+        self._memory[key] = (fetched_at, result)
+        path = self._path(key)
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"query": query, "key": key, "fetched_at": fetched_at, "result": result},
+                      f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    async def search(self, query: str) -> str:
+        """Returns a fresh cached result for the query, searching the backend only on a miss."""
+        key = normalize_query(query)
+        max_age = self.freshness_for(query)
+        now = self.clock()
+
+        cached = self._memory.get(key)
+        if cached and now - cached[0] <= max_age:
+            self.stats.memory_hits += 1
+            return cached[1]
+
+        cached = self._load(key)
+        if cached and now - cached[0] <= max_age:
+            self.stats.disk_hits += 1
+            self._memory[key] = cached
+            return cached[1]
+
+        # Concurrent identical queries wait for the first one instead of searching again
+        if key in self._inflight:
+            self.stats.inflight_hits += 1
+            return await asyncio.shield(self._inflight[key])
+
+        self.stats.misses += 1
+        future: "asyncio.Future[str]" = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self.backend.search(query)
+            # An empty result is likely a transient failure; do not pin it for the freshness window
+            if result.strip():
+                self._store(key, query, self.clock(), result)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be awaiting this future; mark the exception as retrieved
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+
+def create_search_tool(cache: SearchCache) -> SdkMcpTool:
+    """Creates the in-process web_search tool served from the given cache."""
+
+    @tool("web_search", "Search the web (results are cached and shared across the panel)", {"query": str})
+    async def web_search(args: Dict[str, Any]) -> Dict[str, Any]:
+        result = await cache.search(args["query"])
+        return {"content": [{"type": "text", "text": result}]}
+
+    return web_search
+
+
+def create_search_server(cache: SearchCache) -> Any:
+    """Creates the SDK MCP server configuration exposing the cached search tool."""
+    return create_sdk_mcp_server(name=SEARCH_SERVER_NAME, tools=[create_search_tool(cache)])
+
+
+SEARCH_TOOL_HINT = (
+    f"\n\nFor every web search, use the `{SEARCH_TOOL_NAME}` tool "
+    "(it replaces 'WebSearch' and shares results with the rest of the panel).\n"
+)
+
+
+def _route_tools(tools: Optional[List[str]]) -> Optional[List[str]]:
+    if tools is None:
+        return None
+    return [SEARCH_TOOL_NAME if name == "WebSearch" else name for name in tools]
+
+
+def enable_search_cache(options: ClaudeAgentOptions, cache: SearchCache) -> ClaudeAgentOptions:
+    """
+    Routes every WebSearch of the Orchestrator and its gurus through the cached search tool.
+    Returns options with the search MCP server registered and WebSearch swapped out.
+    """
+    mcp_servers = dict(options.mcp_servers) if isinstance(options.mcp_servers, dict) else {}
+    mcp_servers[SEARCH_SERVER_NAME] = create_search_server(cache)
+
+    agents = {
+        name: dataclasses.replace(
+            definition,
+            prompt=definition.prompt + SEARCH_TOOL_HINT,
+            tools=_route_tools(definition.tools),
+        )
+        for name, definition in (options.agents or {}).items()
+    }
+    return dataclasses.replace(
+        options,
+        system_prompt=(options.system_prompt or "") + SEARCH_TOOL_HINT,
+        allowed_tools=_route_tools(options.allowed_tools),
+        mcp_servers=mcp_servers,
+        agents=agents or options.agents,
+    )
@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+"""
+Local Discussion Service
+
+A small asyncio HTTP service for starting discussions from dashboards instead of
+shelling out to run.py. Every discussion runs through the same run_discussion pipeline,
+and its typed events (events.py) are streamed to any number of subscribers as
+Server-Sent Events.
+
+    POST   /discussions              start one: {"topic": ..., "gurus": "a,b", "hybrid": true,
+                                     "budget": {"max_cost_usd": 1.0}} -> 202 {"id": ..., "events": ...}
+    GET    /discussions/<id>         status (and the result once finished)
+    GET    /discussions/<id>/events  SSE stream; replays earlier events, honours Last-Event-ID
+    DELETE /discussions/<id>         cancel a queued or running discussion
+    GET    /health                   queue and worker state
+
+Admission control: at most `max_queue` discussions wait for one of `workers` workers and
+a client (X-Client-Id header, else its address) may have at most `max_per_client`
+queued or running discussions; anything beyond gets 429 with Retry-After.
+
+Backpressure: each subscriber has a bounded buffer. The discussion never waits for a
+dashboard; a subscriber that falls `subscriber_buffer` events behind gets an "overflow"
+event and is disconnected, and reconnects with Last-Event-ID to catch up from history.
+
+Usage: uv run service.py --port 8765 --workers 2
+       uv run service.py --fake      # scripted fake client, no credentials needed
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from claude_agent_sdk import ClaudeSDKClient
+
+from budget import DiscussionBudget
+from convergence import ConvergencePolicy
+from discussion import (
+    DEFAULT_TOPIC, DiscussionConfig, DiscussionObserver, DiscussionResult, EventObserver, parse_guru_names,
+    run_discussion
+)
+from events import DiscussionEvent
+from orchestrator import ClientFactory
+from resilience import ResiliencePolicy
+from routing import RoutingPolicy
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_QUEUE = 16
+DEFAULT_MAX_PER_CLIENT = 2
+DEFAULT_SUBSCRIBER_BUFFER = 256
+DEFAULT_HISTORY_LIMIT = 10_000
+DEFAULT_HEARTBEAT = 15.0
+DEFAULT_OUTPUT_DIR = "service_results"
+DEFAULT_RETRY_AFTER = 5
+MAX_FINISHED_JOBS = 200
+MAX_BODY_BYTES = 64 * 1024
+
+QUEUED = "queued"
+RUNNING = "running"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = {"completed", "failed", "interrupted", CANCELLED}
+
+# Subscriber queue markers
+END = None
+OVERFLOW = "overflow"
+
+HTTP_REASONS = {
+    200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 429: "Too Many Requests",
+}
+
+
+class AdmissionError(Exception):
+    """A discussion was refused because the service is at capacity."""
+
+    def __init__(self, message: str, retry_after: int = DEFAULT_RETRY_AFTER):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_job_request(data: Any) -> DiscussionConfig:
+    """Validates a POST /discussions body and returns the discussion config (without output)."""
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object")
+    topic = data.get("topic") or DEFAULT_TOPIC
+    if not isinstance(topic, str):
+        raise ValueError("'topic' must be a string")
+    config = DiscussionConfig(topic=topic)
+    if data.get("gurus"):
+        config.guru_names = parse_guru_names(data["gurus"])
+    for name in ["parallel_opening", "guru_tools", "hybrid", "turn_digests"]:
+        if name in data:
+            setattr(config, name, bool(data[name]))
+    if data.get("budget"):
+        try:
+            config.budget = DiscussionBudget(**data["budget"])
+        except TypeError as e:
+            raise ValueError(f"invalid 'budget' ({e})") from e
+    convergence = data.get("convergence")
+    if convergence:
+        try:
+            config.convergence = ConvergencePolicy(**(convergence if isinstance(convergence, dict) else {}))
+        except TypeError as e:
+            raise ValueError(f"invalid 'convergence' ({e})") from e
+    routing = data.get("routing")
+    if routing:
+        try:
+            config.routing = RoutingPolicy.from_dict(routing if isinstance(routing, dict) else {})
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"invalid 'routing' ({e})") from e
+    resilience = data.get("resilience")
+    if resilience:
+        try:
+            config.resilience = ResiliencePolicy(**(resilience if isinstance(resilience, dict) else {}))
+        except TypeError as e:
+            raise ValueError(f"invalid 'resilience' ({e})") from e
+    return config
+
+
+class Subscriber:
+    """One SSE connection's bounded event buffer"""
+
+    def __init__(self, maxsize: int):
+        self.queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def push(self, item: Any) -> bool:
+        """Queues an item; on a full buffer, replaces the backlog with an overflow marker."""
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+            return False
+
+
+@dataclass
+class Job:
+    """One submitted discussion and its event history"""
+    id: str
+    client_id: str
+    config: DiscussionConfig
+    history_limit: int = DEFAULT_HISTORY_LIMIT
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    result: Optional[DiscussionResult] = None
+    task: Optional["asyncio.Task[Any]"] = None
+    events: Deque[Tuple[int, str, Dict]] = field(default_factory=deque)
+    subscribers: Set[Subscriber] = field(default_factory=set)
+    _ids: Any = field(default_factory=lambda: itertools.count(1))
+
+    def __post_init__(self) -> None:
+        self.events = deque(maxlen=self.history_limit)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def publish(self, event: str, data: Dict) -> None:
+        item = (next(self._ids), event, data)
+        self.events.append(item)
+        for subscriber in list(self.subscribers):
+            if not subscriber.push(item):
+                self.subscribers.discard(subscriber)
+
+    def close(self) -> None:
+        for subscriber in self.subscribers:
+            subscriber.push(END)
+        self.subscribers.clear()
+
+    def subscribe(self, buffer: int, last_event_id: int = 0) -> Subscriber:
+        """Returns a subscriber primed with the history after last_event_id."""
+        backlog = [item for item in self.events if item[0] > last_event_id]
+        subscriber = Subscriber(max(buffer, len(backlog) + 1))
+        for item in backlog:
+            subscriber.push(item)
+        if self.finished:
+            subscriber.push(END)
+        else:
+            self.subscribers.add(subscriber)
+        return subscriber
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "client_id": self.client_id,
+            "status": self.status,
+            "topic": self.config.topic,
+            "guru_names": list(self.config.guru_names),
+            "created_at": self.created_at,
+            "events": self.events[-1][0] if self.events else 0,
+            "result": self.result.to_dict() if self.result else None,
+        }
+
+
+class JobEventPublisher(EventObserver):
+    """Publishes the discussion's typed events on a job."""
+
+    def __init__(self, job: Job):
+        self.job = job
+
+    def on_event(self, event: DiscussionEvent) -> None:
+        data = event.to_dict()
+        self.job.publish(data.pop("type"), data)
+
+
+def format_sse(event_id: int, event: str, data: Dict) -> bytes:
+    """Encodes one Server-Sent Event."""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n".encode("utf-8")
+
+
+@dataclass
+class HttpRequest:
+    """The parts of an HTTP request the service uses"""
+    method: str
+    path: str
+    headers: Dict[str, str]
+    body: bytes = b""
+
+
+async def read_request(reader: asyncio.StreamReader) -> HttpRequest:
+    """Reads one HTTP/1.1 request; raises ValueError when it is malformed or too large."""
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    parts = request_line.split()
+    if len(parts) != 3:
+        raise ValueError("malformed request line")
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", "0") or 0)
+    if length > MAX_BODY_BYTES:
+        raise ValueError("request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return HttpRequest(parts[0].upper(), urlsplit(parts[1]).path, headers, body)
+
+
+async def send_json(writer: asyncio.StreamWriter, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+    body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+    head = [f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}", "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body)}", "Connection: close"]
+    head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+
+
+class DiscussionService:
+    """Job queue, workers and HTTP front end"""
+
+    def __init__(
+        self,
+        client_factory: ClientFactory = ClaudeSDKClient,
+        workers: int = DEFAULT_WORKERS,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        max_per_client: int = DEFAULT_MAX_PER_CLIENT,
+        subscriber_buffer: int = DEFAULT_SUBSCRIBER_BUFFER,
+        heartbeat: float = DEFAULT_HEARTBEAT,
+        output_dir: str = DEFAULT_OUTPUT_DIR,
+        observers: Tuple[DiscussionObserver, ...] = (),
+    ):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.client_factory = client_factory
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_per_client = max_per_client
+        self.subscriber_buffer = subscriber_buffer
+        self.heartbeat = heartbeat
+        self.output_dir = output_dir
+        self.observers = observers
+        self.jobs: Dict[str, Job] = {}
+        # Unbounded: admission counts the jobs still waiting, so cancelled ones free their slot at once
+        self._queue: "asyncio.Queue[Job]" = asyncio.Queue()
+        self._workers: List["asyncio.Task[None]"] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    # Jobs
+
+    def active_jobs(self, client_id: Optional[str] = None) -> List[Job]:
+        return [
+            job for job in self.jobs.values()
+            if not job.finished and (client_id is None or job.client_id == client_id)
+        ]
+
+    def queued_jobs(self) -> List[Job]:
+        return [job for job in self.jobs.values() if job.status == QUEUED]
+
+    def submit(self, config: DiscussionConfig, client_id: str) -> Job:
+        """Queues a discussion or raises AdmissionError when the client or the queue is full."""
+        if len(self.active_jobs(client_id)) >= self.max_per_client:
+            raise AdmissionError(f"client '{client_id}' already has {self.max_per_client} active discussions")
+        waiting = len(self.queued_jobs())
+        if waiting >= self.max_queue:
+            raise AdmissionError(f"the queue is full ({self.max_queue} waiting discussions)")
+        job_id = uuid.uuid4().hex[:12]
+        config.output = os.path.join(self.output_dir, f"{job_id}.md")
+        job = Job(job_id, client_id, config)
+        self._queue.put_nowait(job)
+        self.jobs[job_id] = job
+        job.publish("queued", {"position": waiting + 1})
+        self._forget_finished()
+        return job
+
+    def cancel(self, job_id: str) -> Job:
+        """Cancels a queued or running discussion; raises KeyError for unknown ids."""
+        job = self.jobs[job_id]
+        if job.status == QUEUED:
+            self._finish(job, CANCELLED)
+        elif job.status == RUNNING and job.task is not None:
+            job.task.cancel()
+        return job
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.publish("end", {"status": status})
+        job.close()
+
+    def _forget_finished(self) -> None:
+        finished = [job for job in self.jobs.values() if job.finished]
+        for job in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job.id]
+
+    async def _run(self, job: Job) -> None:
+        observers = [JobEventPublisher(job), *self.observers]
+        try:
+            job.result = await run_discussion(job.config, observers=observers, client_factory=self.client_factory)
+        except Exception:
+            # run_discussion already reported the failure to the observers
+            pass
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            if job.status != QUEUED:
+                continue
+            job.status = RUNNING
+            job.task = asyncio.ensure_future(self._run(job))
+            try:
+                await asyncio.wait([job.task])
+            finally:
+                if job.task.cancelled():
+                    self._finish(job, CANCELLED)
+                else:
+                    self._finish(job, job.result.status if job.result else "failed")
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> Tuple[str, int]:
+        """Starts the workers and the HTTP server; returns the bound address."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._workers = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        self._server = await asyncio.start_server(self.handle, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def stop(self) -> None:
+        """Stops accepting requests, cancels every discussion and stops the workers."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for job in self.active_jobs():
+            self.cancel(job.id)
+        running = [job.task for job in self.jobs.values() if job.task is not None]
+        await asyncio.gather(*running, return_exceptions=True)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    # HTTP
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            try:
+                request = await read_request(reader)
+            except (ValueError, asyncio.IncompleteReadError) as e:
+                await send_json(writer, 413 if "too large" in str(e) else 400, {"error": str(e)})
+                return
+            await self.route(request, writer)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, request: HttpRequest, writer: asyncio.StreamWriter) -> None:
+        parts = [part for part in request.path.split("/") if part]
+        if parts == ["health"] and request.method == "GET":
+            await send_json(writer, 200, {
+                "workers": self.workers,
+                "queued": len(self.queued_jobs()),
+                "running": sum(1 for job in self.active_jobs() if job.status == RUNNING),
+                "max_queue": self.max_queue,
+            })
+        elif parts == ["discussions"] and request.method == "POST":
+            await self._post_discussion(request, writer)
+        elif len(parts) >= 2 and parts[0] == "discussions":
+            job = self.jobs.get(parts[1])
+            if job is None:
+                await send_json(writer, 404, {"error": f"unknown discussion '{parts[1]}'"})
+            elif len(parts) == 3 and parts[2] == "events" and request.method == "GET":
+                await self._stream(job, request, writer)
+            elif len(parts) == 2 and request.method == "GET":
+                await send_json(writer, 200, job.to_dict())
+            elif len(parts) == 2 and request.method == "DELETE":
+                if job.finished:
+                    await send_json(writer, 409, {"error": f"discussion already {job.status}"})
+                else:
+                    await send_json(writer, 200, self.cancel(job.id).to_dict())
+            else:
+                await send_json(writer, 405, {"error": "method not allowed"})
+        else:
+            await send_json(writer, 404, {"error": "not found"})
+
+    async def _post_discussion(self, request: HttpRequest, writer: asyncio.StreamWriter) -> None:
+        try:
+            config = parse_job_request(json.loads(request.body or b"{}"))
+        except ValueError as e:
+            await send_json(writer, 400, {"error": str(e)})
+            return
+        peer = writer.get_extra_info("peername")
+        client_id = request.headers.get("x-client-id") or (peer[0] if peer else "unknown")
+        try:
+            job = self.submit(config, client_id)
+        except AdmissionError as e:
+            await send_json(writer, 429, {"error": str(e)}, {"Retry-After": str(e.retry_after)})
+            return
+        await send_json(writer, 202, {**job.to_dict(), "events_url": f"/discussions/{job.id}/events"})
+
+    async def _stream(self, job: Job, request: HttpRequest, writer: asyncio.StreamWriter) -> None:
+        try:
+            last_event_id = int(request.headers.get("last-event-id", "0") or 0)
+        except ValueError:
+            last_event_id = 0
+        subscriber = job.subscribe(self.subscriber_buffer, last_event_id)
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream; charset=utf-8\r\n"
+            b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n"
+        )
+        try:
+            await writer.drain()
+            last_sent = last_event_id
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscriber.queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    writer.write(b": keepalive\n\n")
+                    await writer.drain()
+                    continue
+                if item is END:
+                    break
+                if item == OVERFLOW:
+                    # Too slow: let the client reconnect with Last-Event-ID and catch up from history
+                    writer.write(format_sse(last_sent, "overflow", {"last_event_id": last_sent}))
+                    await writer.drain()
+                    break
+                last_sent = item[0]
+                writer.write(format_sse(*item))
+                # Blocks on a slow socket; meanwhile events pile up in the bounded buffer, not in the discussion
+                await writer.drain()
+        finally:
+            job.subscribers.discard(subscriber)
+
+
+async def main() -> None:
+    """Command line entry point for the discussion service"""
+    parser = argparse.ArgumentParser(description="Serve Investment Guru Discussions over HTTP with SSE")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Discussions running at once")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE, help="Discussions waiting for a worker")
+    parser.add_argument("--max-per-client", type=int, default=DEFAULT_MAX_PER_CLIENT,
+                        help="Queued or running discussions per client")
+    parser.add_argument("--subscriber-buffer", type=int, default=DEFAULT_SUBSCRIBER_BUFFER,
+                        help="Events a slow SSE consumer may fall behind before it is disconnected")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--fake", action="store_true", help="Use the scripted fake client (no credentials)")
+    args = parser.parse_args()
+
+    client_factory: ClientFactory = ClaudeSDKClient
+    if args.fake:
+        from fake_client import FakeClaudeSDKClient, discussion_responder
+        client_factory = lambda options: FakeClaudeSDKClient(options, responder=discussion_responder(), latency=0.05)
+
+    service = DiscussionService(
+        client_factory, workers=args.workers, max_queue=args.max_queue, max_per_client=args.max_per_client,
+        subscriber_buffer=args.subscriber_buffer, output_dir=args.output_dir,
+    )
+    host, port = await service.start(args.host, args.port)
+    print(f"🛰️  Discussion service on http://{host}:{port} ({args.workers} workers)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n⏹️  Service stopped.")
@@ -0,0 +1,331 @@
+"""
+Speculative Guru Turns
+
+The Orchestrator hands the microphone to one guru at a time, so the rest of the panel
+idles while a guru speaks. In speculative mode the likely next speakers are predicted
+and their turns are drafted in the background on standalone guru sessions:
+
+- prediction: when a guru is called, the next `depth` panelists in panel order (least
+  recently heard first) are predicted; when an answer comes back, any panelist it names
+  is predicted too, since a rebuttal usually follows;
+- commit: when the Orchestrator calls a guru whose draft exists, a PreToolUse hook attaches
+  it to the Task prompt, so the sub-agent only confirms or adjusts a prepared answer instead
+  of researching from scratch. A draft still running is waited for only as long as a typical
+  guru turn leaves it to finish (at most `commit_wait` seconds); one that overruns is dropped;
+- discard: a draft that has not been asked for within `horizon` guru turns is stale;
+  it is cancelled (or thrown away) and its spend is reported as wasted.
+
+Drafts are paid from the discussion's budget: their spend is fed to the budget scheduler,
+and nothing new is drafted once the budget is tight or the panel has converged.
+
+The report gives the hit rate, the spend of committed and wasted drafts and the head
+start the committed drafts had, to tune depth and horizon against the latency saved.
+"""
+
+import asyncio
+import dataclasses
+import re
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, List, Optional
+
+from claude_agent_sdk import AssistantMessage, ClaudeAgentOptions, ClaudeSDKClient, HookMatcher, ResultMessage
+
+from budget import NORMAL, WRAP_UP, BudgetScheduler
+from convergence import ConvergenceDetector
+from digest import DigestBook, format_digest_block
+from orchestrator import ClientFactory, collect_response_text, create_guru_options
+from pricing import estimate_cost
+from routing import SPECULATION, ModelRouter
+from task_turns import TaskTurn, TurnObserver
+
+DEFAULT_DEPTH = 1
+DEFAULT_HORIZON = 2
+DEFAULT_COMMIT_WAIT = 10.0
+
+SPECULATIVE_PROMPT = (
+    "The discussion topic is: {topic}\n\n"
+    "The panel discussion is under way and you will be asked to speak next. Prepare your "
+    "contribution: react to the latest points of the other Gurus, defend or revise your picks "
+    "and name the main risk you see."
+)
+DRAFT_BLOCK = (
+    "# Your Prepared Draft\n"
+    "You drafted the answer below while the previous Guru was speaking. If it answers the "
+    "question above, return it as your answer (tighten it if needed); otherwise revise it. "
+    "Only research further if the question needs facts the draft lacks.\n\n{draft}"
+)
+
+
+@dataclass
+class SpeculationPolicy:
+    """How aggressively turns are drafted ahead"""
+    depth: int = DEFAULT_DEPTH
+    horizon: int = DEFAULT_HORIZON
+    commit_wait: float = DEFAULT_COMMIT_WAIT
+
+
+@dataclass
+class SpeculationStats:
+    started: int = 0
+    committed: int = 0
+    discarded: int = 0
+    failed: int = 0
+    committed_cost_usd: float = 0.0
+    wasted_cost_usd: float = 0.0
+    head_start_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        settled = self.committed + self.discarded
+        return self.committed / settled if settled else 0.0
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data["hit_rate"] = round(self.hit_rate, 4)
+        for key in ("committed_cost_usd", "wasted_cost_usd", "head_start_seconds"):
+            data[key] = round(data[key], 6)
+        return data
+
+
+class _Draft:
+    """One speculative turn in flight or ready"""
+
+    def __init__(self, guru: str, turn: int, started_at: float):
+        self.guru = guru
+        self.turn = turn
+        self.started_at = started_at
+        self.finished_at: Optional[float] = None
+        self.cost_usd = 0.0
+        self.task: Optional["asyncio.Task[str]"] = None
+
+    def on_message(self, message: Any) -> None:
+        if isinstance(message, AssistantMessage) and message.usage:
+            self.cost_usd += estimate_cost(message.usage, message.model)
+        elif isinstance(message, ResultMessage) and message.total_cost_usd is not None:
+            # The session's own total supersedes the per-message estimate
+            self.cost_usd = message.total_cost_usd
+
+
+class Prefetcher(TurnObserver):
+    """
+    Drafts predicted guru turns in the background and commits them through a Task hook.
+    Draft spend goes to the scheduler, and the scheduler and convergence detector gate new drafts.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[SpeculationPolicy] = None,
+        digests: Optional[DigestBook] = None,
+        clock: Callable[[], float] = time.monotonic,
+        router: Optional[ModelRouter] = None,
+        scheduler: Optional[BudgetScheduler] = None,
+        convergence: Optional[ConvergenceDetector] = None,
+    ):
+        self.policy = policy or SpeculationPolicy()
+        self.digests = digests
+        self.router = router
+        self.scheduler = scheduler
+        self.convergence = convergence
+        self.clock = clock
+        self.stats = SpeculationStats()
+        self.options: Optional[ClaudeAgentOptions] = None
+        self.client_factory: ClientFactory = ClaudeSDKClient
+        self.topic = ""
+        self.guru_names: List[str] = []
+        self.turns = 0
+        self.last_heard: Dict[str, int] = {}
+        self.drafts: Dict[str, _Draft] = {}
+        # How long the Orchestrator's guru turns took, to judge whether a draft is worth waiting for
+        self.turn_seconds: List[float] = []
+
+    def start(self, options: ClaudeAgentOptions, topic: str, client_factory: ClientFactory = ClaudeSDKClient) -> None:
+        self.options = options
+        self.topic = topic
+        self.client_factory = client_factory
+        self.guru_names = list(options.agents or {})
+
+    # Prediction
+
+    def predict(self, current: str) -> List[str]:
+        """The `depth` panelists most likely to follow `current`: next in panel order, least recently heard first."""
+        if current not in self.guru_names:
+            return []
+        index = self.guru_names.index(current)
+        following = self.guru_names[index + 1:] + self.guru_names[:index]
+        following.sort(key=lambda name: self.last_heard.get(name, -1))
+        return following[: self.policy.depth]
+
+    def mentioned(self, guru: str, text: str) -> List[str]:
+        """Panelists named in a guru's answer (by key or by a name part such as "Buffett")."""
+        lowered = text.lower()
+        names = []
+        for name in self.guru_names:
+            if name == guru:
+                continue
+            parts = [name.replace("_", " ")] + [part for part in name.split("_") if len(part) > 3]
+            if any(re.search(rf"\b{re.escape(part)}\b", lowered) for part in parts):
+                names.append(name)
+        return names
+
+    # Drafting
+
+    def closed(self) -> bool:
+        """True once the budget is no longer in its normal phase or the panel has converged."""
+        if self.scheduler is not None and self.scheduler.phase != NORMAL:
+            return True
+        return self.convergence is not None and self.convergence.converged
+
+    def prefetch(self, guru: str) -> bool:
+        """Starts drafting a guru's next turn unless one is already in flight or ready, or drafting is closed."""
+        if self.options is None or guru in self.drafts or guru not in (self.options.agents or {}):
+            return False
+        if self.closed():
+            return False
+        draft = _Draft(guru, self.turns, self.clock())
+        draft.task = asyncio.ensure_future(self._draft(draft))
+        # A discarded draft's failure is of no interest; retrieve it so it is not logged
+        draft.task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        self.drafts[guru] = draft
+        self.stats.started += 1
+        return True
+
+    def _prompt(self, guru: str) -> str:
+        prompt = SPECULATIVE_PROMPT.format(topic=self.topic)
+        if self.digests is not None and self.digests.for_guru(guru):
+            prompt += "\n\n" + format_digest_block(self.digests.for_guru(guru))
+        return prompt
+
+    async def _draft(self, draft: _Draft) -> str:
+        definition = self.options.agents[draft.guru]
+        guru_options = create_guru_options(definition, self.options)
+        session = f"{SPECULATION}:{draft.guru}:{draft.turn}"
+        on_router = None
+        if self.router is not None:
+            tools = definition.tools or []
+            guru_options = dataclasses.replace(guru_options, model=self.router.model_for(SPECULATION, draft.guru, tools))
+            on_router = self.router.session(SPECULATION, draft.guru, tools)
+
+        def on_message(message: Any) -> None:
+            draft.on_message(message)
+            if self.scheduler is not None:
+                self.scheduler.on_session_message(session, message)
+            if on_router is not None:
+                on_router(message)
+        try:
+            return await collect_response_text(
+                guru_options, self._prompt(draft.guru), self.client_factory, on_message=on_message
+            )
+        finally:
+            draft.finished_at = self.clock()
+
+    def _discard(self, draft: _Draft) -> None:
+        self.drafts.pop(draft.guru, None)
+        if draft.task is not None and not draft.task.done():
+            draft.task.cancel()
+        self.stats.discarded += 1
+        self.stats.wasted_cost_usd += draft.cost_usd
+
+    def expire(self) -> None:
+        """Discards drafts that were not asked for within the horizon."""
+        for draft in list(self.drafts.values()):
+            if self.turns - draft.turn >= self.policy.horizon:
+                self._discard(draft)
+
+    def typical_turn_seconds(self) -> float:
+        """Median duration of the guru turns so far; commit_wait until one has been timed."""
+        if not self.turn_seconds:
+            return self.policy.commit_wait
+        ordered = sorted(self.turn_seconds)
+        return ordered[len(ordered) // 2]
+
+    def wait_budget(self, draft: _Draft) -> float:
+        """How long a running draft is worth waiting for: what a typical turn leaves of it, capped by commit_wait."""
+        remaining = self.typical_turn_seconds() - (self.clock() - draft.started_at)
+        return max(0.0, min(remaining, self.policy.commit_wait))
+
+    async def commit(self, guru: str) -> Optional[str]:
+        """
+        Returns the guru's draft if it is ready, or finishes within what a typical turn
+        leaves of it; None otherwise, so the Task call runs from scratch without delay.
+        """
+        draft = self.drafts.pop(guru, None)
+        if draft is None:
+            return None
+        try:
+            if draft.task.done():
+                text = draft.task.result()
+            else:
+                wait = self.wait_budget(draft)
+                if wait <= 0:
+                    raise asyncio.TimeoutError
+                text = await asyncio.wait_for(asyncio.shield(draft.task), wait)
+        except asyncio.TimeoutError:
+            self.drafts[guru] = draft
+            self._discard(draft)
+            return None
+        except Exception:
+            self.stats.failed += 1
+            self.stats.wasted_cost_usd += draft.cost_usd
+            return None
+        if not text:
+            self.stats.discarded += 1
+            return None
+        self.stats.committed += 1
+        self.stats.committed_cost_usd += draft.cost_usd
+        # The time the draft had been running before the Orchestrator asked for it
+        self.stats.head_start_seconds += min(self.clock(), draft.finished_at or self.clock()) - draft.started_at
+        return text
+
+    # Feeding and hooks
+
+    def on_task_turn(self, turn: TaskTurn) -> None:
+        self.turn_seconds.append(turn.seconds)
+        self.turns += 1
+        self.last_heard[turn.guru] = self.turns
+        self.expire()
+        if not turn.is_error:
+            for name in self.mentioned(turn.guru, turn.result):
+                self.prefetch(name)
+
+    async def pre_task_hook(self, hook_input: Dict[str, Any], tool_use_id: Optional[str], context: Any) -> Dict[str, Any]:
+        """PreToolUse hook for Task: commits a ready draft and drafts the predicted next speakers."""
+        tool_input = hook_input.get("tool_input") or {}
+        guru = tool_input.get("subagent_type", "")
+        if self.scheduler is not None:
+            self.scheduler.advance()
+        if (self.scheduler is not None and self.scheduler.phase == WRAP_UP) or (
+            self.convergence is not None and self.convergence.converged
+        ):
+            # The gates registered before this hook deny the call; its draft is not committed
+            return {}
+        draft = await self.commit(guru)
+        for name in self.predict(guru):
+            self.prefetch(name)
+        if draft is None:
+            return {}
+        # Registered after the digest hook, so the digests are attached here as well
+        updated = self.digests.attach(tool_input) if self.digests is not None else dict(tool_input)
+        updated = {**updated, "prompt": f"{updated.get('prompt', '')}\n\n{DRAFT_BLOCK.format(draft=draft)}"}
+        return {"hookSpecificOutput": {
+            "hookEventName": "PreToolUse",
+            "permissionDecision": "allow",
+            "updatedInput": updated,
+        }}
+
+    async def close(self) -> None:
+        """Cancels every draft still outstanding; they count as wasted."""
+        drafts = list(self.drafts.values())
+        for draft in drafts:
+            self._discard(draft)
+        await asyncio.gather(*(draft.task for draft in drafts if draft.task is not None), return_exceptions=True)
+
+    def report(self) -> Dict:
+        return {"policy": asdict(self.policy), **self.stats.to_dict()}
+
+
+def enable_speculation(options: ClaudeAgentOptions, prefetcher: Prefetcher) -> ClaudeAgentOptions:
+    """Returns Orchestrator options whose Task calls commit speculative drafts."""
+    hooks = dict(options.hooks or {})
+    hooks["PreToolUse"] = [*hooks.get("PreToolUse", []), HookMatcher(matcher="Task", hooks=[prefetcher.pre_task_hook])]
+    return dataclasses.replace(options, hooks=hooks)
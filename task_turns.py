@@ -0,0 +1,99 @@
+"""
+Guru Task Turns
+
+Everything that follows a discussion turn by turn (the budget scheduler, the convergence
+detector, the digests, the prefetcher, the router, the resilience monitor and observers
+such as the archive, the usage accountant and the checkpointer) needs the same facts
+from the Orchestrator's stream: which guru a Task call went to, what it was asked and
+what came back. TaskTurnTracker pairs every Task call with its result once per
+discussion and hands both ends to TurnObservers:
+
+- on_task_call when the Orchestrator calls a guru (before the sub-agent's messages);
+- on_task_turn when the result is back, with the answer text and whether it failed.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from claude_agent_sdk import AssistantMessage, ToolResultBlock, ToolUseBlock, UserMessage
+
+from transcript import tool_result_text
+
+UNKNOWN_GURU = "unknown"
+
+
+@dataclass
+class TaskTurn:
+    """One guru turn taken through the Task tool; result and seconds are set once it completes"""
+    tool_use_id: str
+    guru: str
+    prompt: str
+    result: str = ""
+    is_error: bool = False
+    seconds: float = 0.0
+
+
+class TurnObserver:
+    """Base class for everything fed the discussion's messages; override the hooks you need."""
+
+    def on_opening_message(self, guru_name: str, message: Any) -> None:
+        pass
+
+    def on_opening(self, analyses: Dict[str, str]) -> None:
+        pass
+
+    def on_structured_picks(self, picks: Dict[str, Optional[Dict]]) -> None:
+        pass
+
+    def on_task_call(self, turn: TaskTurn) -> None:
+        pass
+
+    def on_message(self, message: Any) -> None:
+        pass
+
+    def on_task_turn(self, turn: TaskTurn) -> None:
+        pass
+
+
+class TaskTurnTracker:
+    """Pairs the Task calls in the Orchestrator's stream with their results."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.in_flight: Dict[str, TaskTurn] = {}
+        self._started: Dict[str, float] = {}
+
+    def feed(self, message: Any, observers: Sequence[TurnObserver]) -> List[TaskTurn]:
+        """
+        Hands one Orchestrator message to the observers: on_task_call for the calls it
+        starts, then on_message, then on_task_turn for the turns it completes.
+        Returns the completed turns.
+        """
+        calls: List[TaskTurn] = []
+        completed: List[TaskTurn] = []
+        if isinstance(message, AssistantMessage):
+            for block in message.content:
+                if isinstance(block, ToolUseBlock) and block.name == "Task":
+                    turn = TaskTurn(block.id, block.input.get("subagent_type", UNKNOWN_GURU), block.input.get("prompt", ""))
+                    self.in_flight[block.id] = turn
+                    self._started[block.id] = self.clock()
+                    calls.append(turn)
+        elif isinstance(message, UserMessage) and isinstance(message.content, list):
+            for block in message.content:
+                if isinstance(block, ToolResultBlock) and block.tool_use_id in self.in_flight:
+                    turn = self.in_flight.pop(block.tool_use_id)
+                    turn.result = tool_result_text(block.content)
+                    turn.is_error = bool(block.is_error)
+                    turn.seconds = self.clock() - self._started.pop(block.tool_use_id)
+                    completed.append(turn)
+
+        for turn in calls:
+            for observer in observers:
+                observer.on_task_call(turn)
+        for observer in observers:
+            observer.on_message(message)
+        for turn in completed:
+            for observer in observers:
+                observer.on_task_turn(turn)
+        return completed
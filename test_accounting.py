@@ -0,0 +1,99 @@
+import json
+import pytest
+from claude_agent_sdk import AssistantMessage, TextBlock, ToolResultBlock, ToolUseBlock, UserMessage
+from accounting import ORCHESTRATOR, UsageAccountant, usage_report_path
+from pricing import estimate_cost
+from discussion import DiscussionConfig, run_discussion
+from fake_client import FakeClaudeSDKClient, result_message
+from task_turns import TaskTurnTracker
+
+def assistant(blocks, message_id, usage=None, parent=None, model="claude-sonnet-4"):
+    return AssistantMessage(content=blocks, model=model, parent_tool_use_id=parent,
+                            message_id=message_id, usage=usage)
+
+def usage(input_tokens, output_tokens):
+    return {"input_tokens": input_tokens, "output_tokens": output_tokens}
+
+def scripted_stream():
+    return [
+        assistant([TextBlock(text="Let's begin.")], "m1", usage(1000, 100)),
+        # Second block of the same API turn: same id, usage must not be double counted
+        assistant([ToolUseBlock(id="task-1", name="Task",
+                                input={"subagent_type": "warren_buffett", "prompt": "View?"})], "m1", usage(1000, 100)),
+        assistant([ToolUseBlock(id="ws-1", name="WebSearch", input={"query": "moat"})], "m2",
+                  usage(500, 20), parent="task-1"),
+        UserMessage(content=[ToolResultBlock(tool_use_id="ws-1", content="results")], parent_tool_use_id="task-1"),
+        assistant([TextBlock(text="Buy moats.")], "m3", usage(800, 300), parent="task-1"),
+        UserMessage(content=[ToolResultBlock(tool_use_id="task-1", content=[{"type": "text", "text": "Buy moats."}])]),
+        assistant([TextBlock(text="Conclusion.")], "m4", usage(2000, 200)),
+        result_message(total_cost_usd=0.05),
+    ]
+
+def test_estimate_cost():
+    assert estimate_cost(usage(1_000_000, 0), "claude-opus-4") == pytest.approx(15.0)
+    assert estimate_cost(usage(0, 1_000_000), "claude-haiku-4") == pytest.approx(5.0)
+    assert estimate_cost({"cache_read_input_tokens": 1_000_000}, "sonnet") == pytest.approx(0.3)
+    assert estimate_cost({"input_tokens": 1_000_000, "cache_read_input_tokens": None, "output_tokens": None},
+                         "sonnet") == pytest.approx(3.0)
+
+async def test_usage_attributed_to_gurus_and_tools(tmp_path):
+    accountant = UsageAccountant()
+    output = str(tmp_path / "out.md")
+    await run_discussion(
+        DiscussionConfig(topic="AI", guru_names=["warren_buffett"], output=output), observers=[accountant],
+        client_factory=lambda options: FakeClaudeSDKClient(options, responder=lambda o, p: scripted_stream()),
+    )
+
+    orchestrator = accountant.gurus[ORCHESTRATOR]
+    assert (orchestrator.input_tokens, orchestrator.output_tokens, orchestrator.turns) == (3000, 300, 2)
+
+    buffett = accountant.gurus["warren_buffett"]
+    assert (buffett.input_tokens, buffett.output_tokens, buffett.turns, buffett.calls) == (1300, 320, 2, 1)
+    assert buffett.wall_seconds >= 0
+
+    assert accountant.tools["Task"].calls == 1
+    assert accountant.tools["Task"].input_tokens == 1300
+    assert accountant.tools["WebSearch"].calls == 1
+    assert accountant.tools["WebSearch"].result_chars == len("results")
+
+    report = accountant.report()
+    assert report["reported_cost_usd"] == 0.05
+    assert report["status"] == "completed"
+    assert report["estimated_cost_usd"] == pytest.approx(orchestrator.cost_usd + buffett.cost_usd, abs=1e-6)
+
+    path = usage_report_path(output)
+    assert path.endswith("out.usage.json")
+    accountant.write_report(path)
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["gurus"]["warren_buffett"]["total_tokens"] == 1620
+    table = accountant.format_table()
+    assert "warren_buffett" in table and "Reported session cost: $0.0500" in table
+
+def test_falls_back_to_session_and_task_totals_without_message_usage():
+    accountant = UsageAccountant()
+    tracker = TaskTurnTracker()
+    for message in [
+        assistant([ToolUseBlock(id="t", name="Task", input={"subagent_type": "ray_dalio"})], None),
+        UserMessage(content=[ToolResultBlock(tool_use_id="t", content="ok")],
+                    tool_use_result={"usage": usage(700, 70)}),
+        result_message(usage=usage(5000, 500)),
+    ]:
+        tracker.feed(message, [accountant])
+    assert accountant.gurus["ray_dalio"].input_tokens == 700
+    assert accountant.gurus[ORCHESTRATOR].input_tokens == 5000
+
+def test_prompt_cache_hit_rate():
+    accountant = UsageAccountant()
+    accountant.on_message(assistant([TextBlock(text="Hi")], "m1", {
+        "input_tokens": 100, "output_tokens": 10, "cache_read_input_tokens": 600, "cache_creation_input_tokens": 300,
+    }))
+    accountant.on_message(assistant([TextBlock(text="Again")], "m2", {
+        "input_tokens": 100, "output_tokens": 10, "cache_read_input_tokens": 900,
+    }))
+    assert accountant.gurus[ORCHESTRATOR].cache_hit_rate == pytest.approx(1500 / 2000)
+
+    cache = accountant.report()["prompt_cache"]
+    assert cache["hit_rate"] == 0.75
+    assert (cache["cache_read_tokens"], cache["cache_creation_tokens"], cache["uncached_input_tokens"]) == (1500, 300, 200)
+    assert len(cache["prefix_fingerprint"]) == 12
+    assert "Prompt cache hit rate: 75.0%" in accountant.format_table()
@@ -0,0 +1,118 @@
+import time
+import pytest
+import sqlite3
+from archive import (
+    GURU, IMPORTED, MODERATOR, ORCHESTRATOR, ArchiveRecorder, ArchivedDiscussion, ArchivedTurn, DiscussionArchive,
+    fts_query, parse_transcript, settings_key
+)
+from budget import DiscussionBudget
+from discussion import DiscussionConfig, run_discussion
+from routing import RoutingPolicy
+from fake_client import FakeClaudeSDKClient, discussion_responder
+from transcript import TranscriptWriter
+
+@pytest.fixture
+def archive(tmp_path):
+    with DiscussionArchive(str(tmp_path / "archive.sqlite3")) as archive:
+        yield archive
+
+def panel_config(topic="AI 인프라 투자", gurus=("benjamin_graham", "cathie_wood"), **settings):
+    return DiscussionConfig(topic=topic, guru_names=list(gurus), **settings)
+
+def discussion(discussion_id, topic="AI 인프라 투자", gurus=("benjamin_graham", "cathie_wood"), **kwargs):
+    kwargs.setdefault("settings", settings_key(panel_config()))
+    return ArchivedDiscussion(id=discussion_id, topic=topic, guru_names=list(gurus), turns=[
+        ArchivedTurn("benjamin_graham", GURU, "NVDA trades far above any margin of safety.", "Your view?"),
+        ArchivedTurn("cathie_wood", GURU, "NVDA is the picks-and-shovels leader of AI."),
+        ArchivedTurn(ORCHESTRATOR, MODERATOR, "Graham doubts NVDA; Cathie disagrees."),
+    ], **kwargs)
+
+def test_search_by_speaker(archive):
+    archive.store(discussion("d1"))
+    hits = archive.search("NVDA", speaker="benjamin_graham")
+    assert [(hit.discussion_id, hit.speaker) for hit in hits] == [("d1", "benjamin_graham")]
+    assert "[NVDA]" in hits[0].snippet
+    assert len(archive.search("nvda")) == 3
+    assert archive.search("TSLA") == []
+    assert archive.search("margin safety")[0].speaker == "benjamin_graham"
+    # FTS syntax in user input is quoted, not interpreted
+    assert archive.search('BRK.B OR "') == []
+    assert fts_query("BRK.B -x") == '"BRK.B" "-x"'
+
+def test_store_replaces_and_get_round_trips(archive):
+    archive.store(discussion("d1"))
+    archive.store(discussion("d1", cost_usd=0.42))
+    stored = archive.get("d1")
+    assert stored.cost_usd == 0.42 and len(stored.turns) == 3
+    assert stored.turns[0].prompt == "Your view?"
+    assert len(archive.search("NVDA")) == 3
+    archive.delete("d1")
+    assert archive.search("NVDA") == []
+    with pytest.raises(KeyError):
+        archive.get("d1")
+
+def test_find_reusable(archive):
+    archive.store(discussion("old", finished_at=time.time() - 48 * 3600))
+    archive.store(discussion("failed", status="failed"))
+    assert archive.find_reusable(panel_config()) is None
+    archive.store(discussion("fresh"))
+    # Case, punctuation and panel order do not matter; the panel itself does
+    assert archive.find_reusable(panel_config("ai 인프라 투자!", ["cathie_wood", "benjamin_graham"])).id == "fresh"
+    assert archive.find_reusable(panel_config(gurus=["cathie_wood"])) is None
+    assert archive.find_reusable(panel_config(), max_age=0) is None
+
+def test_reuse_keeps_word_order_and_settings(archive):
+    archive.store(discussion("nvda", topic="Is NVDA better than AMD?"))
+    assert archive.find_reusable(panel_config("is nvda better than amd")).id == "nvda"
+    assert archive.find_reusable(panel_config("Is AMD better than NVDA?")) is None
+
+    for settings in [{"hybrid": True}, {"guru_tools": True}, {"budget": DiscussionBudget(max_cost_usd=1.0)},
+                     {"routing": RoutingPolicy()}]:
+        assert archive.find_reusable(panel_config("Is NVDA better than AMD?", **settings)) is None
+    # Imported transcripts do not record their settings and are never reused
+    archive.store(discussion("imported", topic="Old topic", settings=""))
+    assert archive.find_reusable(panel_config("Old topic")) is None
+
+def test_archives_without_settings_are_migrated(tmp_path):
+    path = str(tmp_path / "old.sqlite3")
+    with sqlite3.connect(path) as db:
+        db.execute("CREATE TABLE discussions (id TEXT PRIMARY KEY, topic TEXT NOT NULL, topic_key TEXT NOT NULL, "
+                   "panel_key TEXT NOT NULL, guru_names TEXT NOT NULL, status TEXT NOT NULL, output TEXT, "
+                   "started_at TEXT, finished_at REAL NOT NULL, duration_seconds REAL, message_count INTEGER, "
+                   "cost_usd REAL, tokens INTEGER, result TEXT)")
+    with DiscussionArchive(path) as archive:
+        archive.store(discussion("d1"))
+        assert archive.find_reusable(panel_config()).id == "d1"
+
+async def test_recorder_archives_a_discussion(archive, tmp_path):
+    factory = lambda options: FakeClaudeSDKClient(options, responder=discussion_responder())
+    config = DiscussionConfig(guru_names=["warren_buffett", "cathie_wood"], output=str(tmp_path / "d.md"), hybrid=True)
+    result = await run_discussion(config, observers=[ArchiveRecorder(archive, "run-1")], client_factory=factory)
+
+    stored = archive.get("run-1")
+    assert stored.status == "completed" and stored.output == result.output
+    assert stored.message_count == result.message_count
+    assert [turn.speaker for turn in stored.turns if turn.kind == GURU] == ["warren_buffett", "cathie_wood"]
+    assert any(turn.kind == "picks" for turn in stored.turns)
+    assert any(turn.speaker == ORCHESTRATOR for turn in stored.turns)
+    assert [call.name for call in stored.tool_calls].count("Task") == 2
+    assert archive.find_reusable(config).id == "run-1"
+
+def test_import_transcript(archive, tmp_path):
+    path = tmp_path / "discussion_result_20250101_000000.md"
+    with TranscriptWriter(str(path)) as transcript:
+        transcript.write_header("Old topic", ["benjamin_graham", "peter_lynch"])
+        transcript.write("Welcome.")
+        transcript.write("\n\n> 🎤 **[Social] Passing the microphone to:** `benjamin_graham`...\n\n")
+        transcript.write("Mr. Market is euphoric about NVDA.")
+    imported = parse_transcript(str(path))
+    assert imported.topic == "Old topic" and imported.guru_names == ["benjamin_graham", "peter_lynch"]
+    assert [(turn.speaker, turn.kind) for turn in imported.turns] == [
+        (ORCHESTRATOR, MODERATOR), ("benjamin_graham", IMPORTED)
+    ]
+    archive.store(imported)
+    assert archive.search("NVDA", speaker="benjamin_graham")[0].discussion_id == imported.id
+
+    (tmp_path / "notes.md").write_text("# Notes\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        parse_transcript(str(tmp_path / "notes.md"))
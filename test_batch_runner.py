@@ -0,0 +1,90 @@
+import asyncio
+import json
+import time
+import pytest
+from batch_runner import BatchItem, RateLimiter, load_batch, run_batch
+from discussion import DEFAULT_GURUS
+from fake_client import FakeClaudeSDKClient, text_message, result_message
+
+def write_queue(path, entries):
+    path.write_text("\n".join(json.dumps(entry, ensure_ascii=False) for entry in entries) + "\n\n",
+                    encoding="utf-8")
+
+def test_load_batch(tmp_path):
+    queue = tmp_path / "topics.jsonl"
+    write_queue(queue, [
+        {"id": "ai", "topic": "AI infra", "gurus": "warren_buffett, cathie_wood"},
+        {"request_id": "user-001", "title": "Bitcoin", "gurus": ["ray_dalio"]},
+        {"topic": "Rates"},
+        {"id": "ai", "topic": "AI again"},
+    ])
+    items = load_batch(str(queue))
+
+    assert [item.id for item in items] == ["ai", "user-001", "topic-0003", "ai-2"]
+    assert items[0].guru_names == ["warren_buffett", "cathie_wood"]
+    assert items[1].topic == "Bitcoin"
+    assert items[2].guru_names == DEFAULT_GURUS
+
+def test_load_batch_rejects_missing_topic(tmp_path):
+    queue = tmp_path / "topics.jsonl"
+    write_queue(queue, [{"id": "x"}])
+    with pytest.raises(ValueError, match="line 1"):
+        load_batch(str(queue))
+
+async def test_rate_limiter_spaces_starts():
+    limiter = RateLimiter(0.05)
+    start = time.perf_counter()
+    for _ in range(3):
+        await limiter.wait()
+    assert time.perf_counter() - start >= 0.1
+
+async def test_run_batch_bounded_pool_and_manifest(tmp_path):
+    tracker = {"active": 0, "peak": 0}
+
+    class TrackingClient(FakeClaudeSDKClient):
+        async def receive_response(self):
+            tracker["active"] += 1
+            tracker["peak"] = max(tracker["peak"], tracker["active"])
+            try:
+                if "boom" in self.queries[-1]:
+                    raise RuntimeError("boom")
+                async for message in super().receive_response():
+                    yield message
+            finally:
+                tracker["active"] -= 1
+
+    def responder(options, prompt):
+        return [text_message(f"Conclusion on {prompt}"), result_message()]
+
+    items = [BatchItem(id=f"t{i}", topic=f"topic {i}", guru_names=["warren_buffett"]) for i in range(6)]
+    items.append(BatchItem(id="bad", topic="boom", guru_names=["warren_buffett"]))
+    manifest = await run_batch(
+        items, str(tmp_path), workers=3,
+        client_factory=lambda options: TrackingClient(options, responder=responder, latency=0.01),
+    )
+
+    assert tracker["peak"] == 3
+    assert manifest["total"] == 7
+    assert manifest["completed"] == 6
+    assert manifest["failed"] == 1
+    assert [entry["id"] for entry in manifest["results"]] == [item.id for item in items]
+    assert manifest["results"][-1]["error"] == "boom"
+    assert "Conclusion on topic 2" in (tmp_path / "t2.md").read_text(encoding="utf-8")
+    with open(tmp_path / "manifest.json", encoding="utf-8") as f:
+        assert json.load(f)["completed"] == 6
+
+async def test_run_batch_with_warm_pool(tmp_path):
+    clients = []
+
+    def factory(options):
+        client = FakeClaudeSDKClient(options, responder=lambda o, p: [text_message("Done."), result_message()])
+        clients.append(client)
+        return client
+
+    items = [BatchItem(id=f"t{i}", topic=f"topic {i}", guru_names=["warren_buffett"]) for i in range(4)]
+    manifest = await run_batch(items, str(tmp_path), workers=2, client_factory=factory, warm_pool=True)
+
+    assert manifest["completed"] == 4
+    assert manifest["client_pool"]["misses"] == 0
+    assert manifest["client_pool"]["hits"] == 4
+    assert not any(client.connected for client in clients)
@@ -0,0 +1,50 @@
+import pytest
+from benchmark import (
+    BenchmarkCase, benchmark_panel, check_dry_run, check_startup, compare_results, dry_run_modules, format_results,
+    measure_startup, run_benchmarks
+)
+from fake_client import scripted_discussion
+
+def test_benchmark_panel_extends_predefined_gurus():
+    panel = benchmark_panel(7)
+    assert panel[0] == "warren_buffett"
+    assert panel[5:] == ["guru_5", "guru_6"]
+
+def test_scripted_discussion_shape():
+    messages = scripted_discussion(["a", "b"], rounds=3, text_chars=50, searches_per_turn=2)
+    # intro + per call (task + 2 * (search + result) + answer + result) + conclusion + result message
+    assert len(messages) == 1 + 2 * 3 * 7 + 2
+
+async def test_run_benchmarks_reports_every_metric():
+    document = await run_benchmarks([BenchmarkCase(panel_size=2, rounds=2, text_chars=50)], repeat=1)
+    result = document["results"][0]
+    assert result["key"] == "panel=2,rounds=2,chars=50"
+    assert result["messages"] == 1 + 2 * 2 * 5 + 2
+    for metric in ["throughput_msgs_per_s", "time_to_first_output_ms", "per_message_us",
+                   "peak_memory_kb", "options_build_us"]:
+        assert result[metric] > 0
+    assert "panel=2,rounds=2" in format_results(document)
+
+def test_compare_results_flags_regressions_only():
+    baseline = {"results": [{"key": "k", "per_message_us": 100.0, "peak_memory_kb": 500.0}]}
+    current = {"results": [{"key": "k", "per_message_us": 140.0, "peak_memory_kb": 510.0},
+                           {"key": "new", "per_message_us": 999.0}]}
+    regressions = compare_results(baseline, current, threshold=0.25)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("k: per_message_us 100.0 -> 140.0")
+
+def test_startup_is_measured_and_checked():
+    startup = measure_startup(repeat=1)
+    assert set(startup) == {"run_help_ms", "import_run_ms"}
+    assert all(value > 0 for value in startup.values())
+    assert check_startup({"run_help_ms": 80.0}, max_ms=100) == []
+    assert check_startup({"run_help_ms": 180.0}, max_ms=100) == ["run_help_ms: 180.0 ms > 100 ms"]
+
+    regressions = compare_results({"startup": {"run_help_ms": 100.0}}, {"startup": {"run_help_ms": 200.0}})
+    assert regressions == ["startup: run_help_ms 100.0 -> 200.0 (+100%)"]
+
+def test_dry_run_skips_run_only_modules():
+    modules = dry_run_modules()
+    assert "planning" in modules
+    assert check_dry_run(modules) == []
+    assert check_dry_run(["run", "tracing"]) == ["dry run imported tracing"]
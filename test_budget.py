@@ -0,0 +1,125 @@
+import re
+import pytest
+from claude_agent_sdk import AssistantMessage, TextBlock, ToolResultBlock, ToolUseBlock, UserMessage
+from batch_runner import load_batch
+from budget import NORMAL, TIGHT, WRAP_UP, BudgetScheduler, DiscussionBudget, enable_budget
+from guru_tools import ANALYZE_MARKET_TOOL_NAME, enable_guru_tools
+from search_cache import SEARCH_TOOL_NAME, LocalSearchBackend, SearchCache, enable_search_cache
+from discussion import DiscussionConfig, DiscussionObserver, run_discussion
+from fake_client import FakeClaudeSDKClient, discussion_responder, result_message
+from orchestrator import create_agent_options
+from task_turns import TaskTurnTracker
+
+def usage_message(tokens, message_id, parent=None):
+    return AssistantMessage(content=[TextBlock(text="...")], model="claude-sonnet-4", message_id=message_id,
+                            parent_tool_use_id=parent, usage={"input_tokens": tokens, "output_tokens": 0})
+
+def task_round_trip(scheduler, guru, task_id):
+    tracker = TaskTurnTracker()
+    tracker.feed(AssistantMessage(content=[ToolUseBlock(id=task_id, name="Task", input={
+        "subagent_type": guru, "prompt": "?"})], model="claude-sonnet-4"), [scheduler])
+    tracker.feed(UserMessage(content=[ToolResultBlock(tool_use_id=task_id, content="answer")]), [scheduler])
+
+def test_planned_rounds():
+    assert DiscussionBudget().planned_rounds(3) is None
+    assert DiscussionBudget(max_tokens=100_000).planned_rounds(3) == 3
+    # The tightest limit wins
+    assert DiscussionBudget(max_tokens=100_000, max_seconds=60).planned_rounds(3) == 0
+    assert DiscussionBudget(max_tokens=10_000_000).planned_rounds(2) == 5
+
+def test_scheduler_tracks_spend_and_advances(clock):
+    scheduler = BudgetScheduler(DiscussionBudget(max_tokens=1000, max_seconds=100), clock=clock)
+    phases = []
+    scheduler.start(["warren_buffett", "cathie_wood"], on_phase=phases.append)
+
+    scheduler.on_message(usage_message(300, "m1"))
+    scheduler.on_message(usage_message(300, "m1"))  # the same API turn streamed twice
+    assert scheduler.tokens == 300
+    assert scheduler.advance() is None and scheduler.phase == NORMAL
+
+    # Every message moves the phase on as the spend grows
+    scheduler.on_message(usage_message(300, "m2", parent="task-1"))
+    assert scheduler.phase == TIGHT and phases == [TIGHT]
+
+    clock.now = 90
+    assert scheduler.used() == pytest.approx(0.9)
+    assert scheduler.advance() == WRAP_UP
+    assert scheduler.report()["phase"] == WRAP_UP
+
+async def test_hooks_follow_the_phase(clock):
+    scheduler = BudgetScheduler(DiscussionBudget(max_seconds=100), clock=clock)
+    scheduler.start(["warren_buffett", "cathie_wood"])
+    task = lambda guru: {"tool_name": "Task", "tool_input": {"subagent_type": guru, "prompt": "?"}}
+
+    assert await scheduler.pre_tool_hook(task("warren_buffett"), "t1", None) == {}
+    assert await scheduler.post_task_hook(task("warren_buffett"), "t1", None) == {}
+    task_round_trip(scheduler, "warren_buffett", "t1")
+
+    clock.now = 60
+    output = await scheduler.pre_tool_hook(task("cathie_wood"), "t2", None)
+    assert "150 words" in output["hookSpecificOutput"]["additionalContext"]
+    # Buffett already spoke more often than Cathie: skipped while the budget is tight
+    output = await scheduler.pre_tool_hook(task("warren_buffett"), "t3", None)
+    assert output["hookSpecificOutput"]["permissionDecision"] == "deny"
+    assert scheduler.skipped == ["warren_buffett"]
+    assert await scheduler.pre_tool_hook({"tool_name": "WebSearch", "tool_input": {}}, "t4", None) == {}
+
+    clock.now = 86
+    for tool in [task("cathie_wood"), {"tool_name": "WebSearch", "tool_input": {}}]:
+        output = await scheduler.pre_tool_hook(tool, "t5", None)
+        assert output["hookSpecificOutput"]["permissionDecision"] == "deny"
+        assert "conclusion" in output["hookSpecificOutput"]["permissionDecisionReason"]
+    output = await scheduler.post_task_hook(task("cathie_wood"), "t5", None)
+    assert "conclusion" in output["hookSpecificOutput"]["additionalContext"]
+
+def test_enable_budget_registers_hooks():
+    scheduler = BudgetScheduler(DiscussionBudget(max_cost_usd=1.0))
+    options = enable_budget(create_agent_options(["warren_buffett", "cathie_wood"]), scheduler)
+    assert "# Budget" in options.system_prompt and "$1.00" in options.system_prompt
+    assert re.fullmatch(options.hooks["PreToolUse"][-1].matcher, "WebSearch")
+    assert options.hooks["PostToolUse"][-1].hooks == [scheduler.post_task_hook]
+
+async def test_budget_gates_cached_searches_and_guru_tools(clock):
+    scheduler = BudgetScheduler(DiscussionBudget(max_seconds=100), clock=clock)
+    scheduler.start(["warren_buffett", "cathie_wood"])
+    options = create_agent_options(["warren_buffett", "cathie_wood"])
+    options = enable_guru_tools(enable_search_cache(options, SearchCache(LocalSearchBackend(), directory=None)))
+    options = enable_budget(options, scheduler)
+
+    matcher = options.hooks["PreToolUse"][-1].matcher
+    for tool in ["Task", SEARCH_TOOL_NAME, ANALYZE_MARKET_TOOL_NAME]:
+        assert re.fullmatch(matcher, tool)
+    clock.now = 90
+    output = await scheduler.pre_tool_hook({"tool_name": SEARCH_TOOL_NAME, "tool_input": {"query": "NVDA"}}, "t1", None)
+    assert output["hookSpecificOutput"]["permissionDecision"] == "deny"
+
+class StatusLog(DiscussionObserver):
+    def __init__(self):
+        self.lines = []
+
+    def on_status(self, text):
+        self.lines.append(text)
+
+async def test_discussion_reports_budget(tmp_path):
+    factory = lambda options: FakeClaudeSDKClient(options, responder=discussion_responder(rounds=2, text_chars=400))
+    log = StatusLog()
+    config = DiscussionConfig(guru_names=["warren_buffett", "cathie_wood"], output=str(tmp_path / "d.md"),
+                              budget=DiscussionBudget(max_tokens=4000))
+    result = await run_discussion(config, observers=[log], client_factory=factory)
+
+    assert result.budget["tokens"] > 3400
+    assert result.budget["phase"] == WRAP_UP
+    assert any("💰 Budget" in line and "wrapping up" in line for line in log.lines)
+
+    config = DiscussionConfig(guru_names=["warren_buffett"], output=str(tmp_path / "free.md"))
+    result = await run_discussion(config, client_factory=factory)
+    assert result.budget is None
+
+def test_batch_entry_budget(tmp_path):
+    queue = tmp_path / "topics.jsonl"
+    queue.write_text('{"topic": "AI", "budget": {"max_cost_usd": 0.5}}\n', encoding="utf-8")
+    assert load_batch(str(queue))[0].budget == DiscussionBudget(max_cost_usd=0.5)
+
+    queue.write_text('{"topic": "AI", "budget": {"dollars": 0.5}}\n', encoding="utf-8")
+    with pytest.raises(ValueError, match="budget"):
+        load_batch(str(queue))
@@ -0,0 +1,85 @@
+import pytest
+from claude_agent_sdk import AssistantMessage, ToolResultBlock, ToolUseBlock, UserMessage
+from checkpoint import (
+    Checkpoint, CheckpointStore, Checkpointer, GuruTurn, get_resume_config, get_resume_prompt
+)
+from discussion import DiscussionConfig, run_discussion
+from transcript import tool_result_text
+from fake_client import FakeClaudeSDKClient, text_message, result_message, FAKE_MODEL
+
+def task_call(tool_use_id, subagent, prompt):
+    return AssistantMessage(
+        content=[ToolUseBlock(id=tool_use_id, name="Task", input={"subagent_type": subagent, "prompt": prompt})],
+        model=FAKE_MODEL,
+    )
+
+def task_result(tool_use_id, text):
+    return UserMessage(content=[ToolResultBlock(tool_use_id=tool_use_id, content=[{"type": "text", "text": text}])])
+
+def test_tool_result_text():
+    assert tool_result_text("plain") == "plain"
+    assert tool_result_text([{"type": "text", "text": "a"}, {"type": "image"}, {"type": "text", "text": "b"}]) == "a\nb"
+    assert tool_result_text(None) == ""
+
+def test_store_roundtrip(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    checkpoint = Checkpoint(id="abc", topic="AI", guru_names=["warren_buffett"],
+                            turns=[GuruTurn(guru="warren_buffett", prompt="Q", output="A")])
+    store.save(checkpoint)
+    loaded = store.load("abc")
+    assert loaded.turns[0].output == "A"
+    assert store.ids() == ["abc"]
+    with pytest.raises(FileNotFoundError):
+        store.load("missing")
+
+async def test_checkpoint_after_each_turn_and_resume(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints"))
+    output = str(tmp_path / "out.md")
+    saved_turns = []
+
+    def crashing(options, prompt):
+        yield task_call("t1", "warren_buffett", "Your view?")
+        yield task_result("t1", "Buy wonderful businesses.")
+        saved_turns.append(len(store.load(checkpointer.id).turns))
+        yield task_call("t2", "cathie_wood", "Your view?")
+        raise RuntimeError("network down")
+
+    checkpointer = Checkpointer(store)
+    config = DiscussionConfig(topic="AI infra", guru_names=["warren_buffett", "cathie_wood"], output=output)
+    with pytest.raises(RuntimeError):
+        await run_discussion(config, observers=[checkpointer],
+                             client_factory=lambda options: FakeClaudeSDKClient(options, responder=crashing))
+
+    assert saved_turns == [1]
+    checkpoint = store.load(checkpointer.id)
+    assert checkpoint.status == "failed"
+    assert checkpoint.resumable
+    assert [turn.guru for turn in checkpoint.turns] == ["warren_buffett"]
+
+    # Resume: the Orchestrator gets the completed turn instead of re-asking for it
+    prompts = []
+
+    def finishing(options, prompt):
+        prompts.append(prompt)
+        return [task_call("t3", "cathie_wood", "Your view?"), task_result("t3", "Disruption wins."),
+                text_message("Conclusion."), result_message()]
+
+    resumed = Checkpointer(store, checkpoint)
+    result = await run_discussion(
+        get_resume_config(checkpoint), observers=[resumed],
+        client_factory=lambda options: FakeClaudeSDKClient(options, responder=finishing),
+        prompt=get_resume_prompt(checkpoint), resumed=True,
+    )
+    assert result.status == "completed"
+    assert "Buy wonderful businesses." in prompts[0]
+    assert "do NOT call these Gurus again" in prompts[0]
+
+    final = store.load(checkpoint.id)
+    assert final.status == "completed"
+    assert not final.resumable
+    assert [turn.guru for turn in final.turns] == ["warren_buffett", "cathie_wood"]
+    with open(output, encoding="utf-8") as f:
+        content = f.read()
+    assert content.count("# Investment Guru Discussion") == 1
+    assert "Discussion resumed" in content
+    assert content.rstrip().endswith("Conclusion.")
@@ -0,0 +1,96 @@
+import asyncio
+import time
+import pytest
+from client_pool import ClientPool, options_key
+from discussion import DiscussionConfig, create_discussion_options, run_discussion
+from fake_client import FakeClaudeSDKClient, discussion_responder
+from orchestrator import create_agent_options
+
+class Factory:
+    def __init__(self, connect_latency=0.0):
+        self.connect_latency = connect_latency
+        self.clients = []
+
+    def __call__(self, options):
+        client = FakeClaudeSDKClient(options, responder=discussion_responder(), connect_latency=self.connect_latency)
+        self.clients.append(client)
+        return client
+
+def test_options_key_ignores_hook_identity_but_not_panel():
+    config = DiscussionConfig(guru_names=["warren_buffett", "cathie_wood"])
+    first, _ = create_discussion_options(config)
+    second, _ = create_discussion_options(DiscussionConfig(topic="Other topic", guru_names=config.guru_names))
+    assert first.hooks["PreToolUse"][0].hooks != second.hooks["PreToolUse"][0].hooks
+    assert options_key(first) == options_key(second)
+    assert options_key(first) != options_key(create_discussion_options(DiscussionConfig(guru_names=["ray_dalio"]))[0])
+    assert options_key(first) != options_key(create_discussion_options(DiscussionConfig(guru_names=config.guru_names, turn_digests=False))[0])
+
+async def test_warm_client_skips_startup():
+    factory = Factory(connect_latency=0.1)
+    async with ClientPool(factory) as pool:
+        options = create_agent_options(["warren_buffett"])
+        pool.warm(options)
+        await asyncio.sleep(0.15)
+        assert pool.idle_count(options) == 1
+
+        start = time.perf_counter()
+        async with pool(options) as client:
+            assert client.connected
+        assert time.perf_counter() - start < 0.05
+        assert pool.stats.hits == 1 and pool.stats.misses == 0
+        # The leased client is not handed out again; a replacement is warming
+        await asyncio.sleep(0.15)
+        assert not client.connected
+        assert pool.idle_count(options) == 1
+    assert not any(client.connected for client in factory.clients)
+
+async def test_acquire_waits_for_a_warming_client():
+    factory = Factory(connect_latency=0.1)
+    async with ClientPool(factory) as pool:
+        options = create_agent_options(["warren_buffett"])
+        pool.warm(options)
+        async with pool(options):
+            pass
+        await asyncio.sleep(0)
+        # One warming client served the lease, plus one replacement: no cold start in between
+        assert pool.stats.misses == 0
+        assert len(factory.clients) == 2
+
+async def test_unhealthy_and_idle_clients_are_evicted():
+    clock = [0.0]
+    factory = Factory()
+    async with ClientPool(factory, idle_timeout=10, clock=lambda: clock[0]) as pool:
+        options = create_agent_options(["warren_buffett"])
+        pool.warm(options)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        factory.clients[0].connected = False
+        async with pool(options) as client:
+            assert client is not factory.clients[0]
+        assert pool.stats.evicted_unhealthy == 1
+
+        await asyncio.sleep(0)
+        clock[0] = 11
+        assert pool.evict_idle() == 1
+        assert pool.idle_count() == 0
+
+async def test_hooks_follow_the_leasing_discussion(tmp_path):
+    factory = Factory()
+    async with ClientPool(factory) as pool:
+        for index in range(2):
+            config = DiscussionConfig(guru_names=["warren_buffett", "cathie_wood"], output=str(tmp_path / f"{index}.md"))
+            await run_discussion(config, client_factory=pool)
+            await asyncio.sleep(0)
+
+        assert pool.stats.misses == 1 and pool.stats.hits == 1
+        second = factory.clients[1]
+        relay = second.options.hooks["PreToolUse"][0].hooks[0]
+        # The relay now points at the second discussion's digest book, which saw its turns
+        book = relay.target.__self__
+        assert [digest.guru for digest in book.digests] == ["warren_buffett", "cathie_wood"]
+        output = await relay({"tool_input": {"subagent_type": "warren_buffett", "prompt": "?"}}, "t", None)
+        assert "cathie_wood" in output["hookSpecificOutput"]["updatedInput"]["prompt"]
+
+def test_negative_spares_rejected():
+    with pytest.raises(ValueError):
+        ClientPool(spares=-1)
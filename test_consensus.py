@@ -0,0 +1,52 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from consensus import ConsensusEngine, format_report
+from investment_guru_agent import collect_panel_recommendations
+from recommendation_store import RecommendationStore
+
+def panel_store():
+    store = RecommendationStore()
+    store.add_picks("buffett", [{"ticker": "MSFT", "sector": "Cloud", "time_horizon": "10년"},
+                                {"ticker": "BRK.B", "sector": "Insurance"}], discussion_id="ai")
+    store.add_picks("lynch", [{"ticker": "MSFT", "sector": "Cloud", "time_horizon": "3-5년"},
+                              {"ticker": "TSM", "sector": "Semis"}], discussion_id="ai")
+    store.add_picks("wood", [{"ticker": "NVDA", "sector": "Semis"}], discussion_id="crypto")
+    return store
+
+def test_conviction_scores_and_top_picks():
+    engine = ConsensusEngine(panel_store())
+    top = engine.top_picks(limit=3)
+    assert [pick.ticker for pick in top] == ["MSFT", "NVDA", "BRK.B"]
+    assert top[0].score == 2.0 and top[0].support == 2 and top[0].gurus == ["buffett", "lynch"]
+    assert top[0].horizon_years == 7.0 and top[0].sector == "Cloud"
+
+    weighted = engine.top_picks(limit=1, weights={"wood": 3.0})
+    assert weighted[0].ticker == "NVDA"
+
+def test_overlap_exposure_and_disagreement():
+    engine = ConsensusEngine(panel_store())
+    assert engine.ticker_overlap().tolist() == [[2, 1, 0], [1, 2, 0], [0, 0, 1]]
+
+    exposure = engine.sector_exposure()
+    assert exposure.sum(axis=1) == pytest.approx([1.0, 1.0, 1.0])
+    assert exposure[1, engine.store.sectors.codes["Semis"]] == pytest.approx(0.5 / 1.5)
+
+    disagreement = engine.disagreement_matrix()
+    assert np.allclose(np.diag(disagreement), 0.0)
+    assert disagreement[0, 2] == pytest.approx(1.0)
+    assert 0.0 < disagreement[0, 1] < 1.0
+    assert np.allclose(disagreement, disagreement.T)
+
+def test_discussion_filter():
+    report = ConsensusEngine(panel_store(), discussion_ids=["crypto"]).report()
+    assert report.gurus == ["wood"]
+    assert [pick.ticker for pick in report.top_picks] == ["NVDA"]
+
+async def test_report_over_builtin_panel():
+    store = await collect_panel_recommendations(["warren_buffett", "peter_lynch", "cathie_wood"])
+    report = ConsensusEngine(store).report(limit=5)
+    assert len(report.gurus) == 3 and len(report.disagreement) == 3
+    assert "warren_buffett" in format_report(report)
+    assert report.to_dict()["top_picks"][0]["ticker"] == "MSFT"
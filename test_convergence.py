@@ -0,0 +1,125 @@
+import pytest
+from claude_agent_sdk import AssistantMessage, ToolResultBlock, ToolUseBlock, UserMessage
+from batch_runner import load_batch
+from convergence import ConvergenceDetector, ConvergencePolicy, enable_convergence, jaccard, shingles
+from discussion import DiscussionConfig, DiscussionObserver, run_discussion
+from fake_client import FakeClaudeSDKClient, discussion_responder
+from orchestrator import create_agent_options
+from task_turns import TaskTurnTracker
+
+BULL = "NVDA and TSMC are a buy: the AI build-out is a multi-year opportunity for the picks and shovels."
+BEAR = "Avoid NVDA. The AI hype is a bubble and the valuation is far too high; sell into strength."
+
+def test_shingles_and_jaccard():
+    assert shingles("Moats, margins and multiples") == {"moats margins and", "margins and multiples"}
+    assert jaccard(shingles(BULL), shingles(BULL)) == 1.0
+    assert jaccard(shingles(BULL), shingles(BEAR)) < 0.1
+
+def test_disagreement_does_not_converge():
+    detector = ConvergenceDetector()
+    detector.start(["warren_buffett", "cathie_wood"])
+    detector.on_opening({"warren_buffett": BEAR, "cathie_wood": BULL})
+    assert not detector.converged
+    assert detector.signals["stance"] == 0.5
+    # Fresh arguments in the next round keep the discussion going
+    detector.add_turn("warren_buffett", "Berkshire prefers KO and AAPL: durable moats, fair prices, avoid the bubble.")
+    assert not detector.converged and "repetition" in detector.signals
+
+def test_default_policy_does_not_converge_on_the_opening_alone():
+    for policy in [ConvergencePolicy(), ConvergencePolicy(min_rounds=1)]:
+        detector = ConvergenceDetector(policy)
+        detector.start(["peter_lynch", "cathie_wood"])
+        detector.on_opening({"peter_lynch": "I am bullish.", "cathie_wood": "Bullish, buy."})
+        # Full stance agreement, but stance is the only signal and nobody has been heard twice
+        assert detector.signals == {"stance": 1.0} and not detector.converged
+
+    # The default policy waits for every guru's second turn
+    detector = ConvergenceDetector()
+    detector.start(["peter_lynch", "cathie_wood"])
+    detector.on_opening({"peter_lynch": BULL, "cathie_wood": BULL})
+    assert not detector.add_turn("peter_lynch", BULL)
+    assert detector.add_turn("cathie_wood", BULL) and detector.converged_at == 2
+
+def test_agreement_converges_after_min_rounds():
+    detector = ConvergenceDetector(ConvergencePolicy(threshold=0.75, min_rounds=2))
+    detector.start(["peter_lynch", "cathie_wood"])
+    detector.on_opening({"peter_lynch": BULL, "cathie_wood": BULL + " Disruption compounds."})
+    # Full stance and pick agreement, but one round is not enough yet
+    assert detector.agreement >= 0.75 and not detector.converged
+    assert not detector.add_turn("peter_lynch", BULL)
+    assert detector.add_turn("cathie_wood", BULL + " Disruption compounds.")
+    assert detector.converged_at == 2
+    report = detector.report()
+    assert report["rounds_saved"] == 1 and report["signals"]["repetition"] == 1.0
+
+async def test_hooks_steer_to_synthesis():
+    detector = ConvergenceDetector(ConvergencePolicy(min_rounds=1))
+    detector.start(["peter_lynch", "cathie_wood"])
+    task = {"tool_name": "Task", "tool_input": {"subagent_type": "peter_lynch", "prompt": "?"}}
+    assert await detector.pre_task_hook(task, "t1", None) == {}
+
+    detector.on_opening({"peter_lynch": BULL, "cathie_wood": BULL})
+    output = await detector.post_task_hook({**task, "tool_response": BULL}, "t1", None)
+    assert "final synthesis" in output["hookSpecificOutput"]["additionalContext"]
+    output = await detector.pre_task_hook(task, "t2", None)
+    assert output["hookSpecificOutput"]["permissionDecision"] == "deny"
+    assert detector.report()["denied_calls"] == 1
+
+    options = enable_convergence(create_agent_options(["peter_lynch", "cathie_wood"]), detector)
+    assert "# Convergence" in options.system_prompt
+    assert options.hooks["PostToolUse"][-1].hooks == [detector.post_task_hook]
+
+async def test_converging_task_turn_is_scored_in_the_hook():
+    detector = ConvergenceDetector(ConvergencePolicy(threshold=0.6, min_rounds=1))
+    detector.start(["peter_lynch", "cathie_wood"])
+    detector.on_opening({"peter_lynch": BULL, "cathie_wood": BEAR})
+    assert not detector.converged
+
+    task = {"tool_name": "Task", "tool_input": {"subagent_type": "cathie_wood", "prompt": "Still bearish?"},
+            "tool_response": {"content": [{"type": "text", "text": BULL}]}}
+    # The Task result that makes the panel converge already carries the note
+    output = await detector.post_task_hook(task, "t1", None)
+    assert "final synthesis" in output["hookSpecificOutput"]["additionalContext"]
+    assert detector.converged_at == 1
+
+    # The same result streaming in afterwards is not counted twice
+    tracker = TaskTurnTracker()
+    call = ToolUseBlock(id="t1", name="Task", input=task["tool_input"])
+    tracker.feed(AssistantMessage(content=[call], model="claude-sonnet-4"), [detector])
+    tracker.feed(UserMessage(content=[ToolResultBlock(tool_use_id="t1", content=BULL)]), [detector])
+    assert len(detector.turns["cathie_wood"]) == 2 and detector.converged_at == 1
+
+class StatusLog(DiscussionObserver):
+    def __init__(self):
+        self.lines = []
+
+    def on_status(self, text):
+        self.lines.append(text)
+
+async def test_discussion_reports_convergence(tmp_path):
+    # The scripted gurus repeat the same answer every round
+    factory = lambda options: FakeClaudeSDKClient(options, responder=discussion_responder(rounds=3))
+    log = StatusLog()
+    config = DiscussionConfig(guru_names=["warren_buffett", "cathie_wood"], output=str(tmp_path / "d.md"),
+                              convergence=ConvergencePolicy(min_rounds=2, expected_rounds=4))
+    result = await run_discussion(config, observers=[log], client_factory=factory)
+    assert result.convergence["converged_after_round"] == 2
+    # The fake ignores the hooks and runs all three rounds, so only one of four rounds was saved
+    assert result.convergence["rounds_run"] == 3 and result.convergence["rounds_saved"] == 1
+    assert any(line.startswith("🤝 Panel converged after round 2") for line in log.lines)
+
+    result = await run_discussion(DiscussionConfig(guru_names=["warren_buffett"], output=str(tmp_path / "off.md")),
+                                  client_factory=factory)
+    assert result.convergence is None
+
+def test_batch_entry_convergence(tmp_path):
+    queue = tmp_path / "topics.jsonl"
+    queue.write_text('{"topic": "AI", "convergence": true}\n{"topic": "AI", "convergence": {"threshold": 0.9}}\n',
+                     encoding="utf-8")
+    items = load_batch(str(queue))
+    assert items[0].convergence == ConvergencePolicy()
+    assert items[1].convergence.threshold == 0.9
+
+    queue.write_text('{"topic": "AI", "convergence": {"level": 1}}\n', encoding="utf-8")
+    with pytest.raises(ValueError, match="convergence"):
+        load_batch(str(queue))
@@ -0,0 +1,112 @@
+from digest import (
+    MAX_CLAIM_CHARS, MAX_CLAIMS, MAX_DIGESTS_PER_CALL, DigestBook, TurnDigest, compact_json, digest_analysis,
+    digest_text, enable_turn_digests, format_digest_block,
+)
+from discussion import DiscussionConfig, run_discussion
+from fake_client import FakeClaudeSDKClient, discussion_responder
+from investment_guru_agent import BaseInvestmentGuruAgent, InvestmentGuruFactory, respond_to_peer
+from orchestrator import create_agent_options
+
+LONG_ANSWER = (
+    "I think NVDA is the key shovel here because every model needs compute. "
+    "The moat is CUDA and the valuation still looks like an opportunity to buy. "
+    + "Margins keep expanding quarter after quarter. " * 500
+    + "TSM and ASML supply the fabs behind it."
+)
+
+def test_digest_text_is_bounded():
+    digest = digest_text("cathie_wood", LONG_ANSWER)
+    assert digest.source_chars == len(LONG_ANSWER)
+    assert digest.stance == "bullish"
+    assert digest.picks == ["NVDA", "CUDA", "TSM", "ASML"]
+    assert len(digest.claims) <= MAX_CLAIMS
+    assert all(len(claim) <= MAX_CLAIM_CHARS for claim in digest.claims)
+    assert "because" in digest.claims[0]
+    assert len(digest.to_compact()) < 1000
+    assert "source_chars" not in digest.to_dict()
+
+async def test_digest_analysis_uses_top_picks():
+    picks = await InvestmentGuruFactory.create_guru_agent("warren_buffett").recommend()
+    digest = digest_analysis("warren_buffett", {
+        "guru": "워렌 버핏",
+        "top_picks": [{"ticker": pick.ticker, "investment_thesis": pick.investment_thesis * 20} for pick in picks],
+    })
+    assert digest.guru == "warren_buffett"
+    assert digest.picks == [pick.ticker for pick in picks]
+    assert all(len(claim) <= MAX_CLAIM_CHARS for claim in digest.claims)
+
+def test_compact_json_has_no_padding():
+    assert compact_json({"a": [1, 2], "b": "버핏"}) == '{"a":[1,2],"b":"버핏"}'
+
+def test_attach_excludes_own_turns_and_caps_count():
+    book = DigestBook()
+    book.on_opening({"warren_buffett": "Buy KO because the moat is durable.", "cathie_wood": "NVDA is the key."})
+    tool_input = {"subagent_type": "warren_buffett", "prompt": "Respond to Cathie."}
+    attached = book.attach(tool_input)
+    assert attached["prompt"].startswith("Respond to Cathie.")
+    assert "# Panel Digest" in attached["prompt"]
+    assert '"guru":"cathie_wood"' in attached["prompt"]
+    assert '"guru":"warren_buffett"' not in attached["prompt"]
+    assert tool_input["prompt"] == "Respond to Cathie."
+
+    for i in range(MAX_DIGESTS_PER_CALL * 2):
+        book.add(TurnDigest(guru=f"guru_{i}"))
+    assert format_digest_block(book.for_guru("nobody")).count('{"guru"') == MAX_DIGESTS_PER_CALL
+
+async def test_pre_task_hook_output():
+    book = DigestBook()
+    assert await book.pre_task_hook({"tool_input": {"subagent_type": "peter_lynch", "prompt": "Hi"}}, "t1", None) == {}
+
+    book.add(TurnDigest(guru="cathie_wood", stance="bullish", picks=["NVDA"]))
+    output = await book.pre_task_hook({"tool_input": {"subagent_type": "peter_lynch", "prompt": "Hi"}}, "t1", None)
+    specific = output["hookSpecificOutput"]
+    assert specific["hookEventName"] == "PreToolUse"
+    assert specific["permissionDecision"] == "allow"
+    assert specific["updatedInput"]["subagent_type"] == "peter_lynch"
+    assert "NVDA" in specific["updatedInput"]["prompt"]
+
+def test_enable_turn_digests_registers_hook():
+    book = DigestBook()
+    options = enable_turn_digests(create_agent_options(["warren_buffett"]), book)
+    matcher = options.hooks["PreToolUse"][-1]
+    assert matcher.matcher == "Task"
+    assert matcher.hooks == [book.pre_task_hook]
+    assert "digest" in options.system_prompt
+
+async def test_discussion_feeds_digests(tmp_path):
+    clients = []
+
+    def factory(options):
+        client = FakeClaudeSDKClient(options, responder=discussion_responder(rounds=3, text_chars=3000))
+        clients.append(client)
+        return client
+
+    config = DiscussionConfig(guru_names=["warren_buffett", "cathie_wood"], output=str(tmp_path / "d.md"))
+    await run_discussion(config, client_factory=factory)
+
+    book = clients[0].options.hooks["PreToolUse"][-1].hooks[0].__self__
+    assert [digest.guru for digest in book.digests] == ["warren_buffett", "cathie_wood"] * 3
+    attached = book.attach({"subagent_type": "warren_buffett", "prompt": "Final word?"})
+    # Three 3000-character answers from Cathie shrink to three short digest lines
+    assert len(attached["prompt"]) < 3000
+
+    config = DiscussionConfig(guru_names=["warren_buffett"], output=str(tmp_path / "raw.md"), turn_digests=False)
+    await run_discussion(config, client_factory=factory)
+    assert not clients[1].options.hooks
+
+async def test_respond_to_peer_gets_a_compact_digest(monkeypatch):
+    seen = []
+
+    async def formulate(self, peer_name, peer_analysis):
+        seen.append(peer_analysis)
+        return {"responding_guru": self.name, "target_guru": peer_name}
+
+    monkeypatch.setattr(BaseInvestmentGuruAgent, "_formulate_response", formulate)
+    analysis = {"guru": "캐시 우드", "analysis_summary": "x" * 5000,
+                "top_picks": [{"ticker": "NVDA", "investment_thesis": "y" * 5000}]}
+    result = await respond_to_peer.handler({
+        "guru_name": "warren_buffett", "peer_name": "cathie_wood", "peer_analysis": analysis
+    })
+    assert seen[0]["picks"] == ["NVDA"]
+    assert len(compact_json(seen[0])) < 1000
+    assert result["content"][0]["text"] == '{"responding_guru":"워렌 버핏","target_guru":"cathie_wood"}'
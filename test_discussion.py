@@ -0,0 +1,68 @@
+import pytest
+from claude_agent_sdk import AssistantMessage, ToolUseBlock
+from discussion import DiscussionConfig, DiscussionObserver, parse_guru_names, run_discussion
+from fake_client import FakeClaudeSDKClient, text_message, result_message, FAKE_MODEL
+
+def task_message(subagent):
+    return AssistantMessage(
+        content=[ToolUseBlock(id=f"task-{subagent}", name="Task", input={"subagent_type": subagent})],
+        model=FAKE_MODEL,
+    )
+
+def scripted_factory(messages):
+    return lambda options: FakeClaudeSDKClient(options, responder=lambda options, prompt: list(messages))
+
+class RecordingObserver(DiscussionObserver):
+    def __init__(self):
+        self.events = []
+
+    def on_start(self, config):
+        self.events.append("start")
+
+    def on_message(self, message):
+        self.events.append(type(message).__name__)
+
+    def on_finish(self, result):
+        self.events.append(result.status)
+
+def test_parse_guru_names():
+    assert parse_guru_names(" warren_buffett, ,cathie_wood ") == ["warren_buffett", "cathie_wood"]
+    assert parse_guru_names(["ray_dalio"]) == ["ray_dalio"]
+
+async def test_run_discussion_streams_transcript_and_observers(tmp_path):
+    output = str(tmp_path / "out.md")
+    observer = RecordingObserver()
+    messages = [text_message("Welcome. "), task_message("warren_buffett"), text_message("Done."), result_message()]
+    result = await run_discussion(
+        DiscussionConfig(topic="AI infra", guru_names=["warren_buffett"], output=output),
+        observers=[observer], client_factory=scripted_factory(messages),
+    )
+
+    assert result.status == "completed"
+    assert result.message_count == 4
+    assert observer.events == ["start", "AssistantMessage", "AssistantMessage", "AssistantMessage",
+                               "ResultMessage", "completed"]
+    with open(output, encoding="utf-8") as f:
+        content = f.read()
+    assert content.startswith("# Investment Guru Discussion: AI infra")
+    assert "Passing the microphone to:** `warren_buffett`" in content
+    assert content.rstrip().endswith("Done.")
+
+async def test_run_discussion_finalizes_partial_transcript_on_error(tmp_path):
+    output = str(tmp_path / "out.md")
+
+    def failing(options, prompt):
+        yield text_message("Partial thought.")
+        raise RuntimeError("connection lost")
+
+    observer = RecordingObserver()
+    with pytest.raises(RuntimeError):
+        await run_discussion(
+            DiscussionConfig(topic="AI infra", output=output), observers=[observer],
+            client_factory=lambda options: FakeClaudeSDKClient(options, responder=failing),
+        )
+    assert observer.events[-1] == "failed"
+    with open(output, encoding="utf-8") as f:
+        content = f.read()
+    assert "Partial thought." in content
+    assert "Discussion interrupted (error: connection lost)" in content
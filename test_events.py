@@ -0,0 +1,57 @@
+import io
+import json
+from claude_agent_sdk import AssistantMessage, TextBlock, ToolResultBlock, ToolUseBlock, UserMessage
+from discussion import ConsoleRenderer, DiscussionConfig, NdjsonRenderer, run_discussion
+from events import BufferedStream, TextEvent, ToolResultEvent, ToolUseEvent, message_events, tool_label
+from fake_client import FakeClaudeSDKClient, discussion_responder
+
+def test_message_events():
+    search = ToolUseBlock(id="t1", name="WebSearch", input={"query": "NVDA > AMD"})
+    events = message_events(AssistantMessage(content=[TextBlock(text="Hello"), search], model="claude-sonnet-4",
+                                             parent_tool_use_id="task-1"))
+    assert events[0] == TextEvent("Hello", "task-1")
+    assert isinstance(events[1], ToolUseEvent)
+    # Plain text straight from the parts, without stripping markdown (or '>' in the query)
+    assert events[1].label == "🔍 [System] Searching the web for: 'NVDA > AMD'..."
+    assert events[1].to_dict()["type"] == "tool_use"
+
+    events = message_events(UserMessage(content=[ToolResultBlock(tool_use_id="t1", content="results")]))
+    assert events == [ToolResultEvent("t1", False, 7)]
+    assert tool_label(ToolUseBlock(id="t2", name="Task", input={"subagent_type": "cathie_wood"})) == \
+        "🎤 [Social] Passing the microphone to: cathie_wood..."
+
+def test_buffered_stream_flushes_on_thresholds(clock):
+    out = io.StringIO()
+    stream = BufferedStream(out, flush_interval=1.0, max_buffer_bytes=10, clock=clock)
+    stream.write("abc")
+    stream.write("def")
+    assert out.getvalue() == ""
+    stream.write("ghijk")  # size threshold
+    assert out.getvalue() == "abcdefghijk"
+    stream.write("l")
+    clock.now = 1.5
+    stream.write("m")  # time threshold
+    assert out.getvalue().endswith("lm")
+    stream.write("n", flush=True)
+    assert stream.flushes == 3
+
+async def test_renderers_share_the_message_loop(tmp_path):
+    factory = lambda options: FakeClaudeSDKClient(options, responder=discussion_responder(rounds=2))
+    console, ndjson = io.StringIO(), io.StringIO()
+    config = DiscussionConfig(guru_names=["warren_buffett", "cathie_wood"], output=str(tmp_path / "d.md"))
+    console_renderer = ConsoleRenderer(console, flush_interval=60)
+    await run_discussion(config, observers=[console_renderer, NdjsonRenderer(ndjson, flush_interval=60)],
+                         client_factory=factory)
+
+    text = console.getvalue()
+    assert "🎤 [Social] Passing the microphone to: warren_buffett..." in text
+    assert "`warren_buffett`" not in text
+
+    events = [json.loads(line) for line in ndjson.getvalue().splitlines()]
+    types = [event["type"] for event in events]
+    # One flush per tool call plus the final one, not one per text chunk
+    assert console_renderer.output.flushes == types.count("tool_use") + 1
+    assert types[0] == "start" and types[-1] == "finish"
+    assert {"text", "tool_use", "tool_result", "result"} <= set(types)
+    assert all(event["t"] >= 0 for event in events)
+    assert events[-1]["result"]["status"] == "completed"
@@ -0,0 +1,91 @@
+import json
+import time
+import pytest
+from guru_registry import GuruRegistry, fold_guru_name, get_registry
+from investment_gurus import get_guru_prompt, is_predefined_guru, resolve_guru_name
+from discussion import parse_guru_names, unregistered_suggestions
+from investment_guru_agent import InvestmentGuruFactory
+
+def write_catalog(directory, personas, index=None):
+    directory.mkdir(parents=True, exist_ok=True)
+    for key, body in personas.items():
+        (directory / f"{key}.md").write_text(body, encoding="utf-8")
+    if index is not None:
+        (directory / "index.json").write_text(json.dumps(index, ensure_ascii=False), encoding="utf-8")
+
+def test_fold_guru_name():
+    assert fold_guru_name("Warren E. Buffett") == "warrenebuffett"
+    assert fold_guru_name("  warren-BUFFETT ") == "warrenbuffett"
+    assert fold_guru_name("Benjamin Gräham") == "benjamingraham"
+    assert fold_guru_name("워렌 버핏") == "워렌버핏"
+
+@pytest.mark.parametrize("name", [
+    "warren_buffett", "Warren Buffett", "WARREN-BUFFETT", "warrenbuffett", "워렌 버핏", "워렌버핏", "Buffett", "버핏",
+])
+def test_bundled_aliases_resolve(name):
+    assert get_registry().resolve(name) == "warren_buffett"
+    assert is_predefined_guru(name)
+
+def test_bundled_catalog_backs_guru_prompts():
+    assert get_registry().resolve("Elon Musk") is None
+    assert resolve_guru_name("Elon Musk") == "elon_musk"
+    assert get_guru_prompt("캐시 우드") == get_guru_prompt("cathie_wood")
+    assert parse_guru_names("워렌 버핏, Ray Dalio, elon_musk") == ["warren_buffett", "ray_dalio", "elon_musk"]
+    assert InvestmentGuruFactory.create_guru_agent("워렌 버핏").name == "워렌 버핏"
+    assert InvestmentGuruFactory.create_guru_agent("Peter Lynch").name == "피터 린치"
+
+def test_prompt_bodies_load_lazily(tmp_path):
+    write_catalog(tmp_path, {"jane_doe": "You are Jane Doe.", "john_roe": "You are John Roe."})
+    registry = GuruRegistry([str(tmp_path)])
+    assert registry.resolve("Jane Doe") == "jane_doe"
+    assert registry._bodies == {}
+
+    assert registry.prompt("jane doe") == "You are Jane Doe."
+    (tmp_path / "jane_doe.md").write_text("changed", encoding="utf-8")
+    assert registry.prompt("jane_doe") == "You are Jane Doe."
+    assert list(registry._bodies) == ["jane_doe"]
+
+def test_ambiguous_surnames_and_aliases_are_dropped(tmp_path):
+    write_catalog(tmp_path, {"john_smith": "a", "adam_smith": "b", "ada_lovelace": "c"}, index={
+        "john_smith": {"name": "John Smith", "aliases": ["JS"]},
+        "adam_smith": {"name": "Adam Smith", "aliases": ["애덤 스미스", "JS"]},
+    })
+    registry = GuruRegistry([str(tmp_path)])
+    assert registry.resolve("smith") is None
+    assert registry.resolve("JS") is None
+    assert registry.resolve("애덤스미스") == "adam_smith"
+    assert registry.resolve("Lovelace") == "ada_lovelace"
+    assert {"smith", "js"} <= registry.ambiguous
+    assert registry.suggest("adam smyth")[0] == "adam_smith"
+
+def test_misspelled_names_are_suggested_not_resolved(tmp_path):
+    write_catalog(tmp_path, {"ray_dalio": "a", "peter_lynch": "b", "warren_buffett": "c", "benjamin_graham": "d"})
+    registry = GuruRegistry([str(tmp_path)])
+    for name in ["Ray Dalton", "Peter Lynn", "Warren Buffett Jr", "Grahame", "Warren Buffet"]:
+        assert registry.resolve(name) is None
+    assert registry.suggest("Warren Buffet")[0] == "warren_buffett"
+
+    assert parse_guru_names("Cathy Wood, cathie wood") == ["Cathy Wood", "cathie_wood"]
+    assert unregistered_suggestions(["Cathy Wood", "cathie_wood", "Zxq Vbn"]) == {"Cathy Wood": ["cathie_wood"]}
+
+def test_later_directories_override(tmp_path):
+    write_catalog(tmp_path / "base", {"jane_doe": "base"})
+    write_catalog(tmp_path / "local", {"jane_doe": "local"})
+    registry = GuruRegistry([str(tmp_path / "base"), str(tmp_path / "local")])
+    assert len(registry) == 1
+    assert registry.prompt("jane_doe") == "local"
+
+def test_large_catalog_resolves_without_reading_bodies(tmp_path):
+    count = 3000
+    personas = {f"guru_{i:05d}": f"You are Guru {i}." for i in range(count)}
+    index = {key: {"name": f"Guru Number{i}", "aliases": [f"구루 {i}"]} for i, key in enumerate(personas)}
+    write_catalog(tmp_path, personas, index)
+    registry = GuruRegistry([str(tmp_path)])
+    assert len(registry) == count
+
+    start = time.perf_counter()
+    for i in range(count):
+        assert registry.resolve(f"구루{i}") == f"guru_{i:05d}"
+    assert time.perf_counter() - start < 1.0
+    assert registry._bodies == {}
+    assert registry.prompt("Number42") == "You are Guru 42."
@@ -0,0 +1,86 @@
+import json
+import time
+import pytest
+from discussion import DiscussionConfig, DiscussionObserver, run_discussion
+from fake_client import FakeClaudeSDKClient, text_message, result_message
+from guru_tools import (
+    ANALYZE_MARKET_TOOL_NAME, GURU_TOOLS_SERVER_NAME, GURU_TOOL_NAMES, collect_structured_picks, enable_guru_tools,
+    format_structured_picks_block,
+)
+from investment_guru_agent import analyze_market
+from orchestrator import create_agent_options
+from recommendation_store import RecommendationStore
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+def test_enable_guru_tools_registers_server():
+    options = enable_guru_tools(create_agent_options(["warren_buffett"]))
+    assert options.mcp_servers[GURU_TOOLS_SERVER_NAME]["type"] == "sdk"
+    assert all(name in options.allowed_tools for name in GURU_TOOL_NAMES)
+    assert "Task" in options.allowed_tools
+    assert ANALYZE_MARKET_TOOL_NAME in options.system_prompt
+
+async def test_analyze_market_tool_handler():
+    result = await analyze_market.handler({"guru_name": "워렌 버핏"})
+    analysis = json.loads(result["content"][0]["text"])
+    assert [pick["ticker"] for pick in analysis["top_picks"]] == ["MSFT", "BRK.B"]
+
+    result = await analyze_market.handler({"guru_name": "elon_musk"})
+    assert result["is_error"] is True
+
+async def test_collect_structured_picks():
+    picks = await collect_structured_picks(["cathie_wood", "elon_musk"])
+    assert picks["elon_musk"] is None
+    assert picks["cathie_wood"]["top_picks"][0]["ticker"] == "NVDA"
+    block = format_structured_picks_block(picks)
+    assert "# Structured Picks" in block and "NVDA" in block and "`Task`" in block
+
+class Timeline(DiscussionObserver):
+    def __init__(self):
+        self.events = []
+
+    def on_structured_picks(self, picks):
+        self.events.append(("picks", time.perf_counter()))
+
+    def on_message(self, message):
+        self.events.append(("message", time.perf_counter()))
+
+async def test_hybrid_mode_delivers_picks_before_the_orchestrator(tmp_path):
+    clients = []
+
+    def factory(options):
+        client = FakeClaudeSDKClient(options, responder=lambda o, p: [text_message("Debate."), result_message()],
+                                     connect_latency=0.2)
+        clients.append(client)
+        return client
+
+    timeline = Timeline()
+    output = str(tmp_path / "hybrid.md")
+    start = time.perf_counter()
+    result = await run_discussion(
+        DiscussionConfig(topic="AI infra", guru_names=["warren_buffett", "elon_musk"], output=output, hybrid=True),
+        observers=[timeline], client_factory=factory,
+    )
+
+    assert [event for event, _ in timeline.events] == ["picks", "message", "message"]
+    assert timeline.events[0][1] - start < 0.1
+    assert timeline.events[1][1] - start >= 0.2
+
+    options = clients[0].options
+    assert GURU_TOOLS_SERVER_NAME in options.mcp_servers
+    assert "Structured Picks" in options.system_prompt
+    prompt = clients[0].queries[0]
+    assert prompt.startswith("AI infra") and "# Structured Picks" in prompt and "BRK.B" in prompt
+
+    transcript = read(output)
+    assert transcript.index("## Structured Picks") < transcript.index("Debate.")
+    assert "| MSFT |" in transcript
+
+    # The picks are kept next to the transcript for consensus.py --store
+    assert result.picks_path == str(tmp_path / "hybrid.picks.json")
+    store = RecommendationStore.load(result.picks_path)
+    assert {record.guru for record in store} == {"warren_buffett"}
+    assert {record.discussion_id for record in store} == {"hybrid"}
+    assert "BRK.B" in [record.ticker for record in store]
@@ -1,5 +1,5 @@
 import pytest
-from investment_gurus import get_guru_prompt, get_guru_tools, AVAILABLE_GURUS
+from investment_gurus import GURU_PROMPT_PREFIX, get_guru_prompt, get_guru_tools, AVAILABLE_GURUS
 
 def test_available_gurus():
     """Test that we have the expected list of gurus"""
@@ -33,3 +33,12 @@ def test_guru_tools():
         # Basic tools that every guru should have
         assert "WebSearch" in tools
 
+
+def test_guru_prompts_share_prefix():
+    """Test that every guru prompt starts with the same cacheable prefix"""
+    cache = {"elon_musk": "You are Elon Musk, compiled."}
+    prompts = [get_guru_prompt(guru) for guru in AVAILABLE_GURUS]
+    prompts += [get_guru_prompt("elon_musk", persona_cache=cache), get_guru_prompt("adam_smith")]
+    for prompt in prompts:
+        assert prompt.startswith(GURU_PROMPT_PREFIX)
+        assert len(prompt) > len(GURU_PROMPT_PREFIX)
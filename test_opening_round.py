@@ -0,0 +1,86 @@
+import asyncio
+import time
+import pytest
+from investment_gurus import GURU_PROMPT_PREFIX
+from orchestrator import create_agent_options
+from opening_round import run_opening_round, format_opening_block
+from fake_client import FakeClaudeSDKClient, Fault, FaultyClient, text_message, result_message
+
+PANEL = ["warren_buffett", "peter_lynch", "cathie_wood", "ray_dalio", "benjamin_graham"]
+
+def make_factory(latency=0.0, tracker=None):
+    """Fake client factory that answers with the guru's first prompt line"""
+    def responder(options, prompt):
+        persona = options.system_prompt[len(GURU_PROMPT_PREFIX):]
+        return [text_message(persona.strip().splitlines()[0]), result_message()]
+
+    class TrackingClient(FakeClaudeSDKClient):
+        async def receive_response(self):
+            tracker["active"] += 1
+            tracker["peak"] = max(tracker["peak"], tracker["active"])
+            try:
+                async for message in super().receive_response():
+                    yield message
+            finally:
+                tracker["active"] -= 1
+
+    client_cls = TrackingClient if tracker is not None else FakeClaudeSDKClient
+    return lambda options: client_cls(options, responder=responder, latency=latency)
+
+async def test_opening_round_collects_every_guru_in_panel_order():
+    options = create_agent_options(PANEL, parallel_opening=True)
+    analyses = await run_opening_round(options, "AI infra", client_factory=make_factory())
+
+    assert list(analyses) == PANEL
+    assert "Warren Buffett" in analyses["warren_buffett"]
+    assert "Cathie Wood" in analyses["cathie_wood"]
+
+async def test_opening_round_respects_concurrency_cap():
+    tracker = {"active": 0, "peak": 0}
+    options = create_agent_options(PANEL)
+    await run_opening_round(options, "AI infra", concurrency=2,
+                            client_factory=make_factory(latency=0.01, tracker=tracker))
+    assert tracker["peak"] == 2
+
+async def test_opening_round_runs_concurrently():
+    options = create_agent_options(PANEL)
+    start = time.perf_counter()
+    await run_opening_round(options, "AI infra", concurrency=5,
+                            client_factory=make_factory(latency=0.05))
+    # Sequential execution would take 5 * 2 * 0.05s
+    assert time.perf_counter() - start < 0.3
+
+async def test_opening_round_rejects_invalid_concurrency():
+    with pytest.raises(ValueError):
+        await run_opening_round(create_agent_options(PANEL), "AI infra", concurrency=0)
+
+async def test_opening_round_failure_cancels_running_sessions():
+    cancelled = []
+
+    class SlowClient(FakeClaudeSDKClient):
+        async def receive_response(self):
+            try:
+                async for message in super().receive_response():
+                    yield message
+            except asyncio.CancelledError:
+                cancelled.append(self.options.system_prompt)
+                raise
+
+    sessions = []
+
+    def factory(options):
+        # The first session fails at once while the others are still streaming
+        sessions.append(options)
+        if len(sessions) == 1:
+            return FaultyClient(FakeClaudeSDKClient(options), Fault(error=ConnectionError("reset")))
+        return SlowClient(options, latency=10.0)
+
+    with pytest.raises(ConnectionError):
+        await asyncio.wait_for(run_opening_round(create_agent_options(PANEL), "AI infra", client_factory=factory), 2.0)
+    assert len(cancelled) == len(PANEL) - 1
+
+def test_format_opening_block():
+    block = format_opening_block("AI infra", {"warren_buffett": "Buy moats.", "cathie_wood": "Buy disruption."})
+    assert block.startswith("AI infra")
+    assert "# Opening Analyses" in block
+    assert "### warren_buffett\n\nBuy moats." in block
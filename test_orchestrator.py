@@ -1,5 +1,5 @@
 import pytest
-from orchestrator import get_system_prompt, get_allowed_tools, create_agent_options
+from orchestrator import ORCHESTRATOR_PROMPT_PREFIX, get_system_prompt, get_allowed_tools, create_agent_options
 from claude_agent_sdk import ClaudeAgentOptions, AgentDefinition
 
 def test_orchestrator_system_prompt():
@@ -35,3 +35,24 @@ def test_create_agent_options():
     assert buffett_def.description is not None
     assert buffett_def.prompt is not None
     assert buffett_def.tools is not None
+
+def test_parallel_opening_system_prompt():
+    """Test that parallel opening mode skips the sequential opening phase"""
+    prompt = get_system_prompt(["warren_buffett"], parallel_opening=True)
+    assert "Opening Analyses" in prompt
+    assert "Start by asking relevant Gurus" not in prompt
+
+    options = create_agent_options(["warren_buffett"], parallel_opening=True)
+    assert "Opening Analyses" in options.system_prompt
+
+
+def test_system_prompt_shares_static_prefix():
+    """Test that panel-dependent sections come after the shared, cacheable prefix"""
+    prompts = [
+        get_system_prompt(["warren_buffett"]),
+        get_system_prompt(["cathie_wood", "elon_musk"], parallel_opening=True),
+    ]
+    for prompt in prompts:
+        assert prompt.startswith(ORCHESTRATOR_PROMPT_PREFIX)
+        assert "`warren_buffett`" not in ORCHESTRATOR_PROMPT_PREFIX
+    assert prompts[1].index("Discussion Flow Rules") < prompts[1].index("`cathie_wood`")
@@ -0,0 +1,76 @@
+import pytest
+from investment_gurus import get_guru_prompt, normalize_guru_name
+from orchestrator import create_agent_options
+from persona_cache import PersonaCache, warmup
+from fake_client import FakeClaudeSDKClient, text_message, result_message
+
+def persona_factory(calls):
+    """Fake client that 'researches' a persona from the research prompt"""
+    def responder(options, prompt):
+        calls.append(prompt)
+        return [text_message("You are a cached persona."), result_message()]
+    return lambda options: FakeClaudeSDKClient(options, responder=responder)
+
+def test_normalize_guru_name():
+    assert normalize_guru_name(" Elon  Musk ") == "elon_musk"
+    assert normalize_guru_name("Jean-Claude") == "jean_claude"
+
+def test_put_get_roundtrip(tmp_path):
+    cache = PersonaCache(str(tmp_path))
+    cache.put("Elon Musk", "You are Elon.")
+    assert cache.get("elon_musk") == "You are Elon."
+    assert cache.names() == ["elon_musk"]
+
+def test_ttl_expiry(tmp_path, clock):
+    cache = PersonaCache(str(tmp_path), ttl_seconds=60, clock=clock)
+    cache.put("keynes", "You are Keynes.")
+    clock.now += 61
+    assert cache.get("keynes") is None
+    assert cache.names() == []
+
+def test_lru_eviction(tmp_path, clock):
+    cache = PersonaCache(str(tmp_path), max_entries=2, clock=clock)
+    cache.put("a", "A")
+    clock.now += 1
+    cache.put("b", "B")
+    clock.now += 1
+    cache.get("a")  # a becomes most recently used
+    clock.now += 1
+    cache.put("c", "C")
+    assert cache.names() == ["a", "c"]
+
+def test_peek_leaves_lru_order_and_expired_entries_alone(tmp_path, clock):
+    cache = PersonaCache(str(tmp_path), ttl_seconds=60, max_entries=2, clock=clock)
+    cache.put("a", "A")
+    clock.now += 1
+    cache.put("b", "B")
+    clock.now += 1
+    assert cache.peek("a") == "A"
+    assert cache.contains("a") and not cache.contains("z")
+    cache.put("c", "C")
+    assert cache.names() == ["b", "c"]  # peeking did not make "a" recently used
+
+    clock.now += 61
+    assert cache.peek("b") is None
+    assert cache.names() == ["b", "c"]  # expired, but only get() deletes it
+
+async def test_warmup_builds_only_missing_dynamic_personas(tmp_path):
+    cache = PersonaCache(str(tmp_path))
+    cache.put("keynes", "You are Keynes.")
+    calls = []
+    statuses = await warmup(["warren_buffett", "keynes", "Elon Musk", "adam_smith"], cache,
+                            client_factory=persona_factory(calls))
+
+    assert statuses == {"warren_buffett": "predefined", "keynes": "cached",
+                        "elon_musk": "built", "adam_smith": "built"}
+    assert len(calls) == 2
+    assert cache.get("adam_smith") == "You are a cached persona."
+
+def test_dynamic_guru_prompt_uses_cache(tmp_path):
+    cache = PersonaCache(str(tmp_path))
+    assert "WebSearch" in get_guru_prompt("elon_musk", persona_cache=cache)
+
+    cache.put("elon_musk", "You are Elon Musk, compiled.")
+    assert get_guru_prompt("Elon Musk", persona_cache=cache).endswith("You are Elon Musk, compiled.\n")
+    options = create_agent_options(["elon_musk"], persona_cache=cache)
+    assert options.agents["elon_musk"].prompt == get_guru_prompt("elon_musk", persona_cache=cache)
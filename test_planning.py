@@ -0,0 +1,53 @@
+import subprocess
+import sys
+from budget import DiscussionBudget
+from discussion import DiscussionConfig
+from persona_cache import PersonaCache
+from planning import build_plan, estimate_tokens, format_plan
+
+def test_estimate_tokens():
+    assert estimate_tokens("a" * 400) == 100
+    assert estimate_tokens("가" * 150) == 100
+
+def test_build_plan_describes_every_agent():
+    class Cache:
+        def get(self, name):
+            return "# Persona\nGeorge Soros" if name == "george_soros" else None
+
+    config = DiscussionConfig(guru_names=["warren_buffett", "george_soros", "jim_simons"], hybrid=True,
+                              budget=DiscussionBudget(max_tokens=50_000))
+    plan = build_plan(config, persona_cache=Cache())
+
+    assert [agent.name for agent in plan.agents] == config.guru_names
+    assert [agent.persona for agent in plan.agents] == ["registry", "persona cache", "dynamic (researches itself)"]
+    assert all(agent.prompt_tokens > 0 and "WebSearch" in agent.tools for agent in plan.agents)
+    assert "hybrid" in plan.modes and "budget (50,000 tokens)" in plan.modes
+    assert "PostToolUse:Task" in plan.hooks
+    assert plan.total_prompt_tokens == plan.orchestrator_prompt_tokens + sum(a.prompt_tokens for a in plan.agents)
+    assert plan.to_dict()["total_prompt_tokens"] == plan.total_prompt_tokens
+    assert "george_soros" in format_plan(plan)
+
+def test_build_plan_does_not_touch_the_persona_cache(tmp_path, clock):
+    cache = PersonaCache(str(tmp_path), ttl_seconds=60, clock=clock)
+    cache.put("george_soros", "You are George Soros.")
+    clock.now += 61
+    plan = build_plan(DiscussionConfig(guru_names=["george_soros"]), persona_cache=cache)
+
+    assert plan.agents[0].persona == "dynamic (researches itself)"
+    assert cache.names() == ["george_soros"]  # the expired entry is left for a real run to clean up
+
+def run_cli(*arguments, code=None):
+    command = [sys.executable, "-c", code] if code else [sys.executable, "run.py", *arguments]
+    return subprocess.run(command, capture_output=True, text=True, check=True).stdout
+
+def test_cli_help_does_not_import_the_sdk():
+    loaded = run_cli(code="import sys, run; print('claude_agent_sdk' in sys.modules, 'discussion' in sys.modules)")
+    assert loaded.strip() == "False False"
+    assert "--dry-run" in run_cli("--help")
+
+def test_cli_dry_run_prints_the_plan(tmp_path):
+    output = run_cli("--dry-run", "--gurus", "워렌 버핏,cathie_wood", "--persona-cache-dir", str(tmp_path))
+    assert "Dry run" in output
+    assert "warren_buffett" in output and "cathie_wood" in output
+    assert "Total system prompt size" in output
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,55 @@
+import math
+import pytest
+from investment_guru_agent import InvestmentRecommendation, collect_panel_recommendations
+from recommendation_store import RecommendationRecord, RecommendationStore, parse_horizon_years
+
+@pytest.mark.parametrize("text,years", [
+    ("3-5년", 4.0), ("10년 이상", 10.0), ("5-10 years", 7.5), ("영구보유", 30.0), ("18 months", 1.5),
+])
+def test_parse_horizon_years(text, years):
+    assert parse_horizon_years(text) == pytest.approx(years)
+
+def test_parse_horizon_years_unknown():
+    assert math.isnan(parse_horizon_years("장기"))
+    assert math.isnan(parse_horizon_years(None))
+
+def test_records_use_slots():
+    record = RecommendationRecord(guru="a", ticker="MSFT")
+    with pytest.raises(AttributeError):
+        record.note = "x"
+    with pytest.raises(AttributeError):
+        InvestmentRecommendation("a", "b", "c", "d", "e", "f", "g").note = "x"
+
+def test_columns_are_interned():
+    store = RecommendationStore()
+    store.add_picks("warren_buffett", [{"ticker": "msft", "sector": "Cloud"}, {"ticker": "BRK.B", "sector": "Insurance"}])
+    store.add_picks("cathie_wood", [{"ticker": "MSFT", "sector": "Cloud", "conviction": 0.8}], discussion_id="d1")
+
+    assert len(store) == 3
+    assert store.tickers.values == ["MSFT", "BRK.B"]
+    assert store.ticker_codes.tolist() == [0, 1, 0]
+    assert store.convictions.tolist() == [1.0, 0.5, 0.8]
+    record = store.record(2)
+    assert (record.guru, record.ticker, record.sector, record.conviction, record.discussion_id) == \
+        ("cathie_wood", "MSFT", "Cloud", 0.8, "d1")
+
+def test_save_load_roundtrip(tmp_path):
+    store = RecommendationStore()
+    store.add_picks("ray_dalio", [{"ticker": "AMZN", "sector": "Cloud", "time_horizon": "7-10년"},
+                                  {"ticker": "GLD", "sector": "Gold"}])
+    path = str(tmp_path / "picks.json")
+    store.save(path)
+    loaded = RecommendationStore.load(path)
+    assert [(r.guru, r.ticker, r.conviction) for r in loaded] == [(r.guru, r.ticker, r.conviction) for r in store]
+    assert loaded.horizon_years[0] == 8.5 and math.isnan(loaded.horizon_years[1])
+
+    merged = RecommendationStore()
+    merged.merge(store)
+    merged.merge(loaded)
+    assert len(merged) == 4 and len(merged.tickers) == 2
+
+async def test_collect_panel_recommendations():
+    store = await collect_panel_recommendations(["워렌 버핏", "cathie_wood", "elon_musk"], discussion_id="ai")
+    assert store.gurus.values == ["warren_buffett", "cathie_wood"]
+    assert "NVDA" in store.tickers.values
+    assert store.discussions.values == ["ai"]
@@ -0,0 +1,123 @@
+import time
+import pytest
+from claude_agent_sdk import AssistantMessage, ResultMessage, TextBlock, ToolResultBlock, ToolUseBlock, UserMessage
+from investment_gurus import GURU_PROMPT_PREFIX
+from discussion import DiscussionConfig, run_discussion
+from persona_cache import PersonaCache
+from fake_client import FakeClaudeSDKClient, scripted_discussion, text_message, result_message
+from recording import (
+    ReplayClientFactory, StreamRecorder, decode_value, encode_value, get_replay_config, load_recording
+)
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+def strip_date(transcript):
+    return "\n".join(line for line in transcript.splitlines() if not line.startswith("**Date:**"))
+
+def test_encode_decode_roundtrip():
+    for message in scripted_discussion(["warren_buffett"], rounds=1, text_chars=20):
+        assert decode_value(encode_value(message)) == message
+
+def test_encoding_is_compact():
+    encoded = encode_value(text_message("hi"))
+    assert encoded == {"_": "AssistantMessage", "content": [{"_": "TextBlock", "text": "hi"}], "model": "fake-model"}
+
+@pytest.mark.parametrize("suffix", [".ndjson", ".ndjson.gz"])
+async def test_record_and_replay_reproduces_transcript(tmp_path, suffix):
+    recording_path = str(tmp_path / f"run{suffix}")
+    panel = ["warren_buffett", "cathie_wood"]
+
+    def responder(options, prompt):
+        if options.agents:
+            return scripted_discussion(panel, rounds=2, text_chars=40)
+        persona = options.system_prompt[len(GURU_PROMPT_PREFIX):]
+        return [text_message(f"Opening: {persona.strip().splitlines()[0]}"), result_message()]
+
+    original = str(tmp_path / "original.md")
+    await run_discussion(
+        DiscussionConfig(topic="AI infra", guru_names=panel, output=original, parallel_opening=True),
+        observers=[StreamRecorder(recording_path)],
+        client_factory=lambda options: FakeClaudeSDKClient(options, responder=responder),
+    )
+
+    recording = load_recording(recording_path)
+    assert recording.status == "completed"
+    assert recording.guru_names == panel
+    assert {recorded.stream for recorded in recording.messages} == {"main", *panel}
+
+    replayed = str(tmp_path / "replayed.md")
+    await run_discussion(get_replay_config(recording, replayed), client_factory=ReplayClientFactory(recording))
+    assert strip_date(read(replayed)) == strip_date(read(original))
+
+async def test_replay_serves_opening_streams_when_guru_prompts_differ(tmp_path):
+    recording_path = str(tmp_path / "run.ndjson")
+    panel = ["warren_buffett", "some_investor"]
+    cache = PersonaCache(str(tmp_path / "personas"))
+    cache.put("some_investor", "You are Some Investor, compiled.")
+
+    def responder(options, prompt):
+        if options.agents:
+            return scripted_discussion(panel, rounds=1, text_chars=40)
+        persona = options.system_prompt[len(GURU_PROMPT_PREFIX):]
+        return [text_message(f"Opening: {persona.strip().splitlines()[0]}"), result_message()]
+
+    original = str(tmp_path / "original.md")
+    await run_discussion(
+        DiscussionConfig(topic="AI", guru_names=panel, output=original, parallel_opening=True, hybrid=True),
+        observers=[StreamRecorder(recording_path)], persona_cache=cache,
+        client_factory=lambda options: FakeClaudeSDKClient(options, responder=responder),
+    )
+    assert "You are Some Investor, compiled." in read(original)
+
+    recording = load_recording(recording_path)
+    replayed = str(tmp_path / "replayed.md")
+    await run_discussion(get_replay_config(recording, replayed), persona_cache=cache,
+                         client_factory=ReplayClientFactory(recording))
+    assert strip_date(read(replayed)) == strip_date(read(original))
+
+async def test_replay_at_recorded_pace(tmp_path):
+    recording_path = str(tmp_path / "run.ndjson")
+    await run_discussion(
+        DiscussionConfig(topic="AI", guru_names=["ray_dalio"], output=str(tmp_path / "a.md")),
+        observers=[StreamRecorder(recording_path)],
+        client_factory=lambda options: FakeClaudeSDKClient(
+            options, responder=lambda o, p: [text_message("a"), text_message("b"), result_message()], latency=0.03
+        ),
+    )
+    recording = load_recording(recording_path)
+
+    start = time.perf_counter()
+    await run_discussion(get_replay_config(recording, str(tmp_path / "b.md")),
+                         client_factory=ReplayClientFactory(recording, speed=1.0))
+    assert time.perf_counter() - start >= 0.08
+
+    start = time.perf_counter()
+    await run_discussion(get_replay_config(recording, str(tmp_path / "c.md")),
+                         client_factory=ReplayClientFactory(recording))
+    assert time.perf_counter() - start < 0.05
+
+async def test_recording_again_replaces_the_file(tmp_path):
+    recording_path = str(tmp_path / "run.ndjson")
+    for topic in ["first", "second"]:
+        await run_discussion(
+            DiscussionConfig(topic=topic, guru_names=["ray_dalio"], output=str(tmp_path / f"{topic}.md")),
+            observers=[StreamRecorder(recording_path)],
+            client_factory=lambda options: FakeClaudeSDKClient(
+                options, responder=lambda o, p: [text_message("a"), result_message()]
+            ),
+        )
+    recording = load_recording(recording_path)
+    assert recording.topic == "second"
+    assert len(recording.messages) == 2
+    assert sum(1 for line in open(recording_path) if '"format"' in line) == 1
+
+def test_truncated_recording_is_loadable(tmp_path):
+    path = tmp_path / "crash.ndjson"
+    path.write_text('{"format":"guru-recording","version":1,"topic":"AI","guru_names":["a"]}\n'
+                    '{"t":0.1,"s":"main","m":{"_":"AssistantMessage","content":[{"_":"TextBlock","text":"x"}],"model":"m"}}\n'
+                    '{"t":0.2,"s":"main","m":{"_":"Assi', encoding="utf-8")
+    recording = load_recording(str(path))
+    assert len(recording.messages) == 1
+    assert recording.status is None
@@ -0,0 +1,146 @@
+import asyncio
+import pytest
+from discussion import DiscussionConfig, run_discussion
+from fake_client import FakeClaudeSDKClient, Fault, FaultInjector, discussion_responder
+from investment_gurus import get_guru_prompt
+from opening_round import run_opening_round
+from orchestrator import create_agent_options
+from resilience import LatencyTracker, ResilienceMonitor, ResiliencePolicy, backoff_delay
+
+PANEL = ["warren_buffett", "cathie_wood"]
+
+def fake(options):
+    return FakeClaudeSDKClient(options, responder=discussion_responder())
+
+def guru_session(options, guru):
+    return options is not None and not options.agents and options.system_prompt == get_guru_prompt(guru)
+
+async def no_sleep(seconds):
+    pass
+
+def task(guru, tool_use_id="t1"):
+    return {"tool_name": "Task", "tool_use_id": tool_use_id, "tool_input": {"subagent_type": guru, "prompt": "?"}}
+
+def test_backoff_and_percentile():
+    assert backoff_delay(0, 2.0, 30.0, rand=lambda: 1.0) == 2.0
+    assert backoff_delay(3, 2.0, 30.0, rand=lambda: 0.5) == 8.0
+    assert backoff_delay(10, 2.0, 30.0, rand=lambda: 1.0) == 30.0
+    tracker = LatencyTracker()
+    assert tracker.percentile(0.9) is None
+    for seconds in [5.0, 1.0, 3.0, 2.0, 4.0]:
+        tracker.add(seconds)
+    assert tracker.percentile(0.5) == 3.0 and tracker.percentile(0.9) == 5.0 and tracker.percentile(0.0) == 1.0
+
+async def test_opening_retries_then_marks_absent():
+    attempts = {"warren_buffett": 0}
+    def plan(options, session):
+        if guru_session(options, "warren_buffett"):
+            attempts["warren_buffett"] += 1
+            return Fault(error=ConnectionError("reset"))
+        # Cathie's first session fails, the retry succeeds
+        if guru_session(options, "cathie_wood") and session <= 2:
+            return Fault(after_messages=1, error=ConnectionError("reset"))
+        return None
+    absent = []
+    monitor = ResilienceMonitor(ResiliencePolicy(retries=1), sleep=no_sleep)
+    monitor.start(PANEL, lambda guru, reason: absent.append((guru, reason)))
+    analyses = await run_opening_round(
+        create_agent_options(PANEL), "AI", client_factory=FaultInjector(plan, fake), monitor=monitor
+    )
+    assert list(analyses) == ["cathie_wood"]
+    assert absent == [("warren_buffett", "ConnectionError: reset")] and attempts["warren_buffett"] == 2
+    assert monitor.stats.retries == 2 and monitor.stats.errors == 3 and monitor.present == ["cathie_wood"]
+
+async def test_deadline_and_hedging():
+    stalled = FaultInjector(lambda options, session: Fault(delay=10.0), fake)
+    monitor = ResilienceMonitor(ResiliencePolicy(turn_timeout=0.05, retries=0), sleep=no_sleep)
+    monitor.start(PANEL)
+    assert await run_opening_round(create_agent_options(PANEL), "AI", client_factory=stalled, monitor=monitor) == {}
+    assert monitor.stats.timeouts == 2 and set(monitor.absent) == set(PANEL)
+
+    # The first session of each guru stalls; the hedge started past the p50 latency answers
+    first_stalls = FaultInjector(lambda options, session: Fault(delay=10.0) if session <= 2 else None, fake)
+    monitor = ResilienceMonitor(ResiliencePolicy(turn_timeout=5.0, hedge_percentile=0.5, hedge_min_samples=2))
+    for seconds in [0.01, 0.02]:
+        monitor.latency.add(seconds)
+    monitor.start(PANEL)
+    analyses = await asyncio.wait_for(
+        run_opening_round(create_agent_options(PANEL), "AI", client_factory=first_stalls, monitor=monitor), 2.0
+    )
+    assert list(analyses) == PANEL
+    assert monitor.stats.hedges == 2 and monitor.stats.hedge_wins == 2 and monitor.absent == {}
+
+async def test_task_hooks_retry_then_deny():
+    sleeps = []
+    async def sleep(seconds):
+        sleeps.append(seconds)
+    monitor = ResilienceMonitor(ResiliencePolicy(retries=1, backoff_base=1.0), rand=lambda: 0.5, sleep=sleep)
+    monitor.start(PANEL)
+    assert await monitor.pre_task_hook(task("cathie_wood"), "t1", None) == {}
+    output = await monitor.task_failure_hook({**task("cathie_wood"), "error": "overloaded"}, "t1", None)
+    assert "You may ask cathie_wood once more" in output["hookSpecificOutput"]["additionalContext"]
+    assert sleeps == [0.5]
+    output = await monitor.task_failure_hook({**task("cathie_wood", "t2"), "error": "overloaded"}, "t2", None)
+    assert "cathie_wood is absent" in output["hookSpecificOutput"]["additionalContext"]
+    denied = await monitor.pre_task_hook(task("cathie_wood", "t3"), "t3", None)
+    assert denied["hookSpecificOutput"]["permissionDecision"] == "deny"
+    assert "overloaded" in denied["hookSpecificOutput"]["permissionDecisionReason"]
+
+async def test_task_past_deadline_counts_as_failure():
+    now = [0.0]
+    monitor = ResilienceMonitor(ResiliencePolicy(turn_timeout=60.0, retries=0), clock=lambda: now[0])
+    monitor.start(PANEL)
+    await monitor.pre_task_hook(task("warren_buffett"), "t1", None)
+    now[0] = 30.0
+    assert await monitor.post_task_hook(task("warren_buffett"), "t1", None) == {}
+    await monitor.pre_task_hook(task("warren_buffett", "t2"), "t2", None)
+    now[0] = 120.0
+    output = await monitor.post_task_hook(task("warren_buffett", "t2"), "t2", None)
+    assert "past the 60s deadline" in output["hookSpecificOutput"]["additionalContext"]
+    assert "warren_buffett" in monitor.absent and monitor.report()["p50_seconds"] == 30.0
+
+async def test_discussion_survives_a_failing_guru_and_a_dropped_session(tmp_path):
+    prompts = []
+    def recording(options):
+        client = fake(options)
+        if options.agents:
+            original = client.query
+            async def query(prompt, session_id="default"):
+                prompts.append(prompt)
+                await original(prompt, session_id)
+            client.query = query
+        return client
+    orchestrator_sessions = []
+    def plan(options, session):
+        if guru_session(options, "cathie_wood"):
+            return Fault(error=RuntimeError("sub-agent crashed"))
+        if options.agents:
+            orchestrator_sessions.append(session)
+            # The first Orchestrator session drops after Warren's turn has completed
+            if len(orchestrator_sessions) == 1:
+                return Fault(after_messages=7, error=ConnectionError("stream closed"))
+        return None
+    statuses = []
+    class Status:
+        def __getattr__(self, name):
+            return lambda *args: None
+        def on_status(self, text):
+            statuses.append(text)
+
+    config = DiscussionConfig(guru_names=PANEL, output=str(tmp_path / "d.md"), parallel_opening=True,
+                              resilience=ResiliencePolicy(retries=0, backoff_base=0.0))
+    result = await run_discussion(config, observers=[Status()], client_factory=FaultInjector(plan, recording))
+    assert result.status == "completed"
+    assert result.resilience["absent"] == {"cathie_wood": "RuntimeError: sub-agent crashed"}
+    assert result.resilience["orchestrator_reconnects"] == 1
+    assert "# Absent Gurus" in prompts[0] and "cathie_wood" in prompts[0]
+    assert "# Reconnected Discussion" in prompts[1] and "### 1. warren_buffett" in prompts[1]
+    assert any(text.startswith("🚑 cathie_wood marked absent") for text in statuses)
+    assert any("reconnecting" in text for text in statuses)
+    transcript = (tmp_path / "d.md").read_text(encoding="utf-8")
+    assert "Connection lost" in transcript and "cathie_wood is absent" in transcript
+
+async def test_without_policy_a_dropped_session_fails(tmp_path):
+    injector = FaultInjector(lambda options, session: Fault(after_messages=3, error=ConnectionError("closed")), fake)
+    with pytest.raises(ConnectionError):
+        await run_discussion(DiscussionConfig(guru_names=PANEL, output=str(tmp_path / "d.md")), client_factory=injector)
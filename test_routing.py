@@ -0,0 +1,92 @@
+import pytest
+from claude_agent_sdk import AssistantMessage, TextBlock, ToolResultBlock, ToolUseBlock, UserMessage
+from discussion import DiscussionConfig, create_discussion_options, run_discussion
+from fake_client import FakeClaudeSDKClient, discussion_responder, result_message, text_message
+from persona_cache import PersonaCache, warmup
+from planning import build_plan
+from pricing import estimate_cost
+from routing import ModelRouter, RoutingPolicy, parse_routes
+from task_turns import TaskTurnTracker
+
+USAGE = {"input_tokens": 1000, "output_tokens": 100}
+
+def test_most_specific_route_wins():
+    policy = parse_routes(["warren_buffett=strong", "tool:WebSearch=standard", "opening=standard",
+                           "tier:fast=claude-haiku-4-5", "speculation=claude-sonnet-4-5"])
+    assert policy.model_for("persona", "someone", ["WebSearch"]) == "sonnet"
+    assert policy.model_for("persona", "someone") == "claude-haiku-4-5"
+    assert policy.model_for("opening", "cathie_wood") == "sonnet"
+    assert policy.model_for("opening", "warren_buffett", ["WebSearch"]) == "opus"
+    assert policy.model_for("speculation", "cathie_wood") == "claude-sonnet-4-5"
+    # The Orchestrator has WebSearch too, but is routed by phase only
+    assert policy.model_for("orchestrator", None, ["WebSearch"]) == "opus"
+    for spec in ["opening", "tool:=fast", "phase:opening=fast"]:
+        with pytest.raises(ValueError):
+            parse_routes([spec])
+    with pytest.raises(ValueError):
+        policy.tier_for("synthesis")
+    assert RoutingPolicy.from_dict({"phases": {"opening": "strong"}}).model_for("opening") == "opus"
+    with pytest.raises(TypeError):
+        RoutingPolicy.from_dict({"phase": {}})
+
+def test_options_are_routed():
+    config = DiscussionConfig(guru_names=["warren_buffett", "cathie_wood"],
+                              routing=parse_routes(["cathie_wood=fast"]))
+    options, controls = create_discussion_options(config)
+    assert options.model == "opus"
+    assert {name: agent.model for name, agent in options.agents.items()} == {
+        "warren_buffett": "sonnet", "cathie_wood": "haiku"}
+    assert controls.router is not None
+    plan = build_plan(config)
+    assert "model routing" in plan.modes and plan.orchestrator_model == "opus"
+    options, controls = create_discussion_options(DiscussionConfig(guru_names=["warren_buffett"]))
+    assert options.model is None and controls.router is None
+
+def test_stream_is_accounted_per_tier():
+    times = iter([10.0, 12.5])
+    tracker = TaskTurnTracker(clock=lambda: next(times))
+    router = ModelRouter()
+    router.start(create_discussion_options(DiscussionConfig(guru_names=["warren_buffett"]), router=router)[0])
+    for message in [
+        AssistantMessage(content=[ToolUseBlock(id="t1", name="Task", input={
+            "subagent_type": "warren_buffett", "prompt": "?"})], model="claude-opus-4", usage=USAGE, message_id="m1"),
+        # A repeated message id is only counted once
+        AssistantMessage(content=[TextBlock("...")], model="claude-opus-4", usage=USAGE, message_id="m1"),
+        AssistantMessage(content=[TextBlock("Moats.")], model="fake-model", usage=USAGE,
+                         parent_tool_use_id="t1", message_id="m2"),
+        UserMessage(content=[ToolResultBlock(tool_use_id="t1", content="Moats.")]),
+        result_message(duration_ms=4000),
+    ]:
+        tracker.feed(message, [router])
+
+    tiers = router.report()["tiers"]
+    assert tiers["strong"]["calls"] == 1 and tiers["strong"]["seconds"] == 1.5
+    assert tiers["strong"]["cost_usd"] == round(estimate_cost(USAGE, "opus"), 6)
+    # The fake model is priced as the routed one
+    assert tiers["standard"] == {"model": "sonnet", "calls": 1, "seconds": 2.5, "mean_seconds": 2.5, "tokens": 1100,
+                                 "cost_usd": round(estimate_cost(USAGE, "sonnet"), 6), "phases": ["cross_examination"]}
+
+async def test_discussion_routes_opening_and_reports(tmp_path):
+    models = []
+    def factory(options):
+        models.append(options.model)
+        return FakeClaudeSDKClient(options, responder=discussion_responder())
+    config = DiscussionConfig(guru_names=["warren_buffett", "cathie_wood"], output=str(tmp_path / "d.md"),
+                              parallel_opening=True, routing=RoutingPolicy())
+    result = await run_discussion(config, client_factory=factory)
+    assert models == ["haiku", "haiku", "opus"]
+    tiers = result.routing["tiers"]
+    assert tiers["fast"]["calls"] == 2 and tiers["fast"]["phases"] == ["opening"]
+    assert tiers["strong"]["calls"] == 1
+
+async def test_persona_research_runs_on_fast_tier(tmp_path):
+    models = []
+    def factory(options):
+        models.append(options.model)
+        return FakeClaudeSDKClient(options, responder=lambda options, prompt: [
+            text_message("You are a contrarian."), result_message(duration_ms=2000, usage=USAGE)])
+    router = ModelRouter()
+    statuses = await warmup(["some_new_guru"], PersonaCache(str(tmp_path)), client_factory=factory, router=router)
+    assert statuses == {"some_new_guru": "built"} and models == ["haiku"]
+    fast = router.report()["tiers"]["fast"]
+    assert fast["calls"] == 1 and fast["tokens"] == 1100 and fast["phases"] == ["persona"]
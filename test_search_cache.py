@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+from orchestrator import create_agent_options, create_guru_options
+from search_cache import (
+    SEARCH_SERVER_NAME, SEARCH_TOOL_NAME, LocalSearchBackend, SearchCache,
+    create_search_tool, enable_search_cache, normalize_query
+)
+
+def test_normalize_query():
+    assert normalize_query("NVIDIA stock, outlook!") == normalize_query("nvidia  STOCK outlook")
+    assert normalize_query("nvidia 2025.") == "nvidia 2025"
+    assert normalize_query("apple vs microsoft revenue") != normalize_query("microsoft vs apple revenue")
+    assert normalize_query("not buy") != normalize_query("buy not")
+    assert normalize_query("buy buy") != normalize_query("buy")
+
+async def test_identical_and_normalized_queries_hit_memory(tmp_path):
+    backend = LocalSearchBackend()
+    cache = SearchCache(backend, directory=str(tmp_path))
+
+    first = await cache.search("NVIDIA moat")
+    assert await cache.search("nvidia MOAT") == first
+    assert await cache.search("nvidia, moat?") == first
+    assert backend.queries == ["NVIDIA moat"]
+    assert cache.stats.misses == 1
+    assert cache.stats.memory_hits == 2
+
+async def test_empty_results_are_not_cached(tmp_path):
+    backend = LocalSearchBackend(results={"NVDA moat": ""})
+    cache = SearchCache(backend, directory=str(tmp_path))
+    assert await cache.search("NVDA moat") == ""
+    assert await cache.search("NVDA moat") == ""
+    assert backend.queries == ["NVDA moat", "NVDA moat"]
+    assert list(tmp_path.iterdir()) == []
+
+async def test_concurrent_queries_share_one_backend_call():
+    backend = LocalSearchBackend(latency=0.02)
+    cache = SearchCache(backend, directory=None)
+    results = await asyncio.gather(*(cache.search("TSMC capex") for _ in range(5)))
+    assert len(set(results)) == 1
+    assert len(backend.queries) == 1
+    assert cache.stats.inflight_hits == 4
+
+async def test_results_shared_across_runs(tmp_path):
+    await SearchCache(LocalSearchBackend(), directory=str(tmp_path)).search("AI infra")
+
+    backend = LocalSearchBackend()
+    cache = SearchCache(backend, directory=str(tmp_path))
+    assert await cache.search("ai INFRA") == "Local results for: AI infra"
+    assert backend.queries == []
+    assert cache.stats.disk_hits == 1
+
+async def test_freshness_windows(tmp_path, clock):
+    backend = LocalSearchBackend()
+    cache = SearchCache(backend, directory=str(tmp_path), clock=clock,
+                        freshness_rules=[(r"\bprice\b", 60)], default_freshness_seconds=3600)
+    assert cache.freshness_for("NVDA price") == 60
+    assert cache.freshness_for("NVDA moat") == 3600
+
+    await cache.search("NVDA price")
+    await cache.search("NVDA moat")
+    clock.now += 120
+    await cache.search("NVDA price")
+    await cache.search("NVDA moat")
+    assert backend.queries == ["NVDA price", "NVDA moat", "NVDA price"]
+
+async def test_search_tool_serves_from_cache():
+    cache = SearchCache(LocalSearchBackend({"buffett": "Berkshire letters"}), directory=None)
+    search_tool = create_search_tool(cache)
+    result = await search_tool.handler({"query": "buffett"})
+    assert result["content"][0]["text"] == "Berkshire letters"
+
+def test_enable_search_cache_routes_web_search():
+    cache = SearchCache(LocalSearchBackend(), directory=None)
+    options = enable_search_cache(create_agent_options(["warren_buffett"]), cache)
+
+    assert SEARCH_SERVER_NAME in options.mcp_servers
+    assert SEARCH_TOOL_NAME in options.allowed_tools
+    assert "WebSearch" not in options.allowed_tools
+    buffett = options.agents["warren_buffett"]
+    assert SEARCH_TOOL_NAME in buffett.tools and "WebSearch" not in buffett.tools
+    assert SEARCH_TOOL_NAME in buffett.prompt
+
+    guru_options = create_guru_options(buffett, options)
+    assert SEARCH_SERVER_NAME in guru_options.mcp_servers
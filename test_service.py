@@ -0,0 +1,133 @@
+import asyncio
+import json
+import pytest
+from fake_client import FakeClaudeSDKClient, discussion_responder
+from service import OVERFLOW, AdmissionError, DiscussionService, parse_job_request
+
+GURUS = "warren_buffett,cathie_wood"
+
+async def request(port, method, path, body=None, headers=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    head = [f"{method} {path} HTTP/1.1", "Host: localhost", f"Content-Length: {len(payload)}"]
+    head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + payload)
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, body = raw.partition(b"\r\n\r\n")
+    lines = head.decode().split("\r\n")
+    response_headers = dict(line.split(": ", 1) for line in lines[1:])
+    return int(lines[0].split()[1]), response_headers, body.decode()
+
+def parse_events(body):
+    events = []
+    for chunk in body.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in chunk.splitlines() if not line.startswith(":") and ": " in line)
+        if "event" in fields:
+            events.append((int(fields["id"]), fields["event"], json.loads(fields["data"])))
+    return events
+
+@pytest.fixture
+async def make_service(tmp_path):
+    services = []
+
+    async def make(latency=0.0, **kwargs):
+        factory = lambda options: FakeClaudeSDKClient(options, responder=discussion_responder(), latency=latency)
+        service = DiscussionService(factory, output_dir=str(tmp_path), heartbeat=0.5, **kwargs)
+        _, port = await service.start(port=0)
+        services.append(service)
+        return service, port
+
+    yield make
+    for service in services:
+        await service.stop()
+
+def test_parse_job_request():
+    config = parse_job_request({"topic": "AI", "gurus": "워렌 버핏, cathie_wood", "hybrid": True, "budget": {"max_tokens": 1000}})
+    assert config.guru_names == ["warren_buffett", "cathie_wood"]
+    assert config.hybrid and config.budget.max_tokens == 1000
+    for bad in [[], {"topic": 3}, {"budget": {"dollars": 1}}]:
+        with pytest.raises(ValueError):
+            parse_job_request(bad)
+
+async def test_submit_and_stream(make_service):
+    service, port = await make_service()
+    status, _, body = await request(port, "POST", "/discussions", {"topic": "AI", "gurus": GURUS})
+    assert status == 202
+    job = json.loads(body)
+
+    status, headers, body = await request(port, "GET", job["events_url"])
+    assert status == 200 and headers["Content-Type"].startswith("text/event-stream")
+    events = parse_events(body)
+    names = [event for _, event, _ in events]
+    assert names[:2] == ["queued", "start"]
+    assert "tool_use" in names and "text" in names
+    assert names[-2:] == ["finish", "end"]
+    assert events[-1][2]["status"] == "completed"
+    assert [event_id for event_id, _, _ in events] == list(range(1, len(events) + 1))
+
+    status, _, body = await request(port, "GET", f"/discussions/{job['id']}")
+    assert json.loads(body)["result"]["status"] == "completed"
+
+    assert (await request(port, "POST", "/discussions", {"topic": 3}))[0] == 400
+    assert (await request(port, "GET", "/discussions/nope"))[0] == 404
+
+async def test_admission_control(make_service):
+    service, port = await make_service(latency=0.05, workers=1, max_queue=1, max_per_client=2)
+    first = await request(port, "POST", "/discussions", {"gurus": GURUS}, {"X-Client-Id": "a"})
+    assert first[0] == 202
+    await asyncio.sleep(0.01)  # the worker picks it up, freeing the queue slot
+    assert (await request(port, "POST", "/discussions", {"gurus": GURUS}, {"X-Client-Id": "a"}))[0] == 202
+
+    # Client "a" is at its limit
+    status, headers, _ = await request(port, "POST", "/discussions", {"gurus": GURUS}, {"X-Client-Id": "a"})
+    assert status == 429 and "Retry-After" in headers
+    # The queue is full for everybody else
+    status, _, body = await request(port, "POST", "/discussions", {"gurus": GURUS}, {"X-Client-Id": "b"})
+    assert status == 429 and "queue" in json.loads(body)["error"]
+
+    with pytest.raises(AdmissionError):
+        service.submit(parse_job_request({}), "b")
+
+async def test_cancelled_jobs_free_their_queue_slot(make_service):
+    service, port = await make_service(latency=0.05, workers=1, max_queue=1)
+    service.submit(parse_job_request({"gurus": GURUS}), "a")
+    await asyncio.sleep(0.01)  # running
+    queued = service.submit(parse_job_request({"gurus": GURUS}), "b")
+    with pytest.raises(AdmissionError):
+        service.submit(parse_job_request({"gurus": GURUS}), "c")
+
+    service.cancel(queued.id)
+    assert service.submit(parse_job_request({"gurus": GURUS}), "c").status == "queued"
+
+async def test_cancel(make_service):
+    service, port = await make_service(latency=0.05, workers=1)
+    running = json.loads((await request(port, "POST", "/discussions", {"gurus": GURUS}))[2])
+    queued = json.loads((await request(port, "POST", "/discussions", {"gurus": GURUS}, {"X-Client-Id": "b"}))[2])
+    await asyncio.sleep(0.08)
+
+    status, _, body = await request(port, "DELETE", f"/discussions/{queued['id']}")
+    assert status == 200 and json.loads(body)["status"] == "cancelled"
+    status, _, body = await request(port, "DELETE", f"/discussions/{running['id']}")
+    assert status == 200
+
+    events = parse_events((await request(port, "GET", running["events_url"]))[2])
+    assert events[-1][1:] == ("end", {"status": "cancelled"})
+    assert service.jobs[running["id"]].result is None
+    assert (await request(port, "DELETE", f"/discussions/{running['id']}"))[0] == 409
+
+async def test_slow_consumer_overflows_and_replays(make_service):
+    service, port = await make_service(subscriber_buffer=2)
+    job = service.submit(parse_job_request({"gurus": GURUS}), "a")
+    # A subscriber that never reads: its backlog is replaced by an overflow marker
+    slow = job.subscribe(service.subscriber_buffer)
+    while not job.finished:
+        await asyncio.sleep(0.01)
+    assert slow.overflowed and slow not in job.subscribers
+    assert slow.queue.qsize() == 1 and slow.queue.get_nowait() == OVERFLOW
+
+    # Reconnecting with Last-Event-ID resumes from history
+    replay = parse_events((await request(port, "GET", f"/discussions/{job.id}/events", headers={"Last-Event-ID": 2}))[2])
+    assert [event_id for event_id, _, _ in replay] == list(range(3, len(job.events) + 1))
+    assert replay[-1][1] == "end"
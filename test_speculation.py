@@ -0,0 +1,155 @@
+import asyncio
+import time
+from claude_agent_sdk import ToolResultBlock, ToolUseBlock, UserMessage, AssistantMessage
+from budget import TIGHT, BudgetScheduler, DiscussionBudget
+from convergence import ConvergenceDetector, ConvergencePolicy
+from digest import DigestBook, digest_text
+from discussion import DiscussionConfig, create_discussion_options, run_discussion
+from fake_client import FakeClaudeSDKClient, discussion_responder, result_message, text_message
+from orchestrator import create_agent_options
+from speculation import Prefetcher, SpeculationPolicy
+from task_turns import TaskTurnTracker
+
+PANEL = ["warren_buffett", "cathie_wood", "peter_lynch"]
+
+class Factory:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.prompts = []
+
+    def __call__(self, options):
+        def responder(options, prompt):
+            self.prompts.append(prompt)
+            return [text_message("Here is a prepared answer."),
+                    result_message(total_cost_usd=0.01)]
+        return FakeClaudeSDKClient(options, responder=responder, latency=self.latency)
+
+def task(guru):
+    return {"tool_name": "Task", "tool_input": {"subagent_type": guru, "prompt": "Your rebuttal?"}}
+
+def answer(prefetcher, guru, text, task_id):
+    tracker = TaskTurnTracker()
+    tracker.feed(AssistantMessage(content=[ToolUseBlock(id=task_id, name="Task", input={
+        "subagent_type": guru, "prompt": "?"})], model="claude-sonnet-4"), [prefetcher])
+    tracker.feed(UserMessage(content=[ToolResultBlock(tool_use_id=task_id, content=text)]), [prefetcher])
+
+def started(factory=None, **policy):
+    prefetcher = Prefetcher(SpeculationPolicy(**policy))
+    prefetcher.start(create_agent_options(PANEL), "AI", factory or Factory())
+    return prefetcher
+
+def test_predict_follows_panel_order_and_mentions():
+    prefetcher = started(depth=2)
+    assert prefetcher.predict("warren_buffett") == ["cathie_wood", "peter_lynch"]
+    prefetcher.last_heard = {"cathie_wood": 3}
+    assert prefetcher.predict("warren_buffett") == ["peter_lynch", "cathie_wood"]
+    assert prefetcher.predict("george_soros") == []
+    assert prefetcher.mentioned("warren_buffett", "Unlike Cathie, I like KO. Lynch would agree.") == [
+        "cathie_wood", "peter_lynch"]
+
+async def test_predicted_turn_is_committed():
+    factory = Factory(latency=0.01)
+    prefetcher = started(factory)
+    assert await prefetcher.pre_task_hook(task("warren_buffett"), "t1", None) == {}
+    assert list(prefetcher.drafts) == ["cathie_wood"]
+    await asyncio.sleep(0.05)
+    answer(prefetcher, "warren_buffett", "Moats matter.", "t1")
+
+    output = await prefetcher.pre_task_hook(task("cathie_wood"), "t2", None)
+    prompt = output["hookSpecificOutput"]["updatedInput"]["prompt"]
+    assert prompt.startswith("Your rebuttal?") and "# Your Prepared Draft" in prompt
+    assert "a prepared answer" in prompt
+    report = prefetcher.report()
+    assert report["committed"] == 1 and report["hit_rate"] == 1.0
+    assert report["committed_cost_usd"] == 0.01 and report["head_start_seconds"] > 0
+    # Cathie's call predicted Lynch in turn
+    assert list(prefetcher.drafts) == ["peter_lynch"]
+    await prefetcher.close()
+    assert prefetcher.report()["discarded"] == 1
+
+async def test_stale_drafts_are_discarded():
+    prefetcher = started(horizon=1)
+    prefetcher.prefetch("peter_lynch")
+    await asyncio.sleep(0)
+    answer(prefetcher, "warren_buffett", "Nothing about the others.", "t1")
+    assert prefetcher.drafts == {}
+    assert prefetcher.report()["discarded"] == 1 and prefetcher.report()["hit_rate"] == 0.0
+    # A mention starts a draft for the rebuttal
+    answer(prefetcher, "warren_buffett", "Cathie is wrong about TSLA.", "t2")
+    assert list(prefetcher.drafts) == ["cathie_wood"]
+    await prefetcher.close()
+
+async def test_slow_draft_is_abandoned():
+    prefetcher = started(Factory(latency=1.0), commit_wait=0.01)
+    prefetcher.prefetch("cathie_wood")
+    assert await prefetcher.pre_task_hook(task("cathie_wood"), "t1", None) == {}
+    assert prefetcher.report()["committed"] == 0 and prefetcher.report()["discarded"] == 1
+    await prefetcher.close()
+
+async def test_overrunning_draft_is_not_waited_for():
+    prefetcher = started(Factory(latency=1.0))
+    # Guru turns take 50ms here, so a draft running longer than that is not worth the wait
+    prefetcher.turn_seconds = [0.05]
+    prefetcher.prefetch("cathie_wood")
+    start = time.perf_counter()
+    assert await prefetcher.pre_task_hook(task("cathie_wood"), "t1", None) == {}
+    assert time.perf_counter() - start < 0.5
+    assert prefetcher.report()["discarded"] == 1
+    await prefetcher.close()
+
+async def test_drafts_are_paid_from_the_budget_and_stop_when_it_is_tight():
+    def factory(options):
+        usage = {"input_tokens": 1500, "output_tokens": 500}
+        return FakeClaudeSDKClient(options, responder=lambda o, p: [text_message("Draft."), result_message(usage=usage)])
+
+    scheduler = BudgetScheduler(DiscussionBudget(max_tokens=4000))
+    scheduler.start(PANEL)
+    prefetcher = Prefetcher(scheduler=scheduler)
+    prefetcher.start(create_agent_options(PANEL), "AI", factory)
+    assert prefetcher.prefetch("cathie_wood")
+    await prefetcher.drafts["cathie_wood"].task
+    assert scheduler.tokens == 2000
+
+    assert scheduler.advance() == TIGHT
+    assert not prefetcher.prefetch("peter_lynch")
+    await prefetcher.close()
+
+async def test_no_draft_is_started_or_committed_once_converged():
+    detector = ConvergenceDetector()
+    prefetcher = Prefetcher(convergence=detector)
+    prefetcher.start(create_agent_options(PANEL), "AI", Factory())
+    assert prefetcher.prefetch("cathie_wood")
+    detector.converged_at = 2
+    assert not prefetcher.prefetch("peter_lynch")
+    # The convergence gate denies this call, so its draft is not counted as committed
+    assert await prefetcher.pre_task_hook(task("cathie_wood"), "t1", None) == {}
+    assert prefetcher.report()["committed"] == 0
+    await prefetcher.close()
+
+async def test_draft_sees_digests_and_commit_keeps_them():
+    digests = DigestBook()
+    digests.add(digest_text("warren_buffett", "I am bearish on NVDA because of valuation."))
+    factory = Factory()
+    prefetcher = Prefetcher(digests=digests)
+    prefetcher.start(create_agent_options(PANEL), "AI", factory)
+    prefetcher.prefetch("cathie_wood")
+    output = await prefetcher.pre_task_hook(task("cathie_wood"), "t1", None)
+    assert "# Panel Digest" in factory.prompts[0]
+    prompt = output["hookSpecificOutput"]["updatedInput"]["prompt"]
+    assert prompt.index("# Panel Digest") < prompt.index("# Your Prepared Draft")
+    await prefetcher.close()
+
+async def test_discussion_reports_speculation(tmp_path):
+    factory = lambda options: FakeClaudeSDKClient(options, responder=discussion_responder())
+    config = DiscussionConfig(guru_names=PANEL[:2], output=str(tmp_path / "d.md"), speculation=SpeculationPolicy())
+    result = await run_discussion(config, client_factory=factory)
+    # The scripted stream does not run hooks, so nothing was predicted or committed
+    assert result.speculation["started"] == 0
+    assert result.speculation["policy"]["depth"] == 1
+
+    # The prefetcher sees the budget and convergence gates and runs after their hooks
+    config.budget, config.convergence = DiscussionBudget(max_tokens=10_000), ConvergencePolicy()
+    options, controls = create_discussion_options(config)
+    assert controls.prefetcher.scheduler is controls.scheduler
+    assert controls.prefetcher.convergence is controls.convergence
+    assert options.hooks["PreToolUse"][-1].hooks == [controls.prefetcher.pre_task_hook]
@@ -0,0 +1,49 @@
+from claude_agent_sdk import AssistantMessage, TextBlock, ToolResultBlock, ToolUseBlock, UserMessage
+from task_turns import UNKNOWN_GURU, TaskTurnTracker, TurnObserver
+
+def call(task_id, input):
+    return AssistantMessage(content=[ToolUseBlock(id=task_id, name="Task", input=input)], model="claude-sonnet-4")
+
+def reply(task_id, content, is_error=None):
+    return UserMessage(content=[ToolResultBlock(tool_use_id=task_id, content=content, is_error=is_error)])
+
+class Log(TurnObserver):
+    def __init__(self):
+        self.events = []
+
+    def on_task_call(self, turn):
+        self.events.append(("call", turn.guru, turn.prompt))
+
+    def on_message(self, message):
+        self.events.append(("message", type(message).__name__))
+
+    def on_task_turn(self, turn):
+        self.events.append(("turn", turn.guru, turn.result, turn.is_error, turn.seconds))
+
+def test_pairs_task_calls_with_their_results(clock):
+    tracker = TaskTurnTracker(clock=clock)
+    log = Log()
+    assert tracker.feed(call("t1", {"subagent_type": "warren_buffett", "prompt": "Moats?"}), [log]) == []
+    assert set(tracker.in_flight) == {"t1"}
+    # Sub-agent messages and other tools' results do not complete the turn
+    tracker.feed(AssistantMessage(content=[TextBlock(text="...")], model="claude-sonnet-4",
+                                  parent_tool_use_id="t1"), [log])
+    tracker.feed(reply("ws-1", "results"), [log])
+    clock.now = 2.5
+    completed = tracker.feed(reply("t1", [{"type": "text", "text": "Buy moats."}]), [log])
+    assert [(turn.guru, turn.prompt, turn.result, turn.seconds) for turn in completed] == [
+        ("warren_buffett", "Moats?", "Buy moats.", 2.5)]
+    assert tracker.in_flight == {}
+    assert log.events == [
+        ("call", "warren_buffett", "Moats?"), ("message", "AssistantMessage"),
+        ("message", "AssistantMessage"), ("message", "UserMessage"),
+        ("message", "UserMessage"), ("turn", "warren_buffett", "Buy moats.", False, 2.5),
+    ]
+
+def test_failed_and_unnamed_turns():
+    tracker = TaskTurnTracker()
+    tracker.feed(call("t1", {}), [])
+    (turn,) = tracker.feed(reply("t1", "timed out", is_error=True), [])
+    assert (turn.guru, turn.prompt, turn.result, turn.is_error) == (UNKNOWN_GURU, "", "timed out", True)
+    # A result seen twice is only a turn once
+    assert tracker.feed(reply("t1", "timed out"), []) == []
@@ -0,0 +1,54 @@
+import json
+from discussion import DiscussionConfig, run_discussion
+from fake_client import FakeClaudeSDKClient, discussion_responder
+from tracing import NULL_TRACER, TraceObserver, Tracer, trace_client_factory
+
+def test_spans_and_export(tmp_path):
+    now = [0.0]
+    tracer = Tracer(clock=lambda: now[0])
+    with tracer.span("warmup", tid=tracer.lane("work"), gurus=2):
+        now[0] = 0.5
+    tracer.begin("t1", "WebSearch", "tool")
+    tracer.begin("t2", "Task", "tool")
+    now[0] = 1.25
+    assert tracer.end("t1", is_error=False) and not tracer.end("missing")
+    path = tmp_path / "trace" / "run.json"
+    tracer.export(str(path))
+
+    events = json.loads(path.read_text(encoding="utf-8"))["traceEvents"]
+    spans = {event["name"]: event for event in events if event["ph"] == "X"}
+    assert spans["warmup"] == {"name": "warmup", "cat": "run", "ph": "X", "ts": 0.0, "dur": 500000.0, "pid": 1,
+                               "tid": 1, "args": {"gurus": 2}}
+    assert spans["WebSearch"]["ts"] == 500000.0 and spans["WebSearch"]["dur"] == 750000.0
+    # Spans still open at export are closed and flagged
+    assert spans["Task"]["args"] == {"unfinished": True}
+    names = {event["args"]["name"] for event in events if event["ph"] == "M"}
+    assert {"run", "work", "guru discussion"} <= names
+
+def test_null_tracer_records_nothing():
+    assert NULL_TRACER.span("a") is NULL_TRACER.span("b", tid=3, x=1)
+    with NULL_TRACER.span("discussion"):
+        NULL_TRACER.instant("status", "status")
+    assert not NULL_TRACER.enabled and not hasattr(NULL_TRACER, "events")
+
+async def test_traced_discussion(tmp_path):
+    tracer = Tracer()
+    factory = trace_client_factory(lambda options: FakeClaudeSDKClient(options, responder=discussion_responder()), tracer)
+    config = DiscussionConfig(guru_names=["warren_buffett", "cathie_wood"], output=str(tmp_path / "d.md"),
+                              parallel_opening=True)
+    result = await run_discussion(config, observers=[TraceObserver(tracer)], client_factory=factory)
+    events = tracer.to_dict()["traceEvents"]
+    lanes = {name: tid for name, tid in tracer.lanes.items()}
+    assert {"orchestrator", "orchestrator › warren_buffett", "opening › warren_buffett", "opening › cathie_wood"} <= set(lanes)
+
+    def spans(name, lane=None):
+        return [e for e in events if e["ph"] == "X" and e["name"] == name and (lane is None or e["tid"] == lanes[lane])]
+    assert len(spans("connect")) == 3
+    assert len(spans("Task", "orchestrator")) == 2
+    turn = spans("turn warren_buffett", "orchestrator › warren_buffett")[0]
+    search = spans("WebSearch", "orchestrator › warren_buffett")[0]
+    assert turn["ts"] <= search["ts"] and search["ts"] + search["dur"] <= turn["ts"] + turn["dur"]
+    assert search["args"]["label"].startswith("🔍")
+    assert len(spans("process", "orchestrator")) == result.message_count
+    assert spans("wait result", "orchestrator")
+    assert any(e["ph"] == "i" and e["name"] == "finish (completed)" for e in events)
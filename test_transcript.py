@@ -0,0 +1,71 @@
+import os
+import pytest
+import transcript as transcript_module
+from transcript import TranscriptWriter
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+def test_header_is_written_immediately(tmp_path):
+    path = str(tmp_path / "out.md")
+    writer = TranscriptWriter(path)
+    writer.write_header("AI infra", ["warren_buffett", "cathie_wood"])
+    content = read(path)
+    assert content.startswith("# Investment Guru Discussion: AI infra")
+    assert "**Participants:** warren_buffett, cathie_wood" in content
+    writer.close()
+
+def test_new_transcript_replaces_an_existing_file(tmp_path):
+    path = tmp_path / "out.md"
+    path.write_text("stale discussion\n", encoding="utf-8")
+    with TranscriptWriter(str(path)) as writer:
+        writer.write("fresh\n")
+    assert read(path) == "fresh\n"
+
+    with TranscriptWriter(str(path), append=True) as writer:
+        writer.write("resumed\n")
+    assert read(path) == "fresh\nresumed\n"
+
+def test_writes_are_batched_until_time_threshold(tmp_path, clock):
+    path = str(tmp_path / "out.md")
+    writer = TranscriptWriter(path, flush_interval=1.0, clock=clock)
+    writer.write("first ")
+    writer.write("second ")
+    assert read(path) == ""
+
+    clock.now = 1.5
+    writer.write("third")
+    assert read(path) == "first second third"
+    writer.close()
+
+def test_size_threshold_bounds_the_buffer(tmp_path, clock):
+    path = str(tmp_path / "out.md")
+    writer = TranscriptWriter(path, flush_interval=3600, max_buffer_bytes=100, clock=clock)
+    for _ in range(1000):
+        writer.write("x" * 10)
+        assert writer._buffer_bytes < 100
+    writer.close()
+    assert len(read(path)) == 10_000
+
+def test_fsync_interval(tmp_path, monkeypatch, clock):
+    synced = []
+    monkeypatch.setattr(transcript_module.os, "fsync", lambda fd: synced.append(fd))
+    writer = TranscriptWriter(str(tmp_path / "out.md"), flush_interval=0, fsync_interval=5.0, clock=clock)
+    for step in range(10):
+        clock.now = float(step)
+        writer.write("chunk")
+    assert len(synced) == 1  # at t=5
+    writer.close()
+    assert len(synced) == 2
+
+def test_interrupt_finalizes_partial_document(tmp_path):
+    path = str(tmp_path / "out.md")
+    with pytest.raises(KeyboardInterrupt):
+        with TranscriptWriter(path, flush_interval=3600) as writer:
+            writer.write("Buffett: buy moats.")
+            raise KeyboardInterrupt
+    content = read(path)
+    assert "Buffett: buy moats." in content
+    assert "Discussion interrupted (KeyboardInterrupt)" in content
+    assert writer.closed
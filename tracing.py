@@ -0,0 +1,247 @@
+"""
+Discussion Timeline Tracing
+
+Records where the wall-clock time of a discussion goes as spans and writes them in the
+Chrome trace-event format, so a run opens in chrome://tracing or https://ui.perfetto.dev:
+
+- client startup: connecting each session (the Orchestrator and the opening round's);
+- messages: the wait for every streamed message, named by what arrived (text, tool use,
+  tool result, result), on the lane of the session or sub-agent that produced it;
+- rendering: the time the pipeline spends on each message before asking for the next one
+  (transcript, hooks, console output and the other observers);
+- tools: every tool use from the call to its result, e.g. WebSearch inside a guru turn;
+- sub-agent turns: every Task hand-off, on a lane of its own per guru.
+
+Tracing wraps the client factory, so a discussion that is not traced runs exactly the
+code it ran before; NULL_TRACER stands in where a span is opened unconditionally.
+
+Usage: uv run run.py --trace discussion.trace.json
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, AsyncIterator, Callable, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+from claude_agent_sdk import (
+    AssistantMessage, ClaudeAgentOptions, ResultMessage, SystemMessage, TextBlock, ThinkingBlock, ToolResultBlock,
+    ToolUseBlock, UserMessage
+)
+
+from discussion import DiscussionObserver, DiscussionResult
+from events import tool_label
+from orchestrator import ClientFactory
+
+PROCESS_ID = 1
+MAIN_LANE = "run"
+
+
+def message_kind(message: Any) -> str:
+    """Short name of what a message carries, e.g. "tool_use WebSearch" or "text"."""
+    if isinstance(message, AssistantMessage):
+        for block in message.content:
+            if isinstance(block, ToolUseBlock):
+                return f"tool_use {block.name}"
+        if any(isinstance(block, ThinkingBlock) for block in message.content):
+            return "thinking"
+        return "text" if any(isinstance(block, TextBlock) for block in message.content) else "assistant"
+    if isinstance(message, UserMessage):
+        return "tool_result" if isinstance(message.content, list) else "user"
+    if isinstance(message, ResultMessage):
+        return "result"
+    if isinstance(message, SystemMessage):
+        return f"system {message.subtype}"
+    return type(message).__name__
+
+
+class Tracer:
+    """Collects trace events; timestamps are microseconds since the tracer was created."""
+
+    enabled = True
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.origin = clock()
+        self.events: List[Dict[str, Any]] = []
+        self.lanes: Dict[str, int] = {}
+        self._open: Dict[str, Tuple[str, str, int, float, Dict[str, Any]]] = {}
+        # Lane of the message being processed; observers run synchronously within its processing
+        self.current_lane: Optional[str] = None
+        self._metadata("process_name", 0, "guru discussion")
+        self.lane(MAIN_LANE)
+
+    def now(self) -> float:
+        return (self.clock() - self.origin) * 1_000_000
+
+    def _metadata(self, name: str, tid: int, value: str) -> None:
+        self.events.append({"name": name, "ph": "M", "pid": PROCESS_ID, "tid": tid, "args": {"name": value}})
+
+    def lane(self, name: str) -> int:
+        """The thread id of a named lane, created on first use."""
+        if name not in self.lanes:
+            self.lanes[name] = len(self.lanes)
+            self._metadata("thread_name", self.lanes[name], name)
+        return self.lanes[name]
+
+    def rename_lane(self, old: str, new: str) -> None:
+        if old in self.lanes and new not in self.lanes:
+            tid = self.lanes[new] = self.lanes.pop(old)
+            for event in self.events:
+                if event["ph"] == "M" and event["name"] == "thread_name" and event["tid"] == tid:
+                    event["args"]["name"] = new
+
+    def complete(self, name: str, cat: str, start: float, end: float, tid: int = 0, **args: Any) -> None:
+        """Records a span that has already ended (timestamps from now())."""
+        event = {"name": name, "cat": cat, "ph": "X", "ts": round(start, 3), "dur": round(max(0.0, end - start), 3),
+                 "pid": PROCESS_ID, "tid": tid}
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def instant(self, name: str, cat: str, tid: int = 0, **args: Any) -> None:
+        event = {"name": name, "cat": cat, "ph": "i", "s": "t", "ts": round(self.now(), 3), "pid": PROCESS_ID, "tid": tid}
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def begin(self, key: str, name: str, cat: str, tid: int = 0, **args: Any) -> None:
+        """Opens a span that ends in a later call to end(key), e.g. a tool use ended by its result."""
+        self._open[key] = (name, cat, tid, self.now(), args)
+
+    def end(self, key: str, **args: Any) -> bool:
+        if key not in self._open:
+            return False
+        name, cat, tid, start, begin_args = self._open.pop(key)
+        self.complete(name, cat, start, self.now(), tid, **begin_args, **args)
+        return True
+
+    @contextmanager
+    def span(self, name: str, cat: str = "run", tid: int = 0, **args: Any) -> Iterator[None]:
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.complete(name, cat, start, self.now(), tid, **args)
+
+    def close(self) -> None:
+        """Ends the spans still open (e.g. after an interruption); they are marked unfinished."""
+        for key in list(self._open):
+            self.end(key, unfinished=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+
+    def export(self, path: str) -> None:
+        self.close()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+
+
+class NullTracer:
+    """Tracer stand-in for untraced runs: every call is a no-op and nothing is allocated per span."""
+
+    enabled = False
+    _span = nullcontext()
+
+    def span(self, name: str, cat: str = "run", tid: int = 0, **args: Any) -> ContextManager[None]:
+        return self._span
+
+    def instant(self, name: str, cat: str, tid: int = 0, **args: Any) -> None:
+        pass
+
+    def export(self, path: str) -> None:
+        pass
+
+
+NULL_TRACER = NullTracer()
+
+
+class TracedClient:
+    """Wraps one client session and traces its startup, message waits, rendering and tool spans."""
+
+    def __init__(self, client: Any, tracer: Tracer, lane: str):
+        self.client = client
+        self.tracer = tracer
+        self.lane = lane
+        self.tid = tracer.lane(lane)
+        self._subagents: Dict[str, str] = {}
+
+    async def __aenter__(self) -> "TracedClient":
+        with self.tracer.span("connect", "startup", self.tid):
+            await self.client.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> bool:
+        with self.tracer.span("disconnect", "startup", self.tid):
+            return await self.client.__aexit__(exc_type, exc_val, exc_tb)
+
+    async def query(self, prompt: str, session_id: str = "default") -> None:
+        self.tracer.instant("query", "message", self.tid, chars=len(prompt))
+        await self.client.query(prompt, session_id)
+
+    def _tid(self, message: Any) -> int:
+        parent = getattr(message, "parent_tool_use_id", None)
+        return self.tracer.lane(self._subagents[parent]) if parent in self._subagents else self.tid
+
+    def _trace_blocks(self, message: Any, tid: int) -> None:
+        if isinstance(message, AssistantMessage):
+            for block in message.content:
+                if not isinstance(block, ToolUseBlock):
+                    continue
+                self.tracer.begin(block.id, block.name, "tool", tid, label=tool_label(block))
+                if block.name == "Task":
+                    guru = block.input.get("subagent_type", "unknown")
+                    self._subagents[block.id] = f"{self.lane} › {guru}"
+                    self.tracer.begin(f"{block.id}:turn", f"turn {guru}", "subagent", self.tracer.lane(self._subagents[block.id]))
+        elif isinstance(message, UserMessage) and isinstance(message.content, list):
+            for block in message.content:
+                if isinstance(block, ToolResultBlock):
+                    self.tracer.end(block.tool_use_id, is_error=bool(block.is_error))
+                    self.tracer.end(f"{block.tool_use_id}:turn", is_error=bool(block.is_error))
+
+    async def receive_response(self) -> AsyncIterator[Any]:
+        waiting = self.tracer.now()
+        async for message in self.client.receive_response():
+            arrived = self.tracer.now()
+            tid = self._tid(message)
+            self.tracer.complete(f"wait {message_kind(message)}", "message", waiting, arrived, tid)
+            self._trace_blocks(message, tid)
+            self.tracer.current_lane = self.lane
+            yield message
+            # Everything the pipeline did with the message before asking for the next one
+            waiting = self.tracer.now()
+            self.tracer.complete("process", "render", arrived, waiting, self.tid)
+
+
+def trace_client_factory(client_factory: ClientFactory, tracer: Tracer) -> ClientFactory:
+    """Returns a client factory whose sessions are traced, each on a lane of its own."""
+    sessions = 0
+
+    def factory(options: ClaudeAgentOptions) -> TracedClient:
+        nonlocal sessions
+        sessions += 1
+        lane = "orchestrator" if options is not None and options.agents else f"session {sessions}"
+        return TracedClient(client_factory(options), tracer, lane)
+
+    return factory
+
+
+class TraceObserver(DiscussionObserver):
+    """Names the opening round's lanes after their gurus and marks status lines on the timeline."""
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+
+    def on_status(self, text: str) -> None:
+        self.tracer.instant(text, "status")
+
+    def on_opening_message(self, guru_name: str, message: Any) -> None:
+        if self.tracer.current_lane is not None:
+            self.tracer.rename_lane(self.tracer.current_lane, f"opening › {guru_name}")
+
+    def on_finish(self, result: DiscussionResult) -> None:
+        self.tracer.instant(f"finish ({result.status})", "status", messages=result.message_count)
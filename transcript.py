@@ -0,0 +1,152 @@
+"""
+Streaming Discussion Transcript
+
+Appends discussion blocks to the markdown output file as they arrive instead of
+holding the whole discussion in memory. Writes are batched and flushed on a time or
+size threshold, the file is fsynced at a configurable interval, and an interrupted
+discussion is finalized as a valid partial document.
+"""
+
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Tuple
+
+from claude_agent_sdk import AssistantMessage, TextBlock, ToolUseBlock
+
+from search_cache import SEARCH_TOOL_NAME
+
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_FSYNC_INTERVAL = 5.0
+DEFAULT_MAX_BUFFER_BYTES = 64 * 1024
+
+
+def default_transcript_filename(now: Optional[datetime] = None) -> str:
+    """Returns the default discussion_result_YYYYMMDD_HHMMSS.md output name."""
+    return f"discussion_result_{(now or datetime.now()).strftime('%Y%m%d_%H%M%S')}.md"
+
+
+def tool_result_text(content: Any) -> str:
+    """Flattens a ToolResultBlock's content (a string or a list of content dicts) into text."""
+    if content is None:
+        return ""
+    if isinstance(content, str):
+        return content
+    parts = []
+    for item in content:
+        if isinstance(item, dict):
+            if item.get("type") == "text":
+                parts.append(item.get("text", ""))
+        else:
+            parts.append(str(item))
+    return "\n".join(parts)
+
+
+def describe_tool_use(block: ToolUseBlock) -> Tuple[str, str, str, str]:
+    """Returns the (icon, caption, subject, suffix) a tool call is announced with."""
+    # Real-time broadcasting of tool usage (Sub-agent calls)
+    if block.name == "Task":
+        return "🎤", "[Social] Passing the microphone to:", block.input.get("subagent_type", "Unknown Agent"), "..."
+    # In-process guru tools are MCP tools named mcp__<server>__analyze_market
+    if block.name.split("__")[-1] == "analyze_market":
+        return "📊", "[Fast path] Structured picks for:", block.input.get("guru_name", "Unknown Guru"), ""
+    if block.name in ("WebSearch", SEARCH_TOOL_NAME):
+        return "🔍", "[System] Searching the web for:", f"'{block.input.get('query', 'Unknown Query')}'", "..."
+    return "🛠️", "[System] Using tool:", block.name, ""
+
+
+def render_block(block: Any) -> Optional[str]:
+    """Renders a single content block as transcript markdown (None for blocks that are not logged)."""
+    if isinstance(block, TextBlock):
+        return block.text
+    if isinstance(block, ToolUseBlock):
+        icon, caption, subject, suffix = describe_tool_use(block)
+        return f"\n\n> {icon} **{caption}** `{subject}`{suffix}\n\n"
+    return None
+
+
+class TranscriptWriter:
+    """
+    Markdown transcript with batched writes and periodic fsync. A new transcript replaces
+    any file already at path; append=True continues an existing one (a resumed discussion).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        fsync_interval: float = DEFAULT_FSYNC_INTERVAL,
+        max_buffer_bytes: int = DEFAULT_MAX_BUFFER_BYTES,
+        clock: Callable[[], float] = time.monotonic,
+        append: bool = False,
+    ):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.max_buffer_bytes = max_buffer_bytes
+        self.clock = clock
+        self.blocks_written = 0
+        self.closed = False
+        self._buffer: List[str] = []
+        self._buffer_bytes = 0
+        self._file = open(path, "a" if append else "w", encoding="utf-8")
+        self._last_flush = self._last_fsync = clock()
+
+    def write_header(self, topic: str, guru_names: List[str], date: Optional[datetime] = None) -> None:
+        """Writes the document header and makes it durable immediately."""
+        self.write(f"# Investment Guru Discussion: {topic}\n")
+        self.write(f"**Date:** {(date or datetime.now()).strftime('%Y-%m-%d %H:%M:%S')}\n")
+        self.write(f"**Participants:** {', '.join(guru_names)}\n\n")
+        self.write("---\n\n")
+        self.flush(fsync=True)
+
+    def write(self, text: Optional[str]) -> None:
+        """Buffers a block, flushing when the size or time threshold is reached."""
+        if not text:
+            return
+        self._buffer.append(text)
+        self._buffer_bytes += len(text.encode("utf-8"))
+        self.blocks_written += 1
+
+        now = self.clock()
+        if self._buffer_bytes >= self.max_buffer_bytes or now - self._last_flush >= self.flush_interval:
+            self.flush(fsync=now - self._last_fsync >= self.fsync_interval)
+
+    def write_message(self, message: Any) -> None:
+        """Appends every loggable block of an AssistantMessage."""
+        if isinstance(message, AssistantMessage):
+            for block in message.content:
+                self.write(render_block(block))
+
+    def flush(self, fsync: bool = False) -> None:
+        """Writes buffered blocks to the file, optionally forcing them to disk."""
+        if self._buffer:
+            self._file.write("".join(self._buffer))
+            self._buffer.clear()
+            self._buffer_bytes = 0
+        self._file.flush()
+        self._last_flush = self.clock()
+        if fsync:
+            os.fsync(self._file.fileno())
+            self._last_fsync = self._last_flush
+
+    def close(self, interrupted: bool = False, reason: str = "") -> None:
+        """Finalizes the document; an interrupted discussion gets a partial-transcript footer."""
+        if self.closed:
+            return
+        if interrupted:
+            detail = f" ({reason})" if reason else ""
+            self.write(
+                f"\n\n---\n\n> ⚠️ **Discussion interrupted{detail}.** "
+                "This is a partial transcript of the blocks received so far.\n"
+            )
+        self.flush(fsync=True)
+        self._file.close()
+        self.closed = True
+
+    def __enter__(self) -> "TranscriptWriter":
+        return self
+
+    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> bool:
+        self.close(interrupted=exc_type is not None, reason=exc_type.__name__ if exc_type else "")
+        return False